@@ -1,7 +1,7 @@
 """DISCO package"""
 
 import logging
-from jade.utils.timing_utils import TimerStatsCollector
+from disco.utils.telemetry import DiscoTimerStatsCollector
 
 logging.getLogger(__name__).addHandler(logging.NullHandler())
-timer_stats_collector = TimerStatsCollector()
+timer_stats_collector = DiscoTimerStatsCollector()
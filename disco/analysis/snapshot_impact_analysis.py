@@ -2,11 +2,10 @@
 
 import os
 import logging
-import math
 import re
 
 import numpy as np
-from pandas import DataFrame
+from pandas import DataFrame, Series
 
 from jade.common import JOBS_OUTPUT_DIR
 from jade.jobs.results_aggregator import ResultsAggregator
@@ -313,26 +312,22 @@ class SnapshotImpactAnalysis(Analysis):
         results_dataframe : DataFrame
 
         """
-        results_list = list()
         phase_terminal = None
         if terminal is not None:
             phase_terminal = re.compile(rf"[ABCN]{terminal}")
 
         df = scenario.get_full_dataframe(class_name, property_name, phase_terminal=phase_terminal,
                                          **kwargs)
-        for column in df.columns:
-            name = PyDssScenarioResults.get_name_from_column(column)
-            value = df[column].values.item()
-            result = {'Name': name, 'PhaseTerminal': column, 'Value': value}
-
-            if convert:
-                complex_number = complex(value)
-                result['Value'] = math.sqrt(complex_number.real**2 + complex_number.imag**2)
-
-            results_list.append(result)
+        assert len(df) == 1, len(df)
+        names = [PyDssScenarioResults.get_name_from_column(x) for x in df.columns]
+        values = df.iloc[0].values
+        if convert:
+            values = np.asarray(values, dtype=complex)
+            values = np.sqrt(values.real**2 + values.imag**2)
 
         columns = ['Name', 'PhaseTerminal', 'Value']
-        return DataFrame(results_list, columns=columns)
+        data = {'Name': names, 'PhaseTerminal': list(df.columns), 'Value': values}
+        return DataFrame(data, columns=columns)
 
     @track_timing(TIMER_STATS)
     def _get_violations_for_job(self, job, voltage, line, transformer):
@@ -446,12 +441,13 @@ class SnapshotImpactAnalysis(Analysis):
 # TODO: refactor to take in the scenario here instead of remaking it in analysis.py
 @track_timing(TIMER_STATS)
 def _check_voltage_violations(bus_voltages, ub1=1.05, lb1=0.95, ub2=1.05833, lb2=0.91667):
-    vmax = max(bus_voltages)
-    vmin = min(bus_voltages)
-    uv_count1 = len([v for v in bus_voltages if v < lb1])
-    ov_count1 = len([v for v in bus_voltages if v > ub1])
-    uv_count2 = len([v for v in bus_voltages if v < lb2])
-    ov_count2 = len([v for v in bus_voltages if v > ub2])
+    values = np.asarray(bus_voltages, dtype=float)
+    vmax = values.max().item()
+    vmin = values.min().item()
+    uv_count1 = int(np.count_nonzero(values < lb1))
+    ov_count1 = int(np.count_nonzero(values > ub1))
+    uv_count2 = int(np.count_nonzero(values < lb2))
+    ov_count2 = int(np.count_nonzero(values > ub2))
 
     ov1 = vmax > ub1
     uv1 = vmin < lb1
@@ -461,42 +457,42 @@ def _check_voltage_violations(bus_voltages, ub1=1.05, lb1=0.95, ub2=1.05833, lb2
     return vmin, vmax, uv1, ov1, uv_count1, ov_count1, uv2, ov2, uv_count2, ov_count2
 
 
+def _get_max_loading_by_element(currents_df, normal_amps_df):
+    """Return the maximum per-unit loading across the phases of each element.
+
+    Parameters
+    ----------
+    currents_df : DataFrame
+        Current magnitudes with columns Name, PhaseTerminal, Value
+    normal_amps_df : DataFrame
+        One row with a column per element named <Name>__NormalAmps
+
+    Returns
+    -------
+    Series
+        Indexed by element name in order of first appearance
+
+    """
+    names = currents_df["Name"].values
+    normal_amps = normal_amps_df.iloc[0].loc[[f"{x}__NormalAmps" for x in names]].values
+    loading = currents_df["Value"].values / normal_amps.astype(float)
+    return Series(loading).groupby(names, sort=False).max()
+
+
 # TODO: refactor to take in the scenario here instead of remaking it in analysis.py
 @track_timing(TIMER_STATS)
 def _get_line_loading(line_currents_df, line_normalamps_df, deployment_name, ub1=1.0, ub2=1.5):
-    line_loadings = {}
-    lv_count1 = 0
-    lv_count2 = 0
-
-    # loop through unique line names
-    for line in line_currents_df.Name.unique():
-        current_mag = []
-        # filter out only results with current line name
-        line_currents = line_currents_df.query(f"Name == '{line}'")
-        nphases = int(len(line_currents))
-        # loop through line's magnitudes
-        for _, magnitude in line_currents.iterrows():
-            current_mag.append(magnitude['Value'] / line_normalamps_df.iloc[0][f"{line}__NormalAmps"])
-
-        # TODO Kwami: how can this be empty?
-        # deployment_name is only being passed in to debug this problem.
-        if not current_mag:
-            line_loadings[line] = 0.0
-            logger.error("current_mag was empty, set line_loadings=0.0 "
-                         "nphases=%s lencolumns=%s deployment_name=%s line=%s",
-                         nphases, len(line_currents_df.keys()), deployment_name, line)
-        else:
-            line_loadings[line] = max(current_mag)
-            if max(current_mag) > ub1:
-                lv_count1 += 1
-            if max(current_mag) > ub2:
-                lv_count2 += 1
-
-    max_line_loading = max(list(line_loadings.values()))
+    line_loadings = _get_max_loading_by_element(line_currents_df, line_normalamps_df)
+    if line_loadings.empty:
+        raise AnalysisRunException(f"No line currents were found for {deployment_name}")
+    lv_count1 = int((line_loadings > ub1).sum())
+    lv_count2 = int((line_loadings > ub2).sum())
+
+    max_line_loading = line_loadings.max()
     lo1 = max_line_loading > ub1
     lo2 = max_line_loading > ub2
 
-    return line_loadings, max_line_loading, lo1, lv_count1, lo2, lv_count2
+    return line_loadings.to_dict(), max_line_loading, lo1, lv_count1, lo2, lv_count2
 
 
 # TODO: refactor to take in the scenario here instead of remaking it in analysis.py
@@ -504,53 +500,36 @@ def _get_line_loading(line_currents_df, line_normalamps_df, deployment_name, ub1
 def _get_transformer_loading(transformer_dataframe, highside_phase_conn_dataframe,
                             transformer_currents_dataframe, transformer_normalamps_dataframe,
                             ub1=1.0, ub2=1.5):
-    xfmr_loading_s = {}
-    tv_count1 = 0
-    tv_count2 = 0
-
-    # loop through unique line names
-    for xfmr in transformer_currents_dataframe.Name.unique():
-        current_mag = []
-        transformer_name = xfmr.replace('Transformer.', '')
-        # find transformer data in given dataframes
-        transformer = transformer_dataframe.query(f"Name == '{transformer_name}'").iloc[0]
-        transformer_phase = highside_phase_conn_dataframe.query(f"Transformer == '{xfmr}'").iloc[0]
-        transformer_currents = transformer_currents_dataframe.query(f"Name == '{xfmr}'")
-
-        # set variables necessary
-        # TODO: really this shouldn't be necessary, since the dataframe will only have
-        # the phases needed when passed in
-        nwindings = transformer["NumWindings"]
-        high_side_connection = transformer_phase["HighSideConnection"]
-        num_phases = int(transformer_phase["NumPhases"])
-        phase = len(transformer_currents)
-
-        if num_phases == 3 and high_side_connection == "wye":
-            phase = 4
-        elif num_phases == 3 and high_side_connection == "delta":
-            phase = 3
-
-        for _, magnitude in transformer_currents.iterrows():
-            normal_amps = transformer_normalamps_dataframe.iloc[0][f"{xfmr}__NormalAmps"]
-            current_mag.append(magnitude['Value'] / normal_amps)
-
-        xfmr_loading_s[xfmr] = max(current_mag)
-        if max(current_mag) > ub1:
-            tv_count1 += 1
-        if max(current_mag) > ub2:
-            tv_count2 += 1
-
-    max_xfmr_loading = max(list(xfmr_loading_s.values()))
+    # The loading is the maximum across the phases that are present in the currents frame.
+    # The high-side connection does not change it, but every transformer must be described
+    # by the info frames.
+    names = transformer_currents_dataframe.Name.unique()
+    missing = set(names).difference(highside_phase_conn_dataframe["Transformer"])
+    missing.update(
+        set(x.replace('Transformer.', '') for x in names).difference(transformer_dataframe["Name"])
+    )
+    if missing:
+        raise AnalysisRunException(f"Transformers are missing from the info files: {sorted(missing)}")
+
+    xfmr_loading_s = _get_max_loading_by_element(
+        transformer_currents_dataframe, transformer_normalamps_dataframe
+    )
+    if xfmr_loading_s.empty:
+        raise AnalysisRunException("No transformer currents were found")
+    tv_count1 = int((xfmr_loading_s > ub1).sum())
+    tv_count2 = int((xfmr_loading_s > ub2).sum())
+
+    max_xfmr_loading = xfmr_loading_s.max()
     to1 = max_xfmr_loading > ub1
     to2 = max_xfmr_loading > ub2
 
-    return xfmr_loading_s, max_xfmr_loading, to1, tv_count1, to2, tv_count2
+    return xfmr_loading_s.to_dict(), max_xfmr_loading, to1, tv_count1, to2, tv_count2
 
 
 def _compare_voltages(base_voltage_df, voltage_df, limit=0.03):
     voltage_diff = base_voltage_df - voltage_df
     voltage_deviation_magnitude = abs(voltage_diff)
-    voltage_deviation_count = len([f for f in voltage_deviation_magnitude if f > limit])
+    voltage_deviation_count = int(np.count_nonzero(voltage_deviation_magnitude > limit))
     voltage_deviation = np.max(voltage_deviation_magnitude)
     voltage_deviation_flag = voltage_deviation > limit
     return voltage_deviation, voltage_deviation_flag, voltage_deviation_count
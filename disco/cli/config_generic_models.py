@@ -1,5 +1,6 @@
 import logging
 import os
+from pathlib import Path
 
 import click
 
@@ -15,6 +16,7 @@ from disco.cli.config_snapshot import (
 )
 from disco.cli.config_time_series import common_time_series_options
 from disco.models.base import OpenDssDeploymentModel, SimulationModel
+from disco.models.factory import get_model_class_by_name
 from disco.models.power_flow_generic_models import (
     PowerFlowSnapshotSimulationModel,
     PowerFlowTimeSeriesSimulationModel,
@@ -28,14 +30,78 @@ from disco.pydss.common import ConfigType
 logger = logging.getLogger(__name__)
 
 
+TRUST_VALIDATED_INPUTS_OPTION = click.option(
+    "--trust-validated-inputs/--no-trust-validated-inputs",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help="Skip per-job validation if the content of power-flow-config-file passed validation "
+    "in a previous run.",
+)
+
+
 @click.group()
 def config_generic_models():
     """Create a JADE config file from a set of generic OpenDSS models."""
 
 
+def iter_deployment_parameters(inputs, model_type, simulation):
+    """Return an iterator over the JADE jobs for generic power-flow inputs.
+
+    Parameters
+    ----------
+    inputs : PowerFlowSimulationInputs
+    model_type : str
+        Name of the analysis model
+    simulation : SimulationModel
+        Simulation parameters shared by all jobs
+
+    Yields
+    ------
+    DeploymentParameters
+
+    """
+    model_class = get_model_class_by_name(model_type)
+    for job in inputs.iter_jobs():
+        deployment = {
+            "is_standalone": True,
+            "deployment_file": job.opendss_model_file,
+            "substation": job.substation or "NA",
+            "feeder": job.feeder or "NA",
+            "dc_ac_ratio": 1.0,
+            "directory": os.path.dirname(job.opendss_model_file),
+            "kva_to_kw_rating": 1.0,
+            "project_data": job.project_data,
+            "pydss_controllers": job.pydss_controllers,
+        }
+        params = {
+            "model_type": model_type,
+            "name": job.name,
+            "blocked_by": job.blocked_by,
+            "base_case": None,
+            "is_base_case": False,
+        }
+        if inputs.is_trusted:
+            deployment["directory"] = Path(deployment["directory"])
+            model = model_class.construct(
+                deployment=OpenDssDeploymentModel.construct(**deployment),
+                simulation=simulation.copy(),
+                **params,
+            )
+            yield DeploymentParameters(estimated_run_minutes=job.estimated_run_minutes, model=model)
+        else:
+            yield DeploymentParameters(
+                estimated_run_minutes=job.estimated_run_minutes,
+                deployment=OpenDssDeploymentModel(**deployment),
+                simulation=simulation,
+                **params,
+            )
+
+
 @click.command()
 @click.argument("power-flow-config-file", type=click.Path(exists=True))
 @common_snapshot_options
+@TRUST_VALIDATED_INPUTS_OPTION
 def snapshot(
     power_flow_config_file,
     config_file,
@@ -49,11 +115,15 @@ def snapshot(
     strip_whitespace,
     volt_var_curve,
     verbose,
+    trust_validated_inputs,
 ):
     """Create a JADE config file for a snapshot power-flow simulation."""
-    pf_config = PowerFlowSnapshotSimulationModel.from_file(power_flow_config_file)
     level = logging.DEBUG if verbose else logging.INFO
     setup_logging(__name__, None, console_level=level, packages=["disco"])
+    inputs = PowerFlowSnapshotSimulationModel.load_inputs(
+        power_flow_config_file, trust_validated=trust_validated_inputs
+    )
+    pf_config = inputs.simulation
 
     simulation_config, scenarios = make_simulation_config(
         reports_filename,
@@ -67,32 +137,13 @@ def snapshot(
     )
     config = PyDssConfiguration()
     simulation_type = SimulationType.QSTS if with_loadshape else SimulationType.SNAPSHOT
-    for job in pf_config.jobs:
-        job = DeploymentParameters(
-            model_type="SnapshotImpactAnalysisModel",
-            name=job.name,
-            blocked_by=job.blocked_by,
-            base_case=None,
-            is_base_case=False,
-            estimated_run_minutes=job.estimated_run_minutes,
-            deployment=OpenDssDeploymentModel(
-                is_standalone=True,
-                deployment_file=job.opendss_model_file,
-                substation=job.substation or "NA",
-                feeder=job.feeder or "NA",
-                dc_ac_ratio=1.0,
-                directory=os.path.dirname(job.opendss_model_file),
-                kva_to_kw_rating=1.0,
-                project_data=job.project_data,
-                pydss_controllers=job.pydss_controllers,
-            ),
-            simulation=SimulationModel(
-                start_time=pf_config.start_time,
-                end_time=pf_config.start_time,
-                step_resolution=900,
-                simulation_type=simulation_type,
-            ),
-        )
+    simulation = SimulationModel(
+        start_time=pf_config.start_time,
+        end_time=pf_config.start_time,
+        step_resolution=900,
+        simulation_type=simulation_type,
+    )
+    for job in iter_deployment_parameters(inputs, "SnapshotImpactAnalysisModel", simulation):
         config.add_job(job)
 
     config.check_job_consistency()
@@ -121,12 +172,14 @@ def snapshot(
 
     indent = None if strip_whitespace else 2
     config.dump(filename=config_file, indent=indent)
+    inputs.record_validated()
     print(f"Created {config_file} for Snapshot Analysis")
 
 
 @click.command()
 @click.argument("power-flow-config-file", type=click.Path(exists=True))
 @common_time_series_options
+@TRUST_VALIDATED_INPUTS_OPTION
 def time_series(
     power_flow_config_file,
     config_file,
@@ -145,12 +198,16 @@ def time_series(
     store_per_element_data,
     volt_var_curve,
     verbose,
+    trust_validated_inputs,
 ):
     """Create JADE configuration for time series simulations."""
     level = logging.DEBUG if verbose else logging.INFO
     setup_logging(__name__, None, console_level=level, packages=["disco"])
 
-    pf_config = PowerFlowTimeSeriesSimulationModel.from_file(power_flow_config_file)
+    inputs = PowerFlowTimeSeriesSimulationModel.load_inputs(
+        power_flow_config_file, trust_validated=trust_validated_inputs
+    )
+    pf_config = inputs.simulation
     simulation_config = PyDssConfiguration.get_default_pydss_simulation_config()
     simulation_config["project"]["simulation_type"] = SimulationType.QSTS.value
     simulation_config["reports"] = load_data(reports_filename)["reports"]
@@ -187,32 +244,13 @@ def time_series(
         )
 
     config = PyDssConfiguration()
-    for job in pf_config.jobs:
-        job = DeploymentParameters(
-            model_type="TimeSeriesAnalysisModel",
-            name=job.name,
-            blocked_by=job.blocked_by,
-            base_case=None,
-            is_base_case=False,
-            estimated_run_minutes=job.estimated_run_minutes,
-            deployment=OpenDssDeploymentModel(
-                is_standalone=True,
-                deployment_file=job.opendss_model_file,
-                substation=job.substation or "NA",
-                feeder=job.feeder or "NA",
-                dc_ac_ratio=1.0,
-                directory=os.path.dirname(job.opendss_model_file),
-                kva_to_kw_rating=1.0,
-                project_data=job.project_data,
-                pydss_controllers=job.pydss_controllers,
-            ),
-            simulation=SimulationModel(
-                start_time=pf_config.start_time,
-                end_time=pf_config.end_time,
-                step_resolution=pf_config.step_resolution,
-                simulation_type=SimulationType.QSTS,
-            ),
-        )
+    simulation = SimulationModel(
+        start_time=pf_config.start_time,
+        end_time=pf_config.end_time,
+        step_resolution=pf_config.step_resolution,
+        simulation_type=SimulationType.QSTS,
+    )
+    for job in iter_deployment_parameters(inputs, "TimeSeriesAnalysisModel", simulation):
         config.add_job(job)
 
     config.check_job_consistency()
@@ -235,6 +273,7 @@ def time_series(
     config.set_pydss_config(ConfigType.SIMULATION_CONFIG, simulation_config)
     config.set_pydss_config(ConfigType.SCENARIOS, scenarios)
     config.dump(filename=config_file)
+    inputs.record_validated()
 
     print(f"Created {config_file} for TimeSeries Analysis")
 
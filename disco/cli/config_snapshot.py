@@ -5,6 +5,7 @@
 import logging
 import sys
 from datetime import timedelta
+from pathlib import Path
 
 import click
 
@@ -23,6 +24,17 @@ from disco.pydss.pydss_configuration_base import (
     DEFAULT_LOAD_SHAPE_START_TIME,
 )
 from disco.pydss.common import SCENARIO_NAME_DELIMITER
+from disco.pydss.hosting_capacity_early_stop import (
+    DEFAULT_HC_THRESHOLDS_FILE,
+    HC_EARLY_STOP_CONFIG_KEY,
+    make_hc_early_stop_config,
+)
+from disco.pydss.snapshot_time_points import (
+    SNAPSHOT_TIME_POINTS_CONFIG_KEY,
+    SNAPSHOT_TIME_POINTS_TABLE_FILENAME,
+    compute_snapshot_time_points,
+    write_snapshot_time_points_table,
+)
 
 ESTIMATED_EXEC_SECS_PER_JOB = 10
 
@@ -142,6 +154,30 @@ def common_snapshot_options(func):
     show_default=True,
     help="Make jobs with higher penetration levels blocked by those with lower levels.",
 )
+@click.option(
+    "--precompute-time-points/--no-precompute-time-points",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Select the time points of all jobs of a feeder from its load and PV shapes while "
+    "creating the config instead of searching the load shapes in every job. Only applicable "
+    "with --auto-select-time-points.",
+)
+@click.option(
+    "--hc-early-stop-failures",
+    default=None,
+    type=int,
+    help="Cancel the higher penetration levels of a sample after this number of consecutive "
+    "levels exceed the hosting capacity thresholds. The skipped levels count as failing in "
+    "the hosting capacity computation. Requires --order-by-penetration.",
+)
+@click.option(
+    "--hc-thresholds",
+    type=click.Path(exists=True),
+    default=str(DEFAULT_HC_THRESHOLDS_FILE),
+    show_default=True,
+    help="Hosting capacity thresholds for --hc-early-stop-failures",
+)
 def snapshot(
     inputs,
     config_file,
@@ -159,6 +195,9 @@ def snapshot(
     pf1,
     control_mode,
     order_by_penetration,
+    precompute_time_points,
+    hc_early_stop_failures,
+    hc_thresholds,
 ):
     """Create JADE configuration for snapshot simulations."""
     level = logging.DEBUG if verbose else logging.INFO
@@ -167,6 +206,9 @@ def snapshot(
     if not pf1 and not control_mode:
         logger.error("At least one of '--pf1' or '--control-mode' must be set.")
         sys.exit(1)
+    if hc_early_stop_failures is not None and not order_by_penetration:
+        logger.error("'--hc-early-stop-failures' requires '--order-by-penetration'.")
+        sys.exit(1)
 
     simulation_config, scenarios = make_simulation_config(
         reports_filename,
@@ -178,6 +220,10 @@ def snapshot(
         auto_select_time_points,
         auto_select_time_points_search_duration_days,
     )
+    if hc_early_stop_failures is not None:
+        simulation_config[HC_EARLY_STOP_CONFIG_KEY] = make_hc_early_stop_config(
+            hc_early_stop_failures, hc_thresholds
+        )
     config = PyDssConfiguration.auto_config(
         inputs,
         simulation_config=simulation_config,
@@ -210,6 +256,13 @@ def snapshot(
                 CONTROL_MODE_SCENARIO,
             )
 
+    if with_loadshape and auto_select_time_points and precompute_time_points:
+        add_snapshot_time_points(
+            config,
+            auto_select_time_points_search_duration_days,
+            Path(config_file).parent / SNAPSHOT_TIME_POINTS_TABLE_FILENAME,
+        )
+
     # We can't currently predict how long each job will take. If we did, we could set
     # estimated_run_minutes for each job.
     # Shuffle the jobs randomly so that we have a better chance of getting batches with similar
@@ -284,6 +337,25 @@ def make_simulation_config(
     return simulation_config, scenarios
 
 
+def add_snapshot_time_points(config, search_duration_days, table_filename):
+    """Select the snapshot time points of all jobs and store them in the config."""
+    simulation_config = config.get_pydss_config(ConfigType.SIMULATION_CONFIG)
+    try:
+        time_points = compute_snapshot_time_points(
+            config,
+            simulation_config["project"]["loadshape_start_time"],
+            DEFAULT_LOAD_SHAPE_START_TIME,
+            float(search_duration_days) * 24 * 60,
+        )
+    except Exception:
+        logger.exception("Failed to select snapshot time points. Each job will search for them.")
+        return
+
+    simulation_config[SNAPSHOT_TIME_POINTS_CONFIG_KEY] = time_points
+    config.set_pydss_config(ConfigType.SIMULATION_CONFIG, simulation_config)
+    write_snapshot_time_points_table(time_points, table_filename)
+
+
 def switch_snapshot_to_qsts(config):
     """Use QSTS at one time point to perform SNAPSHOT simulation with loadshape profile"""
     for job in config.iter_pydss_simulation_jobs():
@@ -4,6 +4,7 @@
 
 import logging
 import sys
+from pathlib import Path
 
 import click
 
@@ -16,7 +17,21 @@ from disco.enums import SimulationType
 from disco.extensions.pydss_simulation.pydss_configuration import PyDssConfiguration
 from disco.extensions.pydss_simulation.estimate_run_minutes import generate_estimate_run_minutes
 from disco.pydss.common import ConfigType
+from disco.pydss.hosting_capacity_early_stop import (
+    DEFAULT_HC_THRESHOLDS_FILE,
+    HC_EARLY_STOP_CONFIG_KEY,
+    make_hc_early_stop_config,
+)
+from disco.pydss.log_monitor import LOG_MONITOR_CONFIG_KEY
 from disco.pydss.pydss_configuration_base import get_default_reports_file
+from disco.pydss.time_series_windows import (
+    DEFAULT_WINDOW_MARGIN_MINUTES,
+    DEFAULT_WINDOW_QUANTILE,
+    TIME_SERIES_WINDOWS_CONFIG_KEY,
+    TIME_SERIES_WINDOWS_TABLE_FILENAME,
+    compute_time_series_windows,
+    write_time_series_windows_table,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -205,6 +220,59 @@ def common_time_series_options(func):
     "canceled if a job with a lower penetration level fails. However, it can significantly "
     "reduce the number of jobs that can run simultaneously.",
 )
+@click.option(
+    "--max-convergence-errors",
+    default=None,
+    type=int,
+    help="Flag jobs whose PyDSS logs report more than this number of convergence errors. The "
+    "logs are analyzed incrementally while the simulation runs.",
+)
+@click.option(
+    "--abort-on-convergence-errors/--no-abort-on-convergence-errors",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help="Stop a job as soon as it exceeds --max-convergence-errors instead of only flagging it.",
+)
+@click.option(
+    "--hc-early-stop-failures",
+    default=None,
+    type=int,
+    help="Cancel the higher penetration levels of a sample after this number of consecutive "
+    "levels exceed the hosting capacity thresholds. The skipped levels count as failing in "
+    "the hosting capacity computation. Requires --order-by-penetration.",
+)
+@click.option(
+    "--hc-thresholds",
+    type=click.Path(exists=True),
+    default=str(DEFAULT_HC_THRESHOLDS_FILE),
+    show_default=True,
+    help="Hosting capacity thresholds for --hc-early-stop-failures",
+)
+@click.option(
+    "--adaptive-window/--no-adaptive-window",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help="Restrict controls and data collection of each job to the daily time range that "
+    "contains its peak load, high PV-to-load ratio, and fast ramp intervals. The excluded "
+    f"intervals are reported in {TIME_SERIES_WINDOWS_TABLE_FILENAME}.",
+)
+@click.option(
+    "--window-quantile",
+    default=DEFAULT_WINDOW_QUANTILE,
+    type=float,
+    show_default=True,
+    help="Intervals at or above this quantile of load, PV-to-load ratio, or ramp are "
+    "included in the adaptive window.",
+)
+@click.option(
+    "--window-margin-minutes",
+    default=DEFAULT_WINDOW_MARGIN_MINUTES,
+    type=int,
+    show_default=True,
+    help="Safety margin added to both ends of the adaptive window.",
+)
 def time_series(
     inputs,
     config_file,
@@ -229,6 +297,13 @@ def time_series(
     pf1,
     control_mode,
     order_by_penetration,
+    max_convergence_errors,
+    abort_on_convergence_errors,
+    hc_early_stop_failures,
+    hc_thresholds,
+    adaptive_window,
+    window_quantile,
+    window_margin_minutes,
 ):
     """Create JADE configuration for time series simulations."""
     level = logging.DEBUG if verbose else logging.INFO
@@ -237,9 +312,26 @@ def time_series(
     if not pf1 and not control_mode:
         logger.error("At least one of '--pf1' or '--control-mode' must be set.")
         sys.exit(1)
+    if abort_on_convergence_errors and max_convergence_errors is None:
+        logger.error("'--abort-on-convergence-errors' requires '--max-convergence-errors'.")
+        sys.exit(1)
+    if hc_early_stop_failures is not None and not order_by_penetration:
+        logger.error("'--hc-early-stop-failures' requires '--order-by-penetration'.")
+        sys.exit(1)
+    if adaptive_window and skip_night:
+        logger.error("'--adaptive-window' and '--skip-night' cannot both be set.")
+        sys.exit(1)
 
     simulation_config = PyDssConfiguration.get_default_pydss_simulation_config()
     simulation_config["project"]["simulation_type"] = SimulationType.QSTS.value
+    simulation_config[LOG_MONITOR_CONFIG_KEY] = {
+        "max_convergence_errors": max_convergence_errors,
+        "action": "abort" if abort_on_convergence_errors else "flag",
+    }
+    if hc_early_stop_failures is not None:
+        simulation_config[HC_EARLY_STOP_CONFIG_KEY] = make_hc_early_stop_config(
+            hc_early_stop_failures, hc_thresholds
+        )
     simulation_config["reports"] = load_data(reports_filename)["reports"]
     simulation_config["exports"]["export_data_tables"] = export_data_tables
     for report in simulation_config["reports"]["types"]:
@@ -305,7 +397,32 @@ def time_series(
         pydss_sim_config["project"]["simulation_range"] = {"start": "06:00:00", "end": "18:00:00"}
         # Note that we are using the same convergence error threshold percent.
         config.set_pydss_config(ConfigType.SIMULATION_CONFIG, pydss_sim_config)
+    elif adaptive_window:
+        add_time_series_windows(
+            config,
+            window_quantile,
+            window_margin_minutes,
+            Path(config_file).parent / TIME_SERIES_WINDOWS_TABLE_FILENAME,
+        )
 
     config.dump(filename=config_file)
 
     print(f"Created {config_file} for TimeSeries Analysis")
+
+
+def add_time_series_windows(config, quantile, margin_minutes, table_filename):
+    """Select the simulation window of all jobs and store them in the config.
+
+    The estimated run times are not changed because PyDSS still runs power flow outside of the
+    window. It only skips controls and data collection.
+    """
+    simulation_config = config.get_pydss_config(ConfigType.SIMULATION_CONFIG)
+    windows = compute_time_series_windows(
+        config,
+        simulation_config["project"]["loadshape_start_time"],
+        quantile=quantile,
+        margin_minutes=margin_minutes,
+    )
+    simulation_config[TIME_SERIES_WINDOWS_CONFIG_KEY] = windows
+    config.set_pydss_config(ConfigType.SIMULATION_CONFIG, simulation_config)
+    write_time_series_windows_table(windows, table_filename)
@@ -1,4 +1,5 @@
 import logging
+from pathlib import Path
 
 import click
 from jade.common import CONFIG_FILE
@@ -43,6 +44,21 @@ logger = logging.getLogger(__name__)
     show_default=True,
     help="JADE config file to create"
 )
+@click.option(
+    "--warm-start/--no-warm-start",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help="Run the jobs of each feeder, placement, and sample in order of penetration level and "
+    "start each job from the final upgrades of the next-lower level."
+)
+@click.option(
+    "--result-cache-directory",
+    type=click.Path(),
+    default=None,
+    help="Reuse the results of jobs with the same inputs that are stored in this directory, and "
+    "store the results of new jobs in it."
+)
 @click.option(
     "--verbose",
     is_flag=True,
@@ -54,6 +70,8 @@ def upgrade(
     cost_database,
     params_file,
     config_file,
+    warm_start=False,
+    result_cache_directory=None,
     verbose=False
 ):
     """Create JADE configuration for upgrade simulations"""
@@ -77,5 +95,11 @@ def upgrade(
         inputs=inputs,
         job_global_config=job_global_config
     )
+    if warm_start:
+        config.apply_warm_start_by_penetration_level()
+    if result_cache_directory is not None:
+        config.job_global_config["upgrade_simulation_params"]["result_cache_directory"] = str(
+            Path(result_cache_directory).resolve()
+        )
     config.dump(filename=config_file)
     print(f"Created {config_file} for upgrade cost analysis.")
@@ -20,8 +20,17 @@ from PyDSS.pydss_results import PyDssResults, PyDssScenarioResults
 from PyDSS.reports.pv_reports import PF1_SCENARIO, CONTROL_MODE_SCENARIO
 from PyDSS.thermal_metrics import create_summary_from_dict
 
+from disco.exceptions import is_hosting_capacity_early_stop
 from disco.pipelines.utils import ensure_jade_pipeline_output_dir
 from disco.pydss.common import SCENARIO_NAME_DELIMITER
+from disco.pydss.hosting_capacity_early_stop import (
+    EARLY_STOPPED_JOBS_TABLE_FILENAME,
+    HC_EARLY_STOP_DIRNAME,
+    get_chain_key,
+    read_stopped_chains,
+)
+from disco.pydss.snapshot_time_points import PYDSS_FINAL_TIME_POINTS_FILENAME
+from disco.utils.telemetry import make_telemetry_tables
 
 
 JobInfo = namedtuple(
@@ -45,11 +54,17 @@ def parse_batch_results(output_dir):
     jobs = []
     results = ResultsAggregator.list_results(output_dir)
     result_lookup = {x.name: x for x in results}
+    stopped_chains = read_stopped_chains(output_path / HC_EARLY_STOP_DIRNAME)
+    early_stopped_jobs_table = []
     for job in config.iter_pydss_simulation_jobs():
         if job.name not in result_lookup:
             logger.info("Skip missing job %s", job.name)
             continue
-        if result_lookup[job.name].return_code != 0:
+        result = result_lookup[job.name]
+        if result.is_canceled() and _is_early_stopped(job, stopped_chains):
+            early_stopped_jobs_table.append(make_job_info(job)._asdict())
+            continue
+        if result.return_code != 0 and not is_hosting_capacity_early_stop(result.return_code):
             logger.info("Skip failed job %s", job.name)
             continue
         jobs.append(job)
@@ -81,14 +96,29 @@ def parse_batch_results(output_dir):
     serialize_table(voltage_metrics_table, output_path / "voltage_metrics_table.csv")
     if jobs and jobs[0].model.model_type == "SnapshotImpactAnalysisModel":
         serialize_table(snapshot_time_points_table, output_path / "snapshot_time_points_table.csv")
+    if stopped_chains:
+        logger.info(
+            "Skipped %s jobs because lower penetration levels exceeded hosting capacity thresholds",
+            len(early_stopped_jobs_table),
+        )
+        serialize_table(early_stopped_jobs_table, output_path / EARLY_STOPPED_JOBS_TABLE_FILENAME)
+    make_telemetry_tables(output_path, (x.name for x in config.iter_pydss_simulation_jobs()))
 
 
-def parse_job_results(job, output_path):
-    """Return the tables for a single job."""
-    job_path = output_path / JOBS_OUTPUT_DIR / job.name / "pydss_project"
+def _is_early_stopped(job, stopped_chains):
+    if job.model.is_base_case:
+        return False
+    deployment = job.model.deployment
+    key = get_chain_key(deployment)
+    return key in stopped_chains and \
+        float(deployment.project_data["penetration_level"]) > stopped_chains[key]
+
+
+def make_job_info(job):
+    """Return the JobInfo for a job."""
     deployment = job.model.deployment
     if job.model.is_base_case:
-        job_info = JobInfo(
+        return JobInfo(
             name=job.name,
             substation=deployment.substation,
             feeder=deployment.feeder,
@@ -96,15 +126,20 @@ def parse_job_results(job, output_path):
             sample="",
             penetration_level="",
         )
-    else:
-        job_info = JobInfo(
-            name=job.name,
-            substation=deployment.substation,
-            feeder=deployment.feeder,
-            placement=deployment.project_data.get("placement", "NA"),
-            sample=deployment.project_data.get("sample", 0.0),
-            penetration_level=deployment.project_data.get("penetration_level", 0.0),
-        )
+    return JobInfo(
+        name=job.name,
+        substation=deployment.substation,
+        feeder=deployment.feeder,
+        placement=deployment.project_data.get("placement", "NA"),
+        sample=deployment.project_data.get("sample", 0.0),
+        penetration_level=deployment.project_data.get("penetration_level", 0.0),
+    )
+
+
+def parse_job_results(job, output_path):
+    """Return the tables for a single job."""
+    job_path = output_path / JOBS_OUTPUT_DIR / job.name / "pydss_project"
+    job_info = make_job_info(job)
     results = PyDssResults(job_path)
     metadata_table = get_metadata_table(results, job_info)
     feeder_head_table = get_feeder_head_info(results, job_info)
@@ -237,7 +272,7 @@ def get_voltage_metrics(results: PyDssResults, job_info: JobInfo):
 def get_snapshot_time_points_table(results: PyDssResults, job_info: JobInfo):
     """Return the snapshot time points determined by each job."""
     try:
-        data = json.loads(results.read_file(f"Exports/snapshot_time_points.json"))
+        data = json.loads(results.read_file(f"Exports/{PYDSS_FINAL_TIME_POINTS_FILENAME}"))
     except KeyError:
         # Time points are only available if load shapes are used.
         return []
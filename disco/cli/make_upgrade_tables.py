@@ -17,11 +17,14 @@ from jade.jobs.job_configuration_factory import create_config_from_file
 from jade.jobs.results_aggregator import ResultsAggregator
 from jade.utils.utils import load_data, dump_data
 
+from disco.extensions.upgrade_simulation.upgrades.result_cache import RESULT_CACHE_HIT_FILENAME
+from disco.extensions.upgrade_simulation.upgrades.stage_budget import STAGE_STATUS_BUDGET_EXHAUSTED
 from disco.models.upgrade_cost_analysis_generic_output_model import (
     UpgradeViolationResultModel,
     TotalUpgradeCostsResultModel,
 )
 from disco.pipelines.utils import ensure_jade_pipeline_output_dir
+from disco.utils.telemetry import make_telemetry_tables
 
 logger = logging.getLogger(__name__)
 
@@ -60,10 +63,13 @@ def parse_batch_results(output_dir):
     for key in output_json: 
         if not output_json[key]:
             logger.warning("There were no %s results.", key)
+    report_budget_exhausted_jobs(output_json)
+    report_reused_results(output_json)
     
     filename = output_path / "upgrade_summary.json"
     dump_data(output_json, filename, indent=2)
     logger.info("Output summary data to %s", filename)
+    make_telemetry_tables(output_path, (x.name for x in config.iter_jobs()))
     # serialize_table(upgrade_summary_table, output_path / "upgrade_summary.csv")
     # serialize_table(total_upgrade_costs_table, output_path / "total_upgrade_costs.csv")
 
@@ -81,11 +87,14 @@ def parse_job_results(job, output_path):
     )
     overall_output_summary_file = job_path / "output.json"
     data = load_data(overall_output_summary_file)
-    tables = get_upgrade_tables(data)
+    tables = get_upgrade_tables(data, job_path=job_path)
     return tables
 
 
-def get_upgrade_tables(data):
+def get_upgrade_tables(data, job_path=None):
+    """Convert the output summary of a job to tables. If job_path is set, the results report the
+    job whose cached results the job reused, if any.
+    """
     tables = {}
     # the key "results" is a dict, but all others are lists of dict
     # so convert "results" dict to list
@@ -94,21 +103,66 @@ def get_upgrade_tables(data):
             tables[key] = [value]
         else:
             tables[key] = value
+    if job_path is not None and "results" in tables:
+        cache_hit_file = job_path / RESULT_CACHE_HIT_FILENAME
+        source_job = load_data(cache_hit_file)["source_job"] if cache_hit_file.exists() else None
+        tables["results"][0]["reused_results_from"] = source_job
     return tables
 
 
 def combine_job_outputs(output_json, tables):    
     # It might seem odd to go from dict to model back to dict, but this validates
     # fields and types.
-    for record in tables["violation_summary"]:
+    # The tables of a job that did not finish only contain the completed stages.
+    for record in tables.get("violation_summary", []):
         output_json["violation_summary"].append(UpgradeViolationResultModel(**record).dict())
-    for record in tables["costs_per_equipment"]:
+    for record in tables.get("costs_per_equipment", []):
         output_json["costs_per_equipment"].append(TotalUpgradeCostsResultModel(**record).dict())
-    output_json["equipment"] += tables["equipment"]
-    output_json["results"] += tables["results"]
+    output_json["equipment"] += tables.get("equipment", [])
+    output_json["results"] += tables.get("results", [])
     return output_json
 
 
+def report_budget_exhausted_jobs(output_json):
+    """Log the jobs with upgrade stages that stopped at their resource budgets.
+
+    Returns
+    -------
+    list
+        Names of the jobs
+
+    """
+    names = sorted(
+        {
+            x["name"]
+            for x in output_json["violation_summary"]
+            if x["stage_status"] == STAGE_STATUS_BUDGET_EXHAUSTED
+        }
+    )
+    if names:
+        logger.warning(
+            "%s jobs stopped at resource budgets and may have unresolved violations: %s",
+            len(names),
+            " ".join(names),
+        )
+    return names
+
+
+def report_reused_results(output_json):
+    """Log the jobs that reused the cached results of jobs with the same inputs.
+
+    Returns
+    -------
+    list
+        Names of the jobs
+
+    """
+    names = sorted(x["name"] for x in output_json["results"] if x.get("reused_results_from"))
+    if names:
+        logger.info("%s jobs reused cached results: %s", len(names), " ".join(names))
+    return names
+
+
 def serialize_table(table, filename):
     """Serialize a list of dictionaries to a CSV file."""
     with open(filename, "w") as f:
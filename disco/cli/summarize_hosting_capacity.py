@@ -1,19 +1,21 @@
 """Create summary files for hosting capacity results."""
 
+import csv
 import json
 import logging
 import re
 import shutil
+import sqlite3
 import sys
 import time
+from contextlib import closing
 from pathlib import Path
-from tempfile import NamedTemporaryFile
 
 import click
 import chevron
+import pandas as pd
 
 from jade.loggers import setup_logging
-from jade.utils.subprocess_manager import check_run_command
 from jade.utils.utils import get_cli_string, load_data, dump_data
 
 import disco
@@ -25,23 +27,78 @@ DISCO = Path(disco.__path__[0]).parent
 TEMPLATE_FILE = DISCO / "disco" / "postprocess" / "query.mustache"
 HOSTING_CAPACITY_THRESHOLDS = DISCO / "disco" / "postprocess" / "config" / "hc_thresholds.toml"
 
-SQLITE3_CMD_TEMPLATE = """
-.read {{query_file}}
-.headers on
-.mode csv
-.echo on
-.output {{hc_summary_file}}
-select * from hc_summary;
-.output {{hc_by_sample_file}}
-select * from hc_by_sample_kw;
-.output {{bad_feeder_file}}
-select * from bad_feeders order by feeder;
-.output {{bad_feeder_pct_thresholds_file}}
-select * from bad_feeders_pct_threshold order by feeder;
-.output {{bad_feeder_violations_count_file}}
-select * from bad_feeders_violation_count_overall;
+# Report file stem and query for each output report
+REPORTS = (
+    ("hc_summary", "SELECT * FROM hc_summary"),
+    ("hc_by_sample", "SELECT * FROM hc_by_sample_kw"),
+    ("feeders_fail_base_case", "SELECT * FROM bad_feeders ORDER BY feeder"),
+    (
+        "feeders_pct_thresholds_fail_base_case",
+        "SELECT * FROM bad_feeders_pct_threshold ORDER BY feeder",
+    ),
+    (
+        "feeders_fail_base_case_threshold_violation_counts",
+        "SELECT * FROM bad_feeders_violation_count_overall",
+    ),
+)
+
+RESULTS_INDEXES = """
+CREATE INDEX IF NOT EXISTS tmidx1 ON thermal_metrics(job_id, name);
+CREATE INDEX IF NOT EXISTS vmidx1 ON voltage_metrics(job_id, name);
+CREATE INDEX IF NOT EXISTS midx1 ON metadata(job_id);
+CREATE INDEX IF NOT EXISTS jobidx1 ON job(id);
+"""
+
+# The join of all requested scenarios is materialized once per invocation. The tables of each
+# scenario are copied from it before the reports of that scenario are derived.
+JT_BASE_QUERY = """
+CREATE TEMP TABLE jt_base AS
+    SELECT
+        tm.name
+        ,tm.substation
+        ,tm.feeder
+        ,tm.placement
+        ,tm.sample
+        ,tm.penetration_level
+        ,tm.scenario
+        ,tm.line_max_instantaneous_loading_pct
+        ,tm.line_max_moving_average_loading_pct
+        ,tm.line_num_time_points_with_instantaneous_violations
+        ,tm.line_num_time_points_with_moving_average_violations
+        ,tm.transformer_max_instantaneous_loading_pct
+        ,tm.transformer_max_moving_average_loading_pct
+        ,tm.transformer_num_time_points_with_instantaneous_violations
+        ,tm.transformer_num_time_points_with_moving_average_violations
+        ,tm.transformer_instantaneous_threshold
+        ,vm.min_voltage
+        ,vm.max_voltage
+        ,vm.num_nodes_any_outside_ansi_b
+        ,vm.num_time_points_with_ansi_b_violations
+        ,vm.node_type
+    FROM task
+    JOIN job ON job.task_id = task.id
+    JOIN thermal_metrics AS tm ON tm.job_id = job.id
+    JOIN voltage_metrics AS vm
+        ON vm.job_id = job.id AND tm.name = vm.name AND tm.scenario = vm.scenario
+    WHERE
+        tm.scenario IN ({scenarios})
+        AND {task_condition}
+        AND (? OR vm.node_type != 'secondaries')
 """
 
+MT_BASE_QUERY = """
+CREATE TEMP TABLE mt_base AS
+    SELECT mt.*
+    FROM task
+    JOIN job ON job.task_id = task.id
+    JOIN metadata AS mt ON mt.job_id = job.id
+    WHERE
+        mt.scenario IN ({scenarios})
+        AND {task_condition}
+"""
+
+FETCH_SIZE = 10_000
+
 
 def _check_task_pattern(_, __, val):
     if val is None:
@@ -64,8 +121,10 @@ def _check_task_pattern(_, __, val):
     "-s",
     "--scenario",
     type=click.Choice(["pf1", "control_mode", "derms"], case_sensitive=False),
+    multiple=True,
     required=True,
-    help="Scenario name",
+    help="Scenario name. Can be passed multiple times to summarize several scenarios in one "
+    "pass; the reports of each scenario are written to a subdirectory.",
 )
 @click.option(
     "-T",
@@ -125,6 +184,14 @@ def _check_task_pattern(_, __, val):
     show_default=True,
     help="Overwrite any pre-existing output files.",
 )
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["csv", "parquet"]),
+    default="csv",
+    show_default=True,
+    help="Format of the report files. Parquet requires pyarrow.",
+)
 @click.option(
     "--verbose", is_flag=True, default=False, show_default=True, help="Enable verbose logging"
 )
@@ -139,6 +206,7 @@ def summarize_hosting_capacity(
     secondaries,
     output_directory,
     force,
+    fmt,
     verbose,
 ):
     """Create summary files for hosting capacity results."""
@@ -161,23 +229,15 @@ def summarize_hosting_capacity(
     if task_pattern is not None and task_names:
         logger.error("Only one of --task-names and --tast-pattern can be passed")
         sys.exit(1)
-
-    hc_summary_filename = output_directory / "hc_summary.csv"
-    hc_by_sample_filename = output_directory / "hc_by_sample.csv"
-    bad_feeder_filename = output_directory / "feeders_fail_base_case.csv"
-    bad_feeder_pct_thresholds_filename = (
-        output_directory / "feeders_pct_thresholds_fail_base_case.csv"
-    )
-    bad_feeder_violations_count_filename = (
-        output_directory / "feeders_fail_base_case_threshold_violation_counts.csv"
-    )
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            logger.error("--format=parquet requires pyarrow")
+            sys.exit(1)
 
     defaults = load_data(hc_thresholds)
-    options = {"scenario": scenario}
-    if task_names:
-        options["task_names"] = " OR ".join((f"task.name = '{x}'" for x in task_names))
-    if task_pattern is not None:
-        options["task_pattern"] = task_pattern
+    options = {}
     if thermal:
         options["thermal"] = defaults["thermal"]
     if voltage:
@@ -186,37 +246,110 @@ def summarize_hosting_capacity(
 
     with open(TEMPLATE_FILE, "r") as f_in:
         query = chevron.render(f_in, options)
+    with open(output_directory / "query.sql", "w") as f_out:
+        f_out.write(query)
+
+    scenarios = list(dict.fromkeys(scenario))
+    params = {
+        "scenarios": scenarios,
+        "task_names": list(task_names),
+        "task_pattern": task_pattern,
+        "secondaries": secondaries,
+    }
+    logger.info(
+        "Running SQL queries on %s with thresholds\n%s",
+        database,
+        json.dumps(options, indent=4),
+    )
+    dump_data({**params, **options}, output_directory / "thresholds.json", indent=True)
+    start = time.time()
+    with closing(sqlite3.connect(database)) as conn:
+        for name in scenarios:
+            path = output_directory if len(scenarios) == 1 else output_directory / name
+            path.mkdir(exist_ok=True)
+            summarize_scenario(conn, query, name, path, fmt, params)
+    logger.info("Queries complete. Duration = %.2f seconds", time.time() - start)
 
-    with NamedTemporaryFile(mode="w") as f_query:
-        f_query.write(query)
-        f_query.flush()
-
-        out_file = output_directory / "query.sql"
-        shutil.copyfile(f_query.name, out_file)
-
-        with NamedTemporaryFile(mode="w") as f_sqlite3_cmd:
-            query_options = {
-                "query_file": f_query.name,
-                "hc_summary_file": hc_summary_filename,
-                "hc_by_sample_file": hc_by_sample_filename,
-                "bad_feeder_file": bad_feeder_filename,
-                "bad_feeder_pct_thresholds_file": bad_feeder_pct_thresholds_filename,
-                "bad_feeder_violations_count_file": bad_feeder_violations_count_filename,
-            }
-            f_sqlite3_cmd.write(chevron.render(SQLITE3_CMD_TEMPLATE, query_options))
-            f_sqlite3_cmd.write("\n")
-            f_sqlite3_cmd.flush()
-
-            logger.info(
-                "Running SQL queries on %s with thresholds\n%s",
-                database,
-                json.dumps(options, indent=4),
-            )
-            dump_data(options, output_directory / "thresholds.json", indent=True)
-            start = time.time()
-            cmd = f"sqlite3 -init {f_sqlite3_cmd.name} {database} .exit"
-            check_run_command(cmd)
-            logger.info("Queries complete. Duration = %.2f seconds", time.time() - start)
-
-    for filename in output_directory.iterdir():
+    for filename in sorted(output_directory.rglob("*")):
         logger.info("Created output file %s", filename)
+
+
+def summarize_scenario(conn, query, scenario, output_directory, fmt, params):
+    """Create the report files of one scenario.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+    query : str
+        Rendered query template
+    scenario : str
+    output_directory : Path
+    fmt : str
+        csv or parquet
+    params : dict
+        Parameters for the materialized tables
+
+    """
+    _make_base_tables(conn, params)
+    for table in ("jt_all", "mt_all"):
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    for table in ("jt", "mt"):
+        conn.execute(
+            f"CREATE TEMP TABLE {table}_all AS SELECT * FROM {table}_base WHERE scenario = ?",
+            (scenario,),
+        )
+    conn.executescript(query)
+    for stem, report_query in REPORTS:
+        filename = output_directory / f"{stem}.{fmt}"
+        if fmt == "parquet":
+            pd.read_sql_query(report_query, conn).to_parquet(filename)
+        else:
+            _write_csv(conn, report_query, filename)
+    logger.info(
+        "Created hosting capacity reports for scenario=%s in %s", scenario, output_directory
+    )
+
+
+def _make_base_tables(conn, params):
+    """Materialize the filtered join of all requested scenarios once per connection."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_temp_master WHERE type = 'table' AND name = 'jt_base'"
+    ).fetchone()
+    if exists:
+        return
+
+    if params["task_names"]:
+        placeholders = ", ".join("?" for _ in params["task_names"])
+        task_condition = f"task.name IN ({placeholders})"
+        task_params = params["task_names"]
+    else:
+        task_condition = "task.name LIKE ?"
+        task_params = [params["task_pattern"]]
+    scenarios = ", ".join("?" for _ in params["scenarios"])
+
+    start = time.time()
+    conn.executescript(RESULTS_INDEXES)
+    conn.execute(
+        JT_BASE_QUERY.format(scenarios=scenarios, task_condition=task_condition),
+        params["scenarios"] + task_params + [params["secondaries"]],
+    )
+    conn.execute(
+        MT_BASE_QUERY.format(scenarios=scenarios, task_condition=task_condition),
+        params["scenarios"] + task_params,
+    )
+    conn.execute("CREATE INDEX temp.jt_base_idx1 ON jt_base(scenario)")
+    logger.info(
+        "Materialized the results of %s in %.2f seconds", params["scenarios"], time.time() - start
+    )
+
+
+def _write_csv(conn, query, filename):
+    cursor = conn.execute(query)
+    with open(filename, "w", newline="") as f_out:
+        writer = csv.writer(f_out)
+        writer.writerow([x[0] for x in cursor.description])
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            writer.writerows(rows)
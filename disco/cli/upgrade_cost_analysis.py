@@ -16,7 +16,12 @@ from jade.result import ResultsSummary
 from jade.utils.utils import get_cli_string, load_data, dump_data
 
 from disco.common import EXIT_CODE_GOOD, EXIT_CODE_GENERIC_ERROR
-from disco.cli.make_upgrade_tables import get_upgrade_tables, combine_job_outputs
+from disco.cli.make_upgrade_tables import (
+    get_upgrade_tables,
+    combine_job_outputs,
+    report_budget_exhausted_jobs,
+    report_reused_results,
+)
 from disco.exceptions import DiscoBaseException, get_error_code_from_exception
 from disco.models.base import OpenDssDeploymentModel
 from disco.models.upgrade_cost_analysis_generic_input_model import (
@@ -25,8 +30,15 @@ from disco.models.upgrade_cost_analysis_generic_input_model import (
 from disco.models.upgrade_cost_analysis_generic_output_model import (
     JobUpgradeSummaryOutputModel,
 )
+from disco.extensions.upgrade_simulation.upgrade_configuration import (
+    make_warm_start_jobs,
+    order_warm_start_jobs,
+)
 from disco.extensions.upgrade_simulation.upgrade_parameters import UpgradeParameters
 from disco.extensions.upgrade_simulation.upgrade_simulation import UpgradeSimulation
+from disco.extensions.upgrade_simulation.upgrades.plot_rendering import render_plot_artifacts
+from disco.extensions.upgrade_simulation.upgrades.run_journal import JOURNAL_FILENAME, RunJournal
+from disco.utils.telemetry import make_telemetry_tables
 
 
 logger = logging.getLogger(__name__)
@@ -74,14 +86,19 @@ def config(upgrades_config_file, config_file, fmt):
     config = UpgradeCostAnalysisSimulationModel.from_file(upgrades_config_file)
     jade_config = GenericCommandConfiguration()
     base_cmd = f"disco upgrade-cost-analysis run {upgrades_config_file} --no-aggregate-results"
+    warm_start_jobs = _get_warm_start_jobs(config)
     blocking_jobs = set()
     for job in config.jobs:
         cmd = f"{base_cmd} --job-name {job.name}"
+        blocked_by = set()
+        if job.name in warm_start_jobs:
+            blocked_by.add(warm_start_jobs[job.name])
         jade_job = GenericCommandParameters(
             command=cmd,
             name=job.name,
             estimated_run_minutes=job.estimated_run_minutes,
             append_output_dir=True,
+            blocked_by=blocked_by,
         )
         jade_config.add_job(jade_job)
         blocking_jobs.add(job.name)
@@ -148,6 +165,15 @@ def _log_level_cb(_, __, level):
     show_default=True,
     help="Overwrite output directory if it exists.",
 )
+@click.option(
+    "-r",
+    "--resume",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help="Keep existing job directories. Jobs that did not complete resume after their last "
+    "completed stage.",
+)
 @click.option(
     "-C",
     "--console-log-level",
@@ -173,6 +199,7 @@ def run(
     output,
     fmt,
     force,
+    resume,
     console_log_level,
     file_log_level,
 ):
@@ -197,8 +224,18 @@ def run(
         log_file_dir = jobs_output_dir / job_name
         log_filename = f"run_upgrade_cost_analysis__{job_name}.log"
 
-    for job in jobs:
-        _check_job_dir(jobs_output_dir / job.name, force)
+    if force and resume:
+        print("--force and --resume cannot both be set", file=sys.stderr)
+        sys.exit(1)
+    if not resume:
+        for job in jobs:
+            _check_job_dir(jobs_output_dir / job.name, force)
+
+    # Each warm-started job runs after the job that seeds it. If only one job is selected, the
+    # seed must have run in the same output directory.
+    warm_start_jobs = _get_warm_start_jobs(config)
+    jobs_by_name = {x.name: x for x in jobs}
+    jobs = [jobs_by_name[x] for x in order_warm_start_jobs(list(jobs_by_name), warm_start_jobs)]
 
     log_file_dir.mkdir(exist_ok=True)
     log_file = log_file_dir / log_filename
@@ -218,7 +255,13 @@ def run(
         start = time.time()
         ret = EXIT_CODE_GOOD
         try:
-            run_job(job, config, jobs_output_dir, file_log_level)
+            run_job(
+                job,
+                config,
+                jobs_output_dir,
+                file_log_level,
+                warm_start_job=warm_start_jobs.get(job.name),
+            )
             all_failed = False
         except DiscoBaseException as exc:
             logger.exception("Unexpected DISCO error in upgrade cost analysis job=%s", job.name)
@@ -262,18 +305,29 @@ def _write_job_return_code(output_dir, job_name, return_code):
 
 
 def _read_job_return_code(output_dir, job_name):
-    return int(_get_return_code_filename(output_dir, job_name).read_text().strip())
+    """Return the return code of a job or None if the job did not record it, such as when the
+    process was killed."""
+    filename = _get_return_code_filename(output_dir, job_name)
+    if not filename.exists():
+        return None
+    return int(filename.read_text().strip())
 
 
 def _delete_job_return_code_file(output_dir, job_name):
-    _get_return_code_filename(output_dir, job_name).unlink()
+    _get_return_code_filename(output_dir, job_name).unlink(missing_ok=True)
 
 
 def _get_return_code_filename(output_dir, job_name):
     return output_dir / job_name / "return_code"
 
 
-def run_job(job, config, jobs_output_dir, file_log_level):
+def _get_warm_start_jobs(config):
+    if not config.warm_start:
+        return {}
+    return make_warm_start_jobs((x.name, x) for x in config.jobs)
+
+
+def run_job(job, config, jobs_output_dir, file_log_level, warm_start_job=None):
     job_output_dir = jobs_output_dir / job.name
     job_output_dir.mkdir(exist_ok=True)
     job = UpgradeParameters(
@@ -313,6 +367,8 @@ def run_job(job, config, jobs_output_dir, file_log_level):
         voltage_config=global_config["voltage_upgrade_params"],
         cost_database_filepath=global_config["upgrade_cost_database"],
         verbose=file_log_level == logging.DEBUG,
+        warm_start_job=warm_start_job,
+        result_cache_directory=config.result_cache_directory,
     )
 
 
@@ -360,26 +416,32 @@ def _aggregate_results(output, log_file, job_names, fmt):
         "outputs": {"log_file": str(log_file), "jobs": []},
     }
     logger.info("Start result aggregation.")
+    telemetry_job_names = []
+    partial_job_names = []
     for name in job_names:
         if name == AGGREGATION_JOB_NAME:
             continue
+        telemetry_job_names.append(name)
         job_path = jobs_output_dir / name
         job_info = JobInfo(name)
         job_name = getattr(job_info, "name")
-        overall_output_summary_file = job_path / "output.json"
         return_code = (
             _read_job_return_code(jobs_output_dir, name)
         )
         _delete_job_return_code_file(jobs_output_dir, name)
-        if return_code != 0:
-            logger.info("Skip failed job %s", name)
-            continue
-        data = load_data(overall_output_summary_file)
-        tables = get_upgrade_tables(data)
+        data = _read_job_output_summary(job_path)
+        partial = return_code != 0
+        if partial:
+            if data is None:
+                logger.info("Skip failed job %s", name)
+                continue
+            partial_job_names.append(name)
+        tables = get_upgrade_tables(data, job_path=job_path)
         outputs = {
             "upgraded_opendss_model_file": str(jobs_output_dir / name / "upgraded_master.dss"),
             "return_code": return_code,
             "feeder_stats": str(jobs_output_dir / name / "feeder_stats.json"),
+            "partial": partial,
         }
         output_json["outputs"]["jobs"].append(outputs)
         output_json = combine_job_outputs(output_json, tables)
@@ -387,12 +449,56 @@ def _aggregate_results(output, log_file, job_names, fmt):
     for key in output_json: 
         if not output_json[key]:
             logger.warning("There were no aggregated %s results.", key)
+    if partial_job_names:
+        logger.warning(
+            "%s jobs failed or did not finish. Their results only include the completed stages: %s",
+            len(partial_job_names),
+            " ".join(partial_job_names),
+        )
+    report_budget_exhausted_jobs(output_json)
+    report_reused_results(output_json)
     if fmt == "json":
         filename = output / "upgrade_summary.json"
         dump_data(JobUpgradeSummaryOutputModel(**output_json).dict(), filename, indent=2)
         logger.info("Output summary data to %s", filename)
     # elif fmt == "csv":
-        
+
+    make_telemetry_tables(output, telemetry_job_names)
+
+
+def _read_job_output_summary(job_path):
+    """Return the output summary of a job. If the job did not write it, such as when the process
+    was killed, recover the completed stages from the job's journal. Return None if the job has
+    no results."""
+    overall_output_summary_file = job_path / "output.json"
+    if overall_output_summary_file.exists():
+        return load_data(overall_output_summary_file)
+    journal_file = job_path / JOURNAL_FILENAME
+    if not journal_file.exists():
+        return None
+    documents = RunJournal.materialize(journal_file, documents={overall_output_summary_file.name})
+    return documents.get(overall_output_summary_file.name)
+
+
+@click.command()
+@click.argument("output_dir", type=click.Path(exists=True), callback=lambda _, __, x: Path(x))
+@click.option(
+    "-n",
+    "--num-processes",
+    type=int,
+    default=None,
+    show_default=True,
+    help="Number of worker processes. Defaults to the number of CPUs.",
+)
+@click.option(
+    "--verbose", is_flag=True, default=False, show_default=True, help="Enable verbose logging"
+)
+def render_plots(output_dir, num_processes, verbose):
+    """Render figures from plot data recorded by jobs run with defer_plot_rendering = true."""
+    level = logging.DEBUG if verbose else logging.INFO
+    setup_logging(__name__, None, console_level=level, packages=["disco"])
+    figures = render_plot_artifacts(output_dir, num_processes=num_processes)
+    print(f"Rendered {len(figures)} figures in {output_dir}")
 
 
 @click.group()
@@ -404,3 +510,4 @@ upgrade_cost_analysis.add_command(check_config)
 upgrade_cost_analysis.add_command(config)
 upgrade_cost_analysis.add_command(run)
 upgrade_cost_analysis.add_command(aggregate_results)
+upgrade_cost_analysis.add_command(render_plots)
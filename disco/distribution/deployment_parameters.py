@@ -25,9 +25,18 @@ class DeploymentParameters(JobParametersInterface):
         UpgradeCostAnalysisModel: "upgrade_simulation"
     }
 
-    def __init__(self, estimated_run_minutes=None, **kwargs):
+    def __init__(self, estimated_run_minutes=None, model=None, **kwargs):
+        """Constructs DeploymentParameters.
+
+        Parameters
+        ----------
+        estimated_run_minutes : int | None
+        model : BaseAnalysisModel | None
+            Use this model instead of making one from kwargs. It will not be validated.
+
+        """
         self._estimated_run_minutes = estimated_run_minutes
-        self._model = make_model(kwargs)
+        self._model = make_model(kwargs) if model is None else model
         self._submission_group = DEFAULT_SUBMISSION_GROUP
 
     def __repr__(self):
@@ -59,6 +59,10 @@ class InvalidOpenDssElementError(DiscoBaseException):
     """Raise when an OpenDSS element has unexpected properties"""
 
 
+class HostingCapacityEarlyStop(DiscoBaseException):
+    """Raise when consecutive penetration levels exceed the hosting capacity thresholds"""
+
+
 EXCEPTIONS_TO_ERROR_CODES = {
     
     AnalysisConfigurationException: {
@@ -124,6 +128,13 @@ EXCEPTIONS_TO_ERROR_CODES = {
         "modify OpenDSS model for such instances.",
         "error_code": 125,
     },
+    HostingCapacityEarlyStop: {
+        "description": "A simulation completed but consecutive penetration levels of its sample exceeded "
+        "the hosting capacity thresholds. Higher penetration levels of the sample are canceled.",
+        "corrective_action": "None. The results of the job are valid. Disable the early stop to run "
+        "every penetration level.",
+        "error_code": 126,
+    },
 }
 
 
@@ -142,3 +153,8 @@ def get_error_code_from_exception(exception_class):
 def is_convergence_error(error_code):
     """Return True if the error code indicates a convergence error."""
     return error_code in {119, 120, 121, 122}
+
+
+def is_hosting_capacity_early_stop(error_code):
+    """Return True if the error code indicates a job that stopped its penetration-level chain."""
+    return error_code == EXCEPTIONS_TO_ERROR_CODES[HostingCapacityEarlyStop]["error_code"]
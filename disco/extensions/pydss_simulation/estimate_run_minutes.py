@@ -9,27 +9,60 @@ import sklearn
 import numpy as np
 
 from disco.enums import SimulationHierarchy
+from disco.utils.feeder_stats_index import FeederStatsIndex, find_feeder_stats_index_path
 
 
 # We observed that times were off by a little more than 2x.
 FUDGE_FACTOR = 2.5
 
 
-def generate_estimate_run_minutes(config):
+def count_new_elements(dss_path, elem_name):
+    """Count the lines of a DSS file that contain "new <elem_name>". These are the features of
+    the trained model. Refer to feeder_stats_index.ESTIMATE_ELEMENTS.
+    """
+    n = 0
+    with open(dss_path) as fp:
+        for line in fp:
+            if "new "+elem_name.lower() in line.lower():
+                n += 1
+    return n
+
+
+def generate_estimate_run_minutes(config, use_index=True):
     """Estimated run minutes.
 
     Parameters
     ----------
     config : PyDssConfiguration
+    use_index : bool
+        If True, read element counts from the feeder stats index created by transform-model, if
+        present. The index is not updated. Otherwise, scan the DSS files of every job.
 
     """
-    def get_num_elem(dss_path,elem_name):
-        n = 0
-        with open(dss_path) as fp:
-            for line in fp: 
-                if "new "+elem_name.lower() in line.lower():
-                    n += 1
-        return n
+    indexes = {}
+    indexes_by_dir = {}
+    dss_files = {}
+
+    def get_index(path):
+        directory = Path(path).parent
+        if directory not in indexes_by_dir:
+            base_path = find_feeder_stats_index_path(directory)
+            if base_path not in indexes:
+                indexes[base_path] = FeederStatsIndex(base_path)
+            indexes_by_dir[directory] = indexes[base_path]
+        return indexes_by_dir[directory]
+
+    def get_num_elem(dss_path, elem_name):
+        if not use_index:
+            return count_new_elements(dss_path, elem_name)
+        stats = get_index(dss_path).get_file_stats(dss_path)
+        return stats["estimate_counts"].get(elem_name.lower(), 0)
+
+    def find_dss_files(directory, filename):
+        key = (directory, filename)
+        if key not in dss_files:
+            dss_files[key] = list(Path(directory).rglob(filename))
+        return dss_files[key]
 
     def compute_estimate(exe_time, scaling_factor):
         val = math.ceil(float(exe_time / 60) * FUDGE_FACTOR) * scaling_factor
@@ -50,12 +83,11 @@ def generate_estimate_run_minutes(config):
         if hierarchy == SimulationHierarchy.SUBSTATION:
             deployment_dss = job.model.deployment.deployment_file
             sub_dir = job.model.deployment.directory
-            path = Path(sub_dir)
             num_lines = 0
-            for lines_dss in path.rglob("Lines.dss"):
+            for lines_dss in find_dss_files(sub_dir, "Lines.dss"):
                 num_lines += get_num_elem(lines_dss,"Line")
             num_loads = 0
-            for loads_dss in path.rglob("Loads.dss"):
+            for loads_dss in find_dss_files(sub_dir, "Loads.dss"):
                 num_loads += get_num_elem(loads_dss,"Load")
             num_pvsystem = get_num_elem(deployment_dss,"pvsystem")
             exe_time_pred_s = trained_model.predict(np.array([num_lines, num_loads, num_pvsystem]).reshape(1,-1))
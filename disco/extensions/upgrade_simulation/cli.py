@@ -75,7 +75,9 @@ def run(config_file, name, output, output_format, verbose):
             thermal_config=thermal_config,
             voltage_config=voltage_config,
             cost_database_filepath=cost_database_filepath,
-            verbose=verbose
+            verbose=verbose,
+            warm_start_job=upgrade_simulation_params.get("warm_start_jobs", {}).get(job.name),
+            result_cache_directory=upgrade_simulation_params.get("result_cache_directory"),
         )
         return ret
     except Exception:
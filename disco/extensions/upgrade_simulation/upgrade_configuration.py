@@ -1,5 +1,6 @@
 import logging
 import os
+from collections import defaultdict
 
 from jade.utils.utils import load_data
 
@@ -22,6 +23,8 @@ DEFAULT_UPGRADE_PARAMS_FILE = os.path.join(
     "upgrade_parameters.toml"
 )
 
+WARM_START_KEYS = ("placement", "sample", "penetration_level")
+
 
 class UpgradeConfiguration(PyDssConfigurationBase):
 
@@ -44,6 +47,18 @@ class UpgradeConfiguration(PyDssConfigurationBase):
         
         return config
 
+    def apply_warm_start_by_penetration_level(self):
+        """Block each job by the next-lower penetration level of its sample and start it from the
+        final upgrades of that level.
+        """
+        warm_start_jobs = make_warm_start_jobs(
+            (job.name, job.model.deployment) for job in self.iter_jobs()
+        )
+        for name, seed in warm_start_jobs.items():
+            self.get_job(name).add_blocking_job(seed)
+        self.job_global_config["upgrade_simulation_params"]["warm_start_jobs"] = warm_start_jobs
+        logger.info("Warm start %s jobs from lower penetration levels.", len(warm_start_jobs))
+
     def _serialize(self, data):
         data["pydss_inputs"] = self.serialize_pydss_inputs(self._pydss_inputs)
 
@@ -81,3 +96,69 @@ class UpgradeConfiguration(PyDssConfigurationBase):
     def create_from_result(self, job, output_dir):
         cls = self.job_execution_class(job.extension)
         return cls.create(job, output=output_dir)
+
+
+def make_warm_start_jobs(jobs):
+    """Return the job that seeds each job.
+
+    Parameters
+    ----------
+    jobs : iterable
+        Items are (name, deployment), where deployment has the attributes substation, feeder, and
+        project_data.
+
+    Returns
+    -------
+    dict
+        Maps a job name to the name of the job with the next-lower penetration level of the same
+        substation, feeder, placement, and sample. Jobs at the lowest level and jobs without all
+        WARM_START_KEYS in project_data are not included.
+
+    """
+    chains = defaultdict(list)
+    for name, deployment in jobs:
+        project_data = deployment.project_data or {}
+        if not set(WARM_START_KEYS).issubset(project_data):
+            continue
+        key = (
+            deployment.substation,
+            deployment.feeder,
+            project_data["placement"],
+            project_data["sample"],
+        )
+        chains[key].append((project_data["penetration_level"], name))
+
+    warm_start_jobs = {}
+    for chain in chains.values():
+        chain.sort()
+        for (_, seed), (_, name) in zip(chain, chain[1:]):
+            warm_start_jobs[name] = seed
+    return warm_start_jobs
+
+
+def order_warm_start_jobs(names, warm_start_jobs):
+    """Order job names so that each job follows the job that seeds it.
+
+    Parameters
+    ----------
+    names : list
+    warm_start_jobs : dict
+        Returned by make_warm_start_jobs
+
+    Returns
+    -------
+    list
+
+    """
+    included = set(names)
+    ordered = []
+    done = set()
+    for name in names:
+        chain = []
+        while name is not None and name in included and name not in done:
+            chain.append(name)
+            name = warm_start_jobs.get(name)
+        for item in reversed(chain):
+            done.add(item)
+            ordered.append(item)
+    return ordered
@@ -1,11 +1,23 @@
+import logging
 import os
 
 from jade.common import OUTPUT_DIR
+from jade.utils.utils import load_data
 from disco import timer_stats_collector
+from disco.utils.telemetry import TELEMETRY_FILENAME, JobTelemetry
 
 from .upgrades.automated_thermal_upgrades import determine_thermal_upgrades
 from .upgrades.automated_voltage_upgrades import determine_voltage_upgrades
+from .upgrades.common_functions import create_upgraded_master_dss, write_text_file
 from .upgrades.cost_computation import compute_all_costs
+from .upgrades.result_cache import UpgradeResultCache, compute_result_key, iter_model_files
+from .upgrades.run_journal import JOURNAL_FILENAME
+from .upgrades.stage_checkpoints import CHECKPOINTS_DIRNAME, THERMAL_STAGE, StageCheckpoints, compute_input_hash
+from .upgrades.upgrade_session import UpgradeSession
+from .upgrades.warm_start import WarmStartSeed
+
+
+logger = logging.getLogger(__name__)
 
 
 class UpgradeSimulation:
@@ -23,13 +35,13 @@ class UpgradeSimulation:
     def job_output(self):
         return os.path.join(self.output, self.model.name)
     
-    def get_thermal_upgrades_directory(self):
-        thermal_upgrades = os.path.join(self.job_output, "ThermalUpgrades")
+    def get_thermal_upgrades_directory(self, job_output=None):
+        thermal_upgrades = os.path.join(job_output or self.job_output, "ThermalUpgrades")
         os.makedirs(thermal_upgrades, exist_ok=True)
         return thermal_upgrades
     
-    def get_voltage_upgrades_directory(self):
-        voltage_upgrades = os.path.join(self.job_output, "VoltageUpgrades")
+    def get_voltage_upgrades_directory(self, job_output=None):
+        voltage_upgrades = os.path.join(job_output or self.job_output, "VoltageUpgrades")
         os.makedirs(voltage_upgrades, exist_ok=True)
         return voltage_upgrades
 
@@ -42,21 +54,21 @@ class UpgradeSimulation:
         feeder_stats_json_file = os.path.join(self.job_output, "feeder_stats.json")
         return feeder_stats_json_file
     
-    def get_thermal_upgrades_dss_file(self):
-        return os.path.join(self.job_output, "thermal_upgrades.dss")
+    def get_thermal_upgrades_dss_file(self, job_output=None):
+        return os.path.join(job_output or self.job_output, "thermal_upgrades.dss")
     
-    def get_voltage_upgrades_dss_file(self):
-        return os.path.join(self.job_output, "voltage_upgrades.dss")
+    def get_voltage_upgrades_dss_file(self, job_output=None):
+        return os.path.join(job_output or self.job_output, "voltage_upgrades.dss")
     
     def get_upgraded_master_dss_file(self):
         return os.path.join(self.job_output, "upgraded_master.dss")
 
-    def get_thermal_upgrades_json_file(self):
-        thermal_upgrades = self.get_thermal_upgrades_directory()
+    def get_thermal_upgrades_json_file(self, job_output=None):
+        thermal_upgrades = self.get_thermal_upgrades_directory(job_output)
         return os.path.join(thermal_upgrades, "thermal_upgrades.json")
     
-    def get_voltage_upgrades_json_file(self):
-        voltage_upgrades = self.get_voltage_upgrades_directory()
+    def get_voltage_upgrades_json_file(self, job_output=None):
+        voltage_upgrades = self.get_voltage_upgrades_directory(job_output)
         return os.path.join(voltage_upgrades, "voltage_upgrades.json")
     
     def get_thermal_summary_json_file(self):
@@ -83,8 +95,44 @@ class UpgradeSimulation:
         upgrade_costs = self.get_upgrade_costs_directory()
         return os.path.join(upgrade_costs, "total_upgrade_costs.json")
     
-    def get_overall_output_summary_file(self):
-        return os.path.join(self.job_output, "output.json")
+    def get_overall_output_summary_file(self, job_output=None):
+        return os.path.join(job_output or self.job_output, "output.json")
+
+    def get_journal_file(self):
+        return os.path.join(self.job_output, JOURNAL_FILENAME)
+
+    def get_telemetry_file(self):
+        return os.path.join(self.job_output, TELEMETRY_FILENAME)
+
+    def get_checkpoints_directory(self):
+        return os.path.join(self.job_output, CHECKPOINTS_DIRNAME)
+
+    def load_warm_start_seed(self, job_name):
+        """Return the final upgrades of a job that ran in the same output directory.
+
+        Parameters
+        ----------
+        job_name : str
+
+        Returns
+        -------
+        WarmStartSeed | None
+            None if the job did not complete
+
+        """
+        job_output = os.path.join(self.output, job_name)
+        overall_output_summary_file = self.get_overall_output_summary_file(job_output)
+        if not os.path.exists(overall_output_summary_file):
+            logger.warning("Job %s did not complete. Cannot use it as a warm start.", job_name)
+            return None
+        return WarmStartSeed.load(
+            job_name,
+            thermal_upgrades_dss_file=self.get_thermal_upgrades_dss_file(job_output),
+            voltage_upgrades_dss_file=self.get_voltage_upgrades_dss_file(job_output),
+            thermal_upgrades_json_file=self.get_thermal_upgrades_json_file(job_output),
+            voltage_upgrades_json_file=self.get_voltage_upgrades_json_file(job_output),
+            overall_output_summary_file=overall_output_summary_file,
+        )
     
     @staticmethod
     def generate_command(job, output, config_file, verbose=False):
@@ -120,24 +168,167 @@ class UpgradeSimulation:
         thermal_config,
         voltage_config,
         cost_database_filepath,
-        verbose=False
+        verbose=False,
+        warm_start_job=None,
+        result_cache_directory=None,
     ):  
-        determine_thermal_upgrades(
-            job_name = self.job.name,
-            master_path=self.model.deployment.deployment_file,
-            enable_pydss_solve=enable_pydss_solve,
-            thermal_config=thermal_config,
-            pydss_volt_var_model=pydss_controller_model,
-            internal_upgrades_technical_catalog_filepath=self.internal_upgrades_technical_catalog_filepath(),
-            thermal_upgrades_dss_filepath=self.get_thermal_upgrades_dss_file(),
+        """Run the thermal, voltage, and cost stages.
+        If a previous run of the job with the same inputs did not complete, resume after its last
+        completed stage.
+
+        Parameters
+        ----------
+        warm_start_job : str | None
+            If set, start from the final upgrades of this job, which must have run in the same
+            output directory. It is usually the next-lower penetration level of the same sample.
+        result_cache_directory : str | None
+            If set, copy the outputs of a job with the same inputs from this cache instead of
+            running the simulation, and store the outputs of the job in it.
+
+        """
+        with JobTelemetry(self.job.name, "upgrade", self.get_telemetry_file(), timer_stats_collector):
+            params = {
+                "enable_pydss_solve": enable_pydss_solve,
+                "pydss_controller_model": pydss_controller_model,
+                "dc_ac_ratio": dc_ac_ratio,
+                "thermal_config": thermal_config,
+                "voltage_config": voltage_config,
+            }
+            input_hash = self._compute_input_hash(params, warm_start_job)
+            result_cache = None
+            if result_cache_directory is not None:
+                result_cache = UpgradeResultCache(result_cache_directory)
+                result_key = self._compute_result_key(params, cost_database_filepath, warm_start_job)
+                if result_cache.materialize(result_key, self.job_output, self.job.name) is not None:
+                    self._restore_upgraded_master_dss()
+                    return
+            checkpoints = StageCheckpoints(self.get_checkpoints_directory(), input_hash)
+            warm_start_seed = None
+            if warm_start_job is not None:
+                warm_start_seed = self.load_warm_start_seed(warm_start_job)
+            # The stages share their outputs in memory, and the voltage stage starts from the circuit
+            # that the thermal stage verified.
+            # The JSON outputs are written once, also if a stage fails. Until then, the journal records
+            # the outputs of the completed stages.
+            session = UpgradeSession(journal_file=self.get_journal_file())
+            try:
+                self._run_stages(
+                    session,
+                    enable_pydss_solve,
+                    pydss_controller_model,
+                    dc_ac_ratio,
+                    thermal_config,
+                    voltage_config,
+                    cost_database_filepath,
+                    verbose=verbose,
+                    warm_start_seed=warm_start_seed,
+                    checkpoints=checkpoints,
+                )
+            finally:
+                session.write_outputs()
+            checkpoints.clear()
+            if result_cache is not None:
+                if load_data(self.get_overall_output_summary_file())["results"].get("budget_exhausted"):
+                    logger.info("Do not cache the results of job %s because a budget was exhausted", self.job.name)
+                else:
+                    result_cache.store(result_key, self.job_output, self.job.name)
+        timer_stats_collector.log_stats(clear=True)
+
+    def _compute_input_hash(self, params, warm_start_job):
+        # Include the files that the deployment redirects to so that checkpoints are invalidated
+        # when any of them change.
+        input_files = list(iter_model_files(self.model.deployment.deployment_file))
+        if warm_start_job is not None:
+            warm_start_output = os.path.join(self.output, warm_start_job)
+            input_files += [
+                self.get_thermal_upgrades_dss_file(warm_start_output),
+                self.get_voltage_upgrades_dss_file(warm_start_output),
+            ]
+        return compute_input_hash(
+            input_files, {"name": self.job.name, "warm_start_job": warm_start_job, **params}
+        )
+
+    def _compute_result_key(self, params, cost_database_filepath, warm_start_job):
+        input_files = [cost_database_filepath]
+        if params["thermal_config"].get("read_external_catalog"):
+            input_files.append(params["thermal_config"]["external_catalog"])
+        if warm_start_job is not None:
+            # The key depends on the upgrades of the seed but not on its name.
+            warm_start_output = os.path.join(self.output, warm_start_job)
+            input_files += [
+                self.get_thermal_upgrades_dss_file(warm_start_output),
+                self.get_voltage_upgrades_dss_file(warm_start_output),
+                self.get_thermal_upgrades_json_file(warm_start_output),
+                self.get_voltage_upgrades_json_file(warm_start_output),
+            ]
+        params = {"warm_start": warm_start_job is not None, **params}
+        return compute_result_key(self.model.deployment.deployment_file, input_files, params)
+
+    def _restore_upgraded_master_dss(self):
+        """Redirect the upgraded master file copied from the result cache to the OpenDSS model of
+        this job.
+        """
+        master_path = self.model.deployment.deployment_file
+        upgrades_files = {
+            os.path.basename(x): x
+            for x in (self.get_thermal_upgrades_dss_file(), self.get_voltage_upgrades_dss_file())
+        }
+        dss_file_list = []
+        with open(self.get_upgraded_master_dss_file()) as f_in:
+            for line in f_in:
+                fields = line.split(maxsplit=1)
+                if len(fields) == 2 and fields[0].lower() == "redirect":
+                    filename = os.path.basename(fields[1].strip())
+                    dss_file_list.append(upgrades_files.get(filename, master_path))
+        redirect_command_list = create_upgraded_master_dss(
+            dss_file_list=dss_file_list,
             upgraded_master_dss_filepath=self.get_upgraded_master_dss_file(),
-            output_json_thermal_upgrades_filepath=self.get_thermal_upgrades_json_file(),
-            feeder_stats_json_file = self.get_feeder_stats_json_file(),
-            thermal_upgrades_directory=self.get_thermal_upgrades_directory(),
-            overall_output_summary_filepath=self.get_overall_output_summary_file(),
-            dc_ac_ratio=dc_ac_ratio,
-            verbose=verbose
+            original_master_filename=os.path.basename(master_path),
         )
+        write_text_file(string_list=redirect_command_list, text_file_path=self.get_upgraded_master_dss_file())
+
+    def _run_stages(
+        self,
+        session,
+        enable_pydss_solve,
+        pydss_controller_model,
+        dc_ac_ratio,
+        thermal_config,
+        voltage_config,
+        cost_database_filepath,
+        verbose=False,
+        warm_start_seed=None,
+        checkpoints=None,
+    ):
+        thermal_state = None if checkpoints is None else checkpoints.load(THERMAL_STAGE)
+        if thermal_state is None:
+            if checkpoints is not None:
+                checkpoints.clear()
+            self._run_thermal_stage(
+                session,
+                enable_pydss_solve,
+                pydss_controller_model,
+                dc_ac_ratio,
+                thermal_config,
+                verbose=verbose,
+                warm_start_seed=warm_start_seed,
+            )
+            session.checkpoint()
+            if checkpoints is not None:
+                with open(self.get_thermal_upgrades_dss_file()) as f_in:
+                    thermal_upgrades_dss = f_in.read()
+                checkpoints.save(
+                    THERMAL_STAGE,
+                    {
+                        "outputs": session.export_outputs(self.job_output),
+                        "thermal_upgrades_dss": thermal_upgrades_dss,
+                    },
+                )
+        else:
+            logger.info("Resume job %s after the thermal stage", self.job.name)
+            session.restore_outputs(thermal_state["outputs"], self.job_output)
+            with open(self.get_thermal_upgrades_dss_file(), "w") as f_out:
+                f_out.write(thermal_state["thermal_upgrades_dss"])
         determine_voltage_upgrades(
             job_name = self.job.name,
             master_path=self.model.deployment.deployment_file,
@@ -153,8 +344,12 @@ class UpgradeSimulation:
             voltage_upgrades_directory=self.get_voltage_upgrades_directory(),
             overall_output_summary_filepath=self.get_overall_output_summary_file(),
             dc_ac_ratio=dc_ac_ratio,
-            verbose=verbose
+            verbose=verbose,
+            session=session,
+            warm_start_seed=warm_start_seed,
+            checkpoints=checkpoints,
         )
+        session.checkpoint()
         compute_all_costs(
             job_name = self.job.name,
             output_json_thermal_upgrades_filepath=self.get_thermal_upgrades_json_file(),
@@ -163,6 +358,35 @@ class UpgradeSimulation:
             output_equipment_upgrade_costs_filepath=self.get_equipment_upgrade_costs_file(),
             output_total_upgrade_costs_filepath=self.get_total_upgrade_costs_file(),
             overall_output_summary_filepath=self.get_overall_output_summary_file(),
-            feeder_stats_json_file = self.get_feeder_stats_json_file()
+            feeder_stats_json_file = self.get_feeder_stats_json_file(),
+            session=session,
+        )
+
+    def _run_thermal_stage(
+        self,
+        session,
+        enable_pydss_solve,
+        pydss_controller_model,
+        dc_ac_ratio,
+        thermal_config,
+        verbose=False,
+        warm_start_seed=None,
+    ):
+        determine_thermal_upgrades(
+            job_name = self.job.name,
+            master_path=self.model.deployment.deployment_file,
+            enable_pydss_solve=enable_pydss_solve,
+            thermal_config=thermal_config,
+            pydss_volt_var_model=pydss_controller_model,
+            internal_upgrades_technical_catalog_filepath=self.internal_upgrades_technical_catalog_filepath(),
+            thermal_upgrades_dss_filepath=self.get_thermal_upgrades_dss_file(),
+            upgraded_master_dss_filepath=self.get_upgraded_master_dss_file(),
+            output_json_thermal_upgrades_filepath=self.get_thermal_upgrades_json_file(),
+            feeder_stats_json_file = self.get_feeder_stats_json_file(),
+            thermal_upgrades_directory=self.get_thermal_upgrades_directory(),
+            overall_output_summary_filepath=self.get_overall_output_summary_file(),
+            dc_ac_ratio=dc_ac_ratio,
+            verbose=verbose,
+            session=session,
+            warm_start_seed=warm_start_seed,
         )
-        timer_stats_collector.log_stats(clear=True)
@@ -4,9 +4,11 @@ import logging
 import pandas as pd
 
 from jade.utils.timing_utils import track_timing, Timer
-from jade.utils.utils import load_data, dump_data
 
 from .thermal_upgrade_functions import *
+from .catalog_matching import LineCatalogMatcher, TransformerCatalogMatcher
+from .upgrade_session import UpgradeSession
+from .stage_budget import StageBudget
 from .voltage_upgrade_functions import plot_thermal_violations, plot_voltage_violations, plot_feeder
 
 from disco.models.upgrade_cost_analysis_generic_input_model import UpgradeTechnicalCatalogModel
@@ -35,14 +37,21 @@ def determine_thermal_upgrades(
     overall_output_summary_filepath,
     dc_ac_ratio,
     ignore_switch=True,
-    verbose=False
+    verbose=False,
+    session=None,
+    warm_start_seed=None,
 ):
+    if session is None:
+        session = UpgradeSession(in_memory=False)
     start_time = time.time()
     logger.info( f"Simulation start time: {start_time}")   
+    budget = StageBudget.from_config("thermal", thermal_config)
     initial_simulation_params = {"enable_pydss_solve": enable_pydss_solve, "pydss_volt_var_model": pydss_volt_var_model,
                                  "dc_ac_ratio": dc_ac_ratio}
     logger.info("Initial simulation parameters: %s", initial_simulation_params)
     create_plots = thermal_config["create_plots"]
+    defer_plot_rendering = thermal_config.get("defer_plot_rendering", False)
+    batch_upgrade_commands = thermal_config.get("batch_upgrade_commands", False)
     # start upgrades
     initial_dss_file_list = [master_path]
     simulation_params = reload_dss_circuit(dss_file_list=initial_dss_file_list, commands_list=None, **initial_simulation_params)
@@ -57,15 +66,12 @@ def determine_thermal_upgrades(
     voltage_upper_limit = thermal_config["voltage_upper_limit"]
     voltage_lower_limit = thermal_config["voltage_lower_limit"]
     if thermal_config["read_external_catalog"]:
-        with open(thermal_config["external_catalog"]) as json_file:
-            external_upgrades_technical_catalog = json.load(json_file)
-        # perform validation for external catalog
-        input_catalog_model = UpgradeTechnicalCatalogModel(**external_upgrades_technical_catalog)
-        line_upgrade_options = pd.DataFrame.from_dict(input_catalog_model.dict(by_alias=True)["line"])
-        xfmr_upgrade_options = pd.DataFrame.from_dict(input_catalog_model.dict(by_alias=True)["transformer"])
-        # this will remove any duplicates if present
-        line_upgrade_options = determine_available_line_upgrades(line_upgrade_options)
-        xfmr_upgrade_options = determine_available_xfmr_upgrades(xfmr_upgrade_options)
+        # the validated catalog is cached across jobs
+        (
+            external_upgrades_technical_catalog,
+            line_upgrade_options,
+            xfmr_upgrade_options,
+        ) = session.load_external_catalog(thermal_config["external_catalog"])
     else:
         external_upgrades_technical_catalog = {}
         orig_lines_df = get_thermal_equipment_info(compute_loading=False, equipment_type="line")
@@ -80,7 +86,7 @@ def determine_thermal_upgrades(
                                                }
         # validate internal upgrades catalog
         input_catalog_model = UpgradeTechnicalCatalogModel(**internal_upgrades_technical_catalog)
-        dump_data(input_catalog_model.dict(by_alias=True), 
+        session.dump_data(input_catalog_model.dict(by_alias=True), 
                   internal_upgrades_technical_catalog_filepath, indent=2)  # write internal catalog to json
         # reassign from model to dataframes, so datatypes are maintained
         line_upgrade_options = pd.DataFrame.from_dict(input_catalog_model.dict(by_alias=True)["line"])
@@ -110,15 +116,17 @@ def determine_thermal_upgrades(
     orig_capacitors_df = get_capacitor_info(correct_PT_ratio=False)
     feeder_stats["stage_results"].append(get_upgrade_stage_stats(dss, upgrade_stage="initial", upgrade_type="thermal", xfmr_loading_df=initial_xfmr_loading_df, line_loading_df=initial_line_loading_df, 
                                         bus_voltages_df=initial_bus_voltages_df, capacitors_df=orig_capacitors_df, regcontrols_df=orig_regcontrols_df) )
-    dump_data(feeder_stats, feeder_stats_json_file, indent=2)   # save feeder stats
+    session.dump_data(feeder_stats, feeder_stats_json_file, indent=2)   # save feeder stats
     if len(initial_overloaded_xfmr_list) > 0 or len(initial_overloaded_line_list) > 0:
         n = len(initial_overloaded_xfmr_list) +  len(initial_overloaded_line_list)
         equipment_with_violations = {"Transformer": initial_xfmr_loading_df, "Line": initial_line_loading_df}
         if create_plots:
             plot_thermal_violations(fig_folder=thermal_upgrades_directory, title="Thermal violations before thermal upgrades_"+str(n), 
-                                    equipment_with_violations=equipment_with_violations, circuit_source=circuit_source)
+                                    equipment_with_violations=equipment_with_violations, circuit_source=circuit_source,
+                                    defer_rendering=defer_plot_rendering)
             plot_voltage_violations(fig_folder=thermal_upgrades_directory, title="Bus violations before thermal upgrades_"+str(len(initial_buses_with_violations)), 
-                                    buses_with_violations=initial_buses_with_violations, circuit_source=circuit_source, enable_detailed=True)
+                                    buses_with_violations=initial_buses_with_violations, circuit_source=circuit_source, enable_detailed=True,
+                                    defer_rendering=defer_plot_rendering)
         upgrade_status = "Thermal Upgrades Required"  # status - whether upgrades done or not
     else:
         upgrade_status = "Thermal Upgrades not Required"  # status - whether upgrades done or not
@@ -148,14 +156,10 @@ def determine_thermal_upgrades(
         transformer_upper_limit=thermal_config['transformer_upper_limit']
     )
     temp_results = convert_dict_nan_to_none(dict(initial_results))
-    if os.path.exists(overall_output_summary_filepath):
-        overall_outputs = load_data(overall_output_summary_filepath)
-        overall_outputs["violation_summary"].append(temp_results)
-    else:
-        overall_outputs = {"violation_summary": [temp_results]}
-    dump_data(overall_outputs, overall_output_summary_filepath, indent=2, allow_nan=False)
-    title = "Feeder"
-    plot_feeder(fig_folder=thermal_upgrades_directory, title=title, circuit_source=circuit_source, enable_detailed=True)
+    session.append_output(overall_output_summary_filepath, "violation_summary", temp_results, indent=2, allow_nan=False)
+    if create_plots:
+        plot_feeder(fig_folder=thermal_upgrades_directory, title="Feeder", circuit_source=circuit_source, enable_detailed=True,
+                    defer_rendering=defer_plot_rendering)
     # Mitigate thermal violations
     iteration_counter = 0
     # if number of violations is very high,  limit it to a small number
@@ -166,10 +170,27 @@ def determine_thermal_upgrades(
     commands_list = []
     line_upgrades_df = pd.DataFrame()
     xfmr_upgrades_df = pd.DataFrame()
+    # the catalogs are grouped and sorted once, when they are first needed
+    line_catalog_matcher = None
+    xfmr_catalog_matcher = None
     overloaded_line_list = initial_overloaded_line_list
     overloaded_xfmr_list = initial_overloaded_xfmr_list
+    if (warm_start_seed is not None) and warm_start_seed.apply(initial_dss_file_list, warm_start_seed.thermal_commands, **simulation_params):
+        # start from the upgrades of the lower penetration level and resolve the remaining violations
+        commands_list = list(warm_start_seed.thermal_commands)
+        line_upgrades_df = pd.DataFrame(warm_start_seed.get_thermal_upgrades("line"))
+        xfmr_upgrades_df = pd.DataFrame(warm_start_seed.get_thermal_upgrades("transformer"))
+        line_loading_df = get_thermal_equipment_info(compute_loading=True, upper_limit=thermal_config["line_upper_limit"], 
+                                                    equipment_type="line", ignore_switch=ignore_switch, **simulation_params)
+        overloaded_line_list = list(line_loading_df.loc[line_loading_df["status"] == "overloaded"]["name"].unique())
+        xfmr_loading_df = get_thermal_equipment_info(compute_loading=True, upper_limit=thermal_config["transformer_upper_limit"], 
+                                                    equipment_type="transformer", **simulation_params)
+        overloaded_xfmr_list = list(xfmr_loading_df.loc[xfmr_loading_df["status"] == "overloaded"]["name"].unique())
+        logger.info(f"Number of devices with violations after warm start: Transformers:{len(overloaded_xfmr_list)}, Lines: {len(overloaded_line_list)}")
     while (len(overloaded_line_list) > 0 or len(overloaded_xfmr_list) > 0) and (
         iteration_counter < max_upgrade_iteration):
+        if budget.is_exhausted():
+            break
         line_loading_df = get_thermal_equipment_info(compute_loading=True, upper_limit=thermal_config["line_upper_limit"], 
                                                     equipment_type="line", ignore_switch=ignore_switch, **simulation_params)
         overloaded_line_list = list(line_loading_df.loc[line_loading_df["status"] == "overloaded"]["name"].unique())
@@ -177,12 +198,18 @@ def determine_thermal_upgrades(
         logger.info(f"Iteration_{iteration_counter}: Number of line violations: {len(overloaded_line_list)}")
         before_upgrade_num_line_violations = len(overloaded_line_list)
         if len(overloaded_line_list) > 0:            
+            if line_catalog_matcher is None:
+                line_catalog_matcher = LineCatalogMatcher(line_upgrade_options)
             line_commands_list, temp_line_upgrades_df = correct_line_violations(
                 line_loading_df=line_loading_df,
                 line_design_pu=thermal_config["line_design_pu"],
-                line_upgrade_options=line_upgrade_options.copy(deep=True),
+                line_upgrade_options=line_upgrade_options,
                 parallel_lines_limit=thermal_config["parallel_lines_limit"],
-                external_upgrades_technical_catalog=external_upgrades_technical_catalog,)
+                external_upgrades_technical_catalog=external_upgrades_technical_catalog,
+                catalog_matcher=line_catalog_matcher,
+                batch_upgrade_commands=batch_upgrade_commands,
+                restore_circuit=lambda: reload_dss_circuit(
+                    dss_file_list=initial_dss_file_list, commands_list=commands_list, **simulation_params),)
             logger.info(f"Iteration_{iteration_counter}: Corrected line violations.")
             commands_list = commands_list + line_commands_list
             line_upgrades_df = pd.concat([line_upgrades_df, temp_line_upgrades_df])
@@ -194,11 +221,17 @@ def determine_thermal_upgrades(
         before_upgrade_num_xfmr_violations = len(overloaded_xfmr_list)
         
         if len(overloaded_xfmr_list) > 0:
+            if xfmr_catalog_matcher is None:
+                xfmr_catalog_matcher = TransformerCatalogMatcher(xfmr_upgrade_options)
             xfmr_commands_list, temp_xfmr_upgrades_df = correct_xfmr_violations(
                 xfmr_loading_df=xfmr_loading_df,
                 xfmr_design_pu=thermal_config["transformer_design_pu"],
-                xfmr_upgrade_options=xfmr_upgrade_options.copy(deep=True),
-                parallel_transformers_limit=thermal_config["parallel_transformers_limit"])
+                xfmr_upgrade_options=xfmr_upgrade_options,
+                parallel_transformers_limit=thermal_config["parallel_transformers_limit"],
+                catalog_matcher=xfmr_catalog_matcher,
+                batch_upgrade_commands=batch_upgrade_commands,
+                restore_circuit=lambda: reload_dss_circuit(
+                    dss_file_list=initial_dss_file_list, commands_list=commands_list, **simulation_params),)
             logger.info(f"Iteration_{iteration_counter}: Corrected xfmr violations.")
             commands_list = commands_list + xfmr_commands_list
             xfmr_upgrades_df = pd.concat([xfmr_upgrades_df, temp_xfmr_upgrades_df])
@@ -255,23 +288,20 @@ def determine_thermal_upgrades(
     m = AllUpgradesTechnicalResultModel(line=line_upgrades_df.to_dict('records'), transformer=xfmr_upgrades_df.to_dict('records'))
     temp = m.dict(by_alias=True)
     temp.pop("voltage")
-    dump_data(temp, output_json_thermal_upgrades_filepath, indent=2)
+    session.dump_data(temp, output_json_thermal_upgrades_filepath, indent=2)
     n = len(overloaded_xfmr_list) +  len(overloaded_line_list)
     equipment_with_violations = {"Transformer": xfmr_loading_df, "Line": line_loading_df}
     if (upgrade_status == "Thermal Upgrades Required") and create_plots:
         plot_thermal_violations(fig_folder=thermal_upgrades_directory, title="Thermal violations after thermal upgrades_"+str(n), 
-                                equipment_with_violations=equipment_with_violations, circuit_source=circuit_source)
+                                equipment_with_violations=equipment_with_violations, circuit_source=circuit_source,
+                                defer_rendering=defer_plot_rendering)
         plot_voltage_violations(fig_folder=thermal_upgrades_directory, title="Bus violations after thermal upgrades_"+str(len(buses_with_violations)), 
-                                buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True)
-    if os.path.exists(feeder_stats_json_file):
-        feeder_stats = load_data(feeder_stats_json_file)
-    else:
-        feeder_stats = {}
+                                buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True,
+                                defer_rendering=defer_plot_rendering)
     regcontrols_df = get_regcontrol_info(correct_PT_ratio=False)
     capacitors_df = get_capacitor_info(correct_PT_ratio=False)
-    feeder_stats["stage_results"].append( get_upgrade_stage_stats(dss, upgrade_stage="final", upgrade_type="thermal", xfmr_loading_df=xfmr_loading_df, line_loading_df=line_loading_df, 
-                                        bus_voltages_df=bus_voltages_df, capacitors_df=capacitors_df, regcontrols_df=regcontrols_df) )
-    dump_data(feeder_stats, feeder_stats_json_file, indent=2)
+    session.append_output(feeder_stats_json_file, "stage_results", get_upgrade_stage_stats(dss, upgrade_stage="final", upgrade_type="thermal", xfmr_loading_df=xfmr_loading_df, line_loading_df=line_loading_df, 
+                                        bus_voltages_df=bus_voltages_df, capacitors_df=capacitors_df, regcontrols_df=regcontrols_df), indent=2)
     end_time = time.time()
     logger.info(f"Simulation end time: {end_time}")
     simulation_time = end_time - start_time
@@ -297,12 +327,13 @@ def determine_thermal_upgrades(
         line_upper_limit=thermal_config['line_upper_limit'],
         num_transformer_violations=len(overloaded_xfmr_list),
         transformer_upper_limit=thermal_config['transformer_upper_limit'],
+        stage_status=budget.status,
+        budget_exhausted_reason=budget.exhausted_reason,
     )
     temp_results = dict(final_results)
     temp_results = convert_dict_nan_to_none(temp_results)
-    if os.path.exists(overall_output_summary_filepath):
-        overall_outputs = load_data(overall_output_summary_filepath)
-        overall_outputs["violation_summary"].append(temp_results)
-    else:
-        overall_outputs = {"violation_summary": [temp_results]}
-    dump_data(overall_outputs, overall_output_summary_filepath, indent=2, allow_nan=False)
+    session.append_output(overall_output_summary_filepath, "violation_summary", temp_results, indent=2, allow_nan=False)
+    if multiplier_type == LoadMultiplierType.ORIGINAL:
+        # The final checks did not change the upgraded circuit. The voltage stage starts from it.
+        session.hand_over_circuit(dss_file_list=initial_dss_file_list + [thermal_upgrades_dss_filepath],
+                                  **simulation_params)
@@ -4,7 +4,6 @@ import os
 import time
 
 from jade.utils.timing_utils import track_timing, Timer
-from jade.utils.utils import load_data, dump_data
 
 from .fixed_upgrade_parameters import (
     DEFAULT_CAPACITOR_SETTINGS,
@@ -12,6 +11,9 @@ from .fixed_upgrade_parameters import (
     DEFAULT_REGCONTROL_SETTINGS
 )
 from .voltage_upgrade_functions import *
+from .upgrade_session import UpgradeSession
+from .stage_checkpoints import VOLTAGE_STAGES
+from .stage_budget import StageBudget
 from disco.enums import LoadMultiplierType
 from disco.models.upgrade_cost_analysis_generic_output_model import UpgradeViolationResultModel, AllUpgradesTechnicalResultModel
 from disco import timer_stats_collector
@@ -36,16 +38,23 @@ def determine_voltage_upgrades(
     overall_output_summary_filepath,
     dc_ac_ratio,
     ignore_switch=True,
-    verbose=False
+    verbose=False,
+    session=None,
+    warm_start_seed=None,
+    checkpoints=None,
 ):
+    if session is None:
+        session = UpgradeSession(in_memory=False)
     start_time = time.time()
     logger.info(f"Simulation Start time: {start_time}")
+    budget = StageBudget.from_config("voltage", voltage_config)
     timepoint_multipliers = voltage_config["timepoint_multipliers"]
     if timepoint_multipliers is not None:
         multiplier_type = LoadMultiplierType.UNIFORM
     else:
         multiplier_type = LoadMultiplierType.ORIGINAL
     create_plots = voltage_config["create_plots"]
+    defer_plot_rendering = voltage_config.get("defer_plot_rendering", False)
     # default_capacitor settings and customization
     default_capacitor_settings = DEFAULT_CAPACITOR_SETTINGS
     default_capacitor_settings["capON"] = round(
@@ -75,7 +84,7 @@ def determine_voltage_upgrades(
     initial_simulation_params = {"enable_pydss_solve": enable_pydss_solve, "pydss_volt_var_model": pydss_volt_var_model,
                                  "dc_ac_ratio": dc_ac_ratio, "max_control_iterations": voltage_config["max_control_iterations"]}
     initial_dss_file_list = [master_path, thermal_upgrades_dss_filepath]
-    simulation_params = reload_dss_circuit(dss_file_list=initial_dss_file_list, commands_list=None, **initial_simulation_params)
+    simulation_params = session.load_circuit(dss_file_list=initial_dss_file_list, **initial_simulation_params)
     simulation_params.update({"timepoint_multipliers": timepoint_multipliers, "multiplier_type": multiplier_type})
     # reading original objects (before upgrades)
     orig_ckt_info = get_circuit_info()
@@ -106,13 +115,8 @@ def determine_voltage_upgrades(
     initial_overloaded_line_list = list(initial_line_loading_df.loc[initial_line_loading_df['status'] ==
                                                                     'overloaded']['name'].unique())
 
-    if os.path.exists(feeder_stats_json_file):
-        feeder_stats = load_data(feeder_stats_json_file)
-    else:
-        feeder_stats = {"stage_results": []}
-    feeder_stats["stage_results"].append( get_upgrade_stage_stats(dss, upgrade_stage="initial", upgrade_type="voltage", xfmr_loading_df=initial_xfmr_loading_df, line_loading_df=initial_line_loading_df, 
-                                        bus_voltages_df=initial_bus_voltages_df, regcontrols_df=orig_regcontrols_df, capacitors_df=orig_capacitors_df) )
-    dump_data(feeder_stats, feeder_stats_json_file, indent=2)
+    session.append_output(feeder_stats_json_file, "stage_results", get_upgrade_stage_stats(dss, upgrade_stage="initial", upgrade_type="voltage", xfmr_loading_df=initial_xfmr_loading_df, line_loading_df=initial_line_loading_df, 
+                                        bus_voltages_df=initial_bus_voltages_df, regcontrols_df=orig_regcontrols_df, capacitors_df=orig_capacitors_df), indent=2)
     scenario = get_scenario_name(enable_pydss_solve, pydss_volt_var_model)
     initial_results = UpgradeViolationResultModel(
         name = job_name, 
@@ -137,13 +141,14 @@ def determine_voltage_upgrades(
         transformer_upper_limit = thermal_config['transformer_upper_limit'] 
     )
     temp_results = convert_dict_nan_to_none(dict(initial_results))
-    if os.path.exists(overall_output_summary_filepath):
-        overall_outputs = load_data(overall_output_summary_filepath)
-        overall_outputs["violation_summary"].append(temp_results)
-    else:
-        overall_outputs = {"violation_summary": [temp_results]}
-    dump_data(overall_outputs, overall_output_summary_filepath, indent=2, allow_nan=False)
+    session.append_output(overall_output_summary_filepath, "violation_summary", temp_results, indent=2, allow_nan=False)
     circuit_source = orig_ckt_info["source_bus"]
+    # start from the voltage upgrades of the lower penetration level. The upgrades are still reported against the
+    # original objects read above.
+    seeded = (warm_start_seed is not None) and warm_start_seed.apply(initial_dss_file_list, warm_start_seed.voltage_commands,
+                                                                     **simulation_params)
+    if seeded:
+        dss_commands_list = dss_commands_list + warm_start_seed.voltage_commands
     bus_voltages_df, undervoltage_bus_list, overvoltage_bus_list, buses_with_violations = get_bus_voltages(
                 voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, **simulation_params)    
     logger.info(f"Number of overvoltage violations: {len(overvoltage_bus_list)}")
@@ -157,7 +162,8 @@ def determine_voltage_upgrades(
     else:
         if create_plots:
             plot_voltage_violations(fig_folder=voltage_upgrades_directory, title="Bus violations before voltage upgrades_"+str(len(buses_with_violations)), 
-                                    buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True)
+                                    buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True,
+                                    defer_rendering=defer_plot_rendering)
         # change voltage checking thresholds. determine violations based on final limits
         voltage_upper_limit = voltage_config["final_upper_limit"]
         voltage_lower_limit = voltage_config["final_lower_limit"]
@@ -166,11 +172,31 @@ def determine_voltage_upgrades(
         comparison_dict = {"original": compute_voltage_violation_severity(
             voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, **simulation_params)}
         best_setting_so_far = "original"
+        circuit_commands_list = dss_commands_list
+        completed_stages = ()
+        if checkpoints is not None:
+            # resume after the last completed sub-stage of a previous run of this job
+            stage, state = checkpoints.load_last(VOLTAGE_STAGES)
+            if stage is not None:
+                logger.info(f"Resume voltage upgrades after stage {stage}")
+                completed_stages = VOLTAGE_STAGES[:VOLTAGE_STAGES.index(stage) + 1]
+                dss_commands_list = state["dss_commands_list"]
+                circuit_commands_list = state["circuit_commands_list"]
+                comparison_dict = state["comparison_dict"]
+                best_setting_so_far = state["best_setting_so_far"]
+                reload_dss_circuit(dss_file_list=initial_dss_file_list, commands_list=circuit_commands_list, **simulation_params)
+                bus_voltages_df, undervoltage_bus_list, overvoltage_bus_list, buses_with_violations = get_bus_voltages(
+                    voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, **simulation_params)
         # start with capacitors
-        if voltage_config["capacitor_action_flag"] and len(orig_capacitors_df) > 0:
+        if "capacitors" in completed_stages:
+            logger.info("Capacitor upgrades were restored from a checkpoint.")
+        elif budget.is_exhausted():
+            logger.info("Skip capacitor upgrades.")
+        elif voltage_config["capacitor_action_flag"] and len(orig_capacitors_df) > 0:
             capacitor_dss_commands = determine_capacitor_upgrades(voltage_upper_limit, voltage_lower_limit, default_capacitor_settings, orig_capacitors_df, 
                                                                   voltage_config, deciding_field, fig_folder=os.path.join(voltage_upgrades_directory, "interim"), 
-                                                                  create_plots=create_plots, circuit_source=circuit_source,**simulation_params)
+                                                                  create_plots=create_plots, defer_plot_rendering=defer_plot_rendering, circuit_source=circuit_source,
+                                                                  budget=budget, **simulation_params)
            
             bus_voltages_df, undervoltage_bus_list, overvoltage_bus_list, buses_with_violations = get_bus_voltages(
                 voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, **simulation_params)   
@@ -185,11 +211,18 @@ def determine_voltage_upgrades(
                     reload_dss_circuit(dss_file_list=initial_dss_file_list, commands_list=dss_commands_list, **simulation_params)
                     bus_voltages_df, undervoltage_bus_list, overvoltage_bus_list, buses_with_violations = get_bus_voltages(
                                     voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, **simulation_params)   
+                circuit_commands_list = dss_commands_list
+            else:
+                # the capacitor changes resolved all violations. They stay in the circuit but are not upgrades.
+                circuit_commands_list = dss_commands_list + capacitor_dss_commands
         else:
             logger.info("No capacitor banks exist in the system")
+        _save_checkpoint(checkpoints, "capacitors", completed_stages, dss_commands_list, circuit_commands_list,
+                         comparison_dict, best_setting_so_far, budget)
         # next: existing regulators
         # Do a settings sweep of existing reg control devices (other than sub LTC) after correcting their other parameters such as ratios etc
-        if voltage_config["existing_regulator_sweep_action"] and (len(orig_regcontrols_df) > 0) and (len(buses_with_violations) > 0):
+        if voltage_config["existing_regulator_sweep_action"] and (len(orig_regcontrols_df) > 0) and (len(buses_with_violations) > 0) \
+                and ("regulator_sweep" not in completed_stages) and not budget.is_exhausted():
             # first correct regcontrol parameters (ptratio) including substation LTC, if present
             # then perform settings sweep and choose best setting.
             logger.info("Settings sweep for existing reg control devices (excluding substation LTC).")
@@ -197,34 +230,42 @@ def determine_voltage_upgrades(
                                                         upper_limit=voltage_upper_limit, lower_limit=voltage_lower_limit, 
                                                         dss_file_list=initial_dss_file_list, deciding_field=deciding_field, correct_parameters=True, 
                                                         exclude_sub_ltc=True, only_sub_ltc=False, previous_dss_commands_list=dss_commands_list, 
-                                                        fig_folder=os.path.join(voltage_upgrades_directory, "interim"), create_plots=create_plots, circuit_source=circuit_source,
-                                                        title="Bus violations after existing vreg sweep",
+                                                        fig_folder=os.path.join(voltage_upgrades_directory, "interim"), create_plots=create_plots, defer_plot_rendering=defer_plot_rendering, circuit_source=circuit_source,
+                                                        title="Bus violations after existing vreg sweep", budget=budget,
                                                         **simulation_params)
             # added to commands list only if it is different from original
             dss_commands_list = dss_commands_list + reg_sweep_commands_list
+            circuit_commands_list = dss_commands_list
             # determine voltage violations after changes
             bus_voltages_df, undervoltage_bus_list, overvoltage_bus_list, buses_with_violations = get_bus_voltages(voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, **simulation_params)
-        # Writing out the results before adding new devices
-        logger.info("Write upgrades to dss file, before adding new devices.")
-        write_text_file(string_list=dss_commands_list, text_file_path=voltage_upgrades_dss_filepath)
-        # Use this block for adding a substation LTC, correcting its settings and running a sub LTC settings sweep.
-        comparison_dict["before_addition_of_new_device"]= compute_voltage_violation_severity(
-            voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, **simulation_params)
-        best_setting_so_far = "before_addition_of_new_device"
-        if (voltage_config['use_ltc_placement']) and (len(buses_with_violations) > 0):
+        _save_checkpoint(checkpoints, "regulator_sweep", completed_stages, dss_commands_list, circuit_commands_list,
+                         comparison_dict, best_setting_so_far, budget)
+        if "substation_ltc" not in completed_stages:
+            # Writing out the results before adding new devices
+            logger.info("Write upgrades to dss file, before adding new devices.")
+            write_text_file(string_list=dss_commands_list, text_file_path=voltage_upgrades_dss_filepath)
+            # Use this block for adding a substation LTC, correcting its settings and running a sub LTC settings sweep.
+            comparison_dict["before_addition_of_new_device"]= compute_voltage_violation_severity(
+                voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, **simulation_params)
+            best_setting_so_far = "before_addition_of_new_device"
+        if (voltage_config['use_ltc_placement']) and (len(buses_with_violations) > 0) and ("substation_ltc" not in completed_stages) \
+                and not budget.is_exhausted():
             subltc_results_dict = determine_substation_ltc_upgrades(voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, 
                                     orig_regcontrols_df=orig_regcontrols_df, orig_ckt_info=orig_ckt_info, circuit_source=circuit_source, 
                                     default_subltc_settings=default_subltc_settings, voltage_config=voltage_config, dss_file_list=initial_dss_file_list, 
                                     comparison_dict=comparison_dict, deciding_field=deciding_field, previous_dss_commands_list=dss_commands_list, 
-                                    best_setting_so_far=best_setting_so_far, fig_folder=os.path.join(voltage_upgrades_directory, "interim"), create_plots=create_plots, 
-                                    default_capacitor_settings=default_capacitor_settings, **simulation_params)
+                                    best_setting_so_far=best_setting_so_far, fig_folder=os.path.join(voltage_upgrades_directory, "interim"), create_plots=create_plots, defer_plot_rendering=defer_plot_rendering, 
+                                    default_capacitor_settings=default_capacitor_settings, budget=budget, **simulation_params)
             best_setting_so_far = subltc_results_dict["best_setting_so_far"]
             comparison_dict = subltc_results_dict["comparison_dict"]
             subltc_upgrade_commands = subltc_results_dict["subltc_upgrade_commands"]
             dss_commands_list = dss_commands_list + subltc_upgrade_commands
+            circuit_commands_list = dss_commands_list
             # determine voltage violations after changes
             bus_voltages_df, undervoltage_bus_list, overvoltage_bus_list, buses_with_violations = get_bus_voltages(
                 voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, **simulation_params)
+        _save_checkpoint(checkpoints, "substation_ltc", completed_stages, dss_commands_list, circuit_commands_list,
+                         comparison_dict, best_setting_so_far, budget)
 
         if len(buses_with_violations) >= min((100 * len(initial_buses_with_violations)), 500, len(dss.Circuit.AllBusNames())):
             # if number of buses with violations is very high, the loop for adding new regulators will take very long
@@ -233,21 +274,26 @@ def determine_voltage_upgrades(
                         f"number of buses with violations is {len(initial_buses_with_violations)}")
             logger.info("So disable option for addition of new regulators")
             voltage_config["place_new_regulators"] = False
-        if voltage_config["place_new_regulators"] and (len(buses_with_violations) > 0):
+        if voltage_config["place_new_regulators"] and (len(buses_with_violations) > 0) and ("new_regulators" not in completed_stages) \
+                and not budget.is_exhausted():
             new_reg_results_dict = determine_new_regulator_upgrades(voltage_config=voltage_config, buses_with_violations=buses_with_violations, 
                                              voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, 
                                              deciding_field=deciding_field, circuit_source=circuit_source, 
                                              default_regcontrol_settings=default_regcontrol_settings, comparison_dict=comparison_dict, 
                                              best_setting_so_far=best_setting_so_far, dss_file_list=initial_dss_file_list, 
                                              previous_dss_commands_list=dss_commands_list, fig_folder=os.path.join(voltage_upgrades_directory, "interim"), 
-                                             create_plots=create_plots, **simulation_params)
+                                             create_plots=create_plots, defer_plot_rendering=defer_plot_rendering, budget=budget,
+                                             **simulation_params)
             best_setting_so_far = new_reg_results_dict["best_setting_so_far"]
             comparison_dict = new_reg_results_dict["comparison_dict"]
             new_reg_upgrade_commands = new_reg_results_dict["new_reg_upgrade_commands"]
             dss_commands_list = dss_commands_list + new_reg_upgrade_commands
+            circuit_commands_list = dss_commands_list
             # determine voltage violations after changes
             bus_voltages_df, undervoltage_bus_list, overvoltage_bus_list, buses_with_violations = get_bus_voltages(
                 voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, **simulation_params)           
+        _save_checkpoint(checkpoints, "new_regulators", completed_stages, dss_commands_list, circuit_commands_list,
+                         comparison_dict, best_setting_so_far, budget)
 
     dss_commands_list.append(f"Set MaxControlIter={simulation_params['max_control_iterations']}")
     if any("new " in string.lower() for string in dss_commands_list):  # if new equipment is added.
@@ -257,6 +303,7 @@ def determine_voltage_upgrades(
     redirect_command_list = create_upgraded_master_dss(dss_file_list=initial_dss_file_list + [voltage_upgrades_dss_filepath], upgraded_master_dss_filepath=upgraded_master_dss_filepath,
                                                        original_master_filename=os.path.basename(master_path))
     write_text_file(string_list=redirect_command_list, text_file_path=upgraded_master_dss_filepath)
+    # the upgraded objects are read from a clean compilation of the upgraded circuit
     reload_dss_circuit(dss_file_list=[upgraded_master_dss_filepath], commands_list=None, **simulation_params,)
     # reading new objects (after upgrades)
     new_ckt_info = get_circuit_info()
@@ -266,9 +313,11 @@ def determine_voltage_upgrades(
     processed_reg = get_regulator_upgrades(orig_regcontrols_df=orig_regcontrols_df, new_regcontrols_df=new_regcontrols_df, 
                                            orig_xfmrs_df=orig_xfmrs_df, new_ckt_info=new_ckt_info)
     all_processed = processed_cap + processed_reg
+    if seeded:
+        warm_start_seed.mark_voltage_upgrades(all_processed)
     m = AllUpgradesTechnicalResultModel(voltage=all_processed)
     temp = { "voltage": m.dict(by_alias=True)["voltage"]}
-    dump_data(temp, output_json_voltage_upgrades_filepath, indent=2)
+    session.dump_data(temp, output_json_voltage_upgrades_filepath, indent=2)
     bus_voltages_df, undervoltage_bus_list, overvoltage_bus_list, buses_with_violations = get_bus_voltages(
         voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, **simulation_params)
     
@@ -280,14 +329,10 @@ def determine_voltage_upgrades(
     overloaded_line_list = list(line_loading_df.loc[line_loading_df['status'] == 'overloaded']['name'].unique())
     if (upgrade_status == "Voltage Upgrades Required") and create_plots:
         plot_voltage_violations(fig_folder=voltage_upgrades_directory, title="Bus violations after voltage upgrades_"+str(len(buses_with_violations)), 
-                                    buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True)
-    if os.path.exists(feeder_stats_json_file):
-        feeder_stats = load_data(feeder_stats_json_file)
-    else:
-        feeder_stats = {}
-    feeder_stats["stage_results"].append( get_upgrade_stage_stats(dss, upgrade_stage="final", upgrade_type="voltage", xfmr_loading_df=xfmr_loading_df, line_loading_df=line_loading_df, 
-                                        bus_voltages_df=bus_voltages_df, regcontrols_df=new_regcontrols_df, capacitors_df=new_capacitors_df) )
-    dump_data(feeder_stats, feeder_stats_json_file, indent=2) 
+                                    buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True,
+                                    defer_rendering=defer_plot_rendering)
+    session.append_output(feeder_stats_json_file, "stage_results", get_upgrade_stage_stats(dss, upgrade_stage="final", upgrade_type="voltage", xfmr_loading_df=xfmr_loading_df, line_loading_df=line_loading_df, 
+                                        bus_voltages_df=bus_voltages_df, regcontrols_df=new_regcontrols_df, capacitors_df=new_capacitors_df), indent=2)
     end_time = time.time()
     logger.info(f"Simulation end time: {end_time}")
     simulation_time = end_time - start_time
@@ -312,13 +357,25 @@ def determine_voltage_upgrades(
         num_line_violations = len(overloaded_line_list),
         line_upper_limit = thermal_config['line_upper_limit'],
         num_transformer_violations = len(overloaded_xfmr_list),
-        transformer_upper_limit = thermal_config['transformer_upper_limit']
+        transformer_upper_limit = thermal_config['transformer_upper_limit'],
+        stage_status = budget.status,
+        budget_exhausted_reason = budget.exhausted_reason,
     )
     temp_results = convert_dict_nan_to_none(dict(final_results))
-    if os.path.exists(overall_output_summary_filepath):
-        overall_outputs = load_data(overall_output_summary_filepath)
-        overall_outputs["violation_summary"].append(temp_results)
-    else:
-        overall_outputs = {"violation_summary": [temp_results]}
-    dump_data(overall_outputs, overall_output_summary_filepath, indent=2, allow_nan=False)
-    
\ No newline at end of file
+    session.append_output(overall_output_summary_filepath, "violation_summary", temp_results, indent=2, allow_nan=False)
+    
+
+
+def _save_checkpoint(checkpoints, stage, completed_stages, dss_commands_list, circuit_commands_list, comparison_dict,
+                     best_setting_so_far, budget):
+    """Save the state of the voltage upgrades after stage, unless it was restored from a checkpoint.
+    Stages skipped because the budget is exhausted are not saved, so that a resumed job runs them."""
+    if checkpoints is None or stage in completed_stages or budget.exhausted:
+        return
+    state = {
+        "dss_commands_list": dss_commands_list,
+        "circuit_commands_list": circuit_commands_list,
+        "comparison_dict": comparison_dict,
+        "best_setting_so_far": best_setting_so_far,
+    }
+    checkpoints.save(stage, state)
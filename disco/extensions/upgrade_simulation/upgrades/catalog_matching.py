@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+from disco.exceptions import UpgradesExternalCatalogMissingObjectDefinition
+from disco.models.upgrade_cost_analysis_generic_input_model import _extract_specific_model_properties_, TransformerCatalogModel, LineCatalogModel
+
+
+class UpgradeCatalogMatcher:
+    """Matches overloaded equipment to the upgrade options of a technical catalog.
+    The catalog is grouped by the deciding properties and sorted by rating once. All overloaded
+    equipment is then matched with one searchsorted call per group of deciding properties.
+    """
+
+    equipment_type = None
+    catalog_model = None
+    rating_column = None
+
+    def __init__(self, upgrade_options):
+        """Constructs UpgradeCatalogMatcher.
+
+        Parameters
+        ----------
+        upgrade_options : pd.DataFrame
+            Technical catalog of the equipment type. It is not modified.
+
+        """
+        self.deciding_property_list = _extract_specific_model_properties_(
+            model_name=self.catalog_model, field_type_key="deciding_property", field_type_value=True)
+        options = self.normalize(upgrade_options.copy(deep=True)).reset_index(drop=True)
+        codes, self._keys = pd.MultiIndex.from_frame(options[self.deciding_property_list]).factorize()
+        order = np.lexsort((options[self.rating_column].values, codes))
+        self._options = options.iloc[order].reset_index(drop=True)
+        self._ratings = self._options[self.rating_column].values.astype(float)
+        codes = codes[order]
+        self._starts = np.searchsorted(codes, np.arange(len(self._keys)), side="left")
+        self._ends = np.searchsorted(codes, np.arange(len(self._keys)), side="right")
+
+    @staticmethod
+    def normalize(df):
+        """Round and convert the deciding properties so that equipment and catalog keys compare equal.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+
+        Returns
+        -------
+        pd.DataFrame
+
+        """
+        df["kV"] = df["kV"].round(2)
+        return df
+
+    def match(self, equipment_df, oversize_limit):
+        """Find the smallest adequate upgrade option for each overloaded equipment.
+
+        Parameters
+        ----------
+        equipment_df : pd.DataFrame
+            Normalized overloaded equipment with the deciding properties as columns and the
+            column required_design_amp
+        oversize_limit : float
+            An option is adequate if its rating is at least required_design_amp and no more than
+            oversize_limit times required_design_amp.
+
+        Returns
+        -------
+        tuple
+            Arrays of the catalog group of each equipment and of the position of its chosen option.
+            The position is -1 if no option is adequate, in which case parallel equipment is added.
+
+        Raises
+        ------
+        UpgradesExternalCatalogMissingObjectDefinition
+            Raised if the catalog does not contain the deciding properties of an equipment.
+
+        """
+        keys = pd.MultiIndex.from_frame(equipment_df[self.deciding_property_list])
+        groups = self._keys.get_indexer(keys)
+        missing = np.flatnonzero(groups == -1)
+        if missing.size > 0:
+            key = keys[missing[0]]
+            raise UpgradesExternalCatalogMissingObjectDefinition(
+                f"{self.equipment_type} of type {dict(zip(self.deciding_property_list, list(key)))} "
+                f"not found in catalog. Please ensure catalog is complete."
+            )
+
+        required = equipment_df["required_design_amp"].values.astype(float)
+        positions = np.full(len(equipment_df), -1, dtype=int)
+        for group in np.unique(groups):
+            rows = np.flatnonzero(groups == group)
+            start, end = self._starts[group], self._ends[group]
+            candidates = start + np.searchsorted(self._ratings[start:end], required[rows], side="left")
+            found = candidates < end
+            rows, candidates = rows[found], candidates[found]
+            adequate = self._ratings[candidates] <= oversize_limit * required[rows]
+            positions[rows[adequate]] = candidates[adequate]
+        return groups, positions
+
+    def get_option(self, position):
+        """Return the option at position as a Series."""
+        return self._options.iloc[position].copy()
+
+    def get_options(self, group):
+        """Return all options of a catalog group sorted by rating."""
+        return self._options.iloc[self._starts[group]:self._ends[group]].reset_index(drop=True).copy()
+
+
+class LineCatalogMatcher(UpgradeCatalogMatcher):
+    """Matches overloaded lines to line upgrade options."""
+
+    equipment_type = "Line"
+    catalog_model = LineCatalogModel
+    rating_column = "normamps"
+
+
+class TransformerCatalogMatcher(UpgradeCatalogMatcher):
+    """Matches overloaded transformers to transformer upgrade options."""
+
+    equipment_type = "Transformer"
+    catalog_model = TransformerCatalogModel
+    rating_column = "amp_limit_per_phase"
+
+    @staticmethod
+    def normalize(df):
+        df["kV"] = df["kV"].round(2)
+        df["kVs"] = df["kVs"].apply(lambda x: [round(a, 2) for a in x])
+        # convert lists to string type (so they can be used in catalog keys)
+        df[['conns', 'kVs']] = df[['conns', 'kVs']].astype(str)
+        return df
@@ -1,4 +1,5 @@
 import os
+import re
 import math
 import logging
 import pathlib
@@ -8,6 +9,7 @@ import pandas as pd
 import opendssdirect as dss
 
 from .pydss_parameters import *
+from .stage_budget import STAGE_STATUS_BUDGET_EXHAUSTED
 from jade.utils.timing_utils import track_timing, Timer
 
 from disco import timer_stats_collector
@@ -173,6 +175,53 @@ def dss_run_command_list(command_list):
     return
 
 
+def solve_upgrade_commands_batch(commands_list, restore_circuit=None, **kwargs):
+    """This function solves the circuit once after a batch of upgrade commands has been run.
+    CalcVoltageBases is run only if the batch added new lines or transformers.
+    If the solution does not converge and restore_circuit is provided, the batch is bisected to
+    identify the first command after which the circuit does not converge.
+
+    Parameters
+    ----------
+    commands_list : list
+        Commands that have been run since the last converged solution
+    restore_circuit : callable | None
+        Restores the circuit to its state before the batch was run
+    kwargs
+
+    Raises
+    ------
+    OpenDssConvergenceError
+        Raised if the solution does not converge
+
+    """
+    if circuit_solve_and_check(calcvoltagebases=_adds_new_elements(commands_list), **kwargs):
+        return
+    if restore_circuit is None or len(commands_list) < 2:
+        raise OpenDssConvergenceError(
+            f"OpenDSS solution did not converge after a batch of {len(commands_list)} upgrade commands"
+        )
+
+    # A prefix of length num_good converges (0 is the state before the batch); num_bad does not.
+    num_good = 0
+    num_bad = len(commands_list)
+    while num_bad - num_good > 1:
+        num_commands = (num_good + num_bad) // 2
+        restore_circuit()
+        dss_run_command_list(commands_list[:num_commands])
+        if circuit_solve_and_check(calcvoltagebases=_adds_new_elements(commands_list[:num_commands]), **kwargs):
+            num_good = num_commands
+        else:
+            num_bad = num_commands
+    raise OpenDssConvergenceError(
+        f"OpenDSS solution did not converge after upgrade command: {commands_list[num_bad - 1]}"
+    )
+
+
+def _adds_new_elements(commands_list):
+    return any(re.match(r"\s*new\s+(line|transformer)\.", x, re.IGNORECASE) for x in commands_list)
+
+
 def write_text_file(string_list, text_file_path, **kwargs):
     """This function writes the string contents of a list to a text file
 
@@ -254,11 +303,20 @@ def get_dictionary_of_duplicates(df, subset, index_field):
     return mapping_dict
 
 
+LENGTH_CONVERSION = {'mm': 0.001, 'cm': 0.01, 'm': 1.0, 'km': 1000., "mi": 1609.34, "kft": 304.8,
+                     "ft": 0.3048,  "in": 0.0254,}
+
+
 def convert_length_units(length, unit_in, unit_out):
-    """Length unit converter"""
-    LENGTH_CONVERSION = {'mm': 0.001, 'cm': 0.01, 'm': 1.0, 'km': 1000., "mi": 1609.34, "kft": 304.8, 
-          "ft": 0.3048,  "in": 0.0254,}
-    return length*LENGTH_CONVERSION[unit_in]/LENGTH_CONVERSION[unit_out]
+    """Length unit converter. length and unit_in can also be columns (pd.Series) of a dataframe."""
+    if isinstance(unit_in, pd.Series):
+        factor_in = unit_in.map(LENGTH_CONVERSION)
+        unknown_units = unit_in.loc[factor_in.isna()].unique()
+        if len(unknown_units) > 0:
+            raise KeyError(f"Unknown length units: {list(unknown_units)}")
+    else:
+        factor_in = LENGTH_CONVERSION[unit_in]
+    return length*factor_in/LENGTH_CONVERSION[unit_out]
 
 
 def get_scenario_name(enable_pydss_solve, pydss_volt_var_model):
@@ -446,6 +504,7 @@ def summarize_upgrades_outputs(overall_outputs, **kwargs):
     thermal_violations = sum(violation_summary.loc[(violation_summary["stage"] == "final") & (violation_summary["upgrade_type"] == "thermal")][["num_line_violations", "num_transformer_violations"]].sum())
     voltage_violations = sum(violation_summary.loc[(violation_summary["stage"] == "final") & (violation_summary["upgrade_type"] == "voltage")][["num_voltage_violation_buses"]].sum())
     summary["results"]["num_violations"] = thermal_violations + voltage_violations
+    summary["results"]["budget_exhausted"] = bool((violation_summary["stage_status"] == STAGE_STATUS_BUDGET_EXHAUSTED).any())
     if overall_outputs["costs_per_equipment"]:
         summary["results"]["total_cost_usd"] = pd.DataFrame(overall_outputs["costs_per_equipment"])["total_cost_usd"].sum()
     else:
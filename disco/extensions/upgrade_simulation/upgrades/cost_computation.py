@@ -1,13 +1,12 @@
-import os
 import logging
 import pandas as pd
 import numpy as np
 
 from jade.utils.timing_utils import track_timing, Timer
-from jade.utils.utils import load_data, dump_data
 
 from .common_functions import create_overall_output_file, convert_dict_nan_to_none, summarize_upgrades_outputs, \
     convert_length_units
+from .upgrade_session import UpgradeSession
 from disco import timer_stats_collector
 from disco.utils.custom_encoders import ExtendedJSONEncoder
 from disco.models.upgrade_cost_analysis_generic_input_model import load_cost_database
@@ -28,16 +27,21 @@ def compute_all_costs(
     output_total_upgrade_costs_filepath,
     overall_output_summary_filepath,
     feeder_stats_json_file,
+    session=None,
 ):
+    if session is None:
+        session = UpgradeSession(in_memory=False)
     # upgrades files
     all_upgrades = {}
-    all_upgrades.update(load_data(output_json_voltage_upgrades_filepath))
-    all_upgrades.update(load_data(output_json_thermal_upgrades_filepath))
+    all_upgrades.update(session.load_data(output_json_voltage_upgrades_filepath))
+    all_upgrades.update(session.load_data(output_json_thermal_upgrades_filepath))
     # validate upgrades details for thermal and voltage, using pydantic models
     m = AllUpgradesTechnicalResultModel(**all_upgrades)
     xfmr_upgrades_df = pd.DataFrame(m.dict(by_alias=True)["transformer"])
     line_upgrades_df = pd.DataFrame(m.dict(by_alias=True)["line"])
     voltage_upgrades_df = pd.DataFrame(m.dict(by_alias=True)["voltage"])
+    xfmr_upgrades_df = drop_reupgraded_inherited_upgrades(xfmr_upgrades_df)
+    line_upgrades_df = drop_reupgraded_inherited_upgrades(line_upgrades_df)
     
     (
         xfmr_cost_database,
@@ -69,13 +73,16 @@ def compute_all_costs(
     thermal_cost_df = pd.concat([xfmr_cost_df, line_cost_df])
 
     if not voltage_upgrades_df.empty:
-        # compute voltage upgrade costs
-        cap_cost_df = compute_capcontrol_cost(voltage_upgrades_df=voltage_upgrades_df,
-                                            controls_cost_database=controls_cost_database)
-        reg_cost_df = compute_voltage_regcontrol_cost(voltage_upgrades_df=voltage_upgrades_df,
-                                                    vreg_control_cost_database=controls_cost_database, 
-                                                    vreg_xfmr_cost_database=voltage_regulators_cost_database, xfmr_cost_database=xfmr_cost_database)
-        voltage_cost_df = pd.concat([cap_cost_df, reg_cost_df])
+        # compute voltage upgrade costs. Costs of upgrades inherited from a warm start are reported separately.
+        voltage_cost_list = []
+        for inherited, upgrades_df in voltage_upgrades_df.groupby("inherited"):
+            cap_cost_df = compute_capcontrol_cost(voltage_upgrades_df=upgrades_df,
+                                                controls_cost_database=controls_cost_database)
+            reg_cost_df = compute_voltage_regcontrol_cost(voltage_upgrades_df=upgrades_df,
+                                                        vreg_control_cost_database=controls_cost_database, 
+                                                        vreg_xfmr_cost_database=voltage_regulators_cost_database, xfmr_cost_database=xfmr_cost_database)
+            voltage_cost_list.append(pd.concat([cap_cost_df, reg_cost_df]).assign(inherited=inherited))
+        voltage_cost_df = pd.concat(voltage_cost_list)
         voltage_cost_df["name"] = job_name
     else:
         voltage_cost_df = pd.DataFrame(columns=output_columns).astype({"count": int, "total_cost_usd": float})
@@ -84,18 +91,18 @@ def compute_all_costs(
     thermal_cost_df = thermal_cost_df.loc[thermal_cost_df["count"] != 0]
     total_cost_df = get_total_costs(thermal_cost_df, voltage_cost_df)
     equipment_costs = AllEquipmentUpgradeCostsResultModel(thermal=thermal_cost_df.to_dict('records'), voltage=voltage_cost_df.to_dict('records'))
-    dump_data(convert_dict_nan_to_none(equipment_costs.dict(by_alias=True)), 
+    session.dump_data(convert_dict_nan_to_none(equipment_costs.dict(by_alias=True)), 
               output_equipment_upgrade_costs_filepath, indent=2, cls=ExtendedJSONEncoder, allow_nan=False)
     total_cost_df["name"] = job_name
     m = [TotalUpgradeCostsResultModel(**x) for x in total_cost_df.to_dict(orient="records")]
     total_costs_per_equipment = convert_dict_nan_to_none({"costs_per_equipment": total_cost_df.to_dict('records')})
-    feeder_stats = load_data(feeder_stats_json_file)
+    feeder_stats = session.load_data(feeder_stats_json_file)
     output_summary = create_overall_output_file(upgrades_dict={"transformer": xfmr_upgrades_df, "line": line_upgrades_df, "voltage": voltage_upgrades_df},
                                                 costs_dict={"thermal": thermal_cost_df, "voltage": voltage_cost_df}, feeder_stats=feeder_stats, job_name=job_name)
     output_summary_model = AllUpgradesCostResultSummaryModel(equipment=output_summary.to_dict(orient="records"))
     output_summary = convert_dict_nan_to_none(output_summary_model.dict(by_alias=True))
-    if os.path.exists(overall_output_summary_filepath):
-        overall_outputs = load_data(overall_output_summary_filepath)
+    if session.has_output(overall_output_summary_filepath):
+        overall_outputs = session.load_data(overall_output_summary_filepath)
         overall_outputs.update(total_costs_per_equipment)
     else:
         overall_outputs = total_costs_per_equipment
@@ -103,9 +110,30 @@ def compute_all_costs(
     overall_outputs.update(summarize_upgrades_outputs(overall_outputs, job_name=job_name))
     desired_order_list = ["results", "costs_per_equipment", "violation_summary", "equipment"]
     reordered_dict = {k: overall_outputs[k] for k in desired_order_list}
-    dump_data(reordered_dict, overall_output_summary_filepath, indent=2, cls=ExtendedJSONEncoder, allow_nan=False) 
+    session.dump_data(reordered_dict, overall_output_summary_filepath, indent=2, cls=ExtendedJSONEncoder, allow_nan=False) 
     
 
+def drop_reupgraded_inherited_upgrades(upgrades_df):
+    """Drop the upgrades inherited from a warm start of equipment that the job upgrades again.
+    Otherwise, that equipment is costed twice compared with a cold start.
+
+    Parameters
+    ----------
+    upgrades_df : pd.DataFrame
+        Line or transformer upgrades
+
+    Returns
+    -------
+    pd.DataFrame
+
+    """
+    if upgrades_df.empty:
+        return upgrades_df
+    inherited = upgrades_df["inherited"] == True
+    reupgraded = upgrades_df.loc[~inherited, "original_equipment_name"]
+    return upgrades_df.loc[~(inherited & upgrades_df["original_equipment_name"].isin(reupgraded))]
+
+
 def compute_transformer_costs(xfmr_upgrades_df, xfmr_cost_database, **kwargs):
     """This function computes the transformer costs.
     -Unit equipment cost for new_parallel and "upgrade" transformers are the same in the database.
@@ -134,68 +162,164 @@ def compute_transformer_costs(xfmr_upgrades_df, xfmr_cost_database, **kwargs):
     output_count_field = "count"
     deciding_columns = ["rated_kVA", "phases", "primary_kV", "secondary_kV", "primary_connection_type",
                         "secondary_connection_type", "num_windings"]
-    output_columns_list = ["type", output_count_field, output_cost_field, "comment", "equipment_parameters"]
+    output_columns_list = ["type", output_count_field, output_cost_field, "comment", "equipment_parameters", "inherited"]
     backup_deciding_property = kwargs.get("backup_deciding_property", "rated_kVA")
     misc_database = kwargs.get("misc_database", None)
     # choose which properties are to be saved
     upgrade_type_list = ["upgrade", "new_parallel"]
     added_xfmr_df = xfmr_upgrades_df.loc[(xfmr_upgrades_df["upgrade_type"].isin(upgrade_type_list)) & (xfmr_upgrades_df["action"] == "add")]
-    computed_cost = []
-    for index, row in added_xfmr_df.iterrows():
-        unit_cost = xfmr_cost_database.loc[(xfmr_cost_database["rated_kVA"] == row["rated_kVA"]) &
-                                           (xfmr_cost_database["phases"] == row["phases"]) &
-                                           (xfmr_cost_database["primary_kV"] == row["primary_kV"]) &
-                                           (xfmr_cost_database["secondary_kV"] == row["secondary_kV"]) &
-                                           (xfmr_cost_database["primary_connection_type"] == row["primary_connection_type"]) &
-                                           (xfmr_cost_database["secondary_connection_type"] == row["secondary_connection_type"]) &
-                                           (xfmr_cost_database["num_windings"] == row["num_windings"])
-                                           ]["cost"]
-        params_dict = dict(row[['final_equipment_name'] + deciding_columns])
-        row["equipment_parameters"] = params_dict
-        row["type"] = "Transformer"
-        if len(unit_cost) > 0:  # if there are more than one rows, the first one is chosen in random
-            unit_cost = unit_cost.values[0]
-            row[output_cost_field] = unit_cost
-            row["comment"] = ""
-            row[output_count_field] = 1
-        else:  # if costs are not present for this transformer, then choose closest rated_kVA
-            # (or whatever backup deciding property is passed) (ignore other properties)
-            closest = xfmr_cost_database.loc[abs(xfmr_cost_database[backup_deciding_property] -
-                                                 row[backup_deciding_property]).idxmin()].copy()
-            row[output_cost_field] = closest["cost"]
-            row[output_count_field] = 1
-            for key, value in closest.items():  # make it json serializable
-                if isinstance(value, np.int64):
-                    closest[key] = int(value)
-            comment_string = {"text": f"Transformer {row['final_equipment_name']}: Exact cost not available. " \
-                                      f"Unit cost for transformer with these parameters used " \
-                                      f"(based on closest {backup_deciding_property}", 
-                             "params": dict(closest)}
-            logger.debug(comment_string)
-            row["comment"] = comment_string
-        # add transformer fixed costs, if given in database. (depending on upgrade type)
-        if (misc_database is not None) and (not misc_database.empty):
-            misc_xfmr_fields = {"replace": "Replace transformer (fixed cost)",
-                                "new": "Add new transformer (fixed cost)"}
-            # if equipment is upgraded, and misc database contains fixed cost for replacing xfmr
-            if (row["upgrade_type"].lower() == "upgrade") and \
-                    ((misc_database["description"] == misc_xfmr_fields["replace"]).any()):
-                field_name = misc_xfmr_fields["replace"]
-                fixed_cost = misc_database.loc[misc_database["description"] == field_name]
-            # if equipment is new, and misc database contains fixed cost for adding new xfmr
-            elif row["upgrade_type"].lower() == "new_parallel" and \
-                    ((misc_database["description"] == misc_xfmr_fields["new"]).any()):
-                field_name = misc_xfmr_fields["new"]
-                fixed_cost = misc_database.loc[misc_database["description"] == field_name]
-            else:
-                fixed_cost = pd.DataFrame()
-            if not fixed_cost.empty:
-                row[output_cost_field] += misc_database.loc[misc_database["description"]
-                                                            == field_name]["total_cost"].values[0]
-
-        computed_cost.append(row[output_columns_list])
-    xfmr_cost_df = pd.DataFrame(computed_cost)
-    return xfmr_cost_df
+    # if there are more than one matching rows in the database, the first one is chosen.
+    # if costs are not present for a transformer, then the closest rated_kVA is chosen
+    # (or whatever backup deciding property is passed) (ignore other properties)
+    unit_costs = lookup_unit_costs(upgrades_df=added_xfmr_df, cost_database=xfmr_cost_database, cost_column="cost",
+                                   deciding_columns=deciding_columns, backup_deciding_property=backup_deciding_property)
+    xfmr_cost_df = pd.DataFrame(index=added_xfmr_df.index)
+    xfmr_cost_df["type"] = "Transformer"
+    xfmr_cost_df[output_count_field] = 1
+    # add transformer fixed costs, if given in database. (depending on upgrade type)
+    xfmr_cost_df[output_cost_field] = unit_costs["unit_cost"] + get_transformer_fixed_costs(
+        upgrade_types=added_xfmr_df["upgrade_type"], misc_database=misc_database)
+    xfmr_cost_df["comment"] = get_closest_cost_comments(
+        names=added_xfmr_df["final_equipment_name"], closest=unit_costs["closest"], equipment="transformer",
+        backup_deciding_property=backup_deciding_property)
+    xfmr_cost_df["equipment_parameters"] = added_xfmr_df[['final_equipment_name'] + deciding_columns].to_dict(orient="records")
+    xfmr_cost_df["inherited"] = added_xfmr_df["inherited"]
+    return xfmr_cost_df[output_columns_list]
+
+
+def get_transformer_fixed_costs(upgrade_types, misc_database):
+    """This function returns the fixed cost of each added transformer, if given in the misc database.
+    Upgraded transformers get the cost of replacing a transformer, new parallel transformers get
+    the cost of adding a new transformer.
+
+    Parameters
+    ----------
+    upgrade_types : pd.Series
+        upgrade_type of each transformer
+    misc_database : pd.DataFrame | None
+
+    Returns
+    -------
+    pd.Series
+        Fixed costs with the same index as upgrade_types
+
+    """
+    fixed_costs = pd.Series(0.0, index=upgrade_types.index)
+    if (misc_database is None) or misc_database.empty:
+        return fixed_costs
+    misc_xfmr_fields = {"upgrade": "Replace transformer (fixed cost)",
+                        "new_parallel": "Add new transformer (fixed cost)"}
+    for upgrade_type, field_name in misc_xfmr_fields.items():
+        fixed_cost = misc_database.loc[misc_database["description"] == field_name]["total_cost"]
+        if not fixed_cost.empty:
+            fixed_costs.loc[upgrade_types.str.lower() == upgrade_type] = fixed_cost.values[0]
+    return fixed_costs
+
+
+def lookup_unit_costs(upgrades_df, cost_database, cost_column, deciding_columns, backup_deciding_property):
+    """This function looks up the unit cost of each upgrade in a cost database with vectorized joins.
+    -An upgrade gets the unit cost of the first database row that matches all deciding columns.
+    -If no row matches, it gets the unit cost of the first database row with the closest
+    backup_deciding_property.
+
+    Parameters
+    ----------
+    upgrades_df : pd.DataFrame
+    cost_database : pd.DataFrame
+    cost_column : str
+        Unit cost column of the database
+    deciding_columns : list
+    backup_deciding_property : str
+
+    Returns
+    -------
+    pd.DataFrame
+        Same index as upgrades_df. Columns: unit_cost, and closest: None if the unit cost is exact,
+        otherwise the database row used, as a dict
+
+    """
+    cost_database = cost_database.reset_index(drop=True)
+    # merge would match null keys with each other, unlike an equality comparison
+    exact_costs = cost_database.dropna(subset=deciding_columns).drop_duplicates(subset=deciding_columns, keep="first")
+    exact_costs = exact_costs[deciding_columns + [cost_column]].rename(columns={cost_column: "unit_cost"})
+    merged = upgrades_df[deciding_columns].merge(exact_costs, on=deciding_columns, how="left", indicator=True)
+    unit_cost = merged["unit_cost"].to_numpy(dtype=float)
+    closest = np.full(len(upgrades_df), None, dtype=object)
+    no_exact_cost = (merged["_merge"] == "left_only").to_numpy()
+    if no_exact_cost.any():
+        positions = find_closest_rows(values=cost_database[backup_deciding_property],
+                                      targets=upgrades_df.loc[no_exact_cost, backup_deciding_property])
+        unit_cost[no_exact_cost] = cost_database[cost_column].to_numpy(dtype=float)[positions]
+        records = cost_database.to_dict(orient="records")  # json serializable
+        closest[no_exact_cost] = [records[x] for x in positions]
+    return pd.DataFrame({"unit_cost": unit_cost, "closest": closest}, index=upgrades_df.index)
+
+
+def find_closest_rows(values, targets):
+    """This function returns the position of the closest value for each target.
+    If several values are equally close, the first one is chosen, like idxmin.
+    Uses merge_asof on the sorted values in both directions instead of a search per target.
+
+    Parameters
+    ----------
+    values : pd.Series
+    targets : pd.Series
+
+    Returns
+    -------
+    np.ndarray
+        Positions in values, in the order of targets
+
+    """
+    candidates = pd.DataFrame({"value": values.to_numpy(dtype=float), "position": np.arange(len(values))})
+    candidates = candidates.dropna().drop_duplicates(subset="value", keep="first").sort_values("value")
+    queries = pd.DataFrame({"target": targets.to_numpy(dtype=float), "order": np.arange(len(targets))})
+    queries = queries.sort_values("target")
+    below, above = [
+        pd.merge_asof(queries, candidates, left_on="target", right_on="value", direction=direction).sort_values("order")
+        for direction in ("backward", "forward")
+    ]
+    distance_below = (below["target"] - below["value"]).abs().to_numpy()
+    distance_above = (above["target"] - above["value"]).abs().to_numpy()
+    position_below = below["position"].to_numpy()
+    position_above = above["position"].to_numpy()
+    choose_below = np.isnan(distance_above) | (distance_below < distance_above) | \
+        ((distance_below == distance_above) & (position_below < position_above))
+    return np.where(choose_below, position_below, position_above).astype(int)
+
+
+def get_closest_cost_comments(names, closest, equipment, backup_deciding_property, ending=""):
+    """This function returns the cost comment of each upgrade: empty if the unit cost is exact,
+    otherwise the database row that was used instead.
+
+    Parameters
+    ----------
+    names : pd.Series
+    closest : pd.Series
+        closest column returned by lookup_unit_costs
+    equipment : str
+        transformer or line
+    backup_deciding_property : str
+    ending : str
+        appended to the comment text
+
+    Returns
+    -------
+    list
+
+    """
+    comments = []
+    for name, params in zip(names, closest):
+        if params is None:
+            comments.append("")
+            continue
+        comment_string = {"text": f"{equipment.capitalize()} {name}: Exact cost not available. " \
+                                  f"Unit cost for {equipment} with these parameters used " \
+                                  f"(based on closest {backup_deciding_property}{ending}",
+                          "params": params}
+        logger.debug(comment_string)
+        comments.append(comment_string)
+    return comments
 
 
 def reformat_xfmr_files(xfmr_upgrades_df, xfmr_cost_database):
@@ -268,58 +392,33 @@ def compute_line_costs(line_upgrades_df, line_cost_database, **kwargs):
     output_cost_field = "total_cost_usd"
     output_count_field = "count"
     deciding_columns = ["phases", "voltage_kV", "ampere_rating", "line_placement", "upgrade_type"]
-    output_columns_list = ["type", output_count_field, output_cost_field, "comment", "equipment_parameters"]
+    output_columns_list = ["type", output_count_field, output_cost_field, "comment", "equipment_parameters", "inherited"]
     backup_deciding_property = kwargs.get("backup_deciding_property", "ampere_rating")
     # choose which properties are to be saved
     upgrade_type_list = ["upgrade", "new_parallel"]
     
     added_line_df = line_upgrades_df.loc[(line_upgrades_df["upgrade_type"].isin(upgrade_type_list)) & (line_upgrades_df["action"] == "add")]
-    computed_cost = []
-    for index, row in added_line_df.iterrows():
-        if row["upgrade_type"] == "upgrade":
-            upgrade_type = "reconductored_line"
-        elif row["upgrade_type"] == "new_parallel":
-            upgrade_type = "new_line"
-        else:
-            # if anything else, by default, use new_line prices
-            upgrade_type = "new_line"
-        row["upgrade_type"] = upgrade_type
-        unit_cost = line_cost_database.loc[(line_cost_database["phases"] == row["phases"]) &
-                                           (line_cost_database["voltage_kV"] == row["voltage_kV"]) &
-                                           (line_cost_database["ampere_rating"] == row["ampere_rating"]) &
-                                           (line_cost_database["line_placement"] == row["line_placement"]) &
-                                           (line_cost_database["upgrade_type"] == upgrade_type)
-                                           ]["cost_per_m"]
-        # OpenDSS can output results in any of these lengths.
-        # convert line length to metres
-        line_length_m = convert_length_units(length=row["length"], unit_in=row["units"], unit_out="m")
-        params_dict = dict(row[['final_equipment_name'] + deciding_columns])
-        row["equipment_parameters"] = params_dict
-        row["type"] = "Line"
-        if len(unit_cost) > 0:  # if there are more than one rows, the first one is chosen in random
-            unit_cost = unit_cost.values[0]
-            row[output_cost_field] = unit_cost * line_length_m
-            row[output_count_field] = 1
-            row["comment"] = ""
-        else:  # if costs are not present for this transformer, then choose closest ampere_rating
-            # (or whatever backup deciding property is passed) (ignore other properties)
-            closest = line_cost_database.loc[abs(line_cost_database[backup_deciding_property] -
-                                                 row[backup_deciding_property]).idxmin()].copy()
-            row[output_cost_field] = closest["cost_per_m"] * line_length_m
-            for key, value in closest.items():  # make it json serializable
-                if isinstance(value, np.int64):
-                    closest[key] = int(value)
-            comment_string = {"text": f"Line {row['final_equipment_name']}: Exact cost not available. " \
-                                      f"Unit cost for line with these parameters used " \
-                                      f"(based on closest {backup_deciding_property}.",
-                             "params": dict(closest)}
-            
-            logger.debug(comment_string)
-            row["comment"] = comment_string
-            row[output_count_field] = 1
-        computed_cost.append(row[output_columns_list])
-    line_cost_df = pd.DataFrame(computed_cost)
-    return line_cost_df
+    # reconductored line prices for upgraded lines. if anything else, by default, use new_line prices
+    added_line_df = added_line_df.assign(
+        upgrade_type=np.where(added_line_df["upgrade_type"] == "upgrade", "reconductored_line", "new_line"))
+    # OpenDSS can output results in any of these lengths.
+    # convert line length to metres
+    line_length_m = convert_length_units(length=added_line_df["length"], unit_in=added_line_df["units"], unit_out="m")
+    # if there are more than one matching rows in the database, the first one is chosen.
+    # if costs are not present for a line, then the closest ampere_rating is chosen
+    # (or whatever backup deciding property is passed) (ignore other properties)
+    unit_costs = lookup_unit_costs(upgrades_df=added_line_df, cost_database=line_cost_database, cost_column="cost_per_m",
+                                   deciding_columns=deciding_columns, backup_deciding_property=backup_deciding_property)
+    line_cost_df = pd.DataFrame(index=added_line_df.index)
+    line_cost_df["type"] = "Line"
+    line_cost_df[output_count_field] = 1
+    line_cost_df[output_cost_field] = unit_costs["unit_cost"] * line_length_m
+    line_cost_df["comment"] = get_closest_cost_comments(
+        names=added_line_df["final_equipment_name"], closest=unit_costs["closest"], equipment="line",
+        backup_deciding_property=backup_deciding_property, ending=".")
+    line_cost_df["equipment_parameters"] = added_line_df[['final_equipment_name'] + deciding_columns].to_dict(orient="records")
+    line_cost_df["inherited"] = added_line_df["inherited"]
+    return line_cost_df[output_columns_list]
 
 
 def reformat_line_files(line_upgrades_df, line_cost_database):
@@ -439,7 +538,6 @@ def compute_voltage_regcontrol_cost(voltage_upgrades_df, vreg_control_cost_datab
     type_rows = list(type_fields_dict.keys())
     
     control_computation_fields = ["add_new_reg_control", "change_reg_control"]
-    xfmr_fields = ["add_new_transformer"]
 
     empty_reg_cost_dict = {"type": type_rows, "count": [0] * len(type_rows),  "total_cost_usd": [0] * len(type_rows)}
     zero_cost_df = pd.DataFrame.from_dict(empty_reg_cost_dict)
@@ -477,57 +575,28 @@ def compute_voltage_regcontrol_cost(voltage_upgrades_df, vreg_control_cost_datab
             cost_list.append({"type": type_fields_dict[cost_field], "count": count, "total_cost_usd": total_cost, "comment": ""})
     
     # add costs for added transformers (needed for voltage regulators)
-    vreg_xfmr_cost_database = vreg_xfmr_cost_database.drop(columns=["type"])
-    vreg_xfmr_cost_database = pd.concat([vreg_xfmr_cost_database, xfmr_cost_database])
-    for field in xfmr_fields:
-        cost_field = field
-        # if at substation
-        new_xfmr_added_df = reg_upgrades_df.loc[reg_upgrades_df[upgrade_fields_dict["add_new_transformer"]] == True]    
-        for index, row in new_xfmr_added_df.iterrows():
-            output_row = {}
-            added_xfmr_details = row["final_settings"]
-            added_xfmr_details = reformat_xfmr_upgrades_file(pd.DataFrame([added_xfmr_details]))
-            deciding_columns = ["rated_kVA", "phases", "primary_kV", "secondary_kV", "primary_connection_type",
-                        "secondary_connection_type", "num_windings"]
-            params_dict = added_xfmr_details[["name"] + deciding_columns].to_dict(orient="records")[0]
-            added_xfmr_details = added_xfmr_details.to_dict(orient="records")[0]
-            output_row["equipment_parameters"] = params_dict
-            # reformat xfmr dict
-            unit_cost = vreg_xfmr_cost_database.loc[(vreg_xfmr_cost_database["rated_kVA"] == added_xfmr_details["rated_kVA"]) &
-                                            (vreg_xfmr_cost_database["primary_kV"] == added_xfmr_details["primary_kV"]) &
-                                            (vreg_xfmr_cost_database["secondary_kV"] == added_xfmr_details["secondary_kV"]) &
-                                            (vreg_xfmr_cost_database["phases"] == added_xfmr_details["phases"]) &
-                                            (vreg_xfmr_cost_database["num_windings"] == added_xfmr_details["num_windings"]) &
-                                            (vreg_xfmr_cost_database["primary_connection_type"] == added_xfmr_details["primary_connection_type"]) &
-                                            (vreg_xfmr_cost_database["secondary_connection_type"] == added_xfmr_details["secondary_connection_type"])
-                                            ]["cost"]
-            if len(unit_cost) > 0:  # if there are more than one rows, the first one is chosen in random
-                unit_cost = unit_cost.values[0]
-                output_row[output_cost_field] = unit_cost
-                output_row["comment"] = ""
-                output_row[output_count_field] = 1
-            else:  # if costs are not present for this transformer, then choose from other xfmr database rated_kVA
-                backup_deciding_property = "rated_kVA"
-                closest = vreg_xfmr_cost_database.loc[abs(vreg_xfmr_cost_database[backup_deciding_property] - added_xfmr_details[backup_deciding_property]).idxmin()].copy()
-                if isinstance(closest, pd.DataFrame):
-                    closest = closest.iloc[0]
-                output_row[output_cost_field] = closest["cost"]
-                output_row[output_count_field] = 1
-                for key, value in closest.items():  # make it json serializable
-                    if isinstance(value, np.int64):
-                        closest[key] = int(value)
-                comment_string =  {"text": f"Transformer {added_xfmr_details['name']}: Exact cost not available. " \
-                                           f"Unit cost for transformer with these parameters used " \
-                                           f"(based on closest {backup_deciding_property}", 
-                                  "params": dict(closest)}
-                                  
-                logger.debug(comment_string)
-                output_row["comment"] = comment_string
-            if row[upgrade_fields_dict["at_substation"]]:
-                output_row["type"] = type_fields_dict["add_new_substation_transformer"]
-            else: 
-                output_row["type"] = type_fields_dict["add_new_vreg_transformer"]
-            cost_list.append(output_row)
+    new_xfmr_added_df = reg_upgrades_df.loc[reg_upgrades_df[upgrade_fields_dict["add_new_transformer"]] == True]
+    if not new_xfmr_added_df.empty:
+        added_xfmr_df = reformat_xfmr_upgrades_file(
+            pd.DataFrame(new_xfmr_added_df["final_settings"].tolist(), index=new_xfmr_added_df.index))
+        deciding_columns = ["rated_kVA", "phases", "primary_kV", "secondary_kV", "primary_connection_type",
+                            "secondary_connection_type", "num_windings"]
+        # if costs are not present for this transformer, then choose from other xfmr database rated_kVA
+        backup_deciding_property = "rated_kVA"
+        vreg_xfmr_cost_database = pd.concat([vreg_xfmr_cost_database.drop(columns=["type"]), xfmr_cost_database],
+                                            ignore_index=True)
+        unit_costs = lookup_unit_costs(upgrades_df=added_xfmr_df, cost_database=vreg_xfmr_cost_database, cost_column="cost",
+                                       deciding_columns=deciding_columns, backup_deciding_property=backup_deciding_property)
+        xfmr_cost_df = pd.DataFrame({
+            "type": np.where(new_xfmr_added_df[upgrade_fields_dict["at_substation"]],
+                             type_fields_dict["add_new_substation_transformer"], type_fields_dict["add_new_vreg_transformer"]),
+            output_count_field: 1,
+            output_cost_field: unit_costs["unit_cost"].to_numpy(),
+            "comment": get_closest_cost_comments(
+                names=added_xfmr_df["name"], closest=unit_costs["closest"], equipment="transformer",
+                backup_deciding_property=backup_deciding_property),
+        })
+        cost_list.extend(xfmr_cost_df.to_dict(orient="records"))
 
     reg_cost_df = pd.DataFrame(cost_list)
     reg_cost_df = reg_cost_df[output_columns_list]
@@ -538,7 +607,8 @@ def get_total_costs(thermal_cost_df, voltage_cost_df):
     """This function combines voltage and thermal upgrades costs into one file.
     """
     total_cost_df = pd.concat([thermal_cost_df, voltage_cost_df])
-    total_cost_df = total_cost_df.groupby('type').sum(numeric_only=True)
+    total_cost_df["inherited_cost_usd"] = total_cost_df["total_cost_usd"].where(total_cost_df["inherited"] == True, 0.0)
+    total_cost_df = total_cost_df.drop(columns="inherited").groupby('type').sum(numeric_only=True)
     total_cost_df.reset_index(inplace=True)
     return total_cost_df
 
@@ -0,0 +1,254 @@
+"""Rendering of upgrade figures from recorded plot data.
+
+The plot functions in voltage_upgrade_functions collect the data that a figure needs (bus
+coordinates, feeder edges, violations, clusters) from the active OpenDSS circuit. That data can
+either be rendered immediately or recorded as a compact JSON artifact and rendered later, possibly
+in a different process, with the functions in this module. Nothing in this module requires
+OpenDSS.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import networkx as nx
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from jade.utils.utils import load_data, dump_data
+
+
+logger = logging.getLogger(__name__)
+
+PLOT_DATA_DIRECTORY = "plot_data"
+PLOT_ARTIFACT_SUFFIX = ".plot.json"
+LAYOUT_ARTIFACT_SUFFIX = ".layout.json"
+
+NODE_COLORLEGEND = {'Load': {'node_color': 'blue', 'node_size': 20, "alpha": 1, "label": "Load"},
+                'PV': {'node_color': 'orange', 'node_size': 50, "alpha": 0.8, "label": "PV"},
+                'Transformer': {'node_color': 'purple', 'node_size': 250, "alpha": 0.75, "label": "Transformer"},
+                'Circuit Source': {'node_color': 'black', 'node_size': 500, "alpha": 1, "label": "Source"},
+                'Violation': {'node_color': 'red', 'node_size': 500, "alpha": 0.75, "label": "Violation"},
+                'Capacitor': {'node_color': 'green', 'node_size': 100, "alpha": 0.75, "label": "Capacitor"},
+                'Voltage Regulator': {'node_color': 'cyan', 'node_size': 1000, "alpha": 0.75, "label": "Voltage Regulator"},
+                }
+EDGE_COLORLEGEND = {'Violation': {'edge_color': 'violet', 'edge_size': 75, 'alpha': 0.75, "label": "Line Violation"}}
+
+DEFAULT_NODE_SIZE = 2
+DEFAULT_NODE_COLOR = 'black'
+
+
+def get_figure_filename(title):
+    """Return the figure filename for a plot title."""
+    title = title.lower()
+    title = title.replace(" ", "_")
+    return title + ".pdf"
+
+
+def save_or_render_plot(fig_folder, plot_data, defer_rendering=False):
+    """Render the plot described by plot_data into fig_folder, or record it for later rendering.
+
+    Parameters
+    ----------
+    fig_folder : str
+    plot_data : dict
+        Contains keys plot_type, title, positions, edges and any plot-type-specific data.
+    defer_rendering : bool
+        If True, write plot_data as an artifact in fig_folder/plot_data instead of rendering it.
+
+    """
+    os.makedirs(fig_folder, exist_ok=True)
+    if defer_rendering:
+        record_plot_artifact(fig_folder, plot_data)
+    else:
+        render_plot(fig_folder, plot_data)
+
+
+def record_plot_artifact(fig_folder, plot_data):
+    """Write plot_data to a JSON artifact. The feeder layout is stored once per distinct layout
+    and shared by all artifacts in the directory.
+
+    Returns
+    -------
+    Path
+        Path to the artifact
+
+    """
+    data_dir = Path(fig_folder) / PLOT_DATA_DIRECTORY
+    data_dir.mkdir(parents=True, exist_ok=True)
+    artifact = dict(plot_data)
+    layout = {"positions": artifact.pop("positions"), "edges": artifact.pop("edges")}
+    text = json.dumps(layout, sort_keys=True)
+    layout_name = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16] + LAYOUT_ARTIFACT_SUFFIX
+    layout_file = data_dir / layout_name
+    if not layout_file.exists():
+        layout_file.write_text(text)
+    artifact["layout"] = layout_name
+    stem = get_figure_filename(artifact["title"])[:-len(".pdf")]
+    filename = data_dir / (stem + PLOT_ARTIFACT_SUFFIX)
+    dump_data(artifact, filename)
+    logger.debug("Recorded plot data for %s in %s", artifact["title"], filename)
+    return filename
+
+
+def load_plot_artifact(filename):
+    """Load a plot artifact along with its layout."""
+    filename = Path(filename)
+    plot_data = load_data(filename)
+    layout = load_data(filename.parent / plot_data.pop("layout"))
+    plot_data.update(layout)
+    return plot_data
+
+
+def list_plot_artifacts(directory):
+    """Return all plot artifacts recorded under directory.
+
+    Returns
+    -------
+    list
+        list of Path
+
+    """
+    return sorted(Path(directory).rglob(f"{PLOT_DATA_DIRECTORY}/*{PLOT_ARTIFACT_SUFFIX}"))
+
+
+def render_plot_artifact(filename):
+    """Render one plot artifact. The figure is written to the directory that contains the
+    plot_data directory.
+
+    Returns
+    -------
+    str
+        Path to the figure
+
+    """
+    filename = Path(filename)
+    fig_folder = filename.parent.parent
+    plot_data = load_plot_artifact(filename)
+    render_plot(fig_folder, plot_data)
+    return str(fig_folder / get_figure_filename(plot_data["title"]))
+
+
+def render_plot_artifacts(directory, num_processes=None):
+    """Render all plot artifacts recorded under directory.
+
+    Parameters
+    ----------
+    directory : str
+    num_processes : int | None
+        Number of worker processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    list
+        Paths to the rendered figures
+
+    """
+    artifacts = list_plot_artifacts(directory)
+    if not artifacts:
+        logger.info("No plot artifacts found in %s", directory)
+        return []
+    if num_processes == 1:
+        figures = [render_plot_artifact(x) for x in artifacts]
+    else:
+        with ProcessPoolExecutor(max_workers=num_processes) as executor:
+            figures = list(executor.map(render_plot_artifact, artifacts))
+    logger.info("Rendered %s figures from plot artifacts in %s", len(figures), directory)
+    return figures
+
+
+def render_plot(fig_folder, plot_data):
+    """Render the plot described by plot_data into fig_folder."""
+    renderers = {
+        "feeder": _render_feeder,
+        "voltage_violations": _render_voltage_violations,
+        "thermal_violations": _render_thermal_violations,
+        "created_clusters": _render_created_clusters,
+    }
+    plot_type = plot_data["plot_type"]
+    if plot_type not in renderers:
+        raise ValueError(f"Unsupported plot_type={plot_type}")
+
+    position_dict = {k: tuple(v) for k, v in plot_data["positions"].items()}
+    G = nx.Graph()
+    G.add_nodes_from(position_dict)
+    G.add_edges_from(tuple(x) for x in plot_data["edges"])
+    fig = plt.figure(figsize=(40, 40), dpi=10)
+    nx.draw_networkx_edges(G, pos=position_dict, alpha=1.0, width=0.3)
+    renderers[plot_type](G, position_dict, plot_data)
+    plt.title(plot_data["title"], fontsize=50)
+    plt.legend(fontsize=50)
+    plt.savefig(os.path.join(fig_folder, get_figure_filename(plot_data["title"])))
+    plt.close(fig)
+
+
+def _filter_positions(position_dict, nodes):
+    return {k: position_dict.get(k, None) for k in nodes}
+
+
+def _draw_legend_nodes(G, position_dict, node_groups, label_prefixes=None):
+    label_prefixes = label_prefixes or {}
+    colored_nodelist = []
+    for key, nodes in node_groups.items():
+        colored_nodelist = colored_nodelist + nodes
+        if len(nodes) != 0:
+            label = label_prefixes.get(key, "") + NODE_COLORLEGEND[key]["label"]
+            nx.draw_networkx_nodes(G, pos=_filter_positions(position_dict, nodes),
+                                   nodelist=nodes, node_size=NODE_COLORLEGEND[key]["node_size"],
+                                   node_color=NODE_COLORLEGEND[key]["node_color"],
+                                   alpha=NODE_COLORLEGEND[key]["alpha"], label=label)
+    return colored_nodelist
+
+
+def _render_feeder(G, position_dict, plot_data):
+    colored_nodelist = _draw_legend_nodes(G, position_dict, plot_data["node_groups"])
+    remaining_nodes = list(set(G.nodes()) - set(colored_nodelist))
+    nx.draw_networkx_nodes(G, pos=_filter_positions(position_dict, remaining_nodes),
+                           nodelist=remaining_nodes, node_size=DEFAULT_NODE_SIZE, node_color=DEFAULT_NODE_COLOR)
+
+
+def _render_voltage_violations(G, position_dict, plot_data):
+    nx.draw_networkx_nodes(G, pos=position_dict, alpha=1.0, node_size=DEFAULT_NODE_SIZE, node_color=DEFAULT_NODE_COLOR)
+    _draw_legend_nodes(G, position_dict, plot_data["node_groups"], label_prefixes={"Violation": "Bus "})
+
+
+def _render_thermal_violations(G, position_dict, plot_data):
+    nx.draw_networkx_nodes(G, pos=position_dict, alpha=1.0, node_size=DEFAULT_NODE_SIZE, node_color=DEFAULT_NODE_COLOR)
+    _draw_legend_nodes(G, position_dict, plot_data["node_groups"])
+    key = "Violation"
+    # primary bus of transformer is plotted as a node
+    xfmr_nodelist = plot_data["transformer_violation_buses"]
+    if xfmr_nodelist is not None:
+        nx.draw_networkx_nodes(G, pos=_filter_positions(position_dict, xfmr_nodelist),
+                               nodelist=xfmr_nodelist, node_size=NODE_COLORLEGEND[key]["node_size"],
+                               node_color=NODE_COLORLEGEND[key]["node_color"], alpha=NODE_COLORLEGEND[key]["alpha"],
+                               label="Transformer " + NODE_COLORLEGEND[key]["label"])
+    # line violations are plotted as edges
+    edgelist = [tuple(x) for x in plot_data["line_violation_edges"]]
+    if edgelist:
+        line_nodelist = list({node for edge in edgelist for node in edge})
+        nx.draw_networkx_edges(G, pos=_filter_positions(position_dict, line_nodelist),
+                               edgelist=edgelist, edge_color=EDGE_COLORLEGEND[key]["edge_color"],
+                               alpha=EDGE_COLORLEGEND[key]["alpha"], width=EDGE_COLORLEGEND[key]["edge_size"],
+                               label=EDGE_COLORLEGEND[key]["label"])
+
+
+def _render_created_clusters(G, position_dict, plot_data):
+    nx.draw_networkx_nodes(G, pos=position_dict, alpha=1.0, node_size=DEFAULT_NODE_SIZE, node_color=DEFAULT_NODE_COLOR)
+    _draw_legend_nodes(G, position_dict, plot_data["node_groups"])
+    for col, (key, values) in enumerate(plot_data["clusters"].items()):
+        buses_list = values["buses_list"]
+        reg_node = values["node"]
+        common_upstream_nodes_list = values["common_upstream_nodes_list"]
+        nx.draw_networkx_nodes(G, pos=_filter_positions(position_dict, buses_list),
+                               nodelist=buses_list, node_size=500, node_color='C{}'.format(col),
+                               label=f"Bus Violations_cluster{key}")
+        nx.draw_networkx_nodes(G, pos=_filter_positions(position_dict, common_upstream_nodes_list),
+                               nodelist=common_upstream_nodes_list, node_size=500, node_color='C{}'.format(col),
+                               alpha=0.3, label=f"Common Upstream Nodes_cluster{key}")
+        nx.draw_networkx_nodes(G, pos=_filter_positions(position_dict, [reg_node]), nodelist=[reg_node],
+                               node_size=1000, node_color='r', label=f"Voltage Regulator_cluster{key}")
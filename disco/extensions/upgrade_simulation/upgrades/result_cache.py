@@ -0,0 +1,210 @@
+"""Content-addressed cache of upgrade cost analysis results.
+
+Jobs with the same OpenDSS model files and parameters produce the same upgrades. The cache stores
+the outputs of a completed job under a hash of its inputs. A later job with the same hash copies
+those outputs into its directory instead of running the simulation.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+from pathlib import Path
+
+from jade.utils.utils import dump_data, load_data
+
+from disco.utils.telemetry import TELEMETRY_FILENAME
+from disco.version import __version__ as disco_version
+from .run_journal import JOURNAL_FILENAME
+from .stage_checkpoints import CHECKPOINTS_DIRNAME, compute_input_hash
+
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_ENTRY_FILENAME = "result_cache_entry.json"
+RESULT_CACHE_HIT_FILENAME = "result_cache.json"
+# Files of a job that do not describe its results
+_EXCLUDED_PATTERNS = (
+    JOURNAL_FILENAME,
+    TELEMETRY_FILENAME,
+    CHECKPOINTS_DIRNAME,
+    RESULT_CACHE_HIT_FILENAME,
+    "return_code",
+    "*.log",
+)
+
+_REGEX_FILE_COMMAND = re.compile(r"^(?:redirect|compile|buscoords)\s+['\"]?([^'\"\s]+)", re.IGNORECASE)
+_REGEX_FILE_PROPERTY = re.compile(r"\b(?:csv|sng|dbl|pqcsv)?file\s*=\s*['\"]?([^'\"\s\)]+)", re.IGNORECASE)
+
+
+class UpgradeResultCache:
+    """Stores and retrieves the outputs of upgrade jobs by the hash of their inputs."""
+
+    def __init__(self, directory):
+        self._directory = Path(directory)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def get(self, key):
+        """Return the entry stored under key or None.
+
+        Returns
+        -------
+        dict | None
+            Contains key, job_name, and disco_version
+
+        """
+        filename = self._directory / key / RESULT_CACHE_ENTRY_FILENAME
+        if not filename.exists():
+            return None
+        return load_data(filename)
+
+    def materialize(self, key, job_output, job_name):
+        """Copy the outputs stored under key into the output directory of a job. The name of the
+        job that computed them is replaced by job_name in the name fields of the JSON outputs.
+
+        Parameters
+        ----------
+        key : str
+        job_output : str | Path
+        job_name : str
+
+        Returns
+        -------
+        dict | None
+            The cache entry or None if there is no entry for key
+
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+
+        job_output = Path(job_output)
+        for name in _EXCLUDED_PATTERNS:
+            path = job_output / name
+            if path.is_dir():
+                shutil.rmtree(path)
+            elif path.exists():
+                path.unlink()
+        shutil.copytree(
+            self._directory / key,
+            job_output,
+            ignore=shutil.ignore_patterns(RESULT_CACHE_ENTRY_FILENAME),
+            dirs_exist_ok=True,
+        )
+        if entry["job_name"] != job_name:
+            for filename in job_output.rglob("*.json"):
+                _replace_job_name(filename, entry["job_name"], job_name)
+        dump_data({"key": key, "source_job": entry["job_name"]}, job_output / RESULT_CACHE_HIT_FILENAME, indent=2)
+        logger.info("Reused the cached results of job %s for job %s", entry["job_name"], job_name)
+        return entry
+
+    def store(self, key, job_output, job_name):
+        """Store the outputs of a completed job under key. Does nothing if the key is already
+        stored, such as by a concurrent job with the same inputs.
+
+        Parameters
+        ----------
+        key : str
+        job_output : str | Path
+        job_name : str
+
+        Returns
+        -------
+        bool
+            True if the outputs were stored
+
+        """
+        entry_dir = self._directory / key
+        if entry_dir.exists():
+            return False
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        tmp_dir = self._directory / f".{key}.{os.getpid()}.tmp"
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        shutil.copytree(job_output, tmp_dir, ignore=shutil.ignore_patterns(*_EXCLUDED_PATTERNS))
+        entry = {"key": key, "job_name": job_name, "disco_version": disco_version}
+        dump_data(entry, tmp_dir / RESULT_CACHE_ENTRY_FILENAME, indent=2)
+        try:
+            # The entry appears completely or not at all.
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir)
+            return False
+        logger.info("Stored the results of job %s in the result cache %s", job_name, self._directory)
+        return True
+
+
+def compute_result_key(model_file, input_files, params):
+    """Return the cache key of a job.
+
+    Parameters
+    ----------
+    model_file : str
+        OpenDSS file of the job. The files that it references are included.
+    input_files : list
+        Other input files, such as the cost database and the technical catalog
+    params : dict
+        Parameters of the job. They must not include the job name.
+
+    Returns
+    -------
+    str
+
+    """
+    filenames = list(iter_model_files(model_file)) + [Path(x) for x in input_files]
+    params = {"disco_version": disco_version, **params}
+    return compute_input_hash(filenames, params, hash_filenames=False)
+
+
+def iter_model_files(filename):
+    """Yield an OpenDSS file and the files that it references through Redirect, Compile,
+    BusCoords, and file=, csvfile=, sngfile=, dblfile=, and pqcsvfile= properties, recursively,
+    in order of first reference.
+
+    Parameters
+    ----------
+    filename : str | Path
+
+    """
+    visited = set()
+
+    def visit(path):
+        path = Path(os.path.abspath(path))
+        if path in visited:
+            return
+        visited.add(path)
+        yield path
+        if path.suffix.lower() != ".dss" or not path.exists():
+            return
+        with open(path) as f_in:
+            for line in f_in:
+                line = line.strip()
+                if not line or line.startswith(("!", "//")):
+                    continue
+                for regex in (_REGEX_FILE_COMMAND, _REGEX_FILE_PROPERTY):
+                    for referenced in regex.findall(line):
+                        yield from visit(path.parent / referenced)
+
+    yield from visit(filename)
+
+
+def _replace_job_name(filename, old_name, new_name):
+    # The output models store the job name in their name fields.
+    def replace(value):
+        if isinstance(value, dict):
+            return {
+                k: new_name if k == "name" and v == old_name else replace(v) for k, v in value.items()
+            }
+        if isinstance(value, list):
+            return [replace(x) for x in value]
+        return value
+
+    with open(filename) as f_in:
+        data = json.load(f_in)
+    with open(filename, "w") as f_out:
+        json.dump(replace(data), f_out, indent=2)
@@ -0,0 +1,135 @@
+"""Append-only journal of the outputs of an upgrade cost analysis job.
+
+Each line of the journal is one JSON operation on an output document:
+
+- dump: replace the document
+- append: append a record to a list in the document
+- update: update keys of the document
+
+The documents are identified by their paths relative to the directory of the journal. Replaying the
+operations of a document reproduces the JSON file written at the end of the job, so the results of
+the completed stages of a job that crashed can be recovered with RunJournal.materialize.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+
+from disco.utils.custom_encoders import ExtendedJSONEncoder
+
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILENAME = "journal.jsonl"
+
+_BUFFER_SIZE = 64 * 1024
+
+
+class RunJournal:
+    """Appends output operations of a job to a JSON-lines file. An existing file is replaced by
+    the first operation. Writes are buffered; call sync at stage boundaries to make them durable."""
+
+    def __init__(self, filename):
+        self._filename = Path(filename)
+        self._directory = self._filename.parent
+        self._fp = None
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def dump(self, filename, data):
+        """Record that the document filename was replaced with data."""
+        self._write({"document": self._get_document(filename), "op": "dump", "data": data})
+
+    def append(self, filename, key, record):
+        """Record that record was appended to the list key of the document filename."""
+        self._write({"document": self._get_document(filename), "op": "append", "key": key, "data": record})
+
+    def update(self, filename, data):
+        """Record that the document filename was updated with the keys of data."""
+        self._write({"document": self._get_document(filename), "op": "update", "data": data})
+
+    def sync(self):
+        """Flush the buffered operations and fsync the journal."""
+        if self._fp is not None:
+            self._fp.flush()
+            os.fsync(self._fp.fileno())
+
+    def close(self):
+        """Sync and close the journal."""
+        if self._fp is not None:
+            self.sync()
+            self._fp.close()
+            self._fp = None
+
+    def _get_document(self, filename):
+        return os.path.relpath(filename, self._directory)
+
+    def _write(self, operation):
+        line = json.dumps(operation, cls=ExtendedJSONEncoder) + "\n"
+        if self._fp is None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            self._fp = open(self._filename, "w", buffering=_BUFFER_SIZE)
+        self._fp.write(line)
+
+    @staticmethod
+    def iter_operations(filename, documents=None):
+        """Iterate over the operations of a journal.
+        A truncated last line, as left by a crashed job, is skipped.
+
+        Parameters
+        ----------
+        filename : str | Path
+        documents : set | None
+            If set, only return operations on these documents. Lines of other documents are
+            not parsed.
+
+        """
+        # Every operation is written with the document as its first key.
+        prefixes = None if documents is None else tuple(_get_line_prefix(x) for x in documents)
+        with open(filename) as f_in:
+            for i, line in enumerate(f_in):
+                if prefixes is not None and not line.startswith(prefixes):
+                    continue
+                try:
+                    operation = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skip invalid line %s of journal %s", i + 1, filename)
+                    continue
+                if documents is None or operation["document"] in documents:
+                    yield operation
+
+    @classmethod
+    def materialize(cls, filename, documents=None):
+        """Return the documents recorded in a journal.
+
+        Parameters
+        ----------
+        filename : str | Path
+        documents : set | None
+            If set, only return these documents.
+
+        Returns
+        -------
+        dict
+            Maps the document path relative to the journal directory to its contents.
+
+        """
+        results = {}
+        for operation in cls.iter_operations(filename, documents=documents):
+            document = operation["document"]
+            if operation["op"] == "dump":
+                results[document] = operation["data"]
+            elif operation["op"] == "append":
+                results.setdefault(document, {}).setdefault(operation["key"], []).append(operation["data"])
+            elif operation["op"] == "update":
+                results.setdefault(document, {}).update(operation["data"])
+            else:
+                raise Exception(f"Unsupported journal operation: {operation['op']}")
+        return results
+
+
+def _get_line_prefix(document):
+    return json.dumps({"document": document})[:-1] + ","
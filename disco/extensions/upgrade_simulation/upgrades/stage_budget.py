@@ -0,0 +1,125 @@
+"""Resource budgets of the stages of an upgrade cost analysis job.
+
+The thermal and voltage stages check their budgets between upgrade iterations. The voltage stage also
+checks between the settings of its sweeps and between regulator placements. If a budget is
+exhausted, the stage stops with the best upgrades found so far, writes its outputs, and reports the
+status budget_exhausted.
+"""
+
+import logging
+import time
+
+from disco import timer_stats_collector
+from disco.utils.telemetry import COUNTED_FUNCTIONS, get_rss_mb
+
+
+logger = logging.getLogger(__name__)
+
+STAGE_STATUS_COMPLETED = "completed"
+STAGE_STATUS_BUDGET_EXHAUSTED = "budget_exhausted"
+
+
+class StageBudget:
+    """Tracks the wall time, circuit solves, and memory of one stage against its limits.
+
+    A limit of None is not enforced. Once the budget is exhausted, it stays exhausted.
+    """
+
+    def __init__(self, stage, max_time_s=None, max_solves=None, max_memory_mb=None, collector=timer_stats_collector):
+        """Constructs StageBudget. The stage starts when the budget is constructed.
+
+        Parameters
+        ----------
+        stage : str
+        max_time_s : float | None
+            Wall time of the stage in seconds
+        max_solves : int | None
+            Number of circuit solves of the stage
+        max_memory_mb : float | None
+            Resident memory of the process in MiB
+        collector : DiscoTimerStatsCollector
+            Collector that counts the circuit solves
+
+        """
+        self._stage = stage
+        self._max_time_s = max_time_s
+        self._max_solves = max_solves
+        self._max_memory_mb = max_memory_mb
+        self._collector = collector
+        self._start = time.perf_counter()
+        self._start_solves = self._get_solve_count()
+        self._exhausted_reason = None
+
+    @classmethod
+    def from_config(cls, stage, config, **kwargs):
+        """Return a StageBudget with the limits in the thermal or voltage upgrade parameters.
+
+        Parameters
+        ----------
+        stage : str
+        config : dict
+
+        Returns
+        -------
+        StageBudget
+
+        """
+        return cls(
+            stage,
+            max_time_s=config.get("max_stage_time_s"),
+            max_solves=config.get("max_stage_solves"),
+            max_memory_mb=config.get("max_memory_mb"),
+            **kwargs,
+        )
+
+    @property
+    def exhausted(self):
+        """Return True if a previous check found the budget exhausted."""
+        return self._exhausted_reason is not None
+
+    @property
+    def exhausted_reason(self):
+        """Return the limit that was exceeded or None."""
+        return self._exhausted_reason
+
+    @property
+    def status(self):
+        """Return the status of the stage to report in the outputs."""
+        return STAGE_STATUS_BUDGET_EXHAUSTED if self.exhausted else STAGE_STATUS_COMPLETED
+
+    def is_exhausted(self):
+        """Check the budget. Call between upgrade iterations.
+
+        Returns
+        -------
+        bool
+
+        """
+        if self.exhausted:
+            return True
+
+        elapsed = time.perf_counter() - self._start
+        num_solves = self._get_solve_count() - self._start_solves
+        if self._max_time_s is not None and elapsed >= self._max_time_s:
+            self._exhausted_reason = f"max_stage_time_s={self._max_time_s}"
+        elif self._max_solves is not None and num_solves >= self._max_solves:
+            self._exhausted_reason = f"max_stage_solves={self._max_solves}"
+        elif self._max_memory_mb is not None:
+            rss_mb = get_rss_mb()
+            if rss_mb is not None and rss_mb >= self._max_memory_mb:
+                self._exhausted_reason = f"max_memory_mb={self._max_memory_mb}"
+
+        if self.exhausted:
+            logger.warning(
+                "The %s stage exhausted its budget (%s) after %.1f seconds and %s solves. "
+                "Stop with the best upgrades found so far.",
+                self._stage,
+                self._exhausted_reason,
+                elapsed,
+                num_solves,
+            )
+        return self.exhausted
+
+    def _get_solve_count(self):
+        stats = self._collector.get_stats()
+        return stats.get(COUNTED_FUNCTIONS["solve_count"], {}).get("count", 0)
@@ -0,0 +1,138 @@
+"""Stage checkpoints of an upgrade cost analysis job.
+
+After the thermal stage and after each sub-stage of the voltage stage, the job saves the state that
+the remaining stages need. A resubmitted job with the same inputs resumes after the last completed
+stage instead of starting over with the thermal stage.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+
+from disco.utils.custom_encoders import ExtendedJSONEncoder
+from disco.utils.feeder_stats_index import compute_file_hash
+
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINTS_DIRNAME = "checkpoints"
+THERMAL_STAGE = "thermal"
+VOLTAGE_STAGES = ("capacitors", "regulator_sweep", "substation_ltc", "new_regulators")
+
+
+class StageCheckpoints:
+    """Saves and loads the checkpoints of one job.
+
+    A checkpoint file is moved into place only after it is completely written, so its existence
+    marks the stage as completed. Checkpoints of a job with different inputs are ignored.
+    """
+
+    def __init__(self, directory, input_hash):
+        self._directory = Path(directory)
+        self._input_hash = input_hash
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def save(self, stage, state):
+        """Save the state of the job after stage.
+
+        Parameters
+        ----------
+        stage : str
+        state : dict
+
+        """
+        self._directory.mkdir(parents=True, exist_ok=True)
+        filename = self._get_filename(stage)
+        tmp_filename = filename.with_suffix(".tmp")
+        data = {"stage": stage, "input_hash": self._input_hash, "state": state}
+        with open(tmp_filename, "w") as f_out:
+            json.dump(data, f_out, cls=ExtendedJSONEncoder)
+            f_out.flush()
+            os.fsync(f_out.fileno())
+        os.replace(tmp_filename, filename)
+        logger.info("Saved checkpoint for stage %s", stage)
+
+    def load(self, stage):
+        """Return the state saved after stage or None if there is no valid checkpoint.
+
+        Parameters
+        ----------
+        stage : str
+
+        Returns
+        -------
+        dict | None
+
+        """
+        filename = self._get_filename(stage)
+        if not filename.exists():
+            return None
+        with open(filename) as f_in:
+            data = json.load(f_in)
+        if data["input_hash"] != self._input_hash:
+            logger.info("Ignore checkpoint %s because the inputs of the job changed", filename)
+            return None
+        return data["state"]
+
+    def load_last(self, stages):
+        """Return the last stage in stages with a valid checkpoint and its state.
+
+        Parameters
+        ----------
+        stages : tuple
+            Stages in the order in which they run
+
+        Returns
+        -------
+        tuple
+            (str, dict) or (None, None) if no stage has a valid checkpoint
+
+        """
+        for stage in reversed(stages):
+            state = self.load(stage)
+            if state is not None:
+                return stage, state
+        return None, None
+
+    def clear(self):
+        """Delete all checkpoints."""
+        if self._directory.exists():
+            shutil.rmtree(self._directory)
+
+    def _get_filename(self, stage):
+        return self._directory / f"{stage}.json"
+
+
+def compute_input_hash(filenames, params, hash_filenames=True):
+    """Return a hash of the files and parameters that define the results of a job.
+
+    Parameters
+    ----------
+    filenames : list
+        Input files. Missing files are hashed by name only.
+    params : dict
+        Parameters of the job. Values that are not JSON types are hashed by their string
+        representation.
+    hash_filenames : bool
+        If False, files are identified by their content only, so that copies of the files in other
+        directories have the same hash.
+
+    Returns
+    -------
+    str
+
+    """
+    sha = hashlib.sha256()
+    for filename in filenames:
+        if hash_filenames or not os.path.exists(filename):
+            sha.update(str(filename).encode())
+        if os.path.exists(filename):
+            sha.update(compute_file_hash(filename).encode())
+    sha.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return sha.hexdigest()
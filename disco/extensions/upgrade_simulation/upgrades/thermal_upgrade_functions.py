@@ -5,9 +5,10 @@ from .common_functions import *
 from jade.utils.timing_utils import track_timing
 
 from disco import timer_stats_collector
-from disco.exceptions import ExceededParallelLinesLimit, ExceededParallelTransformersLimit, UpgradesExternalCatalogMissingObjectDefinition
+from disco.exceptions import ExceededParallelLinesLimit, ExceededParallelTransformersLimit
 from disco.models.upgrade_cost_analysis_generic_input_model import _extract_specific_model_properties_, TransformerCatalogModel, LineCatalogModel
 from disco.models.upgrade_cost_analysis_generic_output_model import TransformerUpgradesTechnicalResultModel, LineUpgradesTechnicalResultModel
+from .catalog_matching import LineCatalogMatcher, TransformerCatalogMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -22,12 +23,18 @@ def correct_line_violations(line_loading_df, line_design_pu, line_upgrade_option
     line_design_pu
     line_upgrade_options
     parallel_lines_limit
+    kwargs
+        If batch_upgrade_commands is True, all upgrade commands are run before the circuit is solved
+        once. restore_circuit restores the circuit to its state before this pass so that a
+        non-converging batch can be bisected.
 
     Returns
     -------
 
     """
     equipment_type = "Line"
+    batch_upgrade_commands = kwargs.pop("batch_upgrade_commands", False)
+    restore_circuit = kwargs.pop("restore_circuit", None)
     line_upgrades_df = pd.DataFrame()
     upgrades_dict = {}
     upgrades_dict_parallel = []
@@ -36,38 +43,28 @@ def correct_line_violations(line_loading_df, line_design_pu, line_upgrade_option
     # If a line code is not found or if line code is too overrated, one or more parallel lines (num_par_lns-1) are added
     overloaded_loading_df = line_loading_df.loc[line_loading_df["status"] == "overloaded"].copy()
     overloaded_loading_df["required_design_amp"] = overloaded_loading_df["max_amp_loading"] / line_design_pu
-    deciding_property_list =  _extract_specific_model_properties_(model_name=LineCatalogModel, field_type_key="deciding_property", field_type_value=True)
-    line_upgrade_options["kV"] = line_upgrade_options["kV"].round(2)
-    overloaded_loading_df["kV"] = overloaded_loading_df["kV"].round(2)
-    line_upgrade_options.set_index(deciding_property_list, inplace=True)
-    line_upgrade_options = line_upgrade_options.sort_index(level=0)
-    overloaded_loading_df.set_index(deciding_property_list, inplace=True)  
+    # the catalog is grouped and sorted once per job if the caller passes catalog_matcher
+    catalog_matcher = kwargs.pop("catalog_matcher", None)
+    if catalog_matcher is None:
+        catalog_matcher = LineCatalogMatcher(line_upgrade_options)
+    deciding_property_list = catalog_matcher.deciding_property_list
+    overloaded_loading_df = catalog_matcher.normalize(overloaded_loading_df)
     oversize_limit = 2  # limit to determine if chosen upgrade option is too oversized
     extreme_loading_threshold = 2.25  # from observations, if equipment loading is greater than this factor, it is considered extremely overloaded
     # in such extremely loaded cases, the equipment is oversized much more, to avoid iterations in upgrades    
+    extreme_loading = overloaded_loading_df["max_per_unit_loading"] > extreme_loading_threshold
+    overloaded_loading_df.loc[extreme_loading, "required_design_amp"] *= overloaded_loading_df.loc[extreme_loading, "max_per_unit_loading"] * 0.5
+    # TODO: TOGGLE FLAG - EXPLORE IF WE CAN HAVE OPTIONS FOR: PARALLEL, REPLACE,
+    # choose the lowest option that is not very oversized (which is determined by acceptable oversize limit)
+    catalog_groups, chosen_positions = catalog_matcher.match(overloaded_loading_df, oversize_limit)
+    overloaded_loading_df.set_index(deciding_property_list, inplace=True)
     if len(overloaded_loading_df) > 0:  # if overloading exists
-        # iterate over each overloaded line to find a solution
-        for index, row in overloaded_loading_df.iterrows():
+        # iterate over each overloaded line to apply its solution
+        for (index, row), catalog_group, chosen_position in zip(overloaded_loading_df.iterrows(), catalog_groups, chosen_positions):
             logger.debug(row["name"])
-            try:
-                options = line_upgrade_options.loc[index]
-            except KeyError:
-                raise UpgradesExternalCatalogMissingObjectDefinition(f"Line of type {dict(zip(deciding_property_list, list(index)))} not found in catalog."
-                                                                     f" Please ensure catalog is complete.")
-            if isinstance(options, pd.Series):  # if only one option is present, it is returned as series
-                options = pd.DataFrame([options])  # convert to required DataFrame format
-                options = options.rename_axis(deciding_property_list)  # assign names to the index
-            options = options.reset_index().sort_values("normamps")
-            if row["max_per_unit_loading"] > extreme_loading_threshold:  # i.e. equipment is very overloaded, then oversize more to avoid multiple upgrade iterations
-                row["required_design_amp"] = row["required_design_amp"] * (row["max_per_unit_loading"] * 0.5)
-            chosen_option = options.loc[options["normamps"] >= row["required_design_amp"]].sort_values("normamps")
-            # TODO: TOGGLE FLAG - EXPLORE IF WE CAN HAVE OPTIONS FOR: PARALLEL, REPLACE,
-            # if one chosen option exists and is not very oversized (which is determined by acceptable oversize limit)
-            # edit existing line and change line configuration/ampacity
-            if (len(chosen_option) != 0) and \
-                    (chosen_option["normamps"] <= oversize_limit * row["required_design_amp"]).any():
-                chosen_option = chosen_option.sort_values("normamps")
-                chosen_option = chosen_option.iloc[0]  # choose lowest available option
+            # if one chosen option exists, edit existing line and change line configuration/ampacity
+            if chosen_position != -1:
+                chosen_option = catalog_matcher.get_option(chosen_position)
                 new_config_type = chosen_option["line_definition_type"]     
                 new_config_name = chosen_option[new_config_type].lower()
                 temp_commands_list = []
@@ -103,22 +100,27 @@ def correct_line_violations(line_loading_df, line_design_pu, line_upgrade_option
                 # run command for upgraded equipment, that resolves overloading for one equipment
                 for command_item in temp_commands_list:
                     check_dss_run_command(command_item)
-                    circuit_solve_and_check(raise_exception=True, **kwargs)
+                    if not batch_upgrade_commands:
+                        circuit_solve_and_check(raise_exception=True, **kwargs)
                 commands_list = commands_list + temp_commands_list
             # if higher upgrade is not available or chosen line upgrade rating is much higher than required,
             # dont oversize. Instead, place lines in parallelma
             else:
                 external_upgrades_technical_catalog = kwargs.get("external_upgrades_technical_catalog", None)
+                options = catalog_matcher.get_options(catalog_group)
                 parallel_line_commands, temp_upgrades_dict_parallel = identify_parallel_lines(options=options, object_row=row,
                                                                                          parallel_lines_limit=parallel_lines_limit, 
                                                                                          external_upgrades_technical_catalog=external_upgrades_technical_catalog)
                 # run command for all parallel equipment added, that resolves overloading for one equipment
                 for command_item in parallel_line_commands:
                     check_dss_run_command(command_item)
-                    check_dss_run_command('CalcVoltageBases')
-                    circuit_solve_and_check(raise_exception=True, **kwargs)
+                    if not batch_upgrade_commands:
+                        check_dss_run_command('CalcVoltageBases')
+                        circuit_solve_and_check(raise_exception=True, **kwargs)
                 commands_list = commands_list + parallel_line_commands
                 upgrades_dict_parallel = upgrades_dict_parallel + temp_upgrades_dict_parallel  # parallel upgrades is stored in a list (since it has same original_equipment name)
+        if batch_upgrade_commands:
+            solve_upgrade_commands_batch(commands_list, restore_circuit=restore_circuit, **kwargs)
         index_names = ["original_equipment_name", "parameter_type"]
         if upgrades_dict:  # if dictionary is not empty
             line_upgrades_df = create_dataframe_from_nested_dict(user_dict=upgrades_dict, index_names=index_names)
@@ -131,7 +133,7 @@ def correct_line_violations(line_loading_df, line_design_pu, line_upgrade_option
         logger.info("This case has no line violations")
     circuit_solve_and_check(raise_exception=True, **kwargs)  # this is added as a final check for convergence
     output_fields =  list(LineUpgradesTechnicalResultModel.schema(True).get("properties").keys())  # get fields with alias
-    line_upgrades_df = line_upgrades_df[output_fields]
+    line_upgrades_df = line_upgrades_df.assign(inherited=False)[output_fields]
     return commands_list, line_upgrades_df
 
 
@@ -150,7 +152,7 @@ def identify_parallel_lines(options, object_row, parallel_lines_limit, **kwargs)
 
     """
     output_fields = list(LineUpgradesTechnicalResultModel.schema(True).get("properties").keys())
-    temp_output_fields = set(output_fields) - {"final_equipment_name"}
+    temp_output_fields = set(output_fields) - {"final_equipment_name", "inherited"}
     commands_list = []
     temp_dict = {}
     # calculate number of parallel lines needed to carry remaining amperes (in addition to existing line)
@@ -326,12 +328,18 @@ def correct_xfmr_violations(xfmr_loading_df, xfmr_design_pu, xfmr_upgrade_option
     xfmr_design_pu
     xfmr_upgrade_options
     parallel_transformers_limit
+    kwargs
+        If batch_upgrade_commands is True, all upgrade commands are run before the circuit is solved
+        once. restore_circuit restores the circuit to its state before this pass so that a
+        non-converging batch can be bisected.
 
     Returns
     -------
 
     """
     equipment_type = "Transformer"
+    batch_upgrade_commands = kwargs.pop("batch_upgrade_commands", False)
+    restore_circuit = kwargs.pop("restore_circuit", None)
     xfmr_upgrades_df = pd.DataFrame()
     upgrades_dict = {}
     upgrades_dict_parallel = []
@@ -340,45 +348,29 @@ def correct_xfmr_violations(xfmr_loading_df, xfmr_design_pu, xfmr_upgrade_option
     # If a line code is not found or if line code is too overrated, one or more parallel lines (num_par_lns-1) are added
     overloaded_loading_df = xfmr_loading_df.loc[xfmr_loading_df["status"] == "overloaded"].copy()
     overloaded_loading_df["required_design_amp"] = overloaded_loading_df["max_amp_loading"] / xfmr_design_pu
+    # the catalog is grouped and sorted once per job if the caller passes catalog_matcher
+    catalog_matcher = kwargs.pop("catalog_matcher", None)
+    if catalog_matcher is None:
+        catalog_matcher = TransformerCatalogMatcher(xfmr_upgrade_options)
     # list of properties based on which upgrade is chosen
-    deciding_property_list =  _extract_specific_model_properties_(model_name=TransformerCatalogModel, field_type_key="deciding_property", field_type_value=True)
-    # round to same precision for upgrade options, and overloaded equipment
-    xfmr_upgrade_options["kV"] = xfmr_upgrade_options["kV"].round(2)
-    overloaded_loading_df["kV"] = overloaded_loading_df["kV"].round(2)
-    xfmr_upgrade_options["kVs"] = xfmr_upgrade_options["kVs"].apply(lambda x: [round(a, 2) for a in x])
-    overloaded_loading_df["kVs"] = overloaded_loading_df["kVs"].apply(lambda x: [round(a, 2) for a in x])
-    # convert lists to string type (so they can be set as dataframe index later)
-    xfmr_upgrade_options[['conns', 'kVs']] = xfmr_upgrade_options[['conns', 'kVs']].astype(str)
-    overloaded_loading_df[['conns', 'kVs']] = overloaded_loading_df[['conns', 'kVs']].astype(str)
-    xfmr_upgrade_options.set_index(deciding_property_list, inplace=True)
-    xfmr_upgrade_options = xfmr_upgrade_options.sort_index(level=0)
-    overloaded_loading_df.set_index(deciding_property_list, inplace=True)
+    deciding_property_list = catalog_matcher.deciding_property_list
+    # round to same precision as upgrade options, and convert lists to strings
+    overloaded_loading_df = catalog_matcher.normalize(overloaded_loading_df)
     equipment_oversize_limit = 2  # limit to determine if chosen upgrade option is too oversized
     extreme_loading_threshold = 2.25  # if equipment loading is greater than this factor, it is considered extremely overloaded
     # in such extremely loaded cases, the equipment is oversized much more, to avoid iterations in upgrades
+    extreme_loading = overloaded_loading_df["max_per_unit_loading"] > extreme_loading_threshold
+    overloaded_loading_df.loc[extreme_loading, "required_design_amp"] *= overloaded_loading_df.loc[extreme_loading, "max_per_unit_loading"] * 0.5
+    # choose the lowest option that is not very oversized (which is determined by acceptable oversize limit)
+    catalog_groups, chosen_positions = catalog_matcher.match(overloaded_loading_df, equipment_oversize_limit)
+    overloaded_loading_df.set_index(deciding_property_list, inplace=True)
     if len(overloaded_loading_df) > 0:  # if overloading exists
         xfmr_upgrades_df = pd.DataFrame()
-        # iterate over each overloaded line to find a solution
-        for index, row in overloaded_loading_df.iterrows():
-            try:
-                options = xfmr_upgrade_options.loc[index]
-            except KeyError:
-                raise UpgradesExternalCatalogMissingObjectDefinition(f"Transformer of type {dict(zip(deciding_property_list, list(index)))} not found in catalog."
-                                                                     f" Please ensure catalog is complete.")
-            if isinstance(options, pd.Series):  # if only one option is present, it is returned as series
-                options = pd.DataFrame([options])  # convert to required DataFrame format
-                options = options.rename_axis(deciding_property_list)  # assign names to the index
-            options = options.reset_index().sort_values("amp_limit_per_phase")
-            if row["max_per_unit_loading"] > extreme_loading_threshold:  # i.e. equipment is very overloaded, then oversize to avoid multiple upgrade iterations
-                row["required_design_amp"] = row["required_design_amp"] * (row["max_per_unit_loading"] * 0.5)
-            chosen_option = options.loc[options["amp_limit_per_phase"] >=
-                                        row["required_design_amp"]].sort_values("amp_limit_per_phase")
-            # if one chosen option exists and is not very oversized (which is determined by acceptable oversize limit)
-            # edit existing object
-            if (len(chosen_option) != 0) and \
-                    (chosen_option["amp_limit_per_phase"] <= equipment_oversize_limit * row["required_design_amp"]).any():
-                chosen_option = chosen_option.sort_values("amp_limit_per_phase")
-                chosen_option = chosen_option.iloc[0]  # choose lowest available option
+        # iterate over each overloaded transformer to apply its solution
+        for (index, row), catalog_group, chosen_position in zip(overloaded_loading_df.iterrows(), catalog_groups, chosen_positions):
+            # if one chosen option exists, edit existing object
+            if chosen_position != -1:
+                chosen_option = catalog_matcher.get_option(chosen_position)
                 chosen_option["conns"] = ast.literal_eval(chosen_option["conns"])
                 chosen_option["kVs"] = ast.literal_eval(chosen_option["kVs"])
                 if isinstance(chosen_option["%Rs"], str):
@@ -404,19 +396,24 @@ def correct_xfmr_violations(xfmr_loading_df, xfmr_design_pu, xfmr_upgrade_option
                                                                     # "parameter_type": "new_equipment",
                                                                     "action": "add", "name": row["name"]})
                 check_dss_run_command(command_string)  # run command for upgraded equipment
-                circuit_solve_and_check(raise_exception=True, **kwargs)
+                if not batch_upgrade_commands:
+                    circuit_solve_and_check(raise_exception=True, **kwargs)
             # if higher upgrade is not available or chosen upgrade rating is much higher than required,
             # dont oversize. Instead, place equipment in parallel
             else:
+                options = catalog_matcher.get_options(catalog_group)
                 parallel_xfmr_commands, temp_upgrades_dict_parallel = identify_parallel_xfmrs(upgrade_options=options, object_row=row,
                                                                                          parallel_transformers_limit=parallel_transformers_limit)
                 # run command for all new parallel equipment added, that resolves overloading for one equipment
                 for command_item in parallel_xfmr_commands:
                     check_dss_run_command(command_item)
-                    check_dss_run_command('CalcVoltageBases')
-                    circuit_solve_and_check(raise_exception=True, **kwargs)
+                    if not batch_upgrade_commands:
+                        check_dss_run_command('CalcVoltageBases')
+                        circuit_solve_and_check(raise_exception=True, **kwargs)
                 commands_list = commands_list + parallel_xfmr_commands
                 upgrades_dict_parallel = upgrades_dict_parallel + temp_upgrades_dict_parallel  # parallel upgrades is stored in a list (since it has same original_equipment name)
+        if batch_upgrade_commands:
+            solve_upgrade_commands_batch(commands_list, restore_circuit=restore_circuit, **kwargs)
         index_names = ["original_equipment_name", "parameter_type"]
         if upgrades_dict:  # if dictionary is not empty
             xfmr_upgrades_df = create_dataframe_from_nested_dict(user_dict=upgrades_dict, index_names=index_names)
@@ -430,7 +427,7 @@ def correct_xfmr_violations(xfmr_loading_df, xfmr_design_pu, xfmr_upgrade_option
         logger.info("This case has no transformer violations")
     circuit_solve_and_check(raise_exception=True, **kwargs)  # this is added as a final check for convergence
     output_fields =  list(TransformerUpgradesTechnicalResultModel.schema(True).get("properties").keys())  # get fields with alias
-    xfmr_upgrades_df = xfmr_upgrades_df[output_fields]
+    xfmr_upgrades_df = xfmr_upgrades_df.assign(inherited=False)[output_fields]
     return commands_list, xfmr_upgrades_df
 
 
@@ -449,7 +446,7 @@ def identify_parallel_xfmrs(upgrade_options, object_row, parallel_transformers_l
 
     """
     output_fields = list(TransformerUpgradesTechnicalResultModel.schema(True).get("properties").keys())
-    temp_output_fields = set(output_fields) - {"final_equipment_name"}
+    temp_output_fields = set(output_fields) - {"final_equipment_name", "inherited"}
     equipment_type = "Transformer"
     commands_list = []
     upgrades_dict_parallel = {}
@@ -0,0 +1,248 @@
+import json
+import logging
+import os
+
+import opendssdirect as dss
+import pandas as pd
+
+from jade.utils.utils import load_data, dump_data
+
+from .common_functions import (
+    circuit_solve_and_check,
+    determine_available_line_upgrades,
+    determine_available_xfmr_upgrades,
+    reload_dss_circuit,
+)
+from .run_journal import RunJournal
+from disco.models.upgrade_cost_analysis_generic_input_model import UpgradeTechnicalCatalogModel
+
+
+logger = logging.getLogger(__name__)
+
+# Process-wide cache of validated external catalogs keyed by (path, modification time). It is
+# shared by all sessions because jobs run in the same process commonly use one catalog.
+_EXTERNAL_CATALOGS = {}
+
+
+class UpgradeSession:
+    """Holds the state of one upgrade cost analysis job across the thermal, voltage, and cost
+    stages: the outputs and the OpenDSS circuit that one stage hands over to the next.
+
+    With in_memory=True, stages pass their outputs to each other through the session and
+    write_outputs writes the JSON files once at the end of the job. A stage that ends with a clean
+    compilation of the circuit that the next stage starts from hands it over with
+    hand_over_circuit, and load_circuit of the next stage only solves it again. With
+    in_memory=False, every output is written immediately and every load compiles the circuit,
+    which is the behavior of the stages when they run standalone.
+
+    If journal_file is set, every recorded output is also appended to a RunJournal so that the
+    results of completed stages survive a crash of the job.
+    """
+
+    def __init__(self, in_memory=True, journal_file=None):
+        self.in_memory = in_memory
+        self._outputs = {}
+        self._journal = None if journal_file is None else RunJournal(journal_file)
+        self._circuit = None
+
+    def hand_over_circuit(self, dss_file_list, **kwargs):
+        """Record that the loaded circuit is a compilation of dss_file_list that was solved and
+        not changed since, so that the next call of load_circuit can reuse it.
+
+        Parameters
+        ----------
+        dss_file_list : list
+            Files that define the same circuit as the compiled files
+        kwargs
+            Simulation parameters of the compilation
+
+        """
+        if self.in_memory and not kwargs.get("enable_pydss_solve", False):
+            self._circuit = (list(dss_file_list), kwargs.get("dc_ac_ratio"))
+
+    def load_circuit(self, dss_file_list, **kwargs):
+        """Load the circuit defined by dss_file_list and solve it. If the previous stage handed over
+        this circuit, it is solved again instead of compiled.
+
+        Parameters
+        ----------
+        dss_file_list : list
+        kwargs
+            Simulation parameters passed to reload_dss_circuit
+
+        Returns
+        -------
+        dict
+            Simulation parameters
+
+        """
+        circuit, self._circuit = self._circuit, None
+        if circuit == (list(dss_file_list), kwargs.get("dc_ac_ratio")) and not kwargs.get("enable_pydss_solve", False):
+            logger.info("Reusing the OpenDSS circuit of the previous stage")
+            max_control_iterations = kwargs.get("max_control_iterations", None)
+            if max_control_iterations is not None:
+                dss.Solution.MaxControlIterations(max_control_iterations)
+            circuit_solve_and_check(raise_exception=kwargs.get("raise_exception", True))
+            return kwargs
+        return reload_dss_circuit(dss_file_list=dss_file_list, commands_list=None, **kwargs)
+
+    def dump_data(self, data, filename, **kwargs):
+        """Record an output. It is written now unless the session is in memory.
+
+        Parameters
+        ----------
+        data : dict
+        filename : str
+        kwargs
+            Passed to jade.utils.utils.dump_data
+
+        """
+        if self.in_memory:
+            self._outputs[str(filename)] = (data, kwargs)
+        else:
+            dump_data(data, filename, **kwargs)
+        if self._journal is not None:
+            self._journal.dump(filename, data)
+
+    def append_output(self, filename, key, record, **kwargs):
+        """Append record to the list key of an output, creating the output or list if necessary.
+        In memory, only the record is journaled instead of rewriting the output.
+
+        Parameters
+        ----------
+        filename : str
+        key : str
+        record : dict
+        kwargs
+            Passed to jade.utils.utils.dump_data
+
+        """
+        data = self._get_output_for_update(filename, **kwargs)
+        data.setdefault(key, []).append(record)
+        if not self.in_memory:
+            dump_data(data, filename, **kwargs)
+        if self._journal is not None:
+            self._journal.append(filename, key, record)
+
+    def update_output(self, filename, values, **kwargs):
+        """Update the keys of an output, creating the output if necessary.
+
+        Parameters
+        ----------
+        filename : str
+        values : dict
+        kwargs
+            Passed to jade.utils.utils.dump_data
+
+        """
+        data = self._get_output_for_update(filename, **kwargs)
+        data.update(values)
+        if not self.in_memory:
+            dump_data(data, filename, **kwargs)
+        if self._journal is not None:
+            self._journal.update(filename, values)
+
+    def _get_output_for_update(self, filename, **kwargs):
+        if self.in_memory:
+            output = self._outputs.get(str(filename))
+            if output is None:
+                data = self._load_existing_output(filename)
+            else:
+                data = output[0]
+            self._outputs[str(filename)] = (data, kwargs)
+            return data
+        return self._load_existing_output(filename)
+
+    def _load_existing_output(self, filename):
+        if not os.path.exists(filename):
+            return {}
+        data = load_data(filename)
+        if self._journal is not None:
+            self._journal.dump(filename, data)
+        return data
+
+    def checkpoint(self):
+        """Make the journaled outputs durable. Call at stage boundaries."""
+        if self._journal is not None:
+            self._journal.sync()
+
+    def load_data(self, filename):
+        """Return an output recorded by a previous stage, reading it from disk if necessary."""
+        output = self._outputs.get(str(filename))
+        if output is not None:
+            return output[0]
+        return load_data(filename)
+
+    def has_output(self, filename):
+        """Return True if an output was recorded or exists on disk."""
+        return str(filename) in self._outputs or os.path.exists(filename)
+
+    def export_outputs(self, directory):
+        """Return the recorded outputs with paths relative to directory, for a checkpoint.
+
+        Parameters
+        ----------
+        directory : str
+
+        Returns
+        -------
+        dict
+
+        """
+        return {
+            os.path.relpath(filename, directory): {"data": data, "kwargs": kwargs}
+            for filename, (data, kwargs) in self._outputs.items()
+        }
+
+    def restore_outputs(self, outputs, directory):
+        """Record outputs returned by export_outputs.
+
+        Parameters
+        ----------
+        outputs : dict
+        directory : str
+
+        """
+        for filename, output in outputs.items():
+            self.dump_data(output["data"], os.path.join(directory, filename), **output["kwargs"])
+
+    def write_outputs(self):
+        """Write all recorded outputs."""
+        for filename, (data, kwargs) in self._outputs.items():
+            dump_data(data, filename, **kwargs)
+        self._outputs.clear()
+        if self._journal is not None:
+            self._journal.close()
+
+    @staticmethod
+    def load_external_catalog(filename):
+        """Read and validate an external technical catalog. The result is cached for the
+        process, not for the session.
+
+        Parameters
+        ----------
+        filename : str
+
+        Returns
+        -------
+        tuple
+            (dict, pd.DataFrame, pd.DataFrame): the catalog as read, the line upgrade options, and
+            the transformer upgrade options. The caller must not modify the dict.
+
+        """
+        key = (os.path.abspath(filename), os.stat(filename).st_mtime_ns)
+        catalog = _EXTERNAL_CATALOGS.get(key)
+        if catalog is None:
+            with open(filename) as json_file:
+                external_upgrades_technical_catalog = json.load(json_file)
+            # perform validation for external catalog
+            input_catalog_model = UpgradeTechnicalCatalogModel(**external_upgrades_technical_catalog)
+            line_upgrade_options = pd.DataFrame.from_dict(input_catalog_model.dict(by_alias=True)["line"])
+            xfmr_upgrade_options = pd.DataFrame.from_dict(input_catalog_model.dict(by_alias=True)["transformer"])
+            # this will remove any duplicates if present
+            line_upgrade_options = determine_available_line_upgrades(line_upgrade_options)
+            xfmr_upgrade_options = determine_available_xfmr_upgrades(xfmr_upgrade_options)
+            catalog = (external_upgrades_technical_catalog, line_upgrade_options, xfmr_upgrade_options)
+            _EXTERNAL_CATALOGS[key] = catalog
+        external_upgrades_technical_catalog, line_upgrade_options, xfmr_upgrade_options = catalog
+        return external_upgrades_technical_catalog, line_upgrade_options.copy(), xfmr_upgrade_options.copy()
@@ -1,5 +1,6 @@
 import re
 import time
+import itertools
 import seaborn as sns
 import networkx as nx  # this module requires networkx version 2.6.3
 import matplotlib.pyplot as plt
@@ -10,6 +11,7 @@ from sklearn.cluster import AgglomerativeClustering
 
 from .common_functions import *
 from .thermal_upgrade_functions import define_xfmr_object
+from .plot_rendering import NODE_COLORLEGEND, EDGE_COLORLEGEND, save_or_render_plot
 from disco import timer_stats_collector
 from disco.models.upgrade_cost_analysis_generic_output_model import VoltageUpgradesTechnicalResultModel
 from opendssdirect import DSSException
@@ -18,16 +20,6 @@ from jade.utils.timing_utils import track_timing, Timer
 
 logger = logging.getLogger(__name__)
 
-NODE_COLORLEGEND = {'Load': {'node_color': 'blue', 'node_size': 20, "alpha": 1, "label": "Load"},
-                'PV': {'node_color': 'orange', 'node_size': 50, "alpha": 0.8, "label": "PV"},
-                'Transformer': {'node_color': 'purple', 'node_size': 250, "alpha": 0.75, "label": "Transformer"},
-                'Circuit Source': {'node_color': 'black', 'node_size': 500, "alpha": 1, "label": "Source"},
-                'Violation': {'node_color': 'red', 'node_size': 500, "alpha": 0.75, "label": "Violation"},   
-                'Capacitor': {'node_color': 'green', 'node_size': 100, "alpha": 0.75, "label": "Capacitor"},                
-                'Voltage Regulator': {'node_color': 'cyan', 'node_size': 1000, "alpha": 0.75, "label": "Voltage Regulator"},                
-                }
-EDGE_COLORLEGEND = {'Violation': {'edge_color': 'violet', 'edge_size': 75, 'alpha': 0.75, "label": "Line Violation"}}
-
 
 def edit_capacitor_settings_for_convergence(voltage_config=None, control_command=''):
     """This function edits the dss command string with new capacitor settings, in case of convergence issues
@@ -180,6 +172,8 @@ def sweep_capacitor_settings(voltage_config, initial_capacitors_df, default_capa
        This function increases differences between cap ON and OFF voltages in user defined increments,
        default 1 volt, until upper and lower bounds are reached.
 
+    The sweep stops early if the StageBudget passed as budget is exhausted. The settings swept so far are returned.
+
     Parameters
     ----------
     voltage_config
@@ -192,6 +186,7 @@ def sweep_capacitor_settings(voltage_config, initial_capacitors_df, default_capa
     -------
     DataFrame
     """
+    budget = kwargs.get("budget", None)
     # This function increases differences between cap ON and OFF voltages in user defined increments,
     #  default 1 volt, until upper and lower bounds are reached.
     capacitor_sweep_list = []  # this list will contain severity of each capacitor setting sweep
@@ -214,6 +209,9 @@ def sweep_capacitor_settings(voltage_config, initial_capacitors_df, default_capa
     # iterate over capacitor on and off settings while they are within voltage violation limits
     while (cap_on_setting > (voltage_lower_limit * voltage_config["nominal_voltage"])) or \
             (cap_off_setting < (voltage_upper_limit * voltage_config["nominal_voltage"])):
+        if (budget is not None) and budget.is_exhausted():
+            logger.info("Stop capacitor settings sweep. Choose the best setting swept so far.")
+            break
         temp_dict = {'cap_on_setting': cap_on_setting, 'cap_off_setting': cap_off_setting}
         for index, row in initial_capacitors_df.iterrows():  # apply settings to all capacitors
             check_dss_run_command(f"Edit CapControl.{row['capcontrol_name']} ONsetting={cap_on_setting} "
@@ -314,6 +312,7 @@ def determine_capacitor_upgrades(voltage_upper_limit, voltage_lower_limit, defau
     """
     fig_folder = kwargs.get("fig_folder", None)
     create_plots = kwargs.get("create_plots", False)
+    defer_plot_rendering = kwargs.get("defer_plot_rendering", False)
     circuit_source = kwargs.get("circuit_source", None)
     title = kwargs.get("title", "Bus violations after existing capacitor sweep module_")
     
@@ -344,7 +343,8 @@ def determine_capacitor_upgrades(voltage_upper_limit, voltage_lower_limit, defau
         voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, **kwargs)   
     if (fig_folder is not None) and create_plots:
             plot_voltage_violations(fig_folder=fig_folder, title=title+
-                                    str(len(buses_with_violations)), buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True)
+                                    str(len(buses_with_violations)), buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True,
+                                    defer_rendering=defer_plot_rendering)
     
     return capacitor_dss_commands
 
@@ -478,7 +478,8 @@ def correct_regcontrol_parameters(orig_regcontrols_df, **kwargs):
 def sweep_regcontrol_settings(voltage_config, initial_regcontrols_df, voltage_upper_limit, voltage_lower_limit,
                               exclude_sub_ltc=True, only_sub_ltc=False, **kwargs):
     """This function increases differences vreg in user defined increments, until upper and lower bounds are reached.
-    At a time, same settings are applied to all regulator controls
+    At a time, same settings are applied to all regulator controls.
+    The sweep stops early if the StageBudget passed as budget is exhausted and a converged setting was found.
 
     Parameters
     ----------
@@ -493,6 +494,7 @@ def sweep_regcontrol_settings(voltage_config, initial_regcontrols_df, voltage_up
     -------
 
     """
+    budget = kwargs.get("budget", None)
     if exclude_sub_ltc:
         initial_df = initial_regcontrols_df.loc[initial_regcontrols_df['at_substation_xfmr_flag'] == False]
     if only_sub_ltc:
@@ -518,30 +520,33 @@ def sweep_regcontrol_settings(voltage_config, initial_regcontrols_df, voltage_up
         vregs_list.append(vreg)
         vreg += voltage_config["reg_v_delta"]
     # start settings sweep
-    for vreg in vregs_list:
-        for band in voltage_config["reg_control_bands"]:
-            temp_dict = {'setting': f"{vreg}_{band}", 'vreg': vreg, 'band': band}
-            # Apply same settings to all controls and determine their impact
-            for index, row in initial_df.iterrows():
-                logger.debug(f"{vreg}_{band}")
-                check_dss_run_command(f"Edit RegControl.{row['name']} vreg={vreg} band={band}")
-                pass_flag = circuit_solve_and_check(raise_exception=False, **kwargs)
-                if not pass_flag:  # if there is convergence issue at this setting, go onto next setting and dont save
+    for vreg, band in itertools.product(vregs_list, voltage_config["reg_control_bands"]):
+        # the best setting is chosen from the converged settings, so keep sweeping until one converged
+        if (budget is not None) and any(x.get('converged', False) for x in regcontrol_sweep_list) and budget.is_exhausted():
+            logger.info("Stop regulator control settings sweep. Choose the best setting swept so far.")
+            break
+        temp_dict = {'setting': f"{vreg}_{band}", 'vreg': vreg, 'band': band}
+        # Apply same settings to all controls and determine their impact
+        for index, row in initial_df.iterrows():
+            logger.debug(f"{vreg}_{band}")
+            check_dss_run_command(f"Edit RegControl.{row['name']} vreg={vreg} band={band}")
+            pass_flag = circuit_solve_and_check(raise_exception=False, **kwargs)
+            if not pass_flag:  # if there is convergence issue at this setting, go onto next setting and dont save
+                temp_dict['converged'] = False
+                break
+            else:
+                temp_dict['converged'] = True
+                try:
+                    bus_voltages_df, undervoltage_bus_list, overvoltage_bus_list, buses_with_violations = get_bus_voltages(
+                        voltage_upper_limit=voltage_upper_limit,
+                        voltage_lower_limit=voltage_lower_limit, **kwargs)
+                except:  # catch convergence error
                     temp_dict['converged'] = False
                     break
-                else:
-                    temp_dict['converged'] = True
-                    try:
-                        bus_voltages_df, undervoltage_bus_list, overvoltage_bus_list, buses_with_violations = get_bus_voltages(
-                            voltage_upper_limit=voltage_upper_limit,
-                            voltage_lower_limit=voltage_lower_limit, **kwargs)
-                    except:  # catch convergence error
-                        temp_dict['converged'] = False
-                        break
-                    severity_dict = compute_voltage_violation_severity(
-                        voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit)
-                    temp_dict.update(severity_dict)
-                regcontrol_sweep_list.append(temp_dict)
+                severity_dict = compute_voltage_violation_severity(
+                    voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit)
+                temp_dict.update(severity_dict)
+            regcontrol_sweep_list.append(temp_dict)
     regcontrol_sweep_df = pd.DataFrame(regcontrol_sweep_list)
     return regcontrol_sweep_df
 
@@ -727,6 +732,7 @@ def sweep_and_choose_regcontrol_setting(voltage_config, initial_regcontrols_df,
     """
     fig_folder = kwargs.get("fig_folder", None)
     create_plots = kwargs.get("create_plots", False)
+    defer_plot_rendering = kwargs.get("defer_plot_rendering", False)
     circuit_source = kwargs.get("circuit_source", None)
     title = kwargs.get("title", None)
     
@@ -753,7 +759,8 @@ def sweep_and_choose_regcontrol_setting(voltage_config, initial_regcontrols_df,
         bus_voltages_df, undervoltage_bus_list, overvoltage_bus_list, buses_with_violations = get_bus_voltages(
             voltage_upper_limit=upper_limit, voltage_lower_limit=lower_limit, **kwargs)
         plot_voltage_violations(fig_folder=fig_folder, title=title+
-                                    str(len(buses_with_violations)), buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True)
+                                    str(len(buses_with_violations)), buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True,
+                                    defer_rendering=defer_plot_rendering)
 
     return regcontrols_df, reg_sweep_commands_list
 
@@ -769,6 +776,8 @@ def determine_substation_ltc_upgrades(voltage_upper_limit, voltage_lower_limit,
     """
     fig_folder = kwargs.get("fig_folder", None)
     create_plots = kwargs.get("create_plots", False)
+    defer_plot_rendering = kwargs.get("defer_plot_rendering", False)
+    budget = kwargs.get("budget", None)
     
     results_dict = {}
     all_commands_list = previous_dss_commands_list
@@ -866,13 +875,16 @@ def determine_substation_ltc_upgrades(voltage_upper_limit, voltage_lower_limit,
         best_setting_so_far = "after_sub_ltc_checking"
         if (fig_folder is not None) and create_plots:
             plot_voltage_violations(fig_folder=fig_folder, title="Bus violations after substation ltc module_"+
-                                    str(len(buses_with_violations)), buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True)
+                                    str(len(buses_with_violations)), buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True,
+                                    defer_rendering=defer_plot_rendering)
     else:
         all_commands_list = list(set(all_commands_list) - set(subltc_upgrade_commands))
         subltc_upgrade_commands = []
         reload_dss_circuit(dss_file_list=dss_file_list, commands_list=all_commands_list, **kwargs)
     
-    if (best_setting_so_far == "after_sub_ltc_checking") and (len(buses_with_violations) > 0):
+    if (budget is not None) and budget.is_exhausted():
+        logger.info("Skip settings sweeps after substation LTC module.")
+    elif (best_setting_so_far == "after_sub_ltc_checking") and (len(buses_with_violations) > 0):
         # after this, also run settings sweep on all vregs (other than substation LTC), since this can impact those settings too.
         orig_regcontrols_df = get_regcontrol_info(correct_PT_ratio=True, nominal_voltage=voltage_config["nominal_voltage"])
         orig_regcontrols_df = orig_regcontrols_df.loc[orig_regcontrols_df['at_substation_xfmr_flag'] == False]
@@ -1290,6 +1302,7 @@ def test_new_regulator_placement_on_common_nodes(voltage_upper_limit, voltage_lo
                                                  default_regcontrol_settings, deciding_field, **kwargs):
     """ In each cluster group, place a new regulator control at each common upstream node, unless it is the source bus
     (since that already contains the LTC) or if it has a distribution transformer.
+    If the StageBudget passed as budget is exhausted, the best node tested so far is chosen.
 
     If a transformer exists, simply add a new reg control -
     in fact calling the add_new_regctrl function will automatically check whether a reg control exists or not
@@ -1305,8 +1318,12 @@ def test_new_regulator_placement_on_common_nodes(voltage_upper_limit, voltage_lo
     -------
 
     """
+    budget = kwargs.get("budget", None)
     intra_cluster_group_severity_dict = {}
     for node in common_upstream_nodes_list:
+        if intra_cluster_group_severity_dict and (budget is not None) and budget.is_exhausted():
+            logger.info("Stop regulator placement on common nodes. Choose the best node tested so far.")
+            break
         new_xfmr_added_dict = None
         new_regcontrol_dict = None
         logger.debug(node)        
@@ -1596,6 +1613,8 @@ def cluster_and_place_regulator(G, square_distance_df, initial_buses_with_violat
     """
     fig_folder = kwargs.get("fig_folder", None)
     create_plots = kwargs.get("create_plots", False)
+    defer_plot_rendering = kwargs.get("defer_plot_rendering", False)
+    budget = kwargs.get("budget", None)
     if len(initial_buses_with_violations) == 1:  # if there is only one violation, then clustering cant be performed. So directly assign bus to cluster
         clusters_dict = {0: initial_buses_with_violations}
     else:
@@ -1605,6 +1624,9 @@ def cluster_and_place_regulator(G, square_distance_df, initial_buses_with_violat
     cluster_group_info_dict = {}
     # iterate through each cluster group
     for cluster_id, buses_list in clusters_dict.items():
+        if cluster_group_info_dict and (budget is not None) and budget.is_exhausted():
+            logger.info("Stop regulator placement in cluster groups. Keep the regulators placed so far.")
+            break
         logger.debug(f"Cluster group: {cluster_id}")
         cluster_group_info_dict[cluster_id] = per_cluster_group_regulator_analysis(G=G, buses_list=buses_list, voltage_config=voltage_config,
                                                                                    voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, 
@@ -1621,7 +1643,8 @@ def cluster_and_place_regulator(G, square_distance_df, initial_buses_with_violat
             logger.info("All nodal violations have been removed successfully by new regulator placement.")
             break
     if create_plots and (fig_folder is not None):
-        plot_created_clusters(fig_folder=fig_folder, circuit_source=circuit_source, clusters_dict=cluster_group_info_dict)
+        plot_created_clusters(fig_folder=fig_folder, circuit_source=circuit_source, clusters_dict=cluster_group_info_dict,
+                              defer_rendering=defer_plot_rendering)
     return cluster_group_info_dict
 
 
@@ -1630,9 +1653,12 @@ def determine_new_regulator_location(circuit_source, initial_buses_with_violatio
                                      voltage_config, default_regcontrol_settings, max_regs, deciding_field,
                                      **kwargs):
     """Function to determine new regulator location. This decision is made after testing out various clustering and placement options.
+    If the StageBudget passed as budget is exhausted, the best clustering option tested so far is chosen.
     """
     fig_folder = kwargs.get("fig_folder", None)
     create_plots = kwargs.get("create_plots", False)
+    defer_plot_rendering = kwargs.get("defer_plot_rendering", False)
+    budget = kwargs.get("budget", None)
 
     # prepare for clustering
     G = generate_networkx_representation()
@@ -1646,6 +1672,9 @@ def determine_new_regulator_location(circuit_source, initial_buses_with_violatio
     # Clustering the distance matrix into clusters equal to optimal clusters
     # Iterate by changing number of clusters to be considered in the network, and perform analysis.
     for option_num in range(1, max_regs + 1, 1):
+        if options_dict and (budget is not None) and budget.is_exhausted():
+            logger.info("Stop testing clustering options. Choose the best option tested so far.")
+            break
         cluster_option_name = f"cluster_option_{option_num}"
         logger.info(f"Clustering option: num_of_clusters: {option_num}")
 
@@ -1664,7 +1693,8 @@ def determine_new_regulator_location(circuit_source, initial_buses_with_violatio
                 voltage_upper_limit=voltage_upper_limit, voltage_lower_limit=voltage_lower_limit, **kwargs)
         if (fig_folder is not None) and create_plots:
             plot_voltage_violations(fig_folder=fig_folder, title="Bus violations for "+cluster_option_name+" voltage regulators"+"_"+
-                                    str(len(buses_with_violations)), buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True)
+                                    str(len(buses_with_violations)), buses_with_violations=buses_with_violations, circuit_source=circuit_source, enable_detailed=True,
+                                    defer_rendering=defer_plot_rendering)
         options_dict[cluster_option_name].update(severity_dict)
         if (len(buses_with_violations)) == 0:
             logger.info("All nodal violations have been removed successfully.")
@@ -1709,240 +1739,131 @@ def plot_heatmap_distmatrix(square_array, fig_folder):
     plt.close(fig)
 
 
-def plot_feeder(fig_folder, title, circuit_source=None, enable_detailed=False):
-    """Function to plot feeder network.
+def get_feeder_layout_data(title):
+    """Return the plot layout (bus coordinates and edges) of the feeder network, or None if the
+    feeder model does not provide sufficient bus coordinates.
     """
     G = generate_networkx_representation()
     bus_coordinates_df = get_bus_coordinates()
     complete_flag = check_buscoordinates_completeness(bus_coordinates_df)  # check if sufficient buscoordinates data is available
     if not complete_flag:  # feeder cannot be plotted if sufficient buscoordinates data is unavailable
         logger.warning(f"Unable to plot {title} because feeder model bus coordinates are not provided.")
-        return
+        return None
     position_dict = nx.get_node_attributes(G, 'pos')
-    nodes_list = G.nodes()
     Un_G = G.to_undirected()
+    return {
+        "positions": {node: list(pos) for node, pos in position_dict.items()},
+        "edges": [list(edge) for edge in Un_G.edges()],
+    }
 
-    fig = plt.figure(figsize=(40, 40), dpi=10)
-    nx.draw_networkx_edges(Un_G, pos=position_dict, alpha=1.0, width=0.3)
-    default_node_size = 2
-    default_node_color = 'black'
-    
-    NodeLegend = {
+
+def get_capacitor_and_regulator_buses():
+    """Return legend node groups for capacitors and enabled voltage regulators."""
+    node_groups = {}
+    cap_df = get_capacitor_info()
+    if not cap_df.empty:
+        node_groups["Capacitor"] = list(cap_df['bus1'].str.split(".").str[0].unique())
+    reg_df = get_regcontrol_info()
+    if not reg_df.empty:
+        reg_df = reg_df.loc[reg_df.enabled.str.lower() == "yes"]
+    if not reg_df.empty:
+        node_groups["Voltage Regulator"] = list(reg_df['transformer_bus1'].unique())
+    return node_groups
+
+
+def plot_feeder(fig_folder, title, circuit_source=None, enable_detailed=False, defer_rendering=False):
+    """Function to plot feeder network.
+    """
+    plot_data = get_feeder_layout_data(title)
+    if plot_data is None:
+        return
+    node_groups = {
         "Load": get_load_buses(dss), 
         "PV": get_pv_buses(dss), 
         "Transformer": list(get_all_transformer_info_instance(compute_loading=False)['bus_names_only'].str[0].values),
     }
     if circuit_source is not None:
-        NodeLegend["Circuit Source"] = [circuit_source]
+        node_groups["Circuit Source"] = [circuit_source]
     if enable_detailed:
-        if enable_detailed:
-            cap_df = get_capacitor_info()
-        if not cap_df.empty:
-            NodeLegend["Capacitor"] = list(cap_df['bus1'].str.split(".").str[0].unique())
-        reg_df =  get_regcontrol_info()
-        if not reg_df.empty:
-            reg_df = reg_df.loc[reg_df.enabled.str.lower() == "yes"]
-        if not reg_df.empty:
-            NodeLegend["Voltage Regulator"] = list(reg_df['transformer_bus1'].unique())
-    colored_nodelist = []
-    for key in NodeLegend.keys():
-        temp_list = NodeLegend[key]
-        colored_nodelist  = colored_nodelist + temp_list
-        if  len(temp_list) != 0:
-            nx.draw_networkx_nodes(Un_G, pos=filter_dictionary(dict_data=position_dict, wanted_keys=temp_list),
-                                nodelist=temp_list, node_size=NODE_COLORLEGEND[key]["node_size"], node_color=NODE_COLORLEGEND[key]["node_color"],
-                                alpha=NODE_COLORLEGEND[key]["alpha"], label=NODE_COLORLEGEND[key]["label"])
-    
-    remaining_nodes = list(set(nodes_list) - set(colored_nodelist)) 
-    nx.draw_networkx_nodes(Un_G, pos=filter_dictionary(dict_data=position_dict, wanted_keys=remaining_nodes),
-                                nodelist=remaining_nodes, node_size=default_node_size, node_color=default_node_color)
-    plt.title(title, fontsize=50)
-    # plt.axis("off")
-    plt.legend(fontsize=50)
-    title = title.lower()
-    title = title.replace(" ", "_")
-    plt.savefig(os.path.join(fig_folder, title+".pdf"))
-    plt.close(fig)
+        node_groups.update(get_capacitor_and_regulator_buses())
+    plot_data.update({"plot_type": "feeder", "title": title, "node_groups": node_groups})
+    save_or_render_plot(fig_folder=fig_folder, plot_data=plot_data, defer_rendering=defer_rendering)
     return
 
 
-def plot_voltage_violations(fig_folder, title, buses_with_violations, circuit_source=None, enable_detailed=False):
+def plot_voltage_violations(fig_folder, title, buses_with_violations, circuit_source=None, enable_detailed=False,
+                            defer_rendering=False):
     """Function to plot voltage violations in network.
     """
-    os.makedirs(fig_folder, exist_ok=True)
-    default_node_size = 2
-    default_node_color = 'black'
-    G = generate_networkx_representation()
-    bus_coordinates_df = get_bus_coordinates()
-    complete_flag = check_buscoordinates_completeness(bus_coordinates_df)  # check if sufficient buscoordinates data is available
-    if not complete_flag:  # feeder cannot be plotted if sufficient buscoordinates data is unavailable
-        logger.warning(f"Unable to plot {title} because feeder model bus coordinates are not provided.")
+    plot_data = get_feeder_layout_data(title)
+    if plot_data is None:
         return
-    position_dict = nx.get_node_attributes(G, 'pos')
-    nodes_list = G.nodes()
-    Un_G = G.to_undirected()
-
-    fig = plt.figure(figsize=(40, 40), dpi=10)
-    nx.draw_networkx_edges(Un_G, pos=position_dict, alpha=1.0, width=0.3)
-    nx.draw_networkx_nodes(Un_G, pos=position_dict, alpha=1.0, node_size=default_node_size, node_color=default_node_color)
-    
-    NodeLegend = {
-        # "Load": get_load_buses(dss), 
-        # "PV": get_pv_buses(dss), 
-        # "Transformer": list(get_all_transformer_info_instance(compute_loading=False)['bus_names_only'].str[0].values),
-        "Violation": buses_with_violations,
+    node_groups = {
+        "Violation": list(buses_with_violations),
     }
     if circuit_source is not None:
-        NodeLegend["Circuit Source"] = [circuit_source]
+        node_groups["Circuit Source"] = [circuit_source]
     if enable_detailed:
-        cap_df = get_capacitor_info()
-        if not cap_df.empty:
-            NodeLegend["Capacitor"] = list(cap_df['bus1'].str.split(".").str[0].unique())
-        reg_df =  get_regcontrol_info()
-        if not reg_df.empty:
-            reg_df = reg_df.loc[reg_df.enabled.str.lower() == "yes"]
-        if not reg_df.empty:
-            NodeLegend["Voltage Regulator"] = list(reg_df['transformer_bus1'].unique())
-                           
-    colored_nodelist = []
-    for key in NodeLegend.keys():
-        temp_list = NodeLegend[key]
-        colored_nodelist  = colored_nodelist + temp_list
-        if  len(temp_list) != 0:
-            if key == "Violation":
-                label = "Bus " + NODE_COLORLEGEND[key]["label"]
-            else:
-                label = NODE_COLORLEGEND[key]["label"]
-            nx.draw_networkx_nodes(Un_G, pos=filter_dictionary(dict_data=position_dict, wanted_keys=temp_list),
-                                nodelist=temp_list, node_size=NODE_COLORLEGEND[key]["node_size"], node_color=NODE_COLORLEGEND[key]["node_color"], 
-                                alpha=NODE_COLORLEGEND[key]["alpha"], label=label)
-    
-    # remaining_nodes = list(set(nodes_list) - set(colored_nodelist)) 
-    # nx.draw_networkx_nodes(Un_G, pos=filter_dictionary(dict_data=position_dict, wanted_keys=remaining_nodes),
-    #                             nodelist=remaining_nodes, node_size=default_node_size, node_color=default_node_color)
-    plt.title(title, fontsize=50)
-    plt.legend(fontsize=50)
-    title = title.lower()
-    title = title.replace(" ", "_")
-    plt.savefig(os.path.join(fig_folder, title+".pdf"))
-    plt.close()
+        node_groups.update(get_capacitor_and_regulator_buses())
+    plot_data.update({"plot_type": "voltage_violations", "title": title, "node_groups": node_groups})
+    save_or_render_plot(fig_folder=fig_folder, plot_data=plot_data, defer_rendering=defer_rendering)
     return
 
 
-def plot_thermal_violations(fig_folder, title, equipment_with_violations, circuit_source=None):
+def plot_thermal_violations(fig_folder, title, equipment_with_violations, circuit_source=None, defer_rendering=False):
     """Function to plot thermal violations in network.
     """
-    default_node_size = 2
-    default_node_color = 'black'
-    G = generate_networkx_representation()
-    bus_coordinates_df = get_bus_coordinates()
-    complete_flag = check_buscoordinates_completeness(bus_coordinates_df)  # check if sufficient buscoordinates data is available
-    if not complete_flag:  # feeder cannot be plotted if sufficient buscoordinates data is unavailable
-        logger.warning(f"Unable to plot {title} because feeder model bus coordinates are not provided.")
+    plot_data = get_feeder_layout_data(title)
+    if plot_data is None:
         return
-    position_dict = nx.get_node_attributes(G, 'pos')
-    # nodes_list = G.nodes()
-    # edges_list = G.edges()
-    Un_G = G.to_undirected()
-    fig = plt.figure(figsize=(40, 40), dpi=10)
-    nx.draw_networkx_edges(Un_G, pos=position_dict, alpha=1.0, width=0.3)
-    nx.draw_networkx_nodes(Un_G, pos=position_dict, alpha=1.0, node_size=default_node_size, node_color=default_node_color)
-    
-    NodeLegend = {}
+    node_groups = {}
     if circuit_source is not None:
-        NodeLegend["Circuit Source"] = [circuit_source]
-    colored_nodelist = []
-    for key in NodeLegend.keys():
-        temp_list = NodeLegend[key]
-        colored_nodelist  = colored_nodelist + temp_list
-        if  len(temp_list) != 0:
-            label = NODE_COLORLEGEND[key]["label"]
-            nx.draw_networkx_nodes(Un_G, pos=filter_dictionary(dict_data=position_dict, wanted_keys=temp_list),
-                                nodelist=temp_list, node_size=NODE_COLORLEGEND[key]["node_size"], node_color=NODE_COLORLEGEND[key]["node_color"], 
-                                alpha=NODE_COLORLEGEND[key]["alpha"], label=label)
-    temp_xfmr_nodelist = []
-    temp_line_nodelist = []
-    for equipment_name in equipment_with_violations.keys():
-        if equipment_name == "Transformer":
-            # primary bus of transformer is plotted as a node
-            xfmr_df = equipment_with_violations[equipment_name]
-            temp_xfmr_nodelist = list(xfmr_df.loc[xfmr_df['status'] == 'overloaded']['bus_names_only'].str[0].values)
-            key = "Violation"
-            nx.draw_networkx_nodes(Un_G, pos=filter_dictionary(dict_data=position_dict, wanted_keys=temp_xfmr_nodelist),
-                                nodelist=temp_xfmr_nodelist, node_size=NODE_COLORLEGEND[key]["node_size"], 
-                                node_color=NODE_COLORLEGEND[key]["node_color"], alpha=NODE_COLORLEGEND[key]["alpha"], 
-                                label="Transformer " + NODE_COLORLEGEND[key]["label"])
-        elif equipment_name == "Line":
-            # line violations are plotted as edges
-            line_df = equipment_with_violations["Line"]
-            line_df = line_df.loc[line_df['status'] == 'overloaded'].copy()
-            if len(line_df) > 0: 
-                line_df.loc[:, "bus1"] = line_df['bus1'].str.split('.', expand=True)[0].str.lower()
-                line_df.loc[:, "bus2"] = line_df['bus2'].str.split('.', expand=True)[0].str.lower()
-                temp_edgelist = list(zip(line_df.bus1, line_df.bus2))
-                temp_line_nodelist = list(line_df['bus1'].unique()) + list(line_df['bus2'].unique())
-                key = "Violation"
-                nx.draw_networkx_edges(Un_G, pos=filter_dictionary(dict_data=position_dict, wanted_keys=temp_line_nodelist), 
-                                    edgelist=temp_edgelist, edge_color=EDGE_COLORLEGEND[key]["edge_color"], alpha=EDGE_COLORLEGEND[key]["alpha"], 
-                                    width=EDGE_COLORLEGEND[key]["edge_size"], label=EDGE_COLORLEGEND[key]["label"])
-            
-    plt.title(title, fontsize=50)
-    plt.legend(fontsize=50)
-    title = title.lower()
-    title = title.replace(" ", "_")
-    # plt.axis("off")
-    plt.savefig(os.path.join(fig_folder, title+".pdf"))
-    plt.close(fig)
+        node_groups["Circuit Source"] = [circuit_source]
+    xfmr_nodelist = None
+    line_edgelist = []
+    if "Transformer" in equipment_with_violations:
+        # primary bus of transformer is plotted as a node
+        xfmr_df = equipment_with_violations["Transformer"]
+        xfmr_nodelist = list(xfmr_df.loc[xfmr_df['status'] == 'overloaded']['bus_names_only'].str[0].values)
+    if "Line" in equipment_with_violations:
+        # line violations are plotted as edges
+        line_df = equipment_with_violations["Line"]
+        line_df = line_df.loc[line_df['status'] == 'overloaded'].copy()
+        if len(line_df) > 0: 
+            line_df.loc[:, "bus1"] = line_df['bus1'].str.split('.', expand=True)[0].str.lower()
+            line_df.loc[:, "bus2"] = line_df['bus2'].str.split('.', expand=True)[0].str.lower()
+            line_edgelist = [list(edge) for edge in zip(line_df.bus1, line_df.bus2)]
+    plot_data.update({
+        "plot_type": "thermal_violations",
+        "title": title,
+        "node_groups": node_groups,
+        "transformer_violation_buses": xfmr_nodelist,
+        "line_violation_edges": line_edgelist,
+    })
+    save_or_render_plot(fig_folder=fig_folder, plot_data=plot_data, defer_rendering=defer_rendering)
     return
 
 
-def plot_created_clusters(fig_folder, clusters_dict, circuit_source=None):
+def plot_created_clusters(fig_folder, clusters_dict, circuit_source=None, defer_rendering=False):
     """Function to plot created clusters in network, while placing voltage regulators.
     """
-    os.makedirs(fig_folder, exist_ok=True)
-    default_node_size = 2
-    default_node_color = 'black'
-    G = generate_networkx_representation()
-    bus_coordinates_df = get_bus_coordinates()
-    complete_flag = check_buscoordinates_completeness(bus_coordinates_df)  # check if sufficient buscoordinates data is available
     num_clusters = len(clusters_dict.keys())
     title = f"all_bus_violations_grouped_in_{num_clusters}_clusters"
-    if not complete_flag:  # feeder cannot be plotted if sufficient buscoordinates data is unavailable
-        logger.warning(f"Unable to plot {title} because feeder model bus coordinates are not provided.")
+    plot_data = get_feeder_layout_data(title)
+    if plot_data is None:
         return
-    position_dict = nx.get_node_attributes(G, 'pos')
-    Un_G = G.to_undirected()
-    
-    fig = plt.figure(figsize=(40, 40), dpi=10)
-    nx.draw_networkx_edges(Un_G, pos=position_dict, alpha=1.0, width=0.3)
-    nx.draw_networkx_nodes(Un_G, pos=position_dict, alpha=1.0, node_size=default_node_size, node_color=default_node_color)
+    node_groups = {}
     if circuit_source is not None:
-        key = "Circuit Source"
-        nx.draw_networkx_nodes(G, pos=filter_dictionary(dict_data=position_dict, wanted_keys=[circuit_source]),
-                                nodelist=[circuit_source], node_size=NODE_COLORLEGEND[key]["node_size"], 
-                                node_color=NODE_COLORLEGEND[key]["node_color"], alpha=NODE_COLORLEGEND[key]["alpha"], label=NODE_COLORLEGEND[key]["label"])
-    col = 0
+        node_groups["Circuit Source"] = [circuit_source]
+    clusters = {}
     for key, values in clusters_dict.items():
-        buses_list = values["buses_list"]
-        reg_node = values["node"]
-        common_upstream_nodes_list = values["common_upstream_nodes_list"]
-        nx.draw_networkx_nodes(G, pos=filter_dictionary(dict_data=position_dict, wanted_keys=buses_list),
-                                nodelist=buses_list, node_size=500, node_color='C{}'.format(col), label=f"Bus Violations_cluster{key}")
-        
-        nx.draw_networkx_nodes(G, pos=filter_dictionary(dict_data=position_dict, wanted_keys=common_upstream_nodes_list),
-                                nodelist=common_upstream_nodes_list, node_size=500, node_color='C{}'.format(col), alpha=0.3, 
-                                label=f"Common Upstream Nodes_cluster{key}")
-        
-        nx.draw_networkx_nodes(G, pos=filter_dictionary(dict_data=position_dict, wanted_keys=[reg_node]),  nodelist=[reg_node], node_size=1000, node_color='r', 
-                               label=f"Voltage Regulator_cluster{key}")
-        col += 1
-    
-    plt.title(title, fontsize=50)
-    plt.legend(fontsize=50)
-    title = title.lower()
-    title = title.replace(" ", "_")
-    plt.savefig(os.path.join(fig_folder, title+".pdf"))
-    plt.close(fig)
+        clusters[str(key)] = {
+            "buses_list": list(values["buses_list"]),
+            "node": values["node"],
+            "common_upstream_nodes_list": list(values["common_upstream_nodes_list"]),
+        }
+    plot_data.update({"plot_type": "created_clusters", "title": title, "node_groups": node_groups, "clusters": clusters})
+    save_or_render_plot(fig_folder=fig_folder, plot_data=plot_data, defer_rendering=defer_rendering)
     return
 
 
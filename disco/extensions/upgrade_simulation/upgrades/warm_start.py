@@ -0,0 +1,139 @@
+"""Warm start of upgrade cost analysis jobs across the penetration levels of a sample.
+
+Jobs for the same substation, feeder, placement, and sample differ only by the PV added at each
+penetration level, so a job usually needs at least the upgrades of the next-lower level. With warm
+start, each job is blocked by that level and its thermal and voltage stages start from the final
+upgrade commands of that level instead of the original model. The seeded upgrades are marked as
+inherited in the upgrade and cost outputs. If the seeded circuit does not converge, the stage
+starts from the original model.
+
+If a job upgrades equipment that the seed upgraded, only the new upgrade is costed.
+
+make_warm_start_jobs in upgrade_configuration determines the seed of each job.
+"""
+
+import logging
+import os
+
+from jade.utils.utils import load_data
+
+from .common_functions import reload_dss_circuit
+from disco.exceptions import OpenDssCompileError, OpenDssConvergenceError, PyDssConvergenceError
+
+
+logger = logging.getLogger(__name__)
+
+# The stages append these commands to their upgrade files. reload_dss_circuit issues them as needed.
+_STAGE_COMMANDS = ("calcvoltagebases", "solve", "set maxcontroliter")
+
+
+class WarmStartSeed:
+    """Final upgrades of the job that seeds a warm-started job."""
+
+    def __init__(self, job_name, thermal_commands, voltage_commands, thermal_upgrades, voltage_upgrades):
+        self.job_name = job_name
+        self.thermal_commands = thermal_commands
+        self.voltage_commands = voltage_commands
+        self.thermal_upgrades = thermal_upgrades
+        self.voltage_upgrades = voltage_upgrades
+
+    @classmethod
+    def load(
+        cls,
+        job_name,
+        thermal_upgrades_dss_file,
+        voltage_upgrades_dss_file,
+        thermal_upgrades_json_file,
+        voltage_upgrades_json_file,
+        overall_output_summary_file,
+    ):
+        """Load the outputs of a completed job.
+
+        Returns
+        -------
+        WarmStartSeed | None
+            None if the job did not complete
+
+        """
+        if not os.path.exists(overall_output_summary_file) or \
+                "results" not in load_data(overall_output_summary_file):
+            logger.warning("Job %s did not complete. Cannot use it as a warm start.", job_name)
+            return None
+
+        return cls(
+            job_name,
+            thermal_commands=_read_upgrade_commands(thermal_upgrades_dss_file),
+            voltage_commands=_read_upgrade_commands(voltage_upgrades_dss_file),
+            thermal_upgrades=load_data(thermal_upgrades_json_file),
+            voltage_upgrades=load_data(voltage_upgrades_json_file)["voltage"],
+        )
+
+    def apply(self, dss_file_list, commands_list, **kwargs):
+        """Load the circuit with the seed commands and check that it converges.
+        If it does not, reload the circuit without them.
+
+        Parameters
+        ----------
+        dss_file_list : list
+        commands_list : list
+            Seed commands for the stage
+        kwargs
+            Simulation parameters passed to reload_dss_circuit
+
+        Returns
+        -------
+        bool
+            True if the circuit was seeded
+
+        """
+        if not commands_list:
+            return False
+        try:
+            reload_dss_circuit(dss_file_list=dss_file_list, commands_list=commands_list, **kwargs)
+        except (OpenDssCompileError, OpenDssConvergenceError, PyDssConvergenceError):
+            logger.warning(
+                "The circuit seeded with the upgrades of job %s does not converge. "
+                "Start from the original circuit.", self.job_name,
+            )
+            reload_dss_circuit(dss_file_list=dss_file_list, commands_list=None, **kwargs)
+            return False
+
+        logger.info("Seeded the circuit with %s upgrade commands of job %s", len(commands_list), self.job_name)
+        return True
+
+    def get_thermal_upgrades(self, equipment_type):
+        """Return the thermal upgrades of equipment_type ("line" or "transformer"), marked as inherited.
+
+        Returns
+        -------
+        list
+
+        """
+        return [{**x, "inherited": True} for x in self.thermal_upgrades.get(equipment_type, [])]
+
+    def mark_voltage_upgrades(self, upgrades):
+        """Mark the voltage upgrades that are identical to upgrades of the seed job as inherited.
+
+        Parameters
+        ----------
+        upgrades : list
+            Items are VoltageUpgradesTechnicalResultModel. Modified in place.
+
+        """
+        seed_upgrades = [_strip_inherited(x) for x in self.voltage_upgrades]
+        for upgrade in upgrades:
+            upgrade.inherited = _strip_inherited(upgrade.dict(by_alias=True)) in seed_upgrades
+
+
+def _read_upgrade_commands(filename):
+    # write_text_file separates the commands with blank lines.
+    with open(filename) as f_in:
+        commands = [x.strip() for x in f_in.read().split("\n\n")]
+    return [
+        x for x in commands
+        if x and not x.startswith("//") and not x.lower().startswith(_STAGE_COMMANDS)
+    ]
+
+
+def _strip_inherited(upgrade):
+    return {k: v for k, v in upgrade.items() if k != "inherited"}
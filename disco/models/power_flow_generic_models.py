@@ -1,12 +1,20 @@
+import logging
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Set
 
 from pydantic.v1 import BaseModel, Field, root_validator, validator
 
-from jade.utils.utils import load_data
+from jade.utils.utils import load_data, dump_data
+from PyDSS.common import ControllerType
 
 from disco.models.base import BaseAnalysisModel, PyDSSControllerModel
+from disco.utils.feeder_stats_index import compute_file_hash
+
+
+logger = logging.getLogger(__name__)
+
+VALIDATED_INPUTS_CACHE_FILENAME = ".disco_validated_inputs.json"
 
 
 class PowerFlowGenericModel(BaseAnalysisModel):
@@ -120,6 +128,135 @@ class PowerFlowSimulationBaseModel(BaseModel):
         """
         return cls(**load_data(filename))
 
+    @classmethod
+    def load_inputs(cls, filename: Path, trust_validated=False):
+        """Return the contents of a file with incremental validation of its jobs.
+
+        Parameters
+        ----------
+        filename : Path
+        trust_validated : bool
+            If True and the file content was previously validated, skip per-field validation
+            of the jobs.
+
+        Returns
+        -------
+        PowerFlowSimulationInputs
+
+        """
+        return PowerFlowSimulationInputs(cls, filename, trust_validated=trust_validated)
+
+
+def check_power_flow_jobs(jobs):
+    """Run the cross-job checks of PowerFlowSimulationBaseModel on serialized jobs in one pass.
+
+    Parameters
+    ----------
+    jobs : list
+        list of dict
+
+    """
+    if not jobs:
+        raise ValueError("no jobs are defined")
+
+    names = set()
+    num_pydss_controllers = set()
+    for job in jobs:
+        if job["name"] in names:
+            raise ValueError(f"{job['name']} is duplicated")
+        names.add(job["name"])
+        num_pydss_controllers.add(len(job.get("pydss_controllers", [])))
+    if len(num_pydss_controllers) > 1:
+        raise ValueError("All jobs must have the same number of pydss_controllers.")
+
+
+class PowerFlowSimulationInputs:
+    """Contents of a power-flow simulation file.
+
+    The simulation parameters and cross-job rules are validated when the file is loaded. Each job
+    is validated when it is iterated, so a config can be built without holding a validated
+    model of every job. Files whose content hash is recorded as validated can skip per-field
+    validation of the jobs. The registration of PyDSS controllers is always checked.
+
+    """
+
+    def __init__(self, model_class, filename, trust_validated=False):
+        self._filename = Path(filename)
+        data = load_data(self._filename)
+        self._jobs = data.pop("jobs", [])
+        check_power_flow_jobs(self._jobs)
+        self._content_hash = compute_file_hash(self._filename)
+        self._model_class = model_class
+        self._is_trusted = trust_validated and self._content_hash in self._read_cache().get(
+            model_class.__name__, []
+        )
+        if self._is_trusted:
+            logger.info("Skip validation of jobs in previously validated file %s", filename)
+        # This runs the validators of the simulation parameters.
+        self.simulation = model_class(jobs=self._jobs[:1], **data)
+
+    def __len__(self):
+        return len(self._jobs)
+
+    @property
+    def is_trusted(self):
+        """Return True if the jobs are not validated."""
+        return self._is_trusted
+
+    def iter_jobs(self):
+        """Return an iterator over the jobs.
+
+        Yields
+        ------
+        PowerFlowGenericModel
+
+        """
+        for job in self._jobs:
+            if self._is_trusted:
+                yield _construct_generic_job(job)
+            else:
+                yield PowerFlowGenericModel(**job)
+
+    def record_validated(self):
+        """Record that the file content passed validation. Call this after all jobs have been
+        processed.
+
+        """
+        if self._is_trusted:
+            return
+        cache = self._read_cache()
+        hashes = cache.setdefault(self._model_class.__name__, [])
+        if self._content_hash not in hashes:
+            hashes.append(self._content_hash)
+            try:
+                dump_data(cache, self._cache_file, indent=2)
+            except OSError:
+                logger.warning("Failed to record validated inputs in %s", self._cache_file)
+
+    @property
+    def _cache_file(self):
+        return self._filename.parent / VALIDATED_INPUTS_CACHE_FILENAME
+
+    def _read_cache(self):
+        if self._cache_file.exists():
+            return load_data(self._cache_file)
+        return {}
+
+
+def _construct_generic_job(job):
+    values = dict(job)
+    values["blocked_by"] = set(values.get("blocked_by", []))
+    for controller in values.get("pydss_controllers", []):
+        # This depends on the PyDSS installation, not on the file content.
+        PyDSSControllerModel.validate_pydss_controller_registration(controller)
+    values["pydss_controllers"] = [
+        PyDSSControllerModel.construct(
+            **{**x, "controller_type": ControllerType(x["controller_type"])}
+        )
+        for x in values.get("pydss_controllers", [])
+    ]
+    return PowerFlowGenericModel.construct(**values)
+
 
 class PowerFlowSnapshotSimulationModel(PowerFlowSimulationBaseModel):
     """Defines a snapshot power-flow simulation."""
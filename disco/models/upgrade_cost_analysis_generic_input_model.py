@@ -310,6 +310,19 @@ class ThermalUpgradeParamsModel(UpgradeParamsBaseModel):
     create_plots: Optional[bool] = Field(
         title="create_plots", description="Flag to enable or disable figure creation", default=True
     )
+    defer_plot_rendering: Optional[bool] = Field(
+        title="defer_plot_rendering",
+        description="If True, record plot data as artifacts during the simulation instead of rendering "
+        "figures. Render them later with 'disco upgrade-cost-analysis render-plots'.",
+        default=False,
+    )
+    batch_upgrade_commands: Optional[bool] = Field(
+        title="batch_upgrade_commands",
+        description="If True, run all upgrade commands of a correction pass before solving the "
+        "circuit once instead of solving after every command. If that solution does not converge, "
+        "the pass is replayed to identify the failing command.",
+        default=False,
+    )
     parallel_transformers_limit: Optional[int] = Field(
         title="parallel_transformers_limit", description="Parallel transformer limit", default=4
     )
@@ -319,6 +332,27 @@ class ThermalUpgradeParamsModel(UpgradeParamsBaseModel):
     upgrade_iteration_threshold: Optional[int] = Field(
         title="upgrade_iteration_threshold", description="Upgrade iteration threshold", default=5
     )
+    max_stage_time_s: Optional[float] = Field(
+        title="max_stage_time_s",
+        description="Wall-time budget of the thermal stage in seconds. If it is exhausted, the stage "
+        "stops with the best upgrades found so far and reports the status budget_exhausted. "
+        "Not limited by default.",
+        default=None,
+        gt=0,
+    )
+    max_stage_solves: Optional[int] = Field(
+        title="max_stage_solves",
+        description="Budget of circuit solves of the thermal stage. Not limited by default.",
+        default=None,
+        gt=0,
+    )
+    max_memory_mb: Optional[float] = Field(
+        title="max_memory_mb",
+        description="Budget of resident memory of the process in MiB, checked by the thermal stage "
+        "between upgrade iterations. Not limited by default.",
+        default=None,
+        gt=0,
+    )
     timepoint_multipliers: Optional[Dict] = Field(
         title="timepoint_multipliers",
         description='Dictionary to provide timepoint multipliers. example: timepoint_multipliers={"load_multipliers": {"with_pv": [1.2], "without_pv": [0.6]}}',
@@ -404,6 +438,12 @@ class VoltageUpgradeParamsModel(UpgradeParamsBaseModel):
         description="Flag to enable or disable figure creation", 
         default=True
     )
+    defer_plot_rendering: Optional[bool] = Field(
+        title="defer_plot_rendering",
+        description="If True, record plot data as artifacts during the simulation instead of rendering "
+        "figures. Render them later with 'disco upgrade-cost-analysis render-plots'.",
+        default=False,
+    )
     capacitor_sweep_voltage_gap: float = Field(
         title="capacitor_sweep_voltage_gap",
         description="Capacitor sweep voltage gap (example: 1)",
@@ -454,6 +494,27 @@ class VoltageUpgradeParamsModel(UpgradeParamsBaseModel):
         description="Max control iterations to be set for OpenDSS",
         default=50,
     )
+    max_stage_time_s: Optional[float] = Field(
+        title="max_stage_time_s",
+        description="Wall-time budget of the voltage stage in seconds. If it is exhausted, the stage "
+        "stops with the best upgrades found so far and reports the status budget_exhausted. "
+        "Not limited by default.",
+        default=None,
+        gt=0,
+    )
+    max_stage_solves: Optional[int] = Field(
+        title="max_stage_solves",
+        description="Budget of circuit solves of the voltage stage. Not limited by default.",
+        default=None,
+        gt=0,
+    )
+    max_memory_mb: Optional[float] = Field(
+        title="max_memory_mb",
+        description="Budget of resident memory of the process in MiB, checked by the voltage stage "
+        "between upgrade iterations. Not limited by default.",
+        default=None,
+        gt=0,
+    )
 
     @validator("initial_lower_limit")
     def check_initial_voltage_lower_limits(cls, initial_lower_limit, values):
@@ -511,6 +572,20 @@ class UpgradeCostAnalysisGenericModel(BaseAnalysisModel):
         title="estimated_run_minutes",
         description="Optionally advises the job execution manager on how long the job will run",
     )
+    substation: Optional[str] = Field(
+        title="substation",
+        description="Substation for the job",
+    )
+    feeder: Optional[str] = Field(
+        title="feeder",
+        description="Feeder for the job",
+    )
+    project_data: Dict = Field(
+        title="project_data",
+        description="Optional user-defined metadata for the job. warm_start uses placement, "
+        "sample, and penetration_level.",
+        default={},
+    )
 
     @validator("opendss_model_file")
     def check_model_file(cls, opendss_model_file):
@@ -581,6 +656,21 @@ class UpgradeCostAnalysisSimulationModel(UpgradeParamsBaseModel):
     dc_ac_ratio: Optional[float] = Field(
         title="dc_ac_ratio", description="Apply DC-AC ratio for PV Systems", default=None
     )
+    warm_start: bool = Field(
+        title="warm_start",
+        description="If True, run the jobs of each substation, feeder, placement, and sample in "
+        "order of penetration level and start each job from the final upgrades of the next-lower "
+        "level. Those upgrades are reported as inherited.",
+        default=False,
+    )
+    result_cache_directory: Optional[str] = Field(
+        title="result_cache_directory",
+        description="Directory of a cache of job results keyed by a hash of the OpenDSS model "
+        "files, parameters, technical catalog, cost database, and disco version. A job with the "
+        "same inputs as a cached result copies its outputs instead of running the simulation. "
+        "The cache can be shared by several simulations.",
+        default=None,
+    )
     jobs: List[UpgradeCostAnalysisGenericModel]
 
     @root_validator(pre=True)
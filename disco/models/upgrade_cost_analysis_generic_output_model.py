@@ -101,6 +101,17 @@ class UpgradeViolationResultModel(UpgradeParamsBaseModel):
         description="Transformer upper limit, the threshold considered for determining transformer overloading",
         units="pu",
     )
+    stage_status: Optional[str] = Field(
+        title="stage_status",
+        description="completed, or budget_exhausted if the upgrade stage stopped at its resource budget "
+        "with the best upgrades found so far",
+        default="completed",
+    )
+    budget_exhausted_reason: Optional[str] = Field(
+        title="budget_exhausted_reason",
+        description="Resource limit that stopped the upgrade stage",
+        default=None,
+    )
 
 
 class TotalUpgradeCostsResultModel(UpgradeParamsBaseModel):
@@ -123,6 +134,13 @@ class TotalUpgradeCostsResultModel(UpgradeParamsBaseModel):
         description="Total cost in US dollars",
         units="dollars",
     )
+    inherited_cost_usd: Optional[float] = Field(
+        title="inherited_cost_usd",
+        description="Part of total_cost_usd for upgrades inherited from the lower penetration level "
+        "that seeded this job",
+        units="dollars",
+        default=0.0,
+    )
     
 
 class EquipmentTypeUpgradeCostsResultModel(UpgradeParamsBaseModel):
@@ -157,6 +175,12 @@ class EquipmentTypeUpgradeCostsResultModel(UpgradeParamsBaseModel):
         units="",
         default="",
     )
+    inherited: Optional[bool] = Field(
+        title="inherited",
+        description="True if the costs are for upgrades inherited from the lower penetration level "
+        "that seeded this job",
+        default=False,
+    )
     
 
 class AllEquipmentUpgradeCostsResultModel(UpgradeParamsBaseModel):
@@ -203,6 +227,11 @@ class VoltageUpgradesTechnicalResultModel(UpgradeParamsBaseModel):
         title="at_substation",
         description="This flag depicts whether the change was made at the Substation",
     ) 
+    inherited: Optional[bool] = Field(
+        title="inherited",
+        description="True if the upgrade was inherited from the lower penetration level that seeded this job",
+        default=False,
+    )
        
 
 class LineUpgradesTechnicalResultModel(OpenDSSLineModel, ExtraLineParams):
@@ -231,6 +260,11 @@ class LineUpgradesTechnicalResultModel(OpenDSSLineModel, ExtraLineParams):
          title="original_equipment_name",
         description="original_equipment_name"
     )
+    inherited: Optional[bool] = Field(
+        title="inherited",
+        description="True if the upgrade was inherited from the lower penetration level that seeded this job",
+        default=False,
+    )
 
     
 class TransformerUpgradesTechnicalResultModel(OpenDSSTransformerModel, ExtraTransformerParams):
@@ -259,6 +293,11 @@ class TransformerUpgradesTechnicalResultModel(OpenDSSTransformerModel, ExtraTran
          title="original_equipment_name",
         description="original_equipment_name"
     )
+    inherited: Optional[bool] = Field(
+        title="inherited",
+        description="True if the upgrade was inherited from the lower penetration level that seeded this job",
+        default=False,
+    )
 
     
 class AllUpgradesTechnicalResultModel(UpgradeParamsBaseModel):
@@ -409,9 +448,16 @@ class UpgradeJobOutputModel(UpgradeParamsBaseModel):
         description="Path to file containing feeder metadata and equipment details before and "
         "after upgrades.",
     )
-    return_code: int = Field(
+    return_code: Optional[int] = Field(
         title="return_code",
-        description="Return code from process. Zero is success, non-zero is a failure.",
+        description="Return code from process. Zero is success, non-zero is a failure. None if "
+        "the process did not finish.",
+    )
+    partial: bool = Field(
+        title="partial",
+        description="Whether the job failed or did not finish. Its results only include the "
+        "completed stages.",
+        default=False,
     )
 
 
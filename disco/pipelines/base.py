@@ -198,6 +198,16 @@ class PipelineCreatorBase(ABC):
     
     def get_postprocess_command_text_file(self):
         return os.path.join(".", "pipeline-postprocess-command.txt")
+
+    @staticmethod
+    def get_postprocess_step_python_file():
+        return os.path.join(os.path.dirname(__file__), "postprocess_steps.py")
+
+    def get_postprocess_steps_file(self):
+        return os.path.abspath("pipeline-postprocess-steps.json")
+
+    def get_postprocess_cache_directory(self):
+        return os.path.abspath("pipeline-postprocess-cache")
     
     @abstractmethod
     def create_pipeline(self, pipeline_config_file):
@@ -220,8 +230,8 @@ class PipelineCreatorBase(ABC):
         """Make disco config command"""
     
     @abstractmethod
-    def make_postprocess_command(self):
-        """Make disco make-summary-tables & compute-hosting-capacity command"""
+    def make_postprocess_steps(self):
+        """Make postprocess steps, such as disco make-summary-tables & compute-hosting-capacity"""
     
     def create_prescreen_auto_config_text_file(self):
         """Create script for generating prescreen config file"""
@@ -271,10 +281,16 @@ class PipelineCreatorBase(ABC):
     
     def create_postprocess_command_text_file(self):
         text_file = "pipeline-postprocess-command.txt"
-        command = self.make_postprocess_command()
+        steps = self.make_postprocess_steps()
+        steps_file = self.get_postprocess_steps_file()
+        # postprocess_steps imports this module indirectly.
+        from disco.pipelines.postprocess_steps import write_postprocess_steps
+        write_postprocess_steps(steps, steps_file, self.get_postprocess_cache_directory())
+        step_py = self.get_postprocess_step_python_file()
         with open(text_file, "w") as f:
-            f.write(command)
-            f.write("\n")
+            for step in steps:
+                f.write(f"python {step_py} {steps_file} {step['name']}")
+                f.write("\n")
         return text_file
 
     def make_prescreen_stage(self):
@@ -8,13 +8,24 @@ import disco
 from disco.enums import SimulationType, AnalysisType
 from disco.pipelines.enums import TemplateSection
 from disco.pipelines.base import PipelineCreatorBase
+from disco.pipelines.postprocess_steps import make_step
 from disco.pydss.common import TIME_SERIES_SCENARIOS
 from disco.pydss.pydss_configuration_base import get_default_exports_file
+from jade.common import RESULTS_FILE
 from jade.models.pipeline import PipelineConfig
 from jade.utils.utils import dump_data
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_TABLES_STEP = "make-summary-tables"
+SUMMARY_TABLE_FILENAMES = (
+    "feeder_head_table.csv",
+    "feeder_losses_table.csv",
+    "metadata_table.csv",
+    "thermal_metrics_table.csv",
+    "voltage_metrics_table.csv",
+)
+
 
 class SnapshotPipelineCreator(PipelineCreatorBase):
 
@@ -65,55 +76,45 @@ class SnapshotPipelineCreator(PipelineCreatorBase):
     def make_prescreen_filter_command(self):
         pass
 
-    def make_postprocess_command(self):
-        commands = []
+    def make_postprocess_steps(self):
+        steps = []
         impact_analysis = self.template.analysis_type == AnalysisType.IMPACT_ANALYSIS.value
         hosting_capacity = self.template.analysis_type == AnalysisType.HOSTING_CAPACITY.value
         if impact_analysis or hosting_capacity:
             # Postprocess to make summary tables
             inputs = os.path.join("$JADE_PIPELINE_OUTPUT_DIR", f"output-stage{self.stage_num-1}")
-            commands.append(f"disco make-summary-tables {inputs}")
-            
+            steps.append(_make_summary_tables_step(inputs))
+
             # Postprocess to compute hosting capacity
+            hc_steps = {}
             if hosting_capacity:
                 config_params = self.template.get_config_params(TemplateSection.SIMULATION)
                 with_loadshape = config_params["with_loadshape"]
                 auto_select_time_points = config_params["auto_select_time_points"]
                 pf1 = config_params["pf1"]
-                base_cmd = f"disco compute-hosting-capacity {inputs}"
-                plot_cmd = f"disco plot {inputs}"
                 scenarios = [CONTROL_MODE_SCENARIO]
                 if pf1:
                     scenarios.append(PF1_SCENARIO)
-                if with_loadshape and auto_select_time_points:
-                    for scenario in scenarios:
+                for scenario in scenarios:
+                    hc_steps[scenario] = []
+                    if with_loadshape and auto_select_time_points:
                         for mode in SnapshotTimePointSelectionMode:
                             if mode != SnapshotTimePointSelectionMode.NONE:
-                                commands.append(f"{base_cmd} --scenario={scenario} --time-point={mode.value}")
-                else:
-                    for scenario in scenarios:
-                        commands.append(f"{base_cmd} --scenario={scenario}")
-            
+                                hc_steps[scenario].append(
+                                    _make_hosting_capacity_step(inputs, scenario, time_point=mode.value)
+                                )
+                    else:
+                        hc_steps[scenario].append(_make_hosting_capacity_step(inputs, scenario))
+                    steps += hc_steps[scenario]
+
                 # Plot
-                for scenario in scenarios:
-                    commands.append(f"{plot_cmd} --scenario {scenario}")
+                steps += _make_plot_steps(inputs, hc_steps)
 
             # Postprocess to ingest results into sqlite database
-            task_name = self.template.data["task_name"]
-            if os.path.isabs(self.template.database):
-                database = self.template.database
-            else:
-                database = os.path.join(inputs, self.template.database)
-            model_inputs = self.template.inputs
-            commands.append(
-                'disco ingest-tables '
-                f'--task-name "{task_name}" '
-                f'--database {database} '
-                f'--model-inputs {model_inputs} '
-                f'{inputs}'
-            )
+            depends_on = [SUMMARY_TABLES_STEP] + [x["name"] for y in hc_steps.values() for x in y]
+            steps.append(_make_ingest_tables_step(self.template, inputs, depends_on))
 
-        return "\n".join(commands)
+        return steps
 
 
 class TimeSeriesPipelineCreator(PipelineCreatorBase):
@@ -183,41 +184,34 @@ class TimeSeriesPipelineCreator(PipelineCreatorBase):
         logger.info("Make command - '%s'", command)
         return command
 
-    def make_postprocess_command(self):
-        commands = []
+    def make_postprocess_steps(self):
+        steps = []
         impact_analysis = self.template.analysis_type == AnalysisType.IMPACT_ANALYSIS.value
         hosting_capacity = self.template.analysis_type == AnalysisType.HOSTING_CAPACITY.value
         if impact_analysis or hosting_capacity:
             inputs = os.path.join("$JADE_PIPELINE_OUTPUT_DIR", f"output-stage{self.stage_num-1}")
-            commands.append(f"disco make-summary-tables {inputs}")
+            steps.append(_make_summary_tables_step(inputs))
+            hc_steps = {}
             if hosting_capacity:
                 for scenario in TIME_SERIES_SCENARIOS:
-                    commands.append(f"disco compute-hosting-capacity {inputs} --scenario={scenario}")
-                
-                for scenario in TIME_SERIES_SCENARIOS:
-                    commands.append(f"disco plot {inputs} --scenario={scenario}")
-            
+                    hc_steps[scenario] = [_make_hosting_capacity_step(inputs, scenario)]
+                    steps += hc_steps[scenario]
+
+                steps += _make_plot_steps(inputs, hc_steps)
+
             # Postprocess to ingest results into sqlite database
-            task_name = self.template.data["task_name"]
-            
-            if os.path.isabs(self.template.database):
-                database = self.template.database
-            else:
-                database = os.path.join(inputs, self.template.database)
-            model_inputs = self.template.inputs
-            commands.append(
-                'disco ingest-tables '
-                f'--task-name "{task_name}" '
-                f'--database {database} '
-                f'--model-inputs {model_inputs} '
-                f'{inputs}'
-            )
+            depends_on = [SUMMARY_TABLES_STEP] + [x["name"] for y in hc_steps.values() for x in y]
+            steps.append(_make_ingest_tables_step(self.template, inputs, depends_on))
 
         elif self.template.analysis_type == AnalysisType.COST_BENEFIT.value:
             inputs = os.path.join("$JADE_PIPELINE_OUTPUT_DIR", f"output-stage{self.stage_num-1}")
-            commands.append(f"disco-internal make-cba-tables {inputs}")
-        
-        return "\n".join(commands)
+            steps.append(make_step(
+                "make-cba-tables",
+                f"disco-internal make-cba-tables {inputs}",
+                inputs=[os.path.join(inputs, RESULTS_FILE)],
+            ))
+
+        return steps
 
 
 class UpgradePipelineCreator(PipelineCreatorBase):
@@ -256,10 +250,14 @@ class UpgradePipelineCreator(PipelineCreatorBase):
         logger.info("Make command - '%s'", command)
         return command
 
-    def make_postprocess_command(self):
+    def make_postprocess_steps(self):
         inputs = os.path.join("$JADE_PIPELINE_OUTPUT_DIR", f"output-stage{self.stage_num-1}")
-        command = f"disco-internal make-upgrade-tables {inputs}"
-        return command
+        step = make_step(
+            "make-upgrade-tables",
+            f"disco-internal make-upgrade-tables {inputs}",
+            inputs=[os.path.join(inputs, RESULTS_FILE)],
+        )
+        return [step]
 
 
 class UpgradePipelineCreator(PipelineCreatorBase):
@@ -298,7 +296,69 @@ class UpgradePipelineCreator(PipelineCreatorBase):
         logger.info("Make command - '%s'", command)
         return command
 
-    def make_postprocess_command(self):
+    def make_postprocess_steps(self):
         inputs = os.path.join("$JADE_PIPELINE_OUTPUT_DIR", f"output-stage{self.stage_num-1}")
-        command = f"disco-internal make-upgrade-tables {inputs}"
-        return command
+        step = make_step(
+            "make-upgrade-tables",
+            f"disco-internal make-upgrade-tables {inputs}",
+            inputs=[os.path.join(inputs, RESULTS_FILE)],
+        )
+        return [step]
+
+
+def _make_summary_tables_step(inputs):
+    return make_step(
+        SUMMARY_TABLES_STEP,
+        f"disco make-summary-tables {inputs}",
+        inputs=[os.path.join(inputs, RESULTS_FILE)],
+        outputs=[os.path.join(inputs, x) for x in SUMMARY_TABLE_FILENAMES],
+    )
+
+
+def _make_hosting_capacity_step(inputs, scenario, time_point=None):
+    # Each scenario and time point writes its own files, so these steps can run concurrently.
+    command = f"disco compute-hosting-capacity {inputs} --scenario={scenario}"
+    name = f"compute-hosting-capacity__{scenario}"
+    suffix = ""
+    if time_point is not None:
+        command += f" --time-point={time_point}"
+        name += f"__{time_point}"
+        suffix = f"__{time_point}"
+    outputs = [
+        os.path.join(inputs, f"hosting_capacity_summary__{scenario}{suffix}.json"),
+        os.path.join(inputs, f"hosting_capacity_overall__{scenario}{suffix}.json"),
+    ]
+    return make_step(name, command, depends_on=[SUMMARY_TABLES_STEP], outputs=outputs)
+
+
+def _make_plot_steps(inputs, hc_steps):
+    steps = []
+    for scenario, scenario_hc_steps in hc_steps.items():
+        depends_on = [x["name"] for x in scenario_hc_steps]
+        # Every plot command rewrites the same voltage plots, so don't run them concurrently.
+        if steps:
+            depends_on.append(steps[-1]["name"])
+        steps.append(make_step(
+            f"plot__{scenario}",
+            f"disco plot {inputs} --scenario {scenario}",
+            depends_on=depends_on,
+            outputs=[os.path.join(inputs, f"hca__{scenario}.png")],
+        ))
+    return steps
+
+
+def _make_ingest_tables_step(template, inputs, depends_on):
+    task_name = template.data["task_name"]
+    if os.path.isabs(template.database):
+        database = template.database
+    else:
+        database = os.path.join(inputs, template.database)
+    model_inputs = template.inputs
+    command = (
+        'disco ingest-tables '
+        f'--task-name "{task_name}" '
+        f'--database {database} '
+        f'--model-inputs {model_inputs} '
+        f'{inputs}'
+    )
+    return make_step("ingest-tables", command, depends_on=depends_on)
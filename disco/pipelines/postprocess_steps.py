@@ -0,0 +1,157 @@
+"""Dependency-aware postprocess steps of a pipeline.
+
+Each postprocess command is a step that declares the steps it depends on and the files that it
+reads and writes. The postprocess JADE config blocks a job only on the jobs of the steps that it
+depends on, so independent steps run concurrently. A step records a marker in the cache
+directory when it succeeds; re-running the step is a no-op while its command, inputs, and
+upstream steps are unchanged and its outputs exist.
+"""
+
+import hashlib
+import logging
+import os
+import pathlib
+import time
+
+import click
+
+from jade.loggers import setup_logging
+from jade.utils.run_command import check_run_command
+from jade.utils.utils import load_data, dump_data
+from disco.pipelines.utils import ensure_jade_pipeline_output_dir
+
+
+logger = logging.getLogger(__name__)
+
+POSTPROCESS_STEPS_FILENAME = "pipeline-postprocess-steps.json"
+
+
+def make_step(name, command, depends_on=None, inputs=None, outputs=None):
+    """Return the definition of a postprocess step.
+
+    Parameters
+    ----------
+    name : str
+        Unique name of the step
+    command : str
+    depends_on : list | None
+        Names of steps that must complete before this step
+    inputs : list | None
+        Files read by the step that are not produced by other steps
+    outputs : list | None
+        Files written by the step
+
+    Returns
+    -------
+    dict
+
+    """
+    return {
+        "name": name,
+        "command": command,
+        "depends_on": list(depends_on or []),
+        "inputs": list(inputs or []),
+        "outputs": list(outputs or []),
+    }
+
+
+def write_postprocess_steps(steps, filename, cache_dir):
+    """Validate the steps and write them to filename."""
+    names = set()
+    for step in steps:
+        if step["name"] in names:
+            raise ValueError(f"Duplicate postprocess step name: {step['name']}")
+        for name in step["depends_on"]:
+            # Requiring dependencies to be defined first also rules out cycles.
+            if name not in names:
+                raise ValueError(f"Postprocess step {step['name']} depends on unknown step {name}")
+        names.add(step["name"])
+
+    dump_data({"cache_dir": cache_dir, "steps": steps}, filename, indent=2)
+
+
+def set_postprocess_blocked_by(config_file, steps_file):
+    """Update blocked_by of the postprocess jobs from the step dependencies. The jobs must be
+    in the same order as the steps.
+
+    """
+    data = load_data(config_file)
+    steps = load_data(steps_file)["steps"]
+    assert len(data["jobs"]) == len(steps), f"{config_file} does not match {steps_file}"
+
+    job_ids = {}
+    for job, step in zip(data["jobs"], steps):
+        job_ids[step["name"]] = job["job_id"]
+        job["blocked_by"] = [job_ids[x] for x in step["depends_on"]]
+    dump_data(data, config_file, indent=2)
+
+
+def run_postprocess_step(steps_file, name):
+    """Run the postprocess step if its cached result is missing or stale.
+
+    Returns
+    -------
+    bool
+        True if the step ran, False if it was skipped.
+
+    """
+    data = load_data(steps_file)
+    steps = {x["name"]: x for x in data["steps"]}
+    if name not in steps:
+        raise ValueError(f"{name} is not a step in {steps_file}")
+
+    step = steps[name]
+    cache_dir = pathlib.Path(ensure_jade_pipeline_output_dir(data["cache_dir"]))
+    command = ensure_jade_pipeline_output_dir(step["command"])
+    fingerprint = _compute_fingerprint(step, command, cache_dir)
+    marker_file = cache_dir / f"{name}.json"
+    outputs = [pathlib.Path(ensure_jade_pipeline_output_dir(x)) for x in step["outputs"]]
+    if marker_file.exists() and load_data(marker_file)["fingerprint"] == fingerprint and \
+            all(x.exists() for x in outputs):
+        logger.info("Skip postprocess step %s because its outputs are up to date.", name)
+        return False
+
+    check_run_command(command)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    marker = {
+        "name": name,
+        "command": command,
+        "fingerprint": fingerprint,
+        "completed_ns": time.time_ns(),
+    }
+    dump_data(marker, marker_file)
+    return True
+
+
+def _compute_fingerprint(step, command, cache_dir):
+    sha = hashlib.sha256(command.encode("utf-8"))
+    for filename in step["inputs"]:
+        path = pathlib.Path(ensure_jade_pipeline_output_dir(filename))
+        if path.exists():
+            stat = os.stat(path)
+            sha.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+        else:
+            sha.update(f"{path}:missing".encode("utf-8"))
+    for name in step["depends_on"]:
+        # Any re-run of an upstream step invalidates this step.
+        marker_file = cache_dir / f"{name}.json"
+        if marker_file.exists():
+            marker = load_data(marker_file)
+            upstream = f"{marker['fingerprint']}:{marker['completed_ns']}"
+        else:
+            upstream = "missing"
+        sha.update(f"{name}:{upstream}".encode("utf-8"))
+    return sha.hexdigest()
+
+
+@click.command()
+@click.argument("steps-file")
+@click.argument("name")
+def run_step(steps_file, name):
+    """Run one postprocess step of a pipeline."""
+    setup_logging(__name__, None, console_level=logging.INFO, packages=["disco"])
+    run_postprocess_step(steps_file, name)
+
+
+if __name__ == "__main__":
+    run_step()
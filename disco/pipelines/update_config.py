@@ -1,13 +1,26 @@
 import pathlib
+import re
 
 from jade.utils.utils import load_data, dump_data
+from disco.pipelines.postprocess_steps import POSTPROCESS_STEPS_FILENAME, set_postprocess_blocked_by
+
+
+REGEX_CONFIG_FILE = re.compile(r"--config-file=(\S+)")
 
 
 def set_hc_postprocess_blocked_by(commands_file):
     """Update blocked_by of hosting capacity postprocess job"""
     path = pathlib.Path(commands_file)
     command = path.read_text().split("\n")[0]
-    config_file = command.split("=")[-1]
+    match = REGEX_CONFIG_FILE.search(command)
+    config_file = match.group(1) if match else command.split("=")[-1]
+
+    steps_file = path.parent / POSTPROCESS_STEPS_FILENAME
+    if steps_file.exists():
+        # Only block jobs on the steps that they depend on.
+        set_postprocess_blocked_by(config_file, steps_file)
+        return
+
     data = load_data(config_file)
     
     if len(data["jobs"]) <= 1:
@@ -9,6 +9,8 @@ import os
 import pandas as pd
 import numpy as np
 
+from disco.pydss.hosting_capacity_early_stop import EARLY_STOPPED_JOBS_TABLE_FILENAME
+
 PENETRATION_STEP = 5
 METRIC_MAP = {
     "thermal": {
@@ -125,6 +127,26 @@ def synthesize(metrics_df, metadata_df, metric_class):
     return metrics_df, metadata_df
 
 
+def add_early_stopped_jobs(result_path, metric_df, scenario):
+    """Add the penetration levels that did not run because lower levels of the same sample
+    exceeded the thresholds. Their metrics are unknown, so they fail every query.
+    """
+    filename = os.path.join(result_path, EARLY_STOPPED_JOBS_TABLE_FILENAME)
+    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+        return metric_df
+
+    skipped_df = pd.read_csv(
+        filename,
+        dtype={"sample": np.float64, "penetration_level": np.float64, "placement": str},
+    )
+    skipped_df["scenario"] = scenario
+    if "transformer_instantaneous_threshold" in metric_df.columns:
+        # Keep the skipped levels in the same transformer group as the rest of the feeder.
+        by_feeder = metric_df.groupby("feeder").transformer_instantaneous_threshold.first()
+        skipped_df["transformer_instantaneous_threshold"] = skipped_df.feeder.map(by_feeder)
+    return pd.concat([metric_df, skipped_df], ignore_index=True)
+
+
 def compute_hc_per_metric_class(
     result_path,
     thresholds,
@@ -165,6 +187,7 @@ def compute_hc_per_metric_class(
         metric_df = metric_df[metric_df.node_type == node_types[0]]
 
     metric_df, meta_df = synthesize(metric_df, meta_df, metric_class)
+    metric_df = add_early_stopped_jobs(result_path, metric_df, scenario)
 
     queries = build_queries(metric_df.columns, thresholds, metric_class, on=on)
     query_phrase = " & ".join(queries)
@@ -20,6 +20,8 @@ from jade.jobs.job_configuration_factory import create_config_from_file
 from jade.jobs.results_aggregator import ResultsAggregator
 from jade.utils.utils import dump_data, load_data
 from jade.loggers import setup_logging
+from disco.exceptions import is_hosting_capacity_early_stop
+from disco.pydss.chunked_results import ElementPropertyReader
 
 
 # setup logger
@@ -61,7 +63,8 @@ def _compute_hosting_capacity_for_pydss(
         if job.name not in result_lookup:
             logger.info("Skip missing job %s", job.name)
             continue
-        if result_lookup[job.name].return_code != 0:
+        return_code = result_lookup[job.name].return_code
+        if return_code != 0 and not is_hosting_capacity_early_stop(return_code):
             logger.info("Skip failed job %s", job.name)
             continue
         if job.model.is_base_case:
@@ -84,12 +87,18 @@ def _compute_hosting_capacity_for_pydss(
 
         for scenario in results.scenarios:
 
-            df_buses = scenario.get_full_dataframe("Circuits", "AllBusMagPu")
-            df_loadings = scenario.get_full_dataframe("CktElement", "ExportLoadingsMetric")
+            # Only the maximum across buses and elements at each time point is needed, so read
+            # the stores in time slices.
+            max_voltages = ElementPropertyReader(
+                results, scenario, "Circuits", "AllBusMagPu"
+            ).reduce_rows("max")
+            max_loadings = ElementPropertyReader(
+                results, scenario, "CktElement", "ExportLoadingsMetric"
+            ).reduce_rows("max")
 
             violations = []
-            max_thermal_dict = df_loadings.max(axis=1).to_dict()
-            for key, value in df_buses.max(axis=1).to_dict().items():
+            max_thermal_dict = max_loadings.to_dict()
+            for key, value in max_voltages.to_dict().items():
 
                 violations.append(
                     {
@@ -0,0 +1,243 @@
+"""Memory-bounded reading of element properties from PyDSS results.
+
+PyDssScenarioResults.get_full_dataframe loads every time point of every element of a property
+into one DataFrame. With per-element time-series exports of large feeders that is several GB per
+job. ElementPropertyReader reads the HDF5 dataset in slices of time points or of whole elements,
+so that post-processing computes its aggregates with memory bounded by the chunk size.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from jade.exceptions import InvalidParameter
+from PyDSS.common import DatasetPropertyType
+from PyDSS.dataset_buffer import DatasetBuffer
+from PyDSS.pydss_results import PyDssScenarioResults
+from PyDSS.value_storage import ValueStorageBase, get_dataset_property_type
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+class ElementPropertyReader:
+    """Reads one element property of a PyDSS scenario in chunks of bounded size."""
+
+    def __init__(self, results, scenario, element_class, prop, real_only=False, abs_val=False,
+                 max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES, **kwargs):
+        """Constructs ElementPropertyReader.
+
+        Parameters
+        ----------
+        results : PyDssResults
+        scenario : PyDssScenarioResults
+        element_class : str
+        prop : str
+        real_only : bool
+            If the values are complex, drop the imaginary component.
+        abs_val : bool
+            If the values are complex, compute their absolute values.
+        max_chunk_bytes : int
+            Maximum number of bytes to read from the store at once. A chunk always contains at
+            least one time point or one element.
+        kwargs
+            Filter on options; values can be strings or regular expressions. Same as
+            PyDssScenarioResults.get_full_dataframe.
+
+        """
+        if prop not in scenario.list_element_properties(element_class):
+            raise InvalidParameter(f"property {prop} is not stored")
+
+        path = f"Exports/{scenario.name}/{element_class}/ElementProperties/{prop}"
+        self._dataset = results.hdf_store[path]
+        if get_dataset_property_type(self._dataset) != DatasetPropertyType.PER_TIME_POINT:
+            raise InvalidParameter(f"{element_class}/{prop} is not stored at every time point")
+
+        all_columns = DatasetBuffer.get_columns(self._dataset)
+        if kwargs:
+            options = scenario.list_element_property_options(element_class, prop)
+            for option in kwargs:
+                if option not in options:
+                    raise InvalidParameter(
+                        f"class={element_class} property={prop} option={option} is invalid"
+                    )
+            names = DatasetBuffer.get_names(self._dataset)
+            columns = ValueStorageBase.get_columns(
+                pd.DataFrame(columns=all_columns), names, options, **kwargs
+            )
+            # Keep the column order of get_full_dataframe.
+            columns = sorted(columns)
+            index_by_column = {x: i for i, x in enumerate(all_columns)}
+            self._indices = np.array([index_by_column[x] for x in columns], dtype=int)
+        else:
+            self._indices = np.arange(len(all_columns))
+
+        self._columns = [all_columns[i] for i in self._indices]
+        self._length = self._dataset.attrs["length"]
+        self._timestamps = pd.Index(
+            scenario.get_timestamps().values[:self._length], name="Timestamp"
+        )
+        self._real_only = real_only
+        self._abs_val = abs_val
+        self._max_chunk_bytes = max_chunk_bytes
+
+    @property
+    def columns(self):
+        """Return the selected columns."""
+        return self._columns
+
+    @property
+    def timestamps(self):
+        """Return the timestamps of the stored time points."""
+        return self._timestamps
+
+    def iter_time_chunks(self):
+        """Return an iterator over consecutive time slices of the selected columns.
+
+        Yields
+        ------
+        pd.DataFrame
+            Indexed by timestamp with all selected columns
+
+        """
+        row_bytes = self._dataset.shape[1] * self._dataset.dtype.itemsize
+        num_rows = max(self._max_chunk_bytes // row_bytes, 1)
+        for start in range(0, self._length, num_rows):
+            end = min(start + num_rows, self._length)
+            values = self._dataset[start:end, :][:, self._indices]
+            yield self._make_dataframe(values, self._columns, self._timestamps[start:end])
+
+    def iter_element_chunks(self):
+        """Return an iterator over groups of whole elements at all time points.
+
+        Yields
+        ------
+        pd.DataFrame
+            Indexed by timestamp with the selected columns of the elements in the group
+
+        """
+        column_bytes = max(self._length * self._dataset.dtype.itemsize, 1)
+        max_columns = max(self._max_chunk_bytes // column_bytes, 1)
+        names = [PyDssScenarioResults.get_name_from_column(x) for x in self._columns]
+        for positions in make_element_chunks(names, self._indices, max_columns):
+            indices = self._indices[positions]
+            start = indices.min()
+            values = self._dataset[:self._length, start:indices.max() + 1][:, indices - start]
+            columns = [self._columns[i] for i in positions]
+            yield self._make_dataframe(values, columns, self._timestamps)
+
+    def reduce_columns(self, func):
+        """Reduce each column over all time points.
+
+        Parameters
+        ----------
+        func : str
+            Name of a pandas reduction, such as "max", "min", "sum", or "mean"
+
+        Returns
+        -------
+        pd.Series
+            Indexed by column
+
+        """
+        return _concat([getattr(df, func)() for df in self.iter_element_chunks()])
+
+    def reduce_rows(self, func):
+        """Reduce the selected columns at each time point.
+
+        Parameters
+        ----------
+        func : str
+            Name of a pandas reduction, such as "max", "min", "sum", or "mean"
+
+        Returns
+        -------
+        pd.Series
+            Indexed by timestamp
+
+        """
+        return _concat([getattr(df, func)(axis=1) for df in self.iter_time_chunks()])
+
+    def max_moving_average(self, window):
+        """Return the maximum moving average of each column.
+
+        Parameters
+        ----------
+        window : int
+            Number of time points in the moving average
+
+        Returns
+        -------
+        pd.Series
+            Indexed by column
+
+        """
+        return _concat(
+            [df.rolling(window).mean().max() for df in self.iter_element_chunks()]
+        )
+
+    def _make_dataframe(self, values, columns, index):
+        if np.iscomplexobj(values):
+            if self._real_only:
+                values = np.real(values)
+            elif self._abs_val:
+                values = np.absolute(values)
+        return pd.DataFrame(values, columns=columns, index=index)
+
+
+def make_element_chunks(names, indices, max_columns):
+    """Split selected columns into chunks of whole elements.
+
+    Parameters
+    ----------
+    names : list
+        Element name of each selected column. The columns of an element are adjacent.
+    indices : list
+        Dataset column index of each selected column
+    max_columns : int
+        Maximum width of the range of dataset columns spanned by a chunk. An element that is
+        wider than this is returned in its own chunk.
+
+    Returns
+    -------
+    list
+        Each item is a list of positions in names
+
+    """
+    chunks = []
+    positions = []
+    start = end = None
+    for name_positions in _group_adjacent(names):
+        element_indices = [indices[i] for i in name_positions]
+        new_start = min(element_indices) if start is None else min(start, *element_indices)
+        new_end = max(element_indices) if end is None else max(end, *element_indices)
+        if positions and new_end - new_start + 1 > max_columns:
+            chunks.append(positions)
+            positions = []
+            new_start = min(element_indices)
+            new_end = max(element_indices)
+        positions += name_positions
+        start, end = new_start, new_end
+    if positions:
+        chunks.append(positions)
+    return chunks
+
+
+def _group_adjacent(names):
+    group = []
+    for i, name in enumerate(names):
+        if group and names[group[-1]] != name:
+            yield group
+            group = []
+        group.append(i)
+    if group:
+        yield group
+
+
+def _concat(series):
+    if not series:
+        return pd.Series(dtype=float)
+    return pd.concat(series)
@@ -0,0 +1,248 @@
+"""Early stop of penetration-level chains that exceed hosting capacity thresholds.
+
+With order_by_penetration, the jobs of each (substation, feeder, placement, sample) run in order
+of increasing penetration level and each job is blocked by the previous level. A finished job
+compares its thermal and voltage metrics with the hosting capacity thresholds and records the
+outcome in a per-chain state file. When the configured number of consecutive levels fail, the
+job exits with a distinct error code and JADE cancels the remaining higher levels. The
+postprocess treats those levels as failing instead of missing.
+"""
+
+import logging
+import re
+from pathlib import Path
+
+from jade.utils.utils import load_data, dump_data
+
+import disco
+from disco.pydss.common import SCENARIO_NAME_DELIMITER
+
+
+logger = logging.getLogger(__name__)
+
+HC_EARLY_STOP_CONFIG_KEY = "hosting_capacity_early_stop"
+HC_EARLY_STOP_DIRNAME = "hosting-capacity-early-stop"
+EARLY_STOPPED_JOBS_TABLE_FILENAME = "early_stopped_jobs_table.csv"
+DEFAULT_HC_THRESHOLDS_FILE = (
+    Path(disco.__path__[0]) / "postprocess" / "config" / "hc_thresholds.toml"
+)
+
+DEFAULT_HC_EARLY_STOP_CONFIG = {
+    "enabled": False,
+    # Number of consecutive failing penetration levels that stops the chain.
+    "max_consecutive_failures": 1,
+    # Same format as disco/postprocess/config/hc_thresholds.toml
+    "thresholds": None,
+    "include_secondaries": False,
+}
+
+THERMAL_METRICS = (
+    "line_max_instantaneous_loading_pct",
+    "line_max_moving_average_loading_pct",
+    "line_num_time_points_with_instantaneous_violations",
+    "line_num_time_points_with_moving_average_violations",
+    "transformer_max_instantaneous_loading_pct",
+    "transformer_max_moving_average_loading_pct",
+    "transformer_num_time_points_with_instantaneous_violations",
+    "transformer_num_time_points_with_moving_average_violations",
+)
+VOLTAGE_METRICS = (
+    "min_voltage",
+    "max_voltage",
+    "num_nodes_any_outside_ansi_b",
+    "num_time_points_with_ansi_b_violations",
+)
+CHAIN_KEYS = ("placement", "sample", "penetration_level")
+
+_REGEX_INVALID_CHARS = re.compile(r"[^\w\-\.]")
+
+
+def get_hc_early_stop_config(simulation_config):
+    """Return the early-stop config from a PyDSS simulation config, with defaults applied.
+
+    Parameters
+    ----------
+    simulation_config : dict
+
+    Returns
+    -------
+    dict
+
+    """
+    config = dict(DEFAULT_HC_EARLY_STOP_CONFIG)
+    config.update(simulation_config.get(HC_EARLY_STOP_CONFIG_KEY) or {})
+    if config["enabled"]:
+        if config["thresholds"] is None:
+            raise ValueError("Hosting capacity early stop requires thresholds")
+        if config["max_consecutive_failures"] < 1:
+            raise ValueError(
+                f"max_consecutive_failures must be at least 1: {config['max_consecutive_failures']}"
+            )
+    return config
+
+
+def make_hc_early_stop_config(max_consecutive_failures,
+                              thresholds_file=DEFAULT_HC_THRESHOLDS_FILE):
+    """Return an enabled early-stop config for a PyDSS simulation config."""
+    config = dict(DEFAULT_HC_EARLY_STOP_CONFIG)
+    config["enabled"] = True
+    config["max_consecutive_failures"] = max_consecutive_failures
+    config["thresholds"] = load_data(thresholds_file)
+    return config
+
+
+def find_threshold_violations(thermal_summary, voltage_metrics, thresholds,
+                              include_secondaries=False):
+    """Return the hosting capacity thresholds violated by a job. Snapshot time points of a
+    scenario are combined by their worst values, as in the hosting capacity computation.
+
+    Parameters
+    ----------
+    thermal_summary : dict
+        Maps PyDSS scenario name to thermal metrics, as returned by
+        PyDSS.thermal_metrics.create_summary_from_dict
+    voltage_metrics : dict
+        Contents of the PyDSS voltage metrics report
+    thresholds : dict
+        Contents of hc_thresholds.toml
+    include_secondaries : bool
+
+    Returns
+    -------
+    dict
+        Maps scenario name to a list of violated metric names
+
+    """
+    worst = {}
+    has_transformer_threshold = set()
+    for name, metrics in thermal_summary.items():
+        scenario = name.split(SCENARIO_NAME_DELIMITER)[0]
+        if metrics.get("transformer_instantaneous_threshold") is not None:
+            has_transformer_threshold.add(scenario)
+        _update_worst_values(worst.setdefault(scenario, {}), metrics, THERMAL_METRICS)
+
+    for name, by_node_type in (voltage_metrics or {}).get("scenarios", {}).items():
+        scenario = name.split(SCENARIO_NAME_DELIMITER)[0]
+        for node_type, values in by_node_type.items():
+            if node_type == "secondaries" and not include_secondaries:
+                continue
+            summary = values.get("summary")
+            if summary is not None:
+                _update_worst_values(worst.setdefault(scenario, {}), summary, VOLTAGE_METRICS)
+
+    violations = {}
+    for scenario, values in worst.items():
+        violations[scenario] = []
+        for metric_class, metrics in (("thermal", THERMAL_METRICS), ("voltage", VOLTAGE_METRICS)):
+            for metric in metrics:
+                if metric not in values or metric not in thresholds.get(metric_class, {}):
+                    continue
+                if metric.startswith("transformer") and scenario not in has_transformer_threshold:
+                    continue
+                threshold = thresholds[metric_class][metric]
+                if metric == "min_voltage":
+                    failed = values[metric] < threshold
+                else:
+                    failed = values[metric] > threshold
+                if failed:
+                    violations[scenario].append(metric)
+
+    return violations
+
+
+def _update_worst_values(worst, metrics, names):
+    for name in names:
+        val = metrics.get(name)
+        if val is None:
+            continue
+        if name not in worst:
+            worst[name] = val
+        elif name == "min_voltage":
+            worst[name] = min(worst[name], val)
+        else:
+            worst[name] = max(worst[name], val)
+
+
+def make_chain_key(substation, feeder, placement, sample):
+    """Return the name that identifies the penetration-level chain of a job."""
+    key = SCENARIO_NAME_DELIMITER.join(str(x) for x in (substation, feeder, placement, sample))
+    return _REGEX_INVALID_CHARS.sub("_", key)
+
+
+def get_chain_key(deployment):
+    """Return the chain key of a deployment or None if it is not part of a chain."""
+    if not set(CHAIN_KEYS).issubset(deployment.project_data):
+        return None
+    return make_chain_key(
+        deployment.substation,
+        deployment.feeder,
+        deployment.project_data["placement"],
+        deployment.project_data["sample"],
+    )
+
+
+def record_penetration_level(state_dir, key, penetration_level, job_name, passed):
+    """Record the outcome of one penetration level of a chain.
+
+    Re-running a level overwrites its previous outcome, so resubmitted jobs are not counted
+    twice.
+
+    Returns
+    -------
+    int
+        Number of consecutive failing levels up to and including penetration_level
+
+    """
+    filename = Path(state_dir) / f"{key}.json"
+    if filename.exists():
+        state = load_data(filename)
+    else:
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        state = {"levels": {}, "stopped_at": None}
+
+    state["levels"][str(penetration_level)] = {"job": job_name, "passed": passed}
+    if state["stopped_at"] is not None and \
+            float(penetration_level) <= float(state["stopped_at"]):
+        # The chain is running again from this level.
+        state["stopped_at"] = None
+    num_failures = 0
+    levels = sorted(
+        (float(x) for x in state["levels"] if float(x) <= float(penetration_level)),
+        reverse=True,
+    )
+    by_level = {float(x): y for x, y in state["levels"].items()}
+    for level in levels:
+        if by_level[level]["passed"]:
+            break
+        num_failures += 1
+
+    dump_data(state, filename, indent=2)
+    return num_failures
+
+
+def mark_chain_stopped(state_dir, key, penetration_level):
+    """Record that the levels of a chain above penetration_level will not run."""
+    filename = Path(state_dir) / f"{key}.json"
+    state = load_data(filename)
+    state["stopped_at"] = penetration_level
+    dump_data(state, filename, indent=2)
+
+
+def read_stopped_chains(state_dir):
+    """Return the stopped chains.
+
+    Returns
+    -------
+    dict
+        Maps chain key to the penetration level at which the chain stopped
+
+    """
+    stopped = {}
+    path = Path(state_dir)
+    if not path.exists():
+        return stopped
+    for filename in path.glob("*.json"):
+        stopped_at = load_data(filename)["stopped_at"]
+        if stopped_at is not None:
+            stopped[filename.stem] = float(stopped_at)
+    return stopped
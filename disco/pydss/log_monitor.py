@@ -0,0 +1,289 @@
+"""Incremental analysis of PyDSS logs.
+
+PyDSS writes one JSON object per line to its reports log. The monitor in this module tails those
+logs while a simulation runs, decodes only the lines that can contain a report of interest, and
+keeps running counters. A job can then be flagged, or stopped, as soon as it crosses a threshold
+instead of parsing multi-GB logs after the simulation completes.
+
+PyDSS has no hook to cancel a running simulation. To stop one, the monitor interrupts the main
+thread, but only while the simulation runs inside PyDssLogMonitor.interruptible().
+"""
+
+import _thread
+import json
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+
+logger = logging.getLogger(__name__)
+
+LOG_MONITOR_CONFIG_KEY = "log_monitor"
+REPORTS_LOG_SUFFIX = "__reports.log"
+CONVERGENCE_REPORT = "Convergence"
+
+# Cheap substring check applied before JSON decoding. Every convergence report contains it.
+_CONVERGENCE_MARKER = f'"{CONVERGENCE_REPORT}"'
+
+DEFAULT_LOG_MONITOR_CONFIG = {
+    "enabled": True,
+    "poll_interval_seconds": 5.0,
+    # Thresholds are disabled when None.
+    "max_convergence_errors": None,
+    "max_convergence_error_time_points": None,
+    # "flag": log an error; "abort": stop the simulation when a threshold is crossed.
+    "action": "flag",
+}
+
+
+def get_log_monitor_config(simulation_config):
+    """Return the log monitor config from a PyDSS simulation config, with defaults applied.
+
+    Parameters
+    ----------
+    simulation_config : dict
+
+    Returns
+    -------
+    dict
+
+    """
+    config = dict(DEFAULT_LOG_MONITOR_CONFIG)
+    config.update(simulation_config.get(LOG_MONITOR_CONFIG_KEY) or {})
+    if config["action"] not in ("flag", "abort"):
+        raise ValueError(f"Unsupported log monitor action: {config['action']}")
+    return config
+
+
+class LogFileTail:
+    """Reads the complete lines appended to a file since the last read."""
+
+    def __init__(self, filename):
+        self._filename = Path(filename)
+        self._offset = 0
+        self._partial = b""
+        self.num_lines = 0
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def read_lines(self):
+        """Return the complete lines appended since the last call.
+
+        Returns
+        -------
+        list
+            list of str
+
+        """
+        try:
+            with open(self._filename, "rb") as f_in:
+                f_in.seek(self._offset)
+                data = f_in.read()
+        except FileNotFoundError:
+            return []
+
+        self._offset += len(data)
+        data = self._partial + data
+        lines = data.split(b"\n")
+        # The last element is an incomplete line (or empty); keep it for the next read.
+        self._partial = lines.pop()
+        self.num_lines += len(lines)
+        return [x.decode("utf-8") for x in lines]
+
+
+class ConvergenceCounters:
+    """Running counters of convergence problems reported by PyDSS.
+
+    PyDSS writes one convergence report per controller that did not converge within the maximum
+    control iterations of a time point.
+
+    """
+
+    def __init__(self):
+        self.convergence_errors = 0
+        self.convergence_error_time_points = 0
+        self.errors_by_controller = Counter()
+        self.control_mode_events = Counter()
+        self._time_points = set()
+
+    def update(self, report):
+        """Update the counters with one convergence report."""
+        self.convergence_errors += 1
+        controller = report.get("Controller")
+        if controller is not None:
+            self.errors_by_controller[controller] += 1
+        control_mode = report.get("Control algorithm")
+        if control_mode is not None:
+            self.control_mode_events[control_mode] += 1
+        time_point = report.get("Time", report.get("DateTime"))
+        if time_point not in self._time_points:
+            self._time_points.add(time_point)
+            self.convergence_error_time_points += 1
+
+    def to_dict(self, num_controllers=10):
+        """Return a summary of the counters."""
+        return {
+            "convergence_errors": self.convergence_errors,
+            "convergence_error_time_points": self.convergence_error_time_points,
+            "control_mode_events": dict(self.control_mode_events),
+            "top_controllers": dict(self.errors_by_controller.most_common(num_controllers)),
+        }
+
+
+def process_report_lines(lines, counters):
+    """Update counters with the convergence reports in lines.
+
+    Parameters
+    ----------
+    lines : iterable
+        Lines from a PyDSS reports log
+    counters : ConvergenceCounters
+
+    """
+    for line in lines:
+        if _CONVERGENCE_MARKER not in line:
+            continue
+        data = json.loads(line)
+        if data.get("Report") == CONVERGENCE_REPORT:
+            counters.update(data)
+
+
+class PyDssLogMonitor:
+    """Tails the PyDSS reports logs of a project in a background thread."""
+
+    def __init__(self, logs_dir, config=None):
+        """Constructs PyDssLogMonitor.
+
+        Parameters
+        ----------
+        logs_dir : str
+            PyDSS project Logs directory
+        config : dict | None
+            Log monitor config. Refer to DEFAULT_LOG_MONITOR_CONFIG.
+
+        """
+        self._logs_dir = Path(logs_dir)
+        self._config = dict(DEFAULT_LOG_MONITOR_CONFIG)
+        self._config.update(config or {})
+        self._tails = {}
+        self._counters = ConvergenceCounters()
+        self._lock = threading.Lock()
+        self._interrupt_lock = threading.Lock()
+        self._interruptible = False
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._threshold_exceeded = False
+        self._aborted = False
+
+    @property
+    def counters(self):
+        return self._counters
+
+    @property
+    def threshold_exceeded(self):
+        """Return True if the counters crossed a configured threshold."""
+        return self._threshold_exceeded
+
+    @property
+    def aborted(self):
+        """Return True if the monitor interrupted the simulation."""
+        return self._aborted
+
+    @contextmanager
+    def interruptible(self):
+        """Allow the monitor to stop the simulation that runs in this block.
+
+        The monitor stops the simulation by raising KeyboardInterrupt in the main thread. The
+        interrupt can arrive after the block exits, so callers must handle it until they have
+        called stop().
+
+        """
+        with self._interrupt_lock:
+            self._interruptible = True
+        try:
+            yield
+        finally:
+            with self._interrupt_lock:
+                self._interruptible = False
+
+    def lines_consumed(self, filename):
+        """Return the number of lines already processed for a log file."""
+        tail = self._tails.get(Path(filename).name)
+        return 0 if tail is None else tail.num_lines
+
+    def start(self):
+        """Start tailing the logs in a background thread."""
+        self._thread = threading.Thread(target=self._run, name="PyDssLogMonitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and process any remaining lines."""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        self.poll()
+
+    def poll(self):
+        """Process all lines appended to the logs since the last poll."""
+        with self._lock:
+            if self._logs_dir.exists():
+                for path in self._logs_dir.glob(f"*{REPORTS_LOG_SUFFIX}"):
+                    if path.name not in self._tails:
+                        self._tails[path.name] = LogFileTail(path)
+            for tail in self._tails.values():
+                process_report_lines(tail.read_lines(), self._counters)
+            self._check_thresholds()
+
+    def process_remaining_text(self, filename, text):
+        """Process the lines of text that were not consumed while tailing filename.
+
+        This handles logs that were moved, such as into a project archive, before the final poll.
+
+        """
+        with self._lock:
+            start = self.lines_consumed(filename)
+            lines = text.splitlines()[start:]
+            process_report_lines(lines, self._counters)
+            if Path(filename).name in self._tails:
+                self._tails[Path(filename).name].num_lines += len(lines)
+            self._check_thresholds()
+
+    def _run(self):
+        while not self._stop_event.wait(self._config["poll_interval_seconds"]):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Failed to process PyDSS logs in %s", self._logs_dir)
+                return
+            if self._threshold_exceeded and self._config["action"] == "abort":
+                self._abort()
+                return
+
+    def _abort(self):
+        with self._interrupt_lock:
+            if not self._interruptible:
+                # The simulation already completed.
+                return
+            logger.error("Stop the simulation because of convergence problems: %s",
+                         self._counters.to_dict())
+            self._aborted = True
+            _thread.interrupt_main()
+
+    def _check_thresholds(self):
+        if self._threshold_exceeded:
+            return
+        max_errors = self._config["max_convergence_errors"]
+        max_time_points = self._config["max_convergence_error_time_points"]
+        if max_errors is not None and self._counters.convergence_errors > max_errors:
+            self._threshold_exceeded = True
+        elif max_time_points is not None and \
+                self._counters.convergence_error_time_points > max_time_points:
+            self._threshold_exceeded = True
+        if self._threshold_exceeded:
+            logger.error("PyDSS convergence problems exceeded the configured threshold: %s",
+                         self._counters.to_dict())
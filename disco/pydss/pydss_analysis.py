@@ -1,18 +1,19 @@
 """Analysis of PyDSS simulations."""
 
 import logging
-import math
 import os
 import re
 
+import numpy as np
 import pandas as pd
 
 from jade.exceptions import InvalidParameter, InvalidConfiguration
 from jade.jobs.job_analysis import JobAnalysis
 from jade.utils.utils import load_data
-from PyDSS.pydss_results import PyDssResults
+from PyDSS.pydss_results import PyDssResults, PyDssScenarioResults
+from disco.pydss.chunked_results import ElementPropertyReader
 from disco.sources.gem.make_element_bus_mapping import get_bus_to_element, \
-    REGION_BUS_MAPPING_FILENAME
+    get_bus_element_index_filename, BusElementIndex, REGION_BUS_MAPPING_FILENAME
 
 
 logger = logging.getLogger(__name__)
@@ -51,11 +52,29 @@ class PyDssScenarioAnalysis:
         if not results.scenarios:
             raise InvalidParameter("there are no scenarios in the results")
 
+        self._results = results
         if scenario_name is None:
             self._scenario = results.scenarios[0]
         else:
             self._scenario = results.get_scenario(scenario_name)
 
+    def read_element_property(self, element_class, prop, **kwargs):
+        """Return a reader that iterates over an element property in chunks of bounded size.
+
+        Parameters
+        ----------
+        element_class : str
+        prop : str
+        kwargs
+            Forwarded to ElementPropertyReader
+
+        Returns
+        -------
+        ElementPropertyReader
+
+        """
+        return ElementPropertyReader(self._results, self._scenario, element_class, prop, **kwargs)
+
     def get_pu_bus_voltage_magnitudes(self):
         """Return per-unit voltage magnitudes for each bus.
 
@@ -65,18 +84,30 @@ class PyDssScenarioAnalysis:
             Maps bus name to list of voltages.
 
         """
-        voltages = {}
-        for name in self._scenario.list_element_names("Buses", "puVmagAngle"):
-            df = self._scenario.get_dataframe(
-                "Buses",
-                "puVmagAngle",
-                name,
-                phase_terminal=self._REGEX_PHASE_ANY_TERMINAL_1,
-                mag_ang="mag",
-            )
-            voltages[name] = [row.mean() for _, row in df.iterrows()]
+        df = self.get_pu_bus_voltage_magnitudes_dataframe()
+        return {name: df[name].tolist() for name in df.columns}
 
-        return voltages
+    def get_pu_bus_voltage_magnitudes_dataframe(self):
+        """Return per-unit voltage magnitudes for all buses, averaged across the phases of
+        terminal 1. The phases are averaged in chunks of whole buses, so the per-phase frame of
+        all buses is never loaded. The returned frame still holds every time point of every bus.
+
+        Returns
+        -------
+        pd.DataFrame
+            Indexed by time point with one column per bus name.
+
+        """
+        reader = self.read_element_property(
+            "Buses",
+            "puVmagAngle",
+            phase_terminal=self._REGEX_PHASE_ANY_TERMINAL_1,
+            mag_ang="mag",
+        )
+        return _concat_element_chunks(
+            [_reduce_by_element(df, "mean") for df in reader.iter_element_chunks()],
+            reader.timestamps,
+        )
 
     def get_line_loading_percentages(self, fmt="dataframe"):
         """Return line loading values as percents for all lines.
@@ -95,34 +126,21 @@ class PyDssScenarioAnalysis:
         if fmt.lower() not in ("dataframe", "json"):
             raise InvalidParameter("fmt must be 'dataframe' or 'json'")
 
-        loadings = {}
-        columns = ["Line Loading (%)"]
+        df = self.get_line_loading_percentages_dataframe()
+        return _split_loadings_by_element(df, "Line Loading (%)", fmt)
 
-        for name in self._scenario.list_element_names("Lines", "Currents"):
-            df = self._scenario.get_dataframe(
-                "Lines",
-                "Currents",
-                name,
-                phase_terminal=self._REGEX_PHASE_ANY_TERMINAL_1
-            )
-            normal_amps = self._scenario.get_dataframe(
-                "Lines",
-                "NormalAmps",
-                name,
-            )
-            values = []
-            for i, row in df.iterrows():
-                val = max(row.apply(lambda x: math.sqrt(x.real**2 + x.imag**2)))
-                normal_amps_val = normal_amps.loc[i][normal_amps.columns[0]]
-                values.append(val / normal_amps_val * 100)
+    def get_line_loading_percentages_dataframe(self):
+        """Return line loading values as percents for all lines. The complex currents are
+        reduced to the maximum phase magnitude in chunks of whole lines, so only that frame is
+        avoided. The returned frame and NormalAmps hold every time point of every line.
 
-            df = pd.DataFrame(values, index=df.index, columns=columns)
-            if fmt == "json":
-                loadings[name] = df.to_json(orient="records")
-            else:
-                loadings[name] = df
+        Returns
+        -------
+        pd.DataFrame
+            Indexed by time point with one column per line name.
 
-        return loadings
+        """
+        return self._get_loading_percentages_dataframe("Lines")
 
     def get_transformer_loading_percentages(self, fmt="dataframe"):
         """Return transformer loading values as percents for all transformers.
@@ -141,52 +159,44 @@ class PyDssScenarioAnalysis:
         if fmt.lower() not in ("dataframe", "json"):
             raise InvalidParameter("fmt must be 'dataframe' or 'json'")
 
-        #transformers = self._scenario.read_element_info_file("Transformers")
-        #transformers_phase_info = self._scenario.read_element_info_file("TransformersPhase")
-
-        loadings = {}
-        columns = ["Transformer Loading (%)"]
-        for name in self._scenario.list_element_names("Transformers", "Currents"):
-            #short_name = name.replace("Transformer.", "")
-            df = self._scenario.get_dataframe(
-                "Transformers",
-                "Currents",
-                name,
-                phase_terminal=self._REGEX_PHASE_ANY_TERMINAL_1
-            )
-            normal_amps = self._scenario.get_dataframe(
-                "Transformers",
-                "NormalAmps",
-                name,
-            )
+        # TODO: this needs some minor correction for the high-side connection of 3-phase
+        # transformers. Refer to TransformersPhase.
+        df = self.get_transformer_loading_percentages_dataframe()
+        return _split_loadings_by_element(df, "Transformer Loading (%)", fmt)
+
+    def get_transformer_loading_percentages_dataframe(self):
+        """Return transformer loading values as percents for all transformers. The complex
+        currents are reduced to the maximum phase magnitude in chunks of whole transformers, so
+        only that frame is avoided. The returned frame and NormalAmps hold every time point of
+        every transformer.
+
+        Returns
+        -------
+        pd.DataFrame
+            Indexed by time point with one column per transformer name.
 
-            # TODO: this needs some minor correction
-
-            #transformer = transformers.query(f"Name == '{short_name}'").iloc[0]
-            #transformer_phase = transformers_phase_info.query(f"Transformer == '{name}'").iloc[0]
-            #num_windings = transformer["NumWindings"]
-            #high_side_connection = transformer_phase["HighSideConnection"]
-            #num_phases = len(df.columns)
-            #if num_phases == 3 and high_side_connection == "wye":
-            #    phase = 4
-            #elif num_phases == 3 and high_side_connection == "delta":
-            #    phase = 3
-            #else:
-            #    phase = num_phases
-
-            values = []
-            for i, row in df.iterrows():
-                val = max(row.apply(lambda x: math.sqrt(x.real**2 + x.imag**2)))
-                normal_amps_val = normal_amps.loc[i][normal_amps.columns[0]]
-                values.append(val / normal_amps_val * 100)
-
-            df = pd.DataFrame(values, index=df.index, columns=columns)
-            if fmt == "json":
-                loadings[name] = df.to_json(orient="records")
-            else:
-                loadings[name] = df
-
-        return loadings
+        """
+        return self._get_loading_percentages_dataframe("Transformers")
+
+    def _get_loading_percentages_dataframe(self, element_class):
+        reader = self.read_element_property(
+            element_class,
+            "Currents",
+            phase_terminal=self._REGEX_PHASE_ANY_TERMINAL_1
+        )
+        chunks = []
+        for currents in reader.iter_element_chunks():
+            values = currents.values.astype(complex)
+            magnitudes = pd.DataFrame(
+                np.sqrt(values.real**2 + values.imag**2),
+                index=currents.index,
+                columns=currents.columns,
+            )
+            chunks.append(_reduce_by_element(magnitudes, "max"))
+        max_currents = _concat_element_chunks(chunks, reader.timestamps)
+        normal_amps = self._scenario.get_full_dataframe(element_class, "NormalAmps")
+        normal_amps = normal_amps[[f"{x}__NormalAmps" for x in max_currents.columns]]
+        return max_currents / normal_amps.values * 100
 
     def get_kw_at_bus_mapping(self):
         """Return a mapping of bus to PV system and load kW values.
@@ -202,30 +212,20 @@ class PyDssScenarioAnalysis:
             Example: {"123456": [{"type": "pv_systems", "name": "pv_1234", "kW", 1.3}]}
 
         """
-        input_directory = self._job.model.deployment.directory
-        bus_mapping_file = os.path.join(
-            input_directory, REGION_BUS_MAPPING_FILENAME
-        )
-        if not os.path.exists(bus_mapping_file):
-            raise InvalidConfiguration(
-                f"{bus_mapping_file} does not exist. Has make_element_bus_mapping.py been run?"
-            )
-
-        summary = load_data(bus_mapping_file)
-        if self._feeder not in summary:
-            raise InvalidConfiguration(
-                f"{bus_mapping_file} does not contain feeder={self._feeder}"
-            )
+        feeder_file = self._get_feeder_bus_mapping_file()
+        pv_systems = self._scenario.read_element_info_file("PVSystems")
+        loads = self._scenario.read_element_info_file("Loads")
+        index_file = get_bus_element_index_filename(feeder_file, self._feeder)
+        if os.path.exists(index_file):
+            index = BusElementIndex.load(index_file)
+            return index.get_kw_at_bus_mapping({"pv_systems": pv_systems, "loads": loads})
 
-        feeder_file = summary[self._feeder]
         feeder_mapping = load_data(feeder_file)
 
         bus_to_elems = {}
         get_bus_to_element(bus_to_elems, feeder_mapping, "pv_systems")
         get_bus_to_element(bus_to_elems, feeder_mapping, "loads")
 
-        pv_systems = self._scenario.read_element_info_file("PVSystems")
-        loads = self._scenario.read_element_info_file("Loads")
         for elements in bus_to_elems.values():
             to_delete = []
             for i, element in enumerate(elements):
@@ -240,3 +240,67 @@ class PyDssScenarioAnalysis:
                 elements.pop(i)
 
         return bus_to_elems
+
+    def get_kw_by_bus(self):
+        """Return the total PV system and load kW at each bus.
+
+        Requires that the script make_element_bus_mapping.py has been run on this feeder.
+
+        Returns
+        -------
+        pd.DataFrame
+            Indexed by bus name with columns pv_systems and loads
+
+        """
+        feeder_file = self._get_feeder_bus_mapping_file()
+        index_file = get_bus_element_index_filename(feeder_file, self._feeder)
+        if os.path.exists(index_file):
+            index = BusElementIndex.load(index_file)
+        else:
+            index = BusElementIndex.from_feeder_mapping(load_data(feeder_file))
+        element_info = {
+            "pv_systems": self._scenario.read_element_info_file("PVSystems"),
+            "loads": self._scenario.read_element_info_file("Loads"),
+        }
+        return index.sum_kw_by_bus(index.lookup_kw(element_info))
+
+    def _get_feeder_bus_mapping_file(self):
+        input_directory = self._job.model.deployment.directory
+        bus_mapping_file = os.path.join(
+            input_directory, REGION_BUS_MAPPING_FILENAME
+        )
+        if not os.path.exists(bus_mapping_file):
+            raise InvalidConfiguration(
+                f"{bus_mapping_file} does not exist. Has make_element_bus_mapping.py been run?"
+            )
+
+        summary = load_data(bus_mapping_file)
+        if self._feeder not in summary:
+            raise InvalidConfiguration(
+                f"{bus_mapping_file} does not contain feeder={self._feeder}"
+            )
+
+        return summary[self._feeder]
+
+
+def _reduce_by_element(df, func):
+    """Reduce the phase columns of each element in a PyDSS dataframe to one column."""
+    names = [PyDssScenarioResults.get_name_from_column(x) for x in df.columns]
+    return df.T.groupby(names, sort=False).agg(func).T
+
+
+def _concat_element_chunks(chunks, index):
+    if not chunks:
+        return pd.DataFrame(index=index)
+    return pd.concat(chunks, axis=1)
+
+
+def _split_loadings_by_element(df, column, fmt):
+    loadings = {}
+    for name in df.columns:
+        element_df = pd.DataFrame(df[name].values, index=df.index, columns=[column])
+        if fmt == "json":
+            loadings[name] = element_df.to_json(orient="records")
+        else:
+            loadings[name] = element_df
+    return loadings
@@ -2,34 +2,65 @@
 
 import abc
 import copy
+import json
 import logging
 import os
 import re
+from pathlib import Path
 
 import PyDSS.exceptions as PyDssExceptions
 from PyDSS.pydss_project import update_pydss_controllers
 from PyDSS.pydss_project import PyDssProject, PyDssScenario
+from PyDSS.pydss_results import PyDssResults
+from PyDSS.thermal_metrics import create_summary_from_dict
 
 from jade.events import StructuredLogEvent, EVENT_CATEGORY_ERROR
 from jade.jobs.job_execution_interface import JobExecutionInterface
 from jade.loggers import log_event
 from jade.utils.utils import dump_data
-from jade.utils.timing_utils import timed_info
+from jade.utils.timing_utils import timed_info, Timer
 
+from disco import timer_stats_collector
 from disco.common import (
     EXIT_CODE_GOOD,
     LOADS_SUM_GROUP_FILENAME,
     PV_SYSTEMS_SUM_GROUP_FILENAME,
 )
 from disco.exceptions import (
+    HostingCapacityEarlyStop,
     PyDssConvergenceError,
     PyDssConvergenceErrorCountExceeded,
     PyDssConvergenceMaxError,
+    get_error_code_from_exception,
 )
 from disco.pydss.common import ConfigType
 from disco.events import EVENT_NO_CONVERGENCE
 from disco.models.base import PyDSSControllerModel
-from disco.pydss.pydss_utils import detect_convergence_problems
+from disco.pydss.hosting_capacity_early_stop import (
+    HC_EARLY_STOP_CONFIG_KEY,
+    HC_EARLY_STOP_DIRNAME,
+    find_threshold_violations,
+    get_chain_key,
+    get_hc_early_stop_config,
+    mark_chain_stopped,
+    record_penetration_level,
+)
+from disco.pydss.log_monitor import (
+    LOG_MONITOR_CONFIG_KEY,
+    PyDssLogMonitor,
+    get_log_monitor_config,
+)
+from disco.pydss.pydss_utils import count_convergence_problems
+from disco.pydss.snapshot_time_points import (
+    PYDSS_TIME_POINTS_FILENAME,
+    SNAPSHOT_TIME_POINTS_CONFIG_KEY,
+    make_pydss_time_points_data,
+)
+from disco.pydss.time_series_windows import (
+    TIME_SERIES_WINDOWS_CONFIG_KEY,
+    make_simulation_range,
+)
+from disco.utils.telemetry import TELEMETRY_FILENAME, JobTelemetry
 
 
 logger = logging.getLogger(__name__)
@@ -155,8 +186,21 @@ class PyDssSimulationBase(JobExecutionInterface, abc.ABC):
 
         simulation_config = self._pydss_inputs[ConfigType.SIMULATION_CONFIG]
         self._modify_pydss_simulation_params(simulation_config["project"])
+        windows = simulation_config.get(TIME_SERIES_WINDOWS_CONFIG_KEY) or {}
+        if self._model.name in windows:
+            simulation_config["project"]["simulation_range"] = make_simulation_range(
+                windows[self._model.name]
+            )
 
         for category, params in simulation_config.items():
+            if category in (
+                HC_EARLY_STOP_CONFIG_KEY,
+                LOG_MONITOR_CONFIG_KEY,
+                SNAPSHOT_TIME_POINTS_CONFIG_KEY,
+                TIME_SERIES_WINDOWS_CONFIG_KEY,
+            ):
+                # This is consumed by disco, not PyDSS.
+                continue
             if category in dss_args:
                 dss_args[category].update(params)
             else:
@@ -184,6 +228,7 @@ class PyDssSimulationBase(JobExecutionInterface, abc.ABC):
             project_path=self._pydss_project.project_path,
             scenario_names=[s.name for s in scenarios if "pf1" not in s.name]
         )
+        self._write_snapshot_time_points(simulation_config.get(SNAPSHOT_TIME_POINTS_CONFIG_KEY))
         self._dss_dir = self._pydss_project.dss_files_path
         self._results_dir = [
             self._pydss_project.export_path(scenario_name)
@@ -195,6 +240,23 @@ class PyDssSimulationBase(JobExecutionInterface, abc.ABC):
         if not self._model.deployment.is_standalone:
             self._modify_open_dss_parameters()
 
+    def _write_snapshot_time_points(self, time_points):
+        """Seed the project with pre-selected snapshot time points. PyDSS reads them in
+        get_snapshot_timepoint instead of searching the load shapes and renames the file to
+        PYDSS_FINAL_TIME_POINTS_FILENAME after the last scenario.
+
+        """
+        if not time_points or self._model.name not in time_points:
+            return
+
+        exports_dir = os.path.join(self._pydss_project.project_path, "Exports")
+        os.makedirs(exports_dir, exist_ok=True)
+        dump_data(
+            make_pydss_time_points_data(time_points[self._model.name]),
+            os.path.join(exports_dir, PYDSS_TIME_POINTS_FILENAME),
+            indent=2,
+        )
+
     def _apply_pydss_controllers(self, project_path, scenario_names):
         """Update PyDSS controllers."""
         controllers = self._model.deployment.pydss_controllers
@@ -289,15 +351,50 @@ class PyDssSimulationBase(JobExecutionInterface, abc.ABC):
     @timed_info
     def run(self, verbose=False):
         """Runs the simulation."""
-        self._setup_pydss_project()
+        telemetry_file = os.path.join(self._run_dir, TELEMETRY_FILENAME)
+        with JobTelemetry(self._model.name, "pydss", telemetry_file, timer_stats_collector) as telemetry:
+            ret = self._run(verbose=verbose)
+            telemetry.failed = ret != EXIT_CODE_GOOD
+        return ret
+
+    def _run(self, verbose=False):
+        with Timer(timer_stats_collector, "setup_pydss_project"):
+            self._setup_pydss_project()
         logger.info("Run simulation name=%s", self._model.name)
         logger.debug("Run simulation %s", self)
 
         orig_dir = os.getcwd()
+        monitor = self._start_log_monitor()
+        try:
+            ret = self._run_pydss_project(monitor)
+        except KeyboardInterrupt:
+            # The log monitor can interrupt the simulation until it is stopped, which includes
+            # the code that runs after the PyDSS project returns.
+            if monitor is None or not monitor.aborted:
+                raise
+            logger.error("Simulation was stopped because of convergence problems")
+            ret = get_error_code_from_exception(PyDssConvergenceErrorCountExceeded)
+        finally:
+            os.chdir(orig_dir)
+
+        if ret == EXIT_CODE_GOOD:
+            with Timer(timer_stats_collector, "check_hosting_capacity_early_stop"):
+                ret = self._check_hosting_capacity_early_stop()
+
+        # This may be used again in the future.
+        # self.list_results_files()
+        return ret
+
+    def _run_pydss_project(self, monitor):
         ret = EXIT_CODE_GOOD
         try:
-            self._pydss_project.run(logging_configured=False, zip_project=True)
-            self.check_convergence_problems()
+            with Timer(timer_stats_collector, "run_pydss_project"):
+                if monitor is None:
+                    self._pydss_project.run(logging_configured=False, zip_project=True)
+                else:
+                    with monitor.interruptible():
+                        self._pydss_project.run(logging_configured=False, zip_project=True)
+            self.check_convergence_problems(monitor=monitor)
         except PyDssExceptions.PyDssConvergenceError:
             logger.exception("Simulation failed with a convergence error")
             ret = PyDssConvergenceError
@@ -308,27 +405,101 @@ class PyDssSimulationBase(JobExecutionInterface, abc.ABC):
             logger.exception("Simulation failed with a convergence error")
             ret = PyDssConvergenceMaxError
         finally:
-            os.chdir(orig_dir)
-
-        # This may be used again in the future.
-        # self.list_results_files()
+            if monitor is not None:
+                monitor.stop()
         return ret
 
-    def check_convergence_problems(self):
+    def _start_log_monitor(self):
+        """Start tailing the PyDSS reports logs, if enabled."""
+        simulation_config = self._pydss_inputs[ConfigType.SIMULATION_CONFIG]
+        config = get_log_monitor_config(simulation_config)
+        if not config["enabled"]:
+            return None
+
+        logs_dir = os.path.join(self._pydss_project.project_path, "Logs")
+        monitor = PyDssLogMonitor(logs_dir, config=config)
+        monitor.start()
+        return monitor
+
+    def _check_hosting_capacity_early_stop(self):
+        """Record whether this penetration level passed the hosting capacity thresholds. Return
+        a distinct error code if the chain of penetration levels should stop, if enabled.
+
+        """
+        simulation_config = self._pydss_inputs[ConfigType.SIMULATION_CONFIG]
+        config = get_hc_early_stop_config(simulation_config)
+        if not config["enabled"] or self._model.is_base_case:
+            return EXIT_CODE_GOOD
+        key = get_chain_key(self._model.deployment)
+        if key is None:
+            return EXIT_CODE_GOOD
+
+        results = PyDssResults(self._pydss_project.project_path)
+        thermal_metrics = self._read_report(results, "Reports/thermal_metrics.json")
+        voltage_metrics = self._read_report(results, "Reports/voltage_metrics.json")
+        if thermal_metrics is None and voltage_metrics is None:
+            logger.warning("Cannot check hosting capacity thresholds without metrics reports")
+            return EXIT_CODE_GOOD
+
+        thermal_summary = {} if thermal_metrics is None else create_summary_from_dict(thermal_metrics)
+        violations = find_threshold_violations(
+            thermal_summary,
+            voltage_metrics,
+            config["thresholds"],
+            include_secondaries=config["include_secondaries"],
+        )
+        # Hosting capacity is computed per scenario. The level fails only if all of them fail.
+        passed = not violations or any(not x for x in violations.values())
+        penetration_level = self._model.deployment.project_data["penetration_level"]
+        state_dir = Path(self._output).parent / HC_EARLY_STOP_DIRNAME
+        num_failures = record_penetration_level(
+            state_dir, key, penetration_level, self._model.name, passed
+        )
+        if passed:
+            return EXIT_CODE_GOOD
+
+        logger.info(
+            "Penetration level %s exceeded hosting capacity thresholds: %s",
+            penetration_level,
+            violations,
+        )
+        if num_failures < config["max_consecutive_failures"]:
+            return EXIT_CODE_GOOD
+
+        mark_chain_stopped(state_dir, key, penetration_level)
+        logger.info(
+            "Stop higher penetration levels of %s after %s consecutive failing levels",
+            key,
+            num_failures,
+        )
+        return get_error_code_from_exception(HostingCapacityEarlyStop)
+
+    @staticmethod
+    def _read_report(results, path):
+        try:
+            return json.loads(results.read_file(path))
+        except KeyError:
+            return None
+
+    def check_convergence_problems(self, monitor=None):
         """Logs events for convergence errors."""
-        problems = detect_convergence_problems(self._pydss_project.project_path)
-        if not problems:
+        counters = count_convergence_problems(self._pydss_project.project_path, monitor=monitor)
+        if counters.convergence_errors == 0:
             return
 
-        # This is disabled because there can be huge counts. There is no need to duplicate them.
-        #for problem in problems:
-        #    event = StructuredLogEvent(
-        #        source=self._model.name,
-        #        category=EVENT_CATEGORY_ERROR,
-        #        name=EVENT_NO_CONVERGENCE,
-        #        message="Detected convergence problem in PyDSS log.",
-        #        **problem,
-        #    )
-        #    log_event(event)
-
-        logger.error("Job experienced with %s convergence problems", len(problems))
+        # Log one summary event per job. There can be huge counts of individual problems.
+        summary = counters.to_dict()
+        event = StructuredLogEvent(
+            source=self._model.name,
+            category=EVENT_CATEGORY_ERROR,
+            name=EVENT_NO_CONVERGENCE,
+            message="Detected convergence problems in PyDSS log.",
+            threshold_exceeded=monitor is not None and monitor.threshold_exceeded,
+            **summary,
+        )
+        log_event(event)
+        logger.error(
+            "Job experienced %s convergence problems at %s time points",
+            summary["convergence_errors"],
+            summary["convergence_error_time_points"],
+        )
@@ -1,9 +1,17 @@
 """Contains PyDSS utility functions"""
 
 import json
+from pathlib import Path
 
 from PyDSS.pydss_project import PyDssProject
 
+from disco.pydss.log_monitor import (
+    CONVERGENCE_REPORT,
+    REPORTS_LOG_SUFFIX,
+    _CONVERGENCE_MARKER,
+    ConvergenceCounters,
+)
+
 
 def detect_convergence_problems(project_path):
     """Detects convergence problems in a PyDSS run.
@@ -20,19 +28,59 @@ def detect_convergence_problems(project_path):
     """
     problems = []
     project = PyDssProject.load_project(project_path)
-    project_name = project.simulation_config.project.active_project
-    for scenario in project.list_scenario_names():
-        log_file = f"Logs/{project_name}__{scenario}__reports.log"
+    for log_file in _list_reports_log_files(project):
         problems += _detect_convergence_problems(project.fs_interface.read_file(log_file))
 
     return problems
 
 
+def count_convergence_problems(project_path, monitor=None):
+    """Count convergence problems in a PyDSS run.
+
+    Parameters
+    ----------
+    project_path : str
+    monitor : PyDssLogMonitor | None
+        If set, stop the monitor and only process the log lines that it has not already
+        consumed.
+
+    Returns
+    -------
+    ConvergenceCounters
+
+    """
+    project = PyDssProject.load_project(project_path)
+    if monitor is None:
+        counters = ConvergenceCounters()
+        for log_file in _list_reports_log_files(project):
+            for problem in _detect_convergence_problems(project.fs_interface.read_file(log_file)):
+                counters.update(problem)
+        return counters
+
+    monitor.stop()
+    for log_file in _list_reports_log_files(project):
+        if not (Path(project_path) / log_file).exists():
+            # The log was archived before the monitor's final poll.
+            monitor.process_remaining_text(log_file, project.fs_interface.read_file(log_file))
+    return monitor.counters
+
+
+def _list_reports_log_files(project):
+    project_name = project.simulation_config.project.active_project
+    return [
+        f"Logs/{project_name}__{scenario}{REPORTS_LOG_SUFFIX}"
+        for scenario in project.list_scenario_names()
+    ]
+
+
 def _detect_convergence_problems(text):
     problems = []
     for line in text.splitlines():
+        # Avoid decoding the JSON of lines that cannot be convergence reports.
+        if _CONVERGENCE_MARKER not in line:
+            continue
         data = json.loads(line)
-        if data["Report"] == "Convergence":
+        if data["Report"] == CONVERGENCE_REPORT:
             problems.append(data)
 
     return problems
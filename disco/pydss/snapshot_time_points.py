@@ -0,0 +1,345 @@
+"""Selection of snapshot time points from load and PV shapes.
+
+With auto-selected time points, PyDSS searches the load-shape window of every job for the time
+points of interest (max load, max PV-to-load ratio, etc.). All jobs of a feeder share the same
+loads and load shapes, so disco computes the time points once per feeder before the jobs run,
+stores them in the config, and seeds each PyDSS project with them. PyDSS then skips its search.
+
+PyDSS (PyDSS.get_snapshot_timepoints.get_snapshot_timepoint) keeps the time points of a project in
+Exports/.snapshot_time_points.json while its scenarios run. Each scenario reads the file if it
+exists and writes it otherwise. After the last scenario PyDSS renames it to
+Exports/snapshot_time_points.json, which the summary tables read. disco writes the seed to the
+first file.
+"""
+
+import csv
+import logging
+import os
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import opendssdirect as dss
+import pandas as pd
+
+from disco.utils.feeder_stats_index import REGEX_NEW_ELEMENT, REGEX_PMPP
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TIME_POINTS_CONFIG_KEY = "snapshot_time_points"
+PYDSS_TIME_POINTS_FILENAME = ".snapshot_time_points.json"
+PYDSS_FINAL_TIME_POINTS_FILENAME = "snapshot_time_points.json"
+SNAPSHOT_TIME_POINTS_TABLE_FILENAME = "snapshot_time_points_table.csv"
+
+PV_GENERATION_START_TIME = "8:00"
+PV_GENERATION_END_TIME = "17:00"
+
+# Maps SnapshotTimePointSelectionMode values to the labels used by PyDSS.
+SNAPSHOT_TIME_POINT_LABELS = {
+    "max_pv_load_ratio": "Max PV to Load Ratio",
+    "max_load": "Max Load",
+    "daytime_min_load": "Min Daytime Load",
+    "pv_minus_load": "Max PV minus Load",
+}
+
+_REGEX_REDIRECT = re.compile(r"^(?:redirect|compile)\s+['\"]?([^'\"\s]+)", re.IGNORECASE)
+_REGEX_YEARLY = re.compile(r"\syearly\s*=\s*['\"]?([^'\"\s]+)", re.IGNORECASE)
+
+
+def select_time_points(load, pv=None):
+    """Select the snapshot time points from aggregate load and PV profiles. This matches the
+    selection performed by PyDSS.
+
+    Parameters
+    ----------
+    load : pd.Series
+        Aggregate load in kW, indexed by timestamp
+    pv : pd.Series | None
+        Aggregate PV power in kW, indexed by timestamp. None if there are no PV systems.
+
+    Returns
+    -------
+    dict
+        Maps PyDSS time point label to pd.Timestamp
+
+    """
+    daytime_load = load.between_time(PV_GENERATION_START_TIME, PV_GENERATION_END_TIME)
+    time_points = {"Max Load": load.idxmax()}
+    if pv is not None:
+        daytime_pv = pv.between_time(PV_GENERATION_START_TIME, PV_GENERATION_END_TIME)
+        time_points["Max PV to Load Ratio"] = (daytime_pv / daytime_load).idxmax()
+        time_points["Max PV minus Load"] = (daytime_pv - daytime_load).idxmax()
+        time_points["Max PV"] = daytime_pv.idxmax()
+    time_points["Min Load"] = load.idxmin()
+    time_points["Min Daytime Load"] = daytime_load.idxmin()
+    return time_points
+
+
+def get_time_point(time_points, mode):
+    """Return the time point for a SnapshotTimePointSelectionMode value. PyDSS uses the max-load
+    time point for every mode if there are no PV systems.
+
+    """
+    label = SNAPSHOT_TIME_POINT_LABELS[mode]
+    return time_points.get(label, time_points["Max Load"])
+
+
+class FeederProfiles:
+    """Load and PV profiles of one compiled OpenDSS circuit."""
+
+    def __init__(self, dss_file, loadshape_start_time, index):
+        """Compile dss_file and read its profiles.
+
+        Parameters
+        ----------
+        dss_file : str | Path
+        loadshape_start_time : datetime
+            Timestamp of the first point of every load shape
+        index : pd.DatetimeIndex
+            Time points to search
+
+        """
+        self.dss_file = dss_file
+        self._loadshape_start_time = loadshape_start_time
+        self._index = index
+        self._raw_shapes = {}
+        self._shapes = {}
+        orig = os.getcwd()
+        try:
+            dss.Text.Command("Clear")
+            reply = dss.Text.Command(f"Redirect '{dss_file}'")
+            if reply:
+                raise Exception(f"Failed to compile OpenDSS model {dss_file}: {reply}")
+
+            # Keep the raw data because the circuit is cleared when the next feeder is compiled.
+            flag = dss.LoadShape.First()
+            while flag > 0:
+                self._raw_shapes[dss.LoadShape.Name().lower()] = (
+                    np.array(dss.LoadShape.PMult()),
+                    pd.Timedelta(seconds=dss.LoadShape.SInterval()),
+                )
+                flag = dss.LoadShape.Next()
+
+            load_kw = defaultdict(float)
+            flag = dss.Loads.First()
+            while flag > 0:
+                load_kw[dss.Loads.Yearly().lower()] += dss.Loads.kW()
+                flag = dss.Loads.Next()
+
+            self.pv_pmpp = defaultdict(float)
+            flag = dss.PVsystems.First()
+            while flag > 0:
+                self.pv_pmpp[dss.PVsystems.yearly().lower()] += dss.PVsystems.Pmpp()
+                flag = dss.PVsystems.Next()
+        finally:
+            os.chdir(orig)
+
+        self.load = self._aggregate(load_kw)
+
+    @property
+    def index(self):
+        return self._index
+
+    def make_key(self, additional_pmpp=None):
+        """Return a key that identifies the profiles of this circuit with additional PV."""
+        pmpp = tuple(sorted((additional_pmpp or {}).items()))
+        return (str(self.dss_file), self._index[0], len(self._index), self._index.freqstr, pmpp)
+
+    def get_pv(self, additional_pmpp=None):
+        """Return the aggregate PV profile of the circuit plus additional PV systems.
+
+        Parameters
+        ----------
+        additional_pmpp : dict | None
+            Maps PV shape name to total Pmpp of PV systems that are not in the circuit
+
+        Returns
+        -------
+        pd.Series | None
+            None if there are no PV systems
+
+        """
+        pmpp = defaultdict(float, self.pv_pmpp)
+        for name, val in (additional_pmpp or {}).items():
+            pmpp[name] += val
+        if not pmpp:
+            return None
+        return self._aggregate(pmpp)
+
+    def _aggregate(self, kw_by_shape):
+        values = np.zeros(len(self._index))
+        for name, kw in kw_by_shape.items():
+            if not name:
+                # Elements without a yearly shape have a constant profile.
+                values += kw
+            else:
+                values += self._get_shape(name) * kw
+        return pd.Series(values, index=self._index)
+
+    def _get_shape(self, name):
+        shape = self._shapes.get(name)
+        if shape is None:
+            if name not in self._raw_shapes:
+                raise Exception(f"Load shape {name} is not defined")
+            data, interval = self._raw_shapes[name]
+            indices = pd.date_range(self._loadshape_start_time, periods=len(data), freq=interval)
+            shape = pd.Series(data, index=indices).loc[self._index].values
+            self._shapes[name] = shape
+        return shape
+
+
+def read_deployment_pv_pmpp(deployment_file):
+    """Return the total Pmpp of the PV systems defined in a deployment file by PV shape name."""
+    pmpp = defaultdict(float)
+    with open(deployment_file) as f_in:
+        for line in f_in:
+            line = line.strip()
+            match = REGEX_NEW_ELEMENT.search(line)
+            if match is None or match.group(1).lower() != "pvsystem":
+                continue
+            match = REGEX_PMPP.search(line)
+            if match is None:
+                continue
+            yearly = _REGEX_YEARLY.search(line)
+            name = "" if yearly is None else yearly.group(1).lower()
+            pmpp[name] += float(match.group(1))
+    return pmpp
+
+
+def get_master_file(deployment_file):
+    """Return the file redirected by a deployment file or None if it is standalone."""
+    with open(deployment_file) as f_in:
+        for line in f_in:
+            match = _REGEX_REDIRECT.search(line.strip())
+            if match:
+                return (Path(deployment_file).parent / match.group(1)).resolve()
+    return None
+
+
+def group_jobs_by_feeder(config):
+    """Group the simulation jobs in config by the OpenDSS file that defines their circuit.
+
+    Returns
+    -------
+    dict
+        Maps the OpenDSS file to a list of (job, deployment_file). deployment_file is None if
+        the job's deployment file is the OpenDSS file.
+
+    """
+    jobs_by_dss_file = defaultdict(list)
+    for job in config.iter_pydss_simulation_jobs():
+        deployment_file = Path(job.model.deployment.deployment_file)
+        master_file = None
+        if not job.model.deployment.is_standalone:
+            master_file = get_master_file(deployment_file)
+        if master_file is None:
+            jobs_by_dss_file[deployment_file.resolve()].append((job, None))
+        else:
+            jobs_by_dss_file[master_file].append((job, deployment_file))
+    return jobs_by_dss_file
+
+
+def iter_job_profiles(config, loadshape_start_time, make_index):
+    """Yield the feeder profiles of every simulation job in config. Each feeder circuit is
+    compiled once per distinct time index; the PV systems of each deployment are read from its
+    deployment file.
+
+    Parameters
+    ----------
+    config : PyDssConfiguration
+    loadshape_start_time : str
+        Timestamp of the first point of every load shape. The year is changed to the year of
+        each job's time index.
+    make_index : callable
+        Returns the pd.DatetimeIndex to analyze for a job
+
+    Yields
+    ------
+    tuple
+        (job, FeederProfiles, dict): the dict maps PV shape name to total Pmpp of the PV
+        systems in the job's deployment
+
+    """
+    for dss_file, jobs in group_jobs_by_feeder(config).items():
+        profiles = {}
+        for job, deployment_file in jobs:
+            index = make_index(job)
+            key = (index[0], len(index), index.freqstr)
+            if key not in profiles:
+                profiles[key] = FeederProfiles(
+                    dss_file, _replace_year(loadshape_start_time, index[0].year), index
+                )
+            pmpp = {} if deployment_file is None else read_deployment_pv_pmpp(deployment_file)
+            yield job, profiles[key], pmpp
+
+
+def compute_snapshot_time_points(config, loadshape_start_time, search_start_time,
+                                 search_duration_min):
+    """Compute the snapshot time points of every simulation job in config.
+
+    Parameters
+    ----------
+    config : PyDssConfiguration
+    loadshape_start_time : str
+        Timestamp of the first point of every load shape. The year is changed to the year of
+        each job.
+    search_start_time : str
+        Start of the search window. The year is changed to the year of each job.
+    search_duration_min : float
+
+    Returns
+    -------
+    dict
+        Maps job name to a dict of PyDSS time point label to timestamp string
+
+    """
+    def make_index(job):
+        start = _replace_year(search_start_time, job.model.simulation.start_time.year)
+        return pd.date_range(
+            start,
+            start + timedelta(minutes=float(search_duration_min)),
+            freq=pd.Timedelta(seconds=job.model.simulation.step_resolution),
+            inclusive="left",
+        )
+
+    time_points = {}
+    cache = {}
+    for job, feeder, pmpp in iter_job_profiles(config, loadshape_start_time, make_index):
+        key = feeder.make_key(pmpp)
+        if key not in cache:
+            selected = select_time_points(feeder.load, feeder.get_pv(pmpp))
+            cache[key] = {k: str(v) for k, v in selected.items()}
+        time_points[job.name] = cache[key]
+
+    logger.info("Selected snapshot time points for %s jobs from %s distinct profiles",
+                len(time_points), len(cache))
+    return time_points
+
+
+def write_snapshot_time_points_table(time_points, filename):
+    """Write the time points of each job in the format of the summary table."""
+    with open(filename, "w", newline="") as f_out:
+        fieldnames = ["name"] + list(SNAPSHOT_TIME_POINT_LABELS)
+        writer = csv.DictWriter(f_out, fieldnames=fieldnames)
+        writer.writeheader()
+        for name, job_time_points in time_points.items():
+            row = {"name": name}
+            for mode in SNAPSHOT_TIME_POINT_LABELS:
+                row[mode] = get_time_point(job_time_points, mode)
+            writer.writerow(row)
+    logger.info("Wrote snapshot time points to %s", filename)
+
+
+def make_pydss_time_points_data(time_points):
+    """Return time points in the format of the file that PyDSS writes after its search."""
+    return {label: {"Timepoints": timestamp} for label, timestamp in time_points.items()}
+
+
+def _replace_year(timestamp, year):
+    if isinstance(timestamp, str):
+        timestamp = pd.Timestamp(timestamp).to_pydatetime()
+    assert isinstance(timestamp, datetime), timestamp
+    return timestamp.replace(year=year)
@@ -0,0 +1,164 @@
+"""Selection of the daily simulation window of time-series jobs from load and PV shapes.
+
+PyDSS can restrict control algorithms and data collection to a daily time range. disco analyzes
+the aggregate load and PV profiles of each job while creating the config and selects the range
+that contains the intervals that can plausibly produce violations: peak load, high PV-to-load
+ratio, and fast net-load ramps, plus a safety margin. The selected range and statistics about
+the excluded intervals are recorded per job.
+"""
+
+import csv
+import logging
+from datetime import time
+
+import pandas as pd
+
+from disco.pydss.snapshot_time_points import iter_job_profiles
+
+
+logger = logging.getLogger(__name__)
+
+TIME_SERIES_WINDOWS_CONFIG_KEY = "time_series_windows"
+TIME_SERIES_WINDOWS_TABLE_FILENAME = "time_series_windows_table.csv"
+TIME_FORMAT = "%H:%M:%S"
+
+DEFAULT_WINDOW_QUANTILE = 0.9
+DEFAULT_WINDOW_MARGIN_MINUTES = 60
+
+_MINUTES_PER_DAY = 24 * 60
+
+
+def select_simulation_window(load, pv=None, quantile=DEFAULT_WINDOW_QUANTILE,
+                             margin_minutes=DEFAULT_WINDOW_MARGIN_MINUTES):
+    """Select the daily time range that contains every interval of interest.
+
+    An interval is of interest if its load, PV-to-load ratio, or absolute net-load ramp is at or
+    above the quantile of its profile.
+
+    Parameters
+    ----------
+    load : pd.Series
+        Aggregate load in kW, indexed by timestamp
+    pv : pd.Series | None
+        Aggregate PV power in kW, indexed by timestamp. None if there are no PV systems.
+    quantile : float
+    margin_minutes : float
+        Added before and after the range
+
+    Returns
+    -------
+    dict | None
+        start and end of the range and statistics about the excluded intervals. None if the
+        range covers the whole day.
+
+    """
+    net_load = load if pv is None else load - pv
+    ramp = net_load.diff().abs()
+    is_selected = (load >= load.quantile(quantile)) | (ramp >= ramp.quantile(quantile))
+    ratio = None
+    if pv is not None:
+        ratio = (pv / load.where(load > 0)).fillna(0.0)
+        is_generating = pv > 0
+        if is_generating.any():
+            threshold = ratio[is_generating].quantile(quantile)
+            is_selected |= is_generating & (ratio >= threshold)
+
+    minutes = pd.Series(load.index.hour * 60 + load.index.minute, index=load.index)
+    selected_minutes = minutes[is_selected]
+    start = selected_minutes.min() - margin_minutes
+    end = selected_minutes.max() + margin_minutes
+    if start <= 0 and end >= _MINUTES_PER_DAY - 1:
+        return None
+
+    start = max(int(start), 0)
+    end = min(int(end), _MINUTES_PER_DAY - 1)
+    is_excluded = (minutes < start) | (minutes > end)
+    window = {
+        "start": _format_minutes(start),
+        "end": _format_minutes(end),
+        "excluded_pct": round(float(is_excluded.mean()) * 100, 2),
+        "excluded_max_load_pct_of_peak": 0.0,
+        "excluded_max_pv_load_ratio": 0.0,
+    }
+    if is_excluded.any():
+        window["excluded_max_load_pct_of_peak"] = round(
+            float(load[is_excluded].max() / load.max() * 100), 2
+        )
+        if ratio is not None:
+            window["excluded_max_pv_load_ratio"] = round(float(ratio[is_excluded].max()), 4)
+    return window
+
+
+def _format_minutes(minutes):
+    return time(hour=minutes // 60, minute=minutes % 60).strftime(TIME_FORMAT)
+
+
+def compute_time_series_windows(config, loadshape_start_time, quantile=DEFAULT_WINDOW_QUANTILE,
+                                margin_minutes=DEFAULT_WINDOW_MARGIN_MINUTES):
+    """Select the simulation window of every time-series job in config.
+
+    Parameters
+    ----------
+    config : PyDssConfiguration
+    loadshape_start_time : str
+        Timestamp of the first point of every load shape. The year is changed to the year of
+        each job.
+    quantile : float
+    margin_minutes : float
+
+    Returns
+    -------
+    dict
+        Maps job name to its window. Jobs that need the whole day are excluded.
+
+    """
+    def make_index(job):
+        simulation = job.model.simulation
+        return pd.date_range(
+            simulation.start_time,
+            simulation.end_time,
+            freq=pd.Timedelta(seconds=simulation.step_resolution),
+            inclusive="left",
+        )
+
+    windows = {}
+    cache = {}
+    num_jobs = 0
+    for job, feeder, pmpp in iter_job_profiles(config, loadshape_start_time, make_index):
+        num_jobs += 1
+        key = feeder.make_key(pmpp)
+        if key not in cache:
+            cache[key] = select_simulation_window(
+                feeder.load,
+                feeder.get_pv(pmpp),
+                quantile=quantile,
+                margin_minutes=margin_minutes,
+            )
+        if cache[key] is not None:
+            windows[job.name] = cache[key]
+
+    logger.info("Restricted the simulation window of %s of %s jobs", len(windows), num_jobs)
+    return windows
+
+
+def make_simulation_range(window):
+    """Return the PyDSS simulation_range for a window."""
+    return {"start": window["start"], "end": window["end"]}
+
+
+def write_time_series_windows_table(windows, filename):
+    """Write the window and excluded-interval statistics of each job."""
+    fieldnames = [
+        "name",
+        "start",
+        "end",
+        "excluded_pct",
+        "excluded_max_load_pct_of_peak",
+        "excluded_max_pv_load_ratio",
+    ]
+    with open(filename, "w", newline="") as f_out:
+        writer = csv.DictWriter(f_out, fieldnames=fieldnames)
+        writer.writeheader()
+        for name, window in windows.items():
+            writer.writerow({"name": name, **window})
+    logger.info("Wrote time-series simulation windows to %s", filename)
@@ -0,0 +1,60 @@
+"""Compares the run-time estimation of config generation with and without the feeder stats index.
+Requires a time-series config created from a disco-transformed input directory.
+
+Usage: python benchmark_feeder_stats_index.py CONFIG_FILE [MODELS_PATH]
+
+MODELS_PATH is the disco-transformed input directory. It is indexed if it does not have an index.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from disco.extensions.pydss_simulation.estimate_run_minutes import generate_estimate_run_minutes
+from disco.extensions.pydss_simulation.pydss_configuration import PyDssConfiguration
+from disco.utils.feeder_stats_index import build_feeder_stats_index, find_feeder_stats_index_path
+
+
+def estimate_run_minutes(config, use_index):
+    start = time.time()
+    generate_estimate_run_minutes(config, use_index=use_index)
+    duration = time.time() - start
+    return duration, {job.name: job.estimated_run_minutes for job in config.iter_jobs()}
+
+
+def main():
+    if len(sys.argv) == 1:
+        print(f"Usage: python {sys.argv[0]} CONFIG_FILE [MODELS_PATH]", file=sys.stderr)
+        sys.exit(1)
+
+    config_file = Path(sys.argv[1])
+    if not config_file.exists():
+        print(f"{config_file} does not exist", file=sys.stderr)
+        sys.exit(1)
+
+    if len(sys.argv) > 2 and find_feeder_stats_index_path(sys.argv[2]) is None:
+        # transform-model normally does this.
+        start = time.time()
+        build_feeder_stats_index(sys.argv[2])
+        print(f"Built the index in {time.time() - start:.3f} seconds")
+
+    config = PyDssConfiguration.deserialize(str(config_file))
+    job = next(iter(config.iter_jobs()))
+    if find_feeder_stats_index_path(job.model.deployment.directory) is None:
+        print("The input directory of the config does not have a feeder stats index", file=sys.stderr)
+        sys.exit(1)
+
+    scan_duration, scan_estimates = estimate_run_minutes(config, False)
+    index_duration, index_estimates = estimate_run_minutes(config, True)
+
+    print(f"Jobs: {len(scan_estimates)}")
+    print(f"Scanning DSS files: {scan_duration:.3f} seconds")
+    print(f"Feeder stats index: {index_duration:.3f} seconds")
+    if index_duration > 0:
+        print(f"Speedup:            {scan_duration / index_duration:.1f}x")
+    mismatches = [x for x in scan_estimates if scan_estimates[x] != index_estimates[x]]
+    print(f"Jobs with different estimates: {len(mismatches)}")
+
+
+if __name__ == "__main__":
+    main()
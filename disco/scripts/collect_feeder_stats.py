@@ -1,9 +1,10 @@
 """Produces CSV files with feeder stats. Requires disco-transformed input directory."""
 
-import re
 import sys
 from pathlib import Path
 
+from disco.utils.feeder_stats_index import FeederStatsIndex
+
 
 ELEMENTS = {
     "capacitors.dss": ["capacitor", "capcontrol"],
@@ -28,32 +29,17 @@ FIELDS = {
     "pvsystem": "pv_systems",
     "regcontrol": "reg_controls",
     "transformer": "transformers",
+    "buses": "buses",
 }
 
-REGEX_PMPP = re.compile(r"new pvsystem.*\spmpp=([\d\.]+)", re.IGNORECASE)
-
-
-def count_element_types(filename: Path, element: str):
-    count = 0
-    for line in filename.read_text().splitlines():
-        if line.strip().lower().startswith(f"new {element}"):
-            count += 1
-    return count
-
 
-def sum_pmpps(filename: Path):
-    total = 0
-    count = 0
-    for line in filename.read_text().splitlines():
-        match = REGEX_PMPP.search(line)
-        if match:
-            pmpp = float(match.group(1))
-            total += pmpp
-            count += 1
-    return total, count
+def count_element_types(index: FeederStatsIndex, filename: Path, element: str):
+    # Counts element classes that start with element, such as LineCode for line.
+    element_counts = index.get_file_stats(filename)["element_counts"]
+    return sum(v for k, v in element_counts.items() if k.startswith(element))
 
 
-def collect_feeder_counts(path: Path):
+def collect_feeder_counts(index: FeederStatsIndex, path: Path):
     counts = {}
     for filename in path.iterdir():
         elements = ELEMENTS.get(filename.name.lower())
@@ -61,7 +47,8 @@ def collect_feeder_counts(path: Path):
             for element in elements:
                 if element not in counts:
                     counts[element] = 0
-                counts[element] += count_element_types(filename, element)
+                counts[element] += count_element_types(index, filename, element)
+    counts["buses"] = index.get_directory_stats(path)["num_buses"]
     return counts
 
 
@@ -75,6 +62,9 @@ def main():
         print(f"{base_path} does not exist", file=sys.stderr)
         sys.exit(1)
 
+    index = FeederStatsIndex.find(base_path)
+    if index.base_path is None:
+        index = FeederStatsIndex(base_path)
     feeder_stats = []
     pv_stats = []
     for substation_path in base_path.iterdir():
@@ -82,7 +72,7 @@ def main():
             for feeder_path in substation_path.iterdir():
                 dss_path = feeder_path / "OpenDSS"
                 if dss_path.is_dir():
-                    counts = collect_feeder_counts(dss_path)
+                    counts = collect_feeder_counts(index, dss_path)
                     counts["substation"] = substation_path.name
                     counts["feeder"] = feeder_path.name
                     feeder_stats.append(counts)
@@ -91,12 +81,12 @@ def main():
                     for filename in pv_path.iterdir():
                         if filename.suffix == ".dss":
                             name = filename.name.replace(filename.suffix, "")
-                            # sum_pmpps assumes that Pmpp is always defined.
-                            # If that is incorrect, use count_element_types instead.
-                            pmpp, count = sum_pmpps(filename)
-                            #count = count_element_types(filename, "pvsystem")
+                            stats = index.get_file_stats(filename)
+                            pmpp = stats["pmpp"]
+                            count = stats["element_counts"].get("pvsystem", 0)
                             pv_stats.append({"job_name": name, "pv_systems": count, "pmpp": pmpp})
 
+    index.save()
     if feeder_stats:
         output_file = base_path / "feeder_stats.csv"
         header = ["substation", "feeder"] + list(FIELDS.values())
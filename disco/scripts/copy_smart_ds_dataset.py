@@ -1,11 +1,13 @@
 #!/usr/bin/env python
 
+import itertools
 import os
 import re
 import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-import struct
+import numpy as np
 import pandas as pd
 import csv
 
@@ -31,6 +33,8 @@ MASTER_DSS_STRINGS_TO_REMOVE = (
     "export monitors",
     "plot",
 )
+# Linux ioctl that clones a file with copy-on-write on filesystems that support reflinks.
+FICLONE = 0x40049409
 
 
 @click.argument("output-dir")
@@ -58,8 +62,29 @@ MASTER_DSS_STRINGS_TO_REMOVE = (
     default=False,
     help="overwrite output-dir if it exists",
 )
+@click.option(
+    "-n", "--num-processes",
+    type=int,
+    default=None,
+    help="number of regions to copy concurrently; defaults to the number of CPUs",
+)
+@click.option(
+    "--link-profiles/--copy-profiles",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="hard-link or clone profile files instead of copying them, if the filesystem allows it",
+)
+@click.option(
+    "--convert-to-sng",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help="convert the load shape CSV files in each profiles directory to SNG files",
+)
 @click.command()
-def copy_dataset(output_dir, version, year, city, force):
+def copy_dataset(output_dir, version, year, city, force, num_processes, link_profiles,
+                 convert_to_sng):
     """Copy a SMART-DS from the Eagle source directory to a destination directory."""
     output_dir = Path(output_dir)
     base_path = Path(BASE_DIR) / version / year / city
@@ -76,18 +101,73 @@ def copy_dataset(output_dir, version, year, city, force):
             sys.exit(1)
     os.makedirs(dst_path)
 
-    for name in os.listdir(base_path):
-        if REGEX_REGION_NAME.search(name) is not None:
-            src_profiles = base_path / name / "profiles"
-            dst_profiles = dst_path / name / "profiles"
-            shutil.copytree(src_profiles, dst_profiles)
-            src_region_path = base_path / name / "scenarios" / "base_timeseries" / "opendss"
-            dst_region_path = dst_path / name / "scenarios" / "base_timeseries" / "opendss"
-            shutil.copytree(src_region_path, dst_region_path)
-            _write_format_file(dst_region_path / FORMAT_FILENAME)
-            for filename in dst_region_path.rglob("Master.dss"):
-                comment_out_leading_strings(filename, MASTER_DSS_STRINGS_TO_REMOVE)
-            print(f"Copied {src_region_path} to {dst_region_path}")
+    regions = sorted(x for x in os.listdir(base_path) if REGEX_REGION_NAME.search(x) is not None)
+    with ProcessPoolExecutor(max_workers=num_processes) as executor:
+        futures = [
+            executor.submit(copy_region, base_path / x, dst_path / x, link_profiles)
+            for x in regions
+        ]
+        for future in as_completed(futures):
+            print(f"Copied {future.result()}")
+
+    if convert_to_sng:
+        for region in regions:
+            convert_to_sng_file(dst_path / region / "profiles", num_processes=num_processes)
+
+
+def copy_region(src_path, dst_path, link_profiles=True):
+    """Copy the profiles and base time-series OpenDSS models of one region.
+
+    Parameters
+    ----------
+    src_path : Path
+    dst_path : Path
+    link_profiles : bool
+        If True, hard-link or clone the profile files. They are never modified.
+
+    Returns
+    -------
+    Path
+        Destination OpenDSS directory
+
+    """
+    copy_function = link_or_copy_file if link_profiles else shutil.copy2
+    shutil.copytree(src_path / "profiles", dst_path / "profiles", copy_function=copy_function)
+    src_region_path = src_path / "scenarios" / "base_timeseries" / "opendss"
+    dst_region_path = dst_path / "scenarios" / "base_timeseries" / "opendss"
+    shutil.copytree(src_region_path, dst_region_path)
+    _write_format_file(dst_region_path / FORMAT_FILENAME)
+    for filename in dst_region_path.rglob("Master.dss"):
+        comment_out_leading_strings(filename, MASTER_DSS_STRINGS_TO_REMOVE)
+    return dst_region_path
+
+
+def link_or_copy_file(src, dst):
+    """Create dst as a hard link to src. Fall back to a copy-on-write clone and then to a copy
+    if the filesystem does not allow it, such as when the files are on different devices.
+
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        if not _clone_file(src, dst):
+            shutil.copy2(src, dst)
+    return dst
+
+
+def _clone_file(src, dst):
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    with open(src, "rb") as f_in, open(dst, "wb") as f_out:
+        try:
+            fcntl.ioctl(f_out.fileno(), FICLONE, f_in.fileno())
+        except OSError:
+            return False
+    shutil.copystat(src, dst)
+    return True
 
 
 def _write_format_file(filename):
@@ -95,28 +175,39 @@ def _write_format_file(filename):
         f_out.write(FORMAT_FILE_CONTENTS)
 
 
-def convert_to_sng_file(csvfolder):
+def convert_to_sng_file(csvfolder, num_processes=None):
     """Convert csv files to sng files.
 
     Parameters
     ----------
-    csv files location folder
+    csvfolder : str | Path
+        csv files location folder. The sng files are written to this folder.
+    num_processes : int | None
+        number of files to convert concurrently; defaults to the number of CPUs
 
     """
-
     path = Path(csvfolder)
-    for csvpath in path.rglob("*.csv"):
-        header_flag = None
-        with open(csvpath) as f:
-            reader = csv.reader(f)
-            row1 = next(reader)[0]
-        if re.match(r'[a-zA-Z]', row1):
-            header_flag = 0
-        loadshape = pd.read_csv(csvpath, header=header_flag)
-        loadshape_list = loadshape.iloc[:, 0].to_list()
-        fname = os.path.basename(csvpath).split('.csv')[0] + '.sng'
-        with open(path / fname, 'wb') as fout:
-            fout.write(struct.pack('%sf' % len(loadshape_list), *loadshape_list))
+    csv_files = list(path.rglob("*.csv"))
+    with ProcessPoolExecutor(max_workers=num_processes) as executor:
+        chunksize = max(len(csv_files) // ((num_processes or os.cpu_count()) * 4), 1)
+        for _ in executor.map(
+            _convert_csv_to_sng_file, csv_files, itertools.repeat(path), chunksize=chunksize
+        ):
+            pass
+
+
+def _convert_csv_to_sng_file(csvpath, output_dir):
+    header_flag = None
+    with open(csvpath) as f:
+        reader = csv.reader(f)
+        row1 = next(reader)[0]
+    if re.match(r'[a-zA-Z]', row1):
+        header_flag = 0
+    loadshape = pd.read_csv(csvpath, header=header_flag)
+    # Values are rounded to single precision via double precision, as struct.pack does.
+    values = loadshape.iloc[:, 0].to_numpy(dtype=np.float64).astype(np.float32)
+    fname = os.path.basename(csvpath).split('.csv')[0] + '.sng'
+    values.tofile(output_dir / fname)
 
 
 if __name__ == "__main__":
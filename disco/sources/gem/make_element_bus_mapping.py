@@ -8,10 +8,14 @@ import os
 import re
 import sys
 
+import numpy as np
+import pandas as pd
+
 from jade.loggers import setup_logging
 from jade.utils.utils import get_cli_string
 
 REGION_BUS_MAPPING_FILENAME = "bus_mapping_summary.json"
+BUS_ELEMENT_INDEX_FILENAME = "bus_element_index__{}.npz"
 
 logger = None
 
@@ -40,6 +44,10 @@ REGEX_LOAD = re.compile(r"New (?P<load>Load\.\w+).*bus\w+=(?P<bus>\w+)", re.IGNO
 # New PVSystem.pv_865744 bus1=242208_xfmr.1.2 phases=2 kV=0.20784609690826525 kVA=1.5829000000000002 Pmpp=1.439 conn=wye
 REGEX_PV_SYSTEM = re.compile(r"New (?P<pv_system>PVSystem\.[\w-]+) bus\w+=(?P<bus>\w+)", re.IGNORECASE)
 
+# These match the kW rating of a load and the Pmpp of a PV system.
+REGEX_KW = re.compile(r"\skW\s*=\s*(?P<kw>[\d\.eE+-]+)", re.IGNORECASE)
+REGEX_PMPP = re.compile(r"\sPmpp\s*=\s*(?P<kw>[\d\.eE+-]+)", re.IGNORECASE)
+
 # This matches 1417_0_4346_0 and 3 from
 # New Transformer.1417_0_4346_0 phases=1 windings=3 wdg=1 conn=delta bus=242214.2.3 Kv=4.8 kva=15.0 EmergHKVA=22.5 %r=0.1 wdg=2 conn=wye bus=242214_xfmr.1.0 Kv=0.12 kva=15.0 EmergHKVA=22.5 %r=0.1 wdg=3 conn=wye bus=242214_xfmr.0.2 Kv=0.12 kva=15.0 EmergHKVA=22.5 %r=0.1 XHL=0.1 XLT=0.1 XHT=0.1
 REGEX_TRANSFORMER = re.compile(r"New (?P<transformer>Transformer\.\w+).*windings=(?P<windings>\d+).*bus=", re.IGNORECASE)
@@ -79,6 +87,8 @@ def _check_bus_presence(feeder_mapping):
         if element_type == "transformers":
             # Already checked.
             continue
+        if element_type == "kw_ratings":
+            continue
         if element_type == "lines":
             for element, bus in element_mapping.items():
                 _check_bus(feeder_mapping, bus["from"], element)
@@ -132,6 +142,7 @@ def _handle_load(feeder_mapping, line):
         logger.warning("Detected duplicate load=%s", load)
         return
     feeder_mapping["loads"][load] = bus
+    _add_kw_rating(feeder_mapping, load, REGEX_KW.search(line))
 
 
 def _handle_pv_system(feeder_mapping, line):
@@ -146,6 +157,12 @@ def _handle_pv_system(feeder_mapping, line):
         assert bus == feeder_mapping["pv_systems"][pv_system]
     else:
         feeder_mapping["pv_systems"][pv_system] = bus
+        _add_kw_rating(feeder_mapping, pv_system, REGEX_PMPP.search(line))
+
+
+def _add_kw_rating(feeder_mapping, element, match):
+    if match:
+        feeder_mapping["kw_ratings"][element] = float(match.groupdict()["kw"])
 
 
 def _handle_transformer(feeder_mapping, line):
@@ -208,6 +225,7 @@ def _make_feeder_dict():
     return {
         "bus_coords": {},
         "capacitors": {},
+        "kw_ratings": {},
         "lines": {},
         "loads": {},
         "pv_systems": {},
@@ -289,6 +307,160 @@ def get_bus_to_element(bus_to_elems, feeder_mapping, element_type):
             bus_to_elems[bus].append(item)
 
 
+class BusElementIndex:
+    """Aligned arrays of the loads and PV systems of a feeder and their buses.
+
+    Elements are ordered as in get_bus_to_element with PV systems first and then loads.
+
+    """
+
+    ELEMENT_TYPES = ("pv_systems", "loads")
+
+    def __init__(self, buses, element_types, names, kw_ratings, bus_x, bus_y):
+        self.buses = buses
+        self.element_types = element_types
+        self.names = names
+        self.kw_ratings = kw_ratings
+        self.bus_x = bus_x
+        self.bus_y = bus_y
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_feeder_mapping(cls, feeder_mapping):
+        """Build the index from a feeder mapping created by this module."""
+        buses = []
+        element_types = []
+        names = []
+        for element_type in cls.ELEMENT_TYPES:
+            for element, bus in feeder_mapping[element_type].items():
+                buses.append(bus)
+                element_types.append(element_type)
+                names.append(element)
+
+        ratings = feeder_mapping.get("kw_ratings", {})
+        coords = feeder_mapping["bus_coords"]
+        return cls(
+            np.array(buses, dtype=str),
+            np.array(element_types, dtype=str),
+            np.array(names, dtype=str),
+            np.array([ratings.get(x, np.nan) for x in names], dtype=float),
+            np.array([float(coords[x]["x"]) if x in coords else np.nan for x in buses]),
+            np.array([float(coords[x]["y"]) if x in coords else np.nan for x in buses]),
+        )
+
+    @classmethod
+    def load(cls, filename):
+        """Load an index written by write."""
+        with np.load(filename, allow_pickle=False) as data:
+            return cls(**{x: data[x] for x in data.files})
+
+    def write(self, filename):
+        """Write the index to filename in NumPy .npz format."""
+        np.savez_compressed(
+            filename,
+            buses=self.buses,
+            element_types=self.element_types,
+            names=self.names,
+            kw_ratings=self.kw_ratings,
+            bus_x=self.bus_x,
+            bus_y=self.bus_y,
+        )
+
+    def lookup_kw(self, element_info):
+        """Return the kW value of each element in element info tables.
+
+        Parameters
+        ----------
+        element_info : dict
+            Maps element type to a DataFrame with columns Name and kW. The first row of a name
+            is used.
+
+        Returns
+        -------
+        np.ndarray
+            NaN for elements that are not in the tables
+
+        """
+        kw = np.full(len(self), np.nan)
+        for element_type, df in element_info.items():
+            mask = self.element_types == element_type
+            values = df.drop_duplicates("Name").set_index("Name")["kW"]
+            kw[mask] = pd.Series(self.names[mask]).map(values).values
+        return kw
+
+    def get_kw_at_bus_mapping(self, element_info):
+        """Return the output of get_bus_to_element for PV systems and loads, with kW values.
+
+        Parameters
+        ----------
+        element_info : dict
+            Maps element type to a DataFrame with columns Name and kW. Elements that are not
+            in the tables are excluded.
+
+        Returns
+        -------
+        dict
+
+        """
+        found = np.zeros(len(self), dtype=bool)
+        for element_type, df in element_info.items():
+            mask = self.element_types == element_type
+            found[mask] = pd.Series(self.names[mask]).isin(df["Name"]).values
+        kw = self.lookup_kw(element_info)
+
+        bus_to_elems = {}
+        for bus, element_type, name, is_found, val in zip(
+            self.buses.tolist(), self.element_types.tolist(), self.names.tolist(), found, kw
+        ):
+            elements = bus_to_elems.setdefault(bus, [])
+            if is_found:
+                elements.append({"type": element_type, "name": name, "kW": val})
+        return bus_to_elems
+
+    def sum_kw_by_bus(self, kw=None):
+        """Return the total kW of each element type at each bus.
+
+        Parameters
+        ----------
+        kw : np.ndarray | None
+            kW value of each element. Defaults to the kW ratings in the OpenDSS files.
+
+        Returns
+        -------
+        pd.DataFrame
+            Indexed by bus with one column per element type
+
+        """
+        df = pd.DataFrame({
+            "bus": self.buses,
+            "type": self.element_types,
+            "kW": self.kw_ratings if kw is None else kw,
+        })
+        return df.groupby(["bus", "type"])["kW"].sum().unstack(fill_value=0.0)
+
+    def get_distances(self, x, y, element_type="pv_systems"):
+        """Return the distance of each element of a type from a point.
+
+        Returns
+        -------
+        pd.Series
+            Indexed by element name. NaN if the bus of an element has no coordinates.
+
+        """
+        mask = self.element_types == element_type
+        distances = np.hypot(self.bus_x[mask] - x, self.bus_y[mask] - y)
+        return pd.Series(distances, index=self.names[mask])
+
+
+def get_bus_element_index_filename(feeder_mapping_file, feeder):
+    """Return the path of the bus-to-element index written next to a feeder mapping file."""
+    return os.path.join(
+        os.path.dirname(feeder_mapping_file), BUS_ELEMENT_INDEX_FILENAME.format(feeder)
+    )
+
+
 def get_element_coordinates(feeder_mapping, element_type, name):
     """Return the coordinates of the bus to which the element is attached.
 
@@ -408,6 +580,9 @@ def make_element_bus_mapping(path):
         write_element_bus_mapping(feeder_mapping, output_file)
         feeder_files[feeder] = output_file
         print(f"Wrote {output_file}")
+        index_file = get_bus_element_index_filename(output_file, feeder)
+        BusElementIndex.from_feeder_mapping(feeder_mapping).write(index_file)
+        print(f"Wrote {index_file}")
 
     return feeder_files
 
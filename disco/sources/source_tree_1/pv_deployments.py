@@ -301,6 +301,46 @@ class PVDSSInstance:
         return result
 
 
+class PVBusSampler:
+    """Draws PV candidate buses from reproducible, pre-shuffled permutations.
+
+    Each bus subset is shuffled once per sample. Buses drawn at one penetration level hold PV at
+    every higher level, so successive levels consume the remainder of the same permutation
+    instead of re-sampling the subset.
+    """
+
+    def __init__(self):
+        self._permutations = {}
+        self._cursors = {}
+
+    def iter_candidates(self, key, get_buses, excluded):
+        """Yield buses from the permutation identified by key, skipping excluded buses.
+
+        Parameters
+        ----------
+        key : hashable
+            Identifies the bus subset
+        get_buses : callable
+            Returns the buses in the subset; only called the first time key is seen.
+        excluded : set
+            Buses that cannot be drawn. This must only grow for the life of the sampler.
+
+        """
+        if key not in self._permutations:
+            buses = list(get_buses())
+            random.shuffle(buses)
+            self._permutations[key] = buses
+            self._cursors[key] = 0
+
+        buses = self._permutations[key]
+        while self._cursors[key] < len(buses):
+            bus = buses[self._cursors[key]]
+            # The bus is consumed whether or not the caller places PV on it.
+            self._cursors[key] += 1
+            if bus not in excluded:
+                yield bus
+
+
 class PVScenarioGeneratorBase(abc.ABC):
 
     def __init__(self, feeder_path: str, config: SimpleNamespace) -> None:
@@ -405,6 +445,7 @@ class PVScenarioGeneratorBase(abc.ABC):
             random.seed(self.config.random_seed + sample)
             existing_pv = deepcopy(base_existing_pv)
             pv_records = {}
+            bus_sampler = PVBusSampler()
             for penetration in range(start, end, step):
                 data = SimpleNamespace(
                     base_existing_pv=base_existing_pv,
@@ -420,7 +461,8 @@ class PVScenarioGeneratorBase(abc.ABC):
                     bus_kv=highv_buses.bus_kv,
                     pv_records=pv_records,
                     penetration=penetration,
-                    sample=sample
+                    sample=sample,
+                    bus_sampler=bus_sampler,
                 )
                 existing_pv, pv_records = self.deploy_pv_scenario(data)
 
@@ -468,12 +510,15 @@ class PVScenarioGeneratorBase(abc.ABC):
         dict:
             The updated existing_pv
         """
-        pv_string = "! =====================PV SCENARIO FILE==============================\n"
+        pv_lines = ["! =====================PV SCENARIO FILE==============================\n"]
+        needs_write = False
 
         categorical_remaining_pvs = self.get_categorical_remaining_pvs(data)
         bus_distances = self.get_bus_distances(data)
         customer_bus_map = self.get_customer_bus_map(data)
         priority_buses = self.get_priority_buses(data)
+        excluded_buses = set(priority_buses)
+        bus_sampler = getattr(data, "bus_sampler", None) or PVBusSampler()
         existing_pv = data.existing_pv
         pv_records = data.pv_records
 
@@ -501,7 +546,7 @@ class PVScenarioGeneratorBase(abc.ABC):
                             pv_size = min(random_pv_size, min_pv_size + remaining_pv_to_install)
                             pv_added_capacity = pv_size - min_pv_size
                             remaining_pv_to_install -= pv_added_capacity
-                            pv_string = self.add_pv_string(bus, pv_type.value, pv_size, pv_string)
+                            self.add_pv_string(bus, pv_type.value, pv_size, pv_lines)
                             pv_records[bus] = pv_size
                             existing_pv[bus] = pv_size
                             ncs += 1
@@ -518,12 +563,11 @@ class PVScenarioGeneratorBase(abc.ABC):
                             # TODO: pv_added_capacity no effect now
                             pv_added_capacity = 0
                             remaining_pv_to_install -= pv_added_capacity
-                            pv_string = self.add_pv_string(bus, pv_type.value, pv_size, pv_string)
+                            self.add_pv_string(bus, pv_type.value, pv_size, pv_lines)
                             pv_records[bus] = pv_size
                             existing_pv[bus] = pv_size
 
                 subset_idx += 1
-                candidate_bus_array = self.get_pv_bus_subset(bus_distance, subset_idx, priority_buses)
                 if subset_idx > (100 / self.config.proximity_step):
                     logger.info(
                         "No %s file created on feeder - %s, beacause capacity remains %s",
@@ -533,8 +577,12 @@ class PVScenarioGeneratorBase(abc.ABC):
                     )
                     break
 
-                while len(candidate_bus_array) > 0:
-                    picked_candidate = random.choice(candidate_bus_array)
+                candidates = bus_sampler.iter_candidates(
+                    (pv_type, subset_idx),
+                    lambda: self.get_pv_bus_subset(bus_distance, subset_idx, []),
+                    excluded_buses,
+                )
+                for picked_candidate in candidates:
                     if picked_candidate in data.base_existing_pv:
                         base_min_pv_size = data.base_existing_pv[picked_candidate]
                     else:
@@ -549,24 +597,21 @@ class PVScenarioGeneratorBase(abc.ABC):
                         max_pv_size = self.get_maximum_pv_size(picked_candidate, data)
                         random_pv_size = self.generate_pv_size_from_pdf(0, max_pv_size)
                         pv_size = min(random_pv_size, remaining_pv_to_install)
-                        pv_string = self.add_pv_string(picked_candidate, pv_type.value, pv_size, pv_string)
+                        self.add_pv_string(picked_candidate, pv_type.value, pv_size, pv_lines)
                         pv_records[picked_candidate] = pv_size
                         existing_pv[picked_candidate] = pv_size
                         pv_added_capacity = pv_size
                         remaining_pv_to_install -= pv_added_capacity
                         ncs += 1
-                    candidate_bus_array.remove(picked_candidate)
 
                     if abs(remaining_pv_to_install) <= PV_INSTALLATION_TOLERANCE:
                         break
 
                 if len(pv_records) > 0:
-                    self.write_pv_string(pv_string, data)
+                    needs_write = True
 
                 if remaining_pv_to_install > PV_INSTALLATION_TOLERANCE:
                     undeployed_capacity = remaining_pv_to_install
-                elif len(pv_records) > 0 and len(pv_string.split("New PVSystem.")) > 0:
-                    self.write_pv_string(pv_string, data)
 
                 logger.debug(
                     "Sample: %s, Placement: %s, @penetration %s, number of new installable PVs: %s, Remain_to_install: %s kW",
@@ -580,6 +625,9 @@ class PVScenarioGeneratorBase(abc.ABC):
                 if subset_idx * self.config.proximity_step > 100:
                     break
 
+        if needs_write:
+            self.write_pv_string("".join(pv_lines), data)
+
         return existing_pv, pv_records
 
     def get_total_pv(self, data: SimpleNamespace) -> dict:
@@ -638,10 +686,10 @@ class PVScenarioGeneratorBase(abc.ABC):
         pv_size = max_size
         return pv_size
 
-    def add_pv_string(self, bus: str, pv_type: str, pv_size: float, pv_string: str) -> str:
-        """Add PV string to exiting string"""
+    def add_pv_string(self, bus: str, pv_type: str, pv_size: float, pv_lines: list) -> None:
+        """Append the PV definition to the lines of the deployment file"""
         if round(pv_size, 3) <= 0:
-            return pv_string
+            return
 
         pv_name = self.generate_pv_name(bus, pv_type)
         dss.Circuit.SetActiveBus(bus)
@@ -674,8 +722,7 @@ class PVScenarioGeneratorBase(abc.ABC):
             f"conn=wye %cutin=0.1 %cutout=0.1 "
             f"Vmaxpu=1.2\n"
         )
-        pv_string += new_pv_string
-        return pv_string
+        pv_lines.append(new_pv_string)
     
     @staticmethod
     def generate_pv_name(bus, pv_type):
@@ -712,6 +759,7 @@ class PVScenarioGeneratorBase(abc.ABC):
             k: v for k, v in bus_distance.items()
             if v >= lb_dist and v <= ub_dist
         }
+        priority_buses = set(priority_buses)
         candidate_bus_array = [b for b in candidate_bus_map if not b in priority_buses]
         return candidate_bus_array
 
@@ -28,6 +28,7 @@ from disco.sources.base import (
     DEFAULT_PV_DEPLOYMENTS_DIRNAME,
     DEFAULT_UPGRADE_COST_ANALYSIS_PARAMS
 )
+from disco.utils.feeder_stats_index import build_feeder_stats_index
 from .source_tree_1_model_inputs import SourceTree1ModelInputs
 
 
@@ -502,6 +503,8 @@ class SourceTree1Model(BaseOpenDssModel):
             copy_load_shape_data_files,
             strip_load_shape_profiles
         )
+        # Run-time estimation and feeder stats read element counts from this index.
+        build_feeder_stats_index(output_path)
 
     @classmethod
     def _transform_by_feeder(
@@ -24,8 +24,7 @@ def read_capacitor_changes(event_log):
     capacitor_changes = {}
     regex = re.compile(r"(Capacitor\.\w+)")
 
-    data = read_event_log(event_log)
-    for row in data:
+    for row in iter_event_log(event_log, prefilter="Capacitor."):
         match = regex.search(row["Element"])
         if match:
             name = match.group(1)
@@ -53,10 +52,28 @@ def read_event_log(filename):
         list of dictionaries (one dict for each row in the file)
 
     """
-    data = []
+    return list(iter_event_log(filename))
 
+
+def iter_event_log(filename, prefilter=None):
+    """Yield OpenDSS event log rows one at a time without loading the file into memory.
+
+    Parameters
+    ----------
+    filename : str
+        path to event log file.
+    prefilter : str | None
+        If set, skip lines that do not contain this substring before parsing them.
+
+    Yields
+    ------
+    dict
+
+    """
     with open(filename) as f_in:
         for line in f_in:
+            if prefilter is not None and prefilter not in line:
+                continue
             tokens = [x.strip() for x in line.split(",")]
             row = {}
             for token in tokens:
@@ -64,9 +81,7 @@ def read_event_log(filename):
                 name = name_and_value[0]
                 value = name_and_value[1]
                 row[name] = value
-            data.append(row)
-
-    return data
+            yield row
 
 
 def comment_out_leading_strings(filename, strings):
@@ -0,0 +1,267 @@
+"""Persistent index of OpenDSS element statistics.
+
+Run-time estimation and feeder statistics need element counts from the DSS files of every
+feeder. Those files rarely change after transformation, so the statistics are computed once,
+keyed by file content hash, and stored in an index file at the root of the transformed model
+directory. Later lookups only compare file sizes and modification times.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+from jade.utils.utils import load_data, dump_data
+
+
+logger = logging.getLogger(__name__)
+
+FEEDER_STATS_INDEX_FILENAME = "feeder_stats_index.json"
+FEEDER_STATS_INDEX_VERSION = 2
+
+# Run-time estimation counts the lines that contain "new <element>" for these elements. Those
+# counts are the features of the trained model, so they include commented lines and element
+# classes that start with the same name, such as LineCode and LoadShape.
+ESTIMATE_ELEMENTS = ("line", "load", "pvsystem")
+
+REGEX_NEW_ELEMENT = re.compile(r"^new\s+(?:object\s*=\s*)?([\w]+)\.", re.IGNORECASE)
+REGEX_PMPP = re.compile(r"\spmpp\s*=\s*([\d\.]+)", re.IGNORECASE)
+REGEX_BUS = re.compile(r"\sbus[12]?\s*=\s*([^\s\.]+)", re.IGNORECASE)
+REGEX_BUSES = re.compile(r"\sbuses\s*=\s*[\[\(\"']([^\]\)\"']+)", re.IGNORECASE)
+
+
+def compute_dss_file_stats(filename):
+    """Compute element statistics for one DSS file in a single pass.
+
+    Parameters
+    ----------
+    filename : str | Path
+
+    Returns
+    -------
+    tuple
+        (dict, set): stats and the set of bus names referenced by the file
+
+    """
+    counts = Counter()
+    estimate_counts = Counter()
+    pmpp = 0.0
+    buses = set()
+    with open(filename) as f_in:
+        for line in f_in:
+            lowered = line.lower()
+            for element in ESTIMATE_ELEMENTS:
+                if "new " + element in lowered:
+                    estimate_counts[element] += 1
+            line = line.strip()
+            match = REGEX_NEW_ELEMENT.search(line)
+            if match is None:
+                continue
+            element_class = match.group(1).lower()
+            counts[element_class] += 1
+            if element_class == "pvsystem":
+                match = REGEX_PMPP.search(line)
+                if match:
+                    pmpp += float(match.group(1))
+            for bus in REGEX_BUS.findall(line):
+                buses.add(bus.lower())
+            for text in REGEX_BUSES.findall(line):
+                for bus in re.split(r"[\s,]+", text.strip()):
+                    if bus:
+                        buses.add(bus.split(".")[0].lower())
+
+    stats = {
+        "element_counts": dict(counts),
+        "estimate_counts": dict(estimate_counts),
+        "pmpp": pmpp,
+        "num_buses": len(buses),
+    }
+    return stats, buses
+
+
+def compute_file_hash(filename):
+    """Return the SHA-256 hash of a file's content."""
+    sha = hashlib.sha256()
+    with open(filename, "rb") as f_in:
+        for chunk in iter(lambda: f_in.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class FeederStatsIndex:
+    """Maps DSS files and directories to element statistics, keyed by content hash."""
+
+    def __init__(self, base_path=None):
+        """Constructs FeederStatsIndex.
+
+        Parameters
+        ----------
+        base_path : str | Path | None
+            Directory that contains the index file. If None, the index is only kept in memory.
+
+        """
+        self._base_path = None if base_path is None else Path(base_path).resolve()
+        self._files = {}  # content hash -> stats
+        self._directories = {}  # combined hash of file hashes -> stats
+        self._paths = {}  # path -> {"hash", "size", "mtime_ns"}
+        self._is_dirty = False
+        if self.filename is not None and self.filename.exists():
+            data = load_data(self.filename)
+            if data.get("version") == FEEDER_STATS_INDEX_VERSION:
+                self._files = data["files"]
+                self._directories = data["directories"]
+                self._paths = data["paths"]
+            else:
+                logger.info("Ignoring feeder stats index with an old version: %s", self.filename)
+
+    @classmethod
+    def find(cls, path):
+        """Return the index stored at path or in the closest parent directory of path. If there
+        isn't one, return an in-memory index.
+
+        """
+        return cls(find_feeder_stats_index_path(path))
+
+    @property
+    def base_path(self):
+        return self._base_path
+
+    @property
+    def filename(self):
+        if self._base_path is None:
+            return None
+        return self._base_path / FEEDER_STATS_INDEX_FILENAME
+
+    def contains(self, path):
+        """Return True if path is located under the index's base path."""
+        if self._base_path is None:
+            return False
+        try:
+            Path(path).resolve().relative_to(self._base_path)
+            return True
+        except ValueError:
+            return False
+
+    def get_file_stats(self, filename):
+        """Return the element statistics of a DSS file.
+
+        Returns
+        -------
+        dict
+            Contains element_counts (by lowercase element class), estimate_counts (refer to
+            ESTIMATE_ELEMENTS), pmpp, and num_buses
+
+        """
+        file_hash = self._get_file_hash(filename)
+        stats = self._files.get(file_hash)
+        if stats is None:
+            stats, _ = compute_dss_file_stats(filename)
+            self._files[file_hash] = stats
+            self._is_dirty = True
+        return stats
+
+    def get_directory_stats(self, directory, recursive=False):
+        """Return the combined element statistics of the DSS files in a directory.
+
+        Buses are counted once even if they are referenced by multiple files.
+
+        """
+        directory = Path(directory)
+        pattern = "**/*.dss" if recursive else "*.dss"
+        filenames = sorted(x for x in directory.glob(pattern) if x.is_file())
+        sha = hashlib.sha256()
+        for filename in filenames:
+            sha.update(str(filename.relative_to(directory)).encode("utf-8"))
+            sha.update(self._get_file_hash(filename).encode("utf-8"))
+        key = sha.hexdigest()
+        stats = self._directories.get(key)
+        if stats is None:
+            counts = Counter()
+            pmpp = 0.0
+            buses = set()
+            for filename in filenames:
+                file_stats, file_buses = compute_dss_file_stats(filename)
+                self._files[self._get_file_hash(filename)] = file_stats
+                counts.update(file_stats["element_counts"])
+                pmpp += file_stats["pmpp"]
+                buses.update(file_buses)
+            stats = {"element_counts": dict(counts), "pmpp": pmpp, "num_buses": len(buses)}
+            self._directories[key] = stats
+            self._is_dirty = True
+        return stats
+
+    def build(self):
+        """Index every DSS file and every directory with DSS files under the base path."""
+        assert self._base_path is not None
+        directories = set()
+        for filename in self._base_path.rglob("*.dss"):
+            directories.add(filename.parent)
+            self.get_file_stats(filename)
+        for directory in directories:
+            self.get_directory_stats(directory)
+        logger.info("Indexed %s DSS files in %s directories under %s",
+                    len(self._paths), len(directories), self._base_path)
+
+    def save(self):
+        """Write the index to its file if it changed.
+
+        The file is replaced atomically, so concurrent readers never see a partial index. If
+        multiple processes update the same index, the last one to save wins.
+
+        """
+        if self.filename is None or not self._is_dirty:
+            return
+        data = {
+            "version": FEEDER_STATS_INDEX_VERSION,
+            "files": self._files,
+            "directories": self._directories,
+            "paths": self._paths,
+        }
+        tmp_filename = self.filename.with_suffix(f".{os.getpid()}.tmp.json")
+        dump_data(data, tmp_filename)
+        os.replace(tmp_filename, self.filename)
+        self._is_dirty = False
+        logger.debug("Wrote feeder stats index to %s", self.filename)
+
+    def _get_file_hash(self, filename):
+        path = Path(filename).resolve()
+        key = str(path.relative_to(self._base_path)) if self.contains(path) else str(path)
+        stat = os.stat(path)
+        entry = self._paths.get(key)
+        if entry is not None and entry["size"] == stat.st_size and \
+                entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["hash"]
+
+        file_hash = compute_file_hash(path)
+        self._paths[key] = {"hash": file_hash, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        self._is_dirty = True
+        return file_hash
+
+
+def find_feeder_stats_index_path(path):
+    """Return path or the closest parent directory of path that contains an index file. Return
+    None if there isn't one.
+
+    """
+    path = Path(path).resolve()
+    for directory in [path] + list(path.parents):
+        if (directory / FEEDER_STATS_INDEX_FILENAME).exists():
+            return directory
+    return None
+
+
+def build_feeder_stats_index(path):
+    """Build or update the index for all DSS files under path and write it to
+    path/feeder_stats_index.json.
+
+    Returns
+    -------
+    FeederStatsIndex
+
+    """
+    index = FeederStatsIndex(path)
+    index.build()
+    index.save()
+    return index
@@ -0,0 +1,213 @@
+"""Machine-readable performance telemetry of jobs.
+
+Each job writes telemetry.json in its output directory. make_telemetry_tables combines the files of
+a batch into tables that show which jobs and functions dominate the run time.
+"""
+
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+from jade.common import JOBS_OUTPUT_DIR
+from jade.utils.timing_utils import TimerStatsCollector
+from jade.utils.utils import dump_data, load_data
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_FILENAME = "telemetry.json"
+TELEMETRY_JOBS_TABLE_FILENAME = "telemetry_jobs_table.csv"
+TELEMETRY_FUNCTIONS_TABLE_FILENAME = "telemetry_functions_table.csv"
+
+# Counters derived from the timer stats of these functions
+COUNTED_FUNCTIONS = {
+    "solve_count": "circuit_solve_and_check",
+    "circuit_reload_count": "reload_dss_circuit",
+}
+OUTLIER_METRICS = ("duration_s", "peak_rss_mb", "solve_count", "circuit_reload_count")
+
+
+class DiscoTimerStatsCollector(TimerStatsCollector):
+    """TimerStatsCollector that can report its stats as data."""
+
+    def get_stats(self):
+        """Return the stats of all tracked code blocks.
+
+        Returns
+        -------
+        dict
+            Maps the name of each code block to its count, total, max, min, and avg times in
+            seconds.
+
+        """
+        return {name: stat.get_stats() for name, stat in self._stats.items()}
+
+
+class JobTelemetry:
+    """Records the performance of one job. Use as a context manager around the job.
+
+    The stats of the collector are cleared when the job starts. The telemetry file is written when
+    the job ends, also if it raises an exception.
+    """
+
+    def __init__(self, name, job_type, filename, collector):
+        """Constructs JobTelemetry.
+
+        Parameters
+        ----------
+        name : str
+            Job name
+        job_type : str
+            Type of the job, such as upgrade or pydss
+        filename : str | Path
+        collector : DiscoTimerStatsCollector
+
+        """
+        self._name = name
+        self._job_type = job_type
+        self._filename = Path(filename)
+        self._collector = collector
+        self._start_time = None
+        self._start = None
+        self.failed = False
+
+    def __enter__(self):
+        self._collector.clear()
+        self._start_time = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is not None:
+            self.failed = True
+        try:
+            self._filename.parent.mkdir(parents=True, exist_ok=True)
+            dump_data(self.get_data(), self._filename, indent=2)
+        except Exception:
+            logger.exception("Failed to write telemetry file %s", self._filename)
+
+    def get_data(self):
+        """Return the telemetry of the job so far.
+
+        Returns
+        -------
+        dict
+
+        """
+        functions = self._collector.get_stats()
+        data = {
+            "name": self._name,
+            "job_type": self._job_type,
+            "failed": self.failed,
+            "start_time": self._start_time,
+            "duration_s": time.perf_counter() - self._start,
+            "peak_rss_mb": get_peak_rss_mb(),
+        }
+        for counter, function in COUNTED_FUNCTIONS.items():
+            data[counter] = functions.get(function, {}).get("count", 0)
+        data["functions"] = functions
+        return data
+
+
+def get_peak_rss_mb():
+    """Return the peak resident set size of the process in MiB, or None if it is not available.
+    If the process runs several jobs, this is the peak across all jobs so far.
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return max_rss / divisor
+
+
+def get_rss_mb():
+    """Return the current resident set size of the process in MiB. Falls back to the peak if the
+    current size is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f_in:
+            num_pages = int(f_in.read().split()[1])
+        return num_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return get_peak_rss_mb()
+
+
+def make_telemetry_tables(output_path, job_names):
+    """Combine the telemetry files of the jobs in a JADE output directory into a jobs table and a
+    functions table. Jobs are flagged as outliers if a metric exceeds the upper Tukey fence
+    (Q3 + 1.5 IQR) among the jobs of the same type.
+
+    Parameters
+    ----------
+    output_path : Path
+    job_names : iterable
+        Jobs without a telemetry file are skipped.
+
+    Returns
+    -------
+    tuple
+        (pd.DataFrame, pd.DataFrame) or (None, None) if no job has a telemetry file
+
+    """
+    # Imported here because every job imports this module through disco.timer_stats_collector.
+    import pandas as pd
+
+    jobs = []
+    functions = []
+    for name in job_names:
+        filename = output_path / JOBS_OUTPUT_DIR / name / TELEMETRY_FILENAME
+        if not filename.exists():
+            continue
+        data = load_data(filename)
+        for function, stats in data.pop("functions").items():
+            functions.append({"name": name, "function": function, **stats})
+        jobs.append(data)
+
+    if not jobs:
+        logger.info("No jobs have telemetry files")
+        return None, None
+
+    jobs_df = pd.DataFrame.from_records(jobs)
+    jobs_df["outlier_metrics"] = ""
+    for _, group in jobs_df.groupby("job_type"):
+        for metric in OUTLIER_METRICS:
+            values = group[metric].dropna()
+            if values.empty:
+                continue
+            q1, q3 = values.quantile(0.25), values.quantile(0.75)
+            is_outlier = values > q3 + 1.5 * (q3 - q1)
+            for index in values.index[is_outlier]:
+                jobs_df.at[index, "outlier_metrics"] = " ".join(
+                    filter(None, [jobs_df.at[index, "outlier_metrics"], metric])
+                )
+    jobs_df["is_outlier"] = jobs_df["outlier_metrics"] != ""
+    jobs_df.sort_values("duration_s", ascending=False, inplace=True)
+    jobs_df.to_csv(output_path / TELEMETRY_JOBS_TABLE_FILENAME, index=False)
+
+    columns = ["function", "num_jobs", "count", "total", "max", "percent_of_job_time"]
+    if functions:
+        functions_df = pd.DataFrame.from_records(functions)
+        functions_df = functions_df.groupby("function").agg(
+            num_jobs=("name", "nunique"), count=("count", "sum"), total=("total", "sum"), max=("max", "max")
+        ).reset_index()
+        # Functions are nested, so the percentages do not add up to 100.
+        functions_df["percent_of_job_time"] = functions_df["total"] / jobs_df["duration_s"].sum() * 100
+        functions_df.sort_values("total", ascending=False, inplace=True)
+    else:
+        functions_df = pd.DataFrame(columns=columns)
+    functions_df[columns].to_csv(output_path / TELEMETRY_FUNCTIONS_TABLE_FILENAME, index=False)
+
+    num_outliers = int(jobs_df["is_outlier"].sum())
+    if num_outliers > 0:
+        logger.info("Found %s outlier jobs. Refer to %s", num_outliers, TELEMETRY_JOBS_TABLE_FILENAME)
+    logger.info("Wrote telemetry tables for %s jobs to %s", len(jobs_df), output_path)
+    return jobs_df, functions_df[columns]
@@ -16,6 +16,8 @@ PRESCREEN_AUTO_CONFIG_TEXT_FILE = "pipeline-prescreen-auto-config.txt"
 SIMULATION_AUTO_CONFIG_TEXT_FILE = "pipeline-simulation-auto-config.txt"
 POSTPROCESS_AUTO_CONFIG_TEXT_FILE = "pipeline-postprocess-auto-config.txt"
 POSTPROCESS_COMMAND_TEXT_FILE = "pipeline-postprocess-command.txt"
+POSTPROCESS_STEPS_FILE = "pipeline-postprocess-steps.json"
+POSTPROCESS_CACHE_DIR = "pipeline-postprocess-cache"
 
 # Output filenames/dir after pipeline submit
 TRANSFORM_MODEL_LOG_FILE = "transform_model.log"
@@ -67,6 +69,7 @@ def cleanup():
             SIMULATION_AUTO_CONFIG_TEXT_FILE,
             POSTPROCESS_AUTO_CONFIG_TEXT_FILE,
             POSTPROCESS_COMMAND_TEXT_FILE,
+            POSTPROCESS_STEPS_FILE,
             TRANSFORM_MODEL_LOG_FILE,
             SIMULATION_CONFIG_FILE,
             PRESCREEN_CONFIG_FILE,
@@ -86,6 +89,7 @@ def cleanup():
             TIME_SERIES_MODELS_DIR,
             TEST_PIPELINE_OUTPUT,
             TEST_PRECONFIGURED_MODELS,
+            POSTPROCESS_CACHE_DIR,
         ]
         for path in result_dirs:
             if os.path.exists(path):
@@ -251,6 +255,7 @@ def test_source_tree_1_config_snapshot_pipeline__impact_analysis(smart_ds_substa
     assert os.path.exists(SIMULATION_AUTO_CONFIG_TEXT_FILE)
     assert os.path.exists(POSTPROCESS_AUTO_CONFIG_TEXT_FILE)
     assert os.path.exists(POSTPROCESS_COMMAND_TEXT_FILE)
+    assert os.path.exists(POSTPROCESS_STEPS_FILE)
 
     pipeline_data = load_data(TEST_PIPELINE_CONFIG_FILE)
     assert len(pipeline_data["stages"]) == 2
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from disco.sources.gem.make_element_bus_mapping import (
+    BusElementIndex,
+    _handle_load,
+    _handle_pv_system,
+    _make_feeder_dict,
+)
+
+
+def test_bus_element_index(tmp_path):
+    mapping = _make_feeder_dict()
+    mapping["bus_coords"] = {"b1": {"x": "0", "y": "0"}, "b2": {"x": "3", "y": "4"}}
+    _handle_pv_system(mapping, "New PVSystem.pv1 bus1=b2.1 phases=1 kV=0.2 kVA=2 Pmpp=1.5")
+    _handle_pv_system(mapping, "New PVSystem.pv2 bus1=b1.1 phases=1 kV=0.2 kVA=2 Pmpp=2.0")
+    _handle_load(mapping, "New Load.load1 bus1=b1.1 kV=0.2 model=1 kW=3.0 kvar=1.0")
+    _handle_load(mapping, "New Load.load2 bus1=b2.1 kV=0.2 model=1 kW=4.0 kvar=1.0")
+    filename = tmp_path / "index.npz"
+    BusElementIndex.from_feeder_mapping(mapping).write(filename)
+    index = BusElementIndex.load(filename)
+
+    element_info = {
+        "pv_systems": pd.DataFrame({"Name": ["PVSystem.pv1"], "kW": [1.2]}),
+        "loads": pd.DataFrame({"Name": ["Load.load1", "Load.load2"], "kW": [2.5, 3.5]}),
+    }
+    assert index.get_kw_at_bus_mapping(element_info) == {
+        "b2": [
+            {"type": "pv_systems", "name": "PVSystem.pv1", "kW": 1.2},
+            {"type": "loads", "name": "Load.load2", "kW": 3.5},
+        ],
+        "b1": [{"type": "loads", "name": "Load.load1", "kW": 2.5}],
+    }
+
+    rated = index.sum_kw_by_bus()
+    assert rated.loc["b1", "pv_systems"] == 2.0
+    assert rated.loc["b2", "loads"] == 4.0
+    assert index.get_distances(0, 0).to_dict() == {"PVSystem.pv1": 5.0, "PVSystem.pv2": 0.0}
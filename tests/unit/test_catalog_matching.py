@@ -0,0 +1,33 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from jade.utils.utils import load_data
+
+from disco.exceptions import UpgradesExternalCatalogMissingObjectDefinition
+from disco.extensions.upgrade_simulation.upgrades.catalog_matching import LineCatalogMatcher
+from disco.models.upgrade_cost_analysis_generic_input_model import UpgradeTechnicalCatalogModel
+
+
+def test_line_catalog_matcher():
+    catalog_file = Path("tests") / "data" / "uo_technical_catalog.json"
+    catalog = UpgradeTechnicalCatalogModel(**load_data(catalog_file)).dict(by_alias=True)
+    line_upgrade_options = pd.DataFrame.from_dict(catalog["line"])
+    matcher = LineCatalogMatcher(line_upgrade_options)
+    lines = line_upgrade_options.iloc[[0, 0, 0]][matcher.deciding_property_list].copy()
+    options = line_upgrade_options.loc[
+        (line_upgrade_options[matcher.deciding_property_list] == lines.iloc[0]).all(axis=1)
+    ].sort_values("normamps")
+    lowest = options["normamps"].iloc[0]
+    lines["required_design_amp"] = [lowest, options["normamps"].max() * 2, lowest / 3]
+    groups, positions = matcher.match(matcher.normalize(lines), 2)
+
+    assert matcher.get_option(positions[0])["normamps"] == lowest
+    # Nothing is large enough, or the lowest option is too oversized: add parallel lines.
+    assert list(positions[1:]) == [-1, -1]
+    assert sorted(matcher.get_options(groups[1])["name"]) == sorted(options["name"])
+
+    lines["phases"] = 99
+    with pytest.raises(UpgradesExternalCatalogMissingObjectDefinition):
+        matcher.match(lines, 2)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from disco.pydss.chunked_results import ElementPropertyReader, make_element_chunks
+
+
+def test_make_element_chunks():
+    names = ["line1", "line1", "line2", "line3", "line3", "line4"]
+    indices = [0, 1, 2, 7, 8, 3]
+    assert make_element_chunks(names, indices, 4) == [[0, 1, 2], [3, 4], [5]]
+    assert make_element_chunks(names, indices, 9) == [[0, 1, 2, 3, 4, 5]]
+    # An element wider than the limit is not split.
+    assert make_element_chunks(names, indices, 1) == [[0, 1], [2], [3, 4], [5]]
+    assert make_element_chunks([], [], 1) == []
+
+
+ALL_COLUMNS = [
+    "Line.l1__A", "Line.l1__B", "Line.l2__A", "Line.l3__A", "Line.l3__B", "Line.l3__C", "Line.l4__A",
+]
+
+
+def _make_reader(values, indices, max_chunk_bytes, **kwargs):
+    # The store is bypassed. The reader only slices its dataset, so an array can stand in for it.
+    length = 10
+    reader = ElementPropertyReader.__new__(ElementPropertyReader)
+    reader._dataset = values
+    reader._indices = np.array(indices, dtype=int)
+    reader._columns = [ALL_COLUMNS[i] for i in indices]
+    reader._length = length
+    reader._timestamps = pd.Index(pd.date_range("2020-01-01", periods=length, freq="15min"), name="Timestamp")
+    reader._real_only = kwargs.get("real_only", False)
+    reader._abs_val = kwargs.get("abs_val", False)
+    reader._max_chunk_bytes = max_chunk_bytes
+    # This is what get_full_dataframe returns.
+    expected = reader._make_dataframe(values[:length, indices], reader.columns, reader.timestamps)
+    return reader, expected
+
+
+@pytest.mark.parametrize("max_chunk_bytes", [1, 100, 200, 10000])
+@pytest.mark.parametrize("indices", [list(range(7)), [0, 1, 3, 4, 5, 6], [2, 6]])
+def test_element_property_reader(max_chunk_bytes, indices):
+    # The dataset is allocated for more time points than were stored.
+    values = np.random.default_rng(1).random((12, len(ALL_COLUMNS)))
+    reader, expected = _make_reader(values, indices, max_chunk_bytes)
+
+    time_chunks = list(reader.iter_time_chunks())
+    element_chunks = list(reader.iter_element_chunks())
+    if max_chunk_bytes < 10000:
+        assert len(time_chunks) > 1
+    pd.testing.assert_frame_equal(pd.concat(time_chunks), expected)
+    pd.testing.assert_frame_equal(pd.concat(element_chunks, axis=1), expected)
+    # An element is never split across chunks.
+    element_names = [{x.split("__")[0] for x in df.columns} for df in element_chunks]
+    assert sum(len(x) for x in element_names) == len(set().union(*element_names))
+
+    for func in ("max", "min", "sum", "mean"):
+        pd.testing.assert_series_equal(reader.reduce_rows(func), getattr(expected, func)(axis=1))
+        pd.testing.assert_series_equal(reader.reduce_columns(func), getattr(expected, func)())
+    for window in (1, 4):
+        pd.testing.assert_series_equal(reader.max_moving_average(window), expected.rolling(window).mean().max())
+
+
+@pytest.mark.parametrize("kwargs", [{"abs_val": True}, {"real_only": True}])
+def test_element_property_reader_complex(kwargs):
+    rng = np.random.default_rng(2)
+    values = rng.random((10, len(ALL_COLUMNS))) + 1j * rng.random((10, len(ALL_COLUMNS)))
+    reader, expected = _make_reader(values, [0, 1, 2, 6], 200, **kwargs)
+    assert not np.iscomplexobj(expected.values)
+    pd.testing.assert_series_equal(reader.reduce_rows("max"), expected.max(axis=1))
+    pd.testing.assert_series_equal(reader.reduce_columns("max"), expected.max())
+    pd.testing.assert_series_equal(reader.max_moving_average(4), expected.rolling(4).mean().max())
@@ -0,0 +1,25 @@
+import os
+import struct
+
+from disco.scripts.copy_smart_ds_dataset import convert_to_sng_file, link_or_copy_file
+
+
+def test_convert_to_sng_file(tmp_path):
+    values = [0.1, 1.0 / 3, 2.5, -7.125, 1e-9]
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "with_header.csv").write_text("kw\n" + "\n".join(str(x) for x in values) + "\n")
+    (tmp_path / "nested" / "no_header.csv").write_text("\n".join(str(x) for x in values) + "\n")
+
+    convert_to_sng_file(tmp_path, num_processes=1)
+    expected = struct.pack("%sf" % len(values), *values)
+    assert (tmp_path / "with_header.sng").read_bytes() == expected
+    assert (tmp_path / "no_header.sng").read_bytes() == expected
+
+
+def test_link_or_copy_file(tmp_path):
+    src = tmp_path / "src.csv"
+    src.write_text("1.0\n")
+    dst = tmp_path / "dst.csv"
+    link_or_copy_file(src, dst)
+    assert dst.read_text() == "1.0\n"
+    assert os.path.samefile(src, dst)
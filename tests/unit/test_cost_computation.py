@@ -0,0 +1,75 @@
+import pandas as pd
+
+from disco.extensions.upgrade_simulation.upgrades.common_functions import convert_length_units
+from disco.extensions.upgrade_simulation.upgrades.cost_computation import (
+    drop_reupgraded_inherited_upgrades,
+    find_closest_rows,
+    lookup_unit_costs,
+)
+
+
+def test_find_closest_rows():
+    values = pd.Series([50.0, 10.0, 25.0, 10.0, None, 75.0])
+    targets = pd.Series([10.0, 12.0, 37.5, 62.5, 1000.0, 0.0])
+    # ties go to the first row in the database, like idxmin
+    assert find_closest_rows(values, targets).tolist() == [1, 1, 0, 0, 5, 1]
+
+
+def test_lookup_unit_costs():
+    cost_database = pd.DataFrame(
+        {
+            "phases": [1, 1, 3, 3],
+            "rated_kVA": [25.0, 25.0, 50.0, 100.0],
+            "cost": [100.0, 200.0, 300.0, 400.0],
+        }
+    )
+    upgrades = pd.DataFrame({"phases": [1, 3, 1], "rated_kVA": [25.0, 90.0, 50.0]}, index=[4, 7, 9])
+    unit_costs = lookup_unit_costs(
+        upgrades, cost_database, cost_column="cost", deciding_columns=["phases", "rated_kVA"],
+        backup_deciding_property="rated_kVA",
+    )
+    assert unit_costs.index.tolist() == [4, 7, 9]
+    assert unit_costs["unit_cost"].tolist() == [100.0, 400.0, 300.0]
+    assert unit_costs.loc[4, "closest"] is None
+    assert unit_costs.loc[7, "closest"] == {"phases": 3, "rated_kVA": 100.0, "cost": 400.0}
+
+
+def test_lookup_unit_costs_null_keys():
+    # null keys never match exactly, so the closest backup property is used
+    cost_database = pd.DataFrame(
+        {
+            "line_placement": [None, "overhead"],
+            "ampere_rating": [100.0, 200.0],
+            "cost_per_m": [1.0, 2.0],
+        }
+    )
+    upgrades = pd.DataFrame({"line_placement": [None], "ampere_rating": [190.0]})
+    unit_costs = lookup_unit_costs(
+        upgrades, cost_database, cost_column="cost_per_m", deciding_columns=["line_placement", "ampere_rating"],
+        backup_deciding_property="ampere_rating",
+    )
+    assert unit_costs["unit_cost"].tolist() == [2.0]
+    assert unit_costs.loc[0, "closest"]["line_placement"] == "overhead"
+
+
+def test_convert_length_units_columns():
+    lengths = convert_length_units(pd.Series([1.0, 2.0]), pd.Series(["km", "kft"]), "m")
+    assert lengths.tolist() == [1000.0, 609.6]
+
+
+def test_drop_reupgraded_inherited_upgrades():
+    def make_upgrades(name, inherited):
+        return [
+            {"action": action, "original_equipment_name": name, "final_equipment_name": name, "inherited": inherited}
+            for action in ("remove", "add")
+        ]
+
+    # The seed upgraded l1 and l2. This job upgrades l2 again and upgrades l3.
+    upgrades = pd.DataFrame(
+        make_upgrades("l1", True) + make_upgrades("l2", True) + make_upgrades("l2", False)
+        + make_upgrades("l3", False)
+    )
+    upgrades = drop_reupgraded_inherited_upgrades(upgrades)
+    assert upgrades["original_equipment_name"].tolist() == ["l1", "l1", "l2", "l2", "l3", "l3"]
+    assert upgrades["inherited"].tolist() == [True, True, False, False, False, False]
+    assert drop_reupgraded_inherited_upgrades(pd.DataFrame()).empty
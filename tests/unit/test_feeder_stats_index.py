@@ -0,0 +1,42 @@
+from disco.extensions.pydss_simulation.estimate_run_minutes import count_new_elements
+from disco.scripts.collect_feeder_stats import collect_feeder_counts
+from disco.utils.feeder_stats_index import FeederStatsIndex, build_feeder_stats_index
+
+
+def test_feeder_stats_index(tmp_path):
+    dss_path = tmp_path / "substation" / "feeder" / "OpenDSS"
+    dss_path.mkdir(parents=True)
+    lines_file = dss_path / "Lines.dss"
+    lines_file.write_text(
+        "New Line.l1 bus1=b1.1.2 bus2=b2.1.2\n"
+        "new line.l2 bus1=b2.1 bus2=b3.1\n"
+        "! New Line.commented bus1=x bus2=y\n"
+        "New LineCode.lc1 nphases=1\n"
+    )
+    (dss_path / "PVSystems.dss").write_text(
+        "New PVSystem.pv1 bus1=b3.1 Pmpp=5.5\nNew PVSystem.pv2 bus1=b4 pmpp=2\n"
+    )
+    build_feeder_stats_index(tmp_path)
+
+    index = FeederStatsIndex.find(dss_path)
+    assert index.base_path == tmp_path.resolve()
+    stats = index.get_file_stats(lines_file)
+    assert stats == {
+        "element_counts": {"line": 2, "linecode": 1},
+        "estimate_counts": {"line": 4},
+        "pmpp": 0.0,
+        "num_buses": 3,
+    }
+    # Run-time estimation keeps the features of the trained model.
+    assert stats["estimate_counts"]["line"] == count_new_elements(lines_file, "Line")
+    stats = index.get_directory_stats(dss_path)
+    assert stats["element_counts"] == {"line": 2, "linecode": 1, "pvsystem": 2}
+    assert stats["pmpp"] == 7.5
+    assert stats["num_buses"] == 4
+
+    counts = collect_feeder_counts(index, dss_path)
+    assert counts == {"line": 3, "pvsystem": 2, "buses": 4}
+
+    # Changed files are detected.
+    lines_file.write_text(lines_file.read_text() + "New Line.l3 bus1=b3 bus2=b5\n")
+    assert index.get_file_stats(lines_file)["element_counts"]["line"] == 3
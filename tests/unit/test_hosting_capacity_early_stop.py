@@ -0,0 +1,67 @@
+from disco.pydss.hosting_capacity_early_stop import (
+    find_threshold_violations,
+    make_chain_key,
+    mark_chain_stopped,
+    read_stopped_chains,
+    record_penetration_level,
+)
+
+
+THRESHOLDS = {
+    "voltage": {"min_voltage": 0.95, "max_voltage": 1.05},
+    "thermal": {
+        "line_max_instantaneous_loading_pct": 150,
+        "transformer_max_instantaneous_loading_pct": 150,
+    },
+}
+
+
+def test_find_threshold_violations():
+    thermal = {
+        "control_mode__max_load": {
+            "line_max_instantaneous_loading_pct": 120,
+            "transformer_max_instantaneous_loading_pct": 200,
+            "transformer_instantaneous_threshold": None,
+        },
+        "control_mode__min_load": {"line_max_instantaneous_loading_pct": 160},
+        "pf1__max_load": {
+            "line_max_instantaneous_loading_pct": 100,
+            "transformer_max_instantaneous_loading_pct": 200,
+            "transformer_instantaneous_threshold": 150,
+        },
+    }
+    voltage = {
+        "scenarios": {
+            "control_mode__max_load": {
+                "primaries": {"summary": {"min_voltage": 0.97, "max_voltage": 1.02}},
+                "secondaries": {"summary": {"min_voltage": 0.90, "max_voltage": 1.02}},
+            },
+            "pf1__max_load": {
+                "primaries": {"summary": {"min_voltage": 0.94, "max_voltage": 1.02}},
+                "secondaries": {"summary": None},
+            },
+        }
+    }
+
+    violations = find_threshold_violations(thermal, voltage, THRESHOLDS)
+    assert violations == {
+        "control_mode": ["line_max_instantaneous_loading_pct"],
+        "pf1": ["transformer_max_instantaneous_loading_pct", "min_voltage"],
+    }
+    violations = find_threshold_violations(thermal, voltage, THRESHOLDS, include_secondaries=True)
+    assert violations["control_mode"] == ["line_max_instantaneous_loading_pct", "min_voltage"]
+
+
+def test_record_penetration_level(tmp_path):
+    key = make_chain_key("sub1", "feeder1", "random", 1.0)
+    assert record_penetration_level(tmp_path, key, 5, "job5", False) == 1
+    assert record_penetration_level(tmp_path, key, 10, "job10", True) == 0
+    assert record_penetration_level(tmp_path, key, 15, "job15", False) == 1
+    assert record_penetration_level(tmp_path, key, 20, "job20", False) == 2
+    # Resubmitted jobs replace their previous outcome.
+    assert record_penetration_level(tmp_path, key, 20, "job20", False) == 2
+
+    assert not read_stopped_chains(tmp_path)
+    mark_chain_stopped(tmp_path, key, 20)
+    assert read_stopped_chains(tmp_path) == {key: 20.0}
+    assert not read_stopped_chains(tmp_path / "missing")
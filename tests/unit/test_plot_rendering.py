@@ -0,0 +1,60 @@
+from disco.extensions.upgrade_simulation.upgrades.plot_rendering import (
+    PLOT_DATA_DIRECTORY,
+    list_plot_artifacts,
+    load_plot_artifact,
+    render_plot_artifacts,
+    save_or_render_plot,
+)
+
+
+POSITIONS = {"b1": [0.0, 0.0], "b2": [1.0, 0.0], "b3": [1.0, 1.0], "b4": [2.0, 1.0]}
+EDGES = [["b1", "b2"], ["b2", "b3"], ["b3", "b4"]]
+
+
+def _make_plots():
+    layout = {"positions": POSITIONS, "edges": EDGES}
+    return [
+        {"plot_type": "feeder", "title": "Feeder", "node_groups": {"Load": ["b3"], "Circuit Source": ["b1"]},
+         **layout},
+        {"plot_type": "voltage_violations", "title": "Bus violations before voltage upgrades_2",
+         "node_groups": {"Violation": ["b3", "b4"]}, **layout},
+        {"plot_type": "thermal_violations", "title": "Thermal violations", "node_groups": {},
+         "transformer_violation_buses": ["b2"], "line_violation_edges": [["b3", "b4"]], **layout},
+        {"plot_type": "created_clusters", "title": "all_bus_violations_grouped_in_1_clusters", "node_groups": {},
+         "clusters": {"0": {"buses_list": ["b4"], "node": "b3", "common_upstream_nodes_list": ["b2"]}}, **layout},
+    ]
+
+
+def test_deferred_plot_rendering(tmp_path):
+    plots = _make_plots()
+    fig_folders = [tmp_path / "ThermalUpgrades", tmp_path / "VoltageUpgrades" / "interim"]
+    for i, plot_data in enumerate(plots):
+        save_or_render_plot(fig_folders[i % 2], plot_data, defer_rendering=True)
+    assert not list(tmp_path.rglob("*.pdf"))
+
+    artifacts = list_plot_artifacts(tmp_path)
+    assert len(artifacts) == len(plots)
+    for fig_folder in fig_folders:
+        # All plots of a circuit share one layout file.
+        assert len(list((fig_folder / PLOT_DATA_DIRECTORY).glob("*.layout.json"))) == 1
+    by_title = {x["title"]: x for x in plots}
+    for artifact in artifacts:
+        plot_data = load_plot_artifact(artifact)
+        assert plot_data == by_title[plot_data["title"]]
+
+    figures = render_plot_artifacts(tmp_path, num_processes=1)
+    expected = [
+        tmp_path / "ThermalUpgrades" / "feeder.pdf",
+        tmp_path / "ThermalUpgrades" / "thermal_violations.pdf",
+        tmp_path / "VoltageUpgrades" / "interim" / "all_bus_violations_grouped_in_1_clusters.pdf",
+        tmp_path / "VoltageUpgrades" / "interim" / "bus_violations_before_voltage_upgrades_2.pdf",
+    ]
+    assert sorted(figures) == [str(x) for x in expected]
+    assert all(x.stat().st_size > 0 for x in expected)
+
+    # Immediate rendering writes the same figures.
+    immediate = tmp_path / "immediate"
+    for plot_data in plots:
+        save_or_render_plot(immediate, plot_data)
+    assert sorted(x.name for x in immediate.glob("*.pdf")) == sorted(x.name for x in expected)
+    assert not list_plot_artifacts(immediate)
@@ -0,0 +1,96 @@
+import pytest
+from jade.utils.utils import dump_data, load_data
+
+from disco.pipelines import postprocess_steps
+from disco.pipelines.postprocess_steps import (
+    make_step,
+    run_postprocess_step,
+    set_postprocess_blocked_by,
+    write_postprocess_steps,
+)
+
+
+def _make_steps(tmp_path):
+    steps = [
+        make_step("make-summary", "make-summary", inputs=[str(tmp_path / "input.csv")],
+                  outputs=["$JADE_PIPELINE_OUTPUT_DIR/summary.csv"]),
+        make_step("make-plots", "make-plots", outputs=[str(tmp_path / "plots")]),
+        make_step("make-report", "make-report", depends_on=["make-summary", "make-plots"],
+                  outputs=[str(tmp_path / "report.csv")]),
+    ]
+    steps_file = tmp_path / "steps.json"
+    write_postprocess_steps(steps, steps_file, "$JADE_PIPELINE_OUTPUT_DIR/cache")
+    return steps, steps_file
+
+
+def test_write_postprocess_steps(tmp_path):
+    steps, steps_file = _make_steps(tmp_path)
+    assert load_data(steps_file)["steps"] == steps
+    with pytest.raises(ValueError):
+        write_postprocess_steps(steps + [steps[0]], steps_file, "cache")
+    with pytest.raises(ValueError):
+        write_postprocess_steps(list(reversed(steps)), steps_file, "cache")
+
+
+def test_set_postprocess_blocked_by(tmp_path):
+    _, steps_file = _make_steps(tmp_path)
+    config_file = tmp_path / "config.json"
+    dump_data({"jobs": [{"job_id": i, "blocked_by": []} for i in (1, 2, 3)]}, config_file)
+    set_postprocess_blocked_by(config_file, steps_file)
+    assert [x["blocked_by"] for x in load_data(config_file)["jobs"]] == [[], [], [1, 2]]
+
+    dump_data({"jobs": [{"job_id": 1, "blocked_by": []}]}, config_file)
+    with pytest.raises(AssertionError):
+        set_postprocess_blocked_by(config_file, steps_file)
+
+
+def test_run_postprocess_step(tmp_path, monkeypatch):
+    monkeypatch.setenv("JADE_PIPELINE_OUTPUT_DIR", str(tmp_path))
+    _, steps_file = _make_steps(tmp_path)
+    outputs = {
+        "make-summary": tmp_path / "summary.csv",
+        "make-plots": tmp_path / "plots",
+        "make-report": tmp_path / "report.csv",
+    }
+    commands = []
+
+    def run_command(command):
+        commands.append(command)
+        outputs[command].write_text(command)
+
+    monkeypatch.setattr(postprocess_steps, "check_run_command", run_command)
+    input_file = tmp_path / "input.csv"
+    input_file.write_text("a")
+
+    def run_all():
+        commands.clear()
+        for name in ("make-summary", "make-plots", "make-report"):
+            run_postprocess_step(steps_file, name)
+        return commands
+
+    assert run_all() == ["make-summary", "make-plots", "make-report"]
+    assert (tmp_path / "cache" / "make-report.json").exists()
+    assert run_all() == []
+
+    # A missing output re-runs only its step.
+    outputs["make-plots"].unlink()
+    assert run_all() == ["make-plots", "make-report"]
+
+    # A changed input re-runs the steps that read it and the steps downstream.
+    input_file.write_text("ab")
+    assert run_all() == ["make-summary", "make-report"]
+    assert run_all() == []
+
+    # A failed command does not record a marker.
+    def fail(command):
+        raise RuntimeError(command)
+
+    input_file.write_text("abc")
+    monkeypatch.setattr(postprocess_steps, "check_run_command", fail)
+    with pytest.raises(RuntimeError):
+        run_postprocess_step(steps_file, "make-summary")
+    monkeypatch.setattr(postprocess_steps, "check_run_command", run_command)
+    assert run_all() == ["make-summary", "make-report"]
+
+    with pytest.raises(ValueError):
+        run_postprocess_step(steps_file, "invalid")
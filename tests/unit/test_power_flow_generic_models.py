@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+import pytest
+
+from jade.utils.utils import dump_data
+
+from disco.models.power_flow_generic_models import (
+    PowerFlowTimeSeriesSimulationModel,
+    check_power_flow_jobs,
+)
+
+
+def _make_job(name, num_controllers=0):
+    controllers = [
+        {"controller_type": "PvController", "name": "volt_var_ieee_1547_2018_catB"}
+    ] * num_controllers
+    return {
+        "name": name,
+        "opendss_model_file": "Master.dss",
+        "project_data": {},
+        "pydss_controllers": controllers,
+    }
+
+
+def test_check_power_flow_jobs():
+    check_power_flow_jobs([_make_job("job1"), _make_job("job2")])
+    with pytest.raises(ValueError):
+        check_power_flow_jobs([])
+    with pytest.raises(ValueError):
+        check_power_flow_jobs([_make_job("job1"), _make_job("job1")])
+    with pytest.raises(ValueError):
+        check_power_flow_jobs([_make_job("job1"), _make_job("job2", num_controllers=1)])
+
+
+def test_load_inputs_trust_validated(tmp_path):
+    filename = tmp_path / "power_flow.json"
+    dump_data({"jobs": [_make_job("job1", 1), _make_job("job2", 1)]}, filename)
+
+    inputs = PowerFlowTimeSeriesSimulationModel.load_inputs(filename, trust_validated=True)
+    assert not inputs.is_trusted
+    validated = list(inputs.iter_jobs())
+    inputs.record_validated()
+
+    inputs = PowerFlowTimeSeriesSimulationModel.load_inputs(filename, trust_validated=True)
+    assert inputs.is_trusted
+    assert len(inputs) == 2
+    constructed = list(inputs.iter_jobs())
+    assert [x.dict() for x in constructed] == [x.dict() for x in validated]
+
+    assert not PowerFlowTimeSeriesSimulationModel.load_inputs(filename).is_trusted
+    dump_data({"jobs": [_make_job("job1", 1)]}, filename)
+    inputs = PowerFlowTimeSeriesSimulationModel.load_inputs(filename, trust_validated=True)
+    assert not inputs.is_trusted
+
+
+def test_load_inputs_trust_validated_checks_registration(tmp_path, monkeypatch):
+    registered = {"controller1", "controller2"}
+
+    class Registry:
+        def is_controller_registered(self, controller_type, name):
+            return name in registered
+
+    monkeypatch.setattr("disco.models.base.Registry", Registry)
+    monkeypatch.setattr("disco.models.base.registered_pydss_controllers", defaultdict(set))
+    jobs = [_make_job("job1"), _make_job("job2")]
+    for job, name in zip(jobs, registered):
+        job["pydss_controllers"] = [{"controller_type": "PvController", "name": name}]
+    filename = tmp_path / "power_flow.json"
+    dump_data({"jobs": jobs}, filename)
+    inputs = PowerFlowTimeSeriesSimulationModel.load_inputs(filename, trust_validated=True)
+    list(inputs.iter_jobs())
+    inputs.record_validated()
+
+    # The controller of the second job is no longer registered in this environment.
+    registered.remove(jobs[1]["pydss_controllers"][0]["name"])
+    monkeypatch.setattr("disco.models.base.registered_pydss_controllers", defaultdict(set))
+    inputs = PowerFlowTimeSeriesSimulationModel.load_inputs(filename, trust_validated=True)
+    assert inputs.is_trusted
+    with pytest.raises(ValueError, match="Invalid controller name"):
+        list(inputs.iter_jobs())
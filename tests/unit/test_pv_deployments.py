@@ -0,0 +1,76 @@
+import random
+import re
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+from disco.sources.source_tree_1.pv_deployments import PVBusSampler, get_pv_scenario_generator
+
+
+FEEDER_PATH = Path(__file__).parents[1] / "data" / "smart-ds" / "substations-no-load-shapes" / \
+    "p1uhs21_1247" / "p1uhs21_1247--p1udt5257"
+
+
+def test_pv_bus_sampler():
+    buses = [f"bus{i}" for i in range(20)]
+    random.seed(11)
+    expected = list(buses)
+    random.shuffle(expected)
+
+    random.seed(11)
+    sampler = PVBusSampler()
+    calls = []
+
+    def get_buses():
+        calls.append(1)
+        return buses
+
+    excluded = {expected[1]}
+    candidates = sampler.iter_candidates("subset", get_buses, excluded)
+    assert [next(candidates) for _ in range(3)] == [expected[0], expected[2], expected[3]]
+    # The next penetration level continues with the rest of the permutation.
+    excluded.update(expected[:4])
+    excluded.add(expected[5])
+    assert list(sampler.iter_candidates("subset", get_buses, excluded)) == [expected[4]] + expected[6:]
+    assert list(sampler.iter_candidates("subset", get_buses, excluded)) == []
+    assert len(calls) == 1
+
+
+def _deploy_pvs(tmp_path, random_seed):
+    feeder_path = tmp_path / FEEDER_PATH.name
+    shutil.copytree(FEEDER_PATH, feeder_path, ignore=shutil.ignore_patterns("hc_pv_deployments"))
+    config = SimpleNamespace(
+        placement="random",
+        category="small",
+        master_filename="Master.dss",
+        pv_upscale=True,
+        min_penetration=5,
+        max_penetration=50,
+        penetration_step=15,
+        sample_number=2,
+        proximity_step=10,
+        percent_shares=[100, 0],
+        pv_size_pdf=None,
+        pv_deployments_dirname="hc_pv_deployments",
+        random_seed=random_seed,
+    )
+    get_pv_scenario_generator(str(feeder_path), config).deploy_all_pv_scenarios()
+    deployments = {}
+    for path in (feeder_path / "hc_pv_deployments" / "random").rglob("PVSystems.dss"):
+        sample, penetration = path.parent.parent.name, path.parent.name
+        deployments[(int(sample), int(penetration))] = path.read_text()
+    return deployments
+
+
+def test_pv_deployments_are_reproducible(tmp_path):
+    deployments = _deploy_pvs(tmp_path / "run1", 7)
+    assert sorted(deployments) == [(s, p) for s in (1, 2) for p in (5, 20, 35, 50)]
+    assert _deploy_pvs(tmp_path / "run2", 7) == deployments
+    assert _deploy_pvs(tmp_path / "run3", 8) != deployments
+
+    buses = {k: set(re.findall(r"bus1=(\S+)", v)) for k, v in deployments.items()}
+    assert buses[(1, 5)] != buses[(2, 5)]
+    for sample in (1, 2):
+        # PVs placed at one penetration level stay at the higher levels.
+        for low, high in ((5, 20), (20, 35), (35, 50)):
+            assert buses[(sample, low)] <= buses[(sample, high)]
@@ -0,0 +1,69 @@
+import json
+import time
+
+import pytest
+
+from disco.pydss.log_monitor import PyDssLogMonitor
+
+
+def _make_report(time_point, controller="pv1"):
+    return json.dumps(
+        {"Report": "Convergence", "Controller": controller, "Time": time_point, "Control algorithm": "VVar"}
+    )
+
+
+def test_log_monitor_incremental(tmp_path):
+    log_file = tmp_path / "pydss_project__control_mode__reports.log"
+    monitor = PyDssLogMonitor(tmp_path, config={"max_convergence_errors": 2})
+
+    # The last line is incomplete and must not be processed until it is terminated.
+    with open(log_file, "w") as f_out:
+        f_out.write(_make_report(1) + "\n")
+        f_out.write(json.dumps({"Report": "Capacitor State Changes"}) + "\n")
+        f_out.write(_make_report(1, controller="pv2")[:10])
+    monitor.poll()
+    assert monitor.counters.convergence_errors == 1
+    assert monitor.lines_consumed(log_file) == 2
+    assert not monitor.threshold_exceeded
+
+    with open(log_file, "a") as f_out:
+        f_out.write(_make_report(1, controller="pv2")[10:] + "\n")
+        f_out.write(_make_report(2) + "\n")
+    monitor.poll()
+    counters = monitor.counters.to_dict()
+    assert counters["convergence_errors"] == 3
+    assert counters["convergence_error_time_points"] == 2
+    assert counters["control_mode_events"] == {"VVar": 3}
+    assert counters["top_controllers"] == {"pv1": 2, "pv2": 1}
+    assert monitor.threshold_exceeded
+
+    # Simulate the log being archived: only unconsumed lines get processed.
+    text = log_file.read_text() + _make_report(3) + "\n"
+    log_file.unlink()
+    monitor.process_remaining_text(log_file.name, text)
+    assert monitor.counters.convergence_errors == 4
+
+
+def test_log_monitor_abort(tmp_path):
+    log_file = tmp_path / "pydss_project__control_mode__reports.log"
+    log_file.write_text(_make_report(1) + "\n" + _make_report(2) + "\n")
+    config = {"max_convergence_error_time_points": 1, "action": "abort", "poll_interval_seconds": 0.01}
+
+    monitor = PyDssLogMonitor(tmp_path, config=config)
+    monitor.start()
+    with pytest.raises(KeyboardInterrupt):
+        with monitor.interruptible():
+            for _ in range(500):
+                time.sleep(0.01)
+    monitor.stop()
+    assert monitor.aborted
+
+    # The monitor does not interrupt the main thread after the simulation completed.
+    monitor = PyDssLogMonitor(tmp_path, config=config)
+    with monitor.interruptible():
+        pass
+    monitor.start()
+    time.sleep(0.1)
+    monitor.stop()
+    assert monitor.threshold_exceeded
+    assert not monitor.aborted
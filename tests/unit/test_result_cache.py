@@ -0,0 +1,66 @@
+import shutil
+
+from jade.utils.utils import dump_data, load_data
+
+from disco.extensions.upgrade_simulation.upgrades.result_cache import (
+    RESULT_CACHE_HIT_FILENAME,
+    UpgradeResultCache,
+    compute_result_key,
+    iter_model_files,
+)
+
+
+def _make_model(path):
+    path.mkdir()
+    (path / "Master.dss").write_text(
+        "New Circuit.test\n"
+        "! Redirect Ignored.dss\n"
+        "Redirect Lines.dss\n"
+        "New Loadshape.ls1 npts=2 mult=(file=shape.csv)\n"
+        "New Loadshape.ls2 npts=2 csvfile=shape2.csv\n"
+        "Buscoords Buscoords.dss\n"
+    )
+    (path / "Lines.dss").write_text("New Line.l1 bus1=a bus2=b\n")
+    (path / "shape.csv").write_text("1.0\n0.5\n")
+    (path / "shape2.csv").write_text("1.0,1.0\n0.5,0.5\n")
+    (path / "Buscoords.dss").write_text("a 0 0\nb 1 1\n")
+    return path / "Master.dss"
+
+
+def test_compute_result_key(tmp_path):
+    master_file = _make_model(tmp_path / "model1")
+    names = [x.name for x in iter_model_files(master_file)]
+    assert names == ["Master.dss", "Lines.dss", "shape.csv", "shape2.csv", "Buscoords.dss"]
+
+    params = {"thermal_config": {"line_upper_limit": 1.25}}
+    key = compute_result_key(master_file, [], params)
+    # A copy of the model in another directory has the same key.
+    shutil.copytree(tmp_path / "model1", tmp_path / "model2")
+    assert compute_result_key(tmp_path / "model2" / "Master.dss", [], params) == key
+    (tmp_path / "model2" / "shape.csv").write_text("1.0\n0.6\n")
+    assert compute_result_key(tmp_path / "model2" / "Master.dss", [], params) != key
+    shutil.copytree(tmp_path / "model1", tmp_path / "model3")
+    (tmp_path / "model3" / "shape2.csv").write_text("1.0,1.0\n0.6,0.6\n")
+    assert compute_result_key(tmp_path / "model3" / "Master.dss", [], params) != key
+    assert compute_result_key(master_file, [], {"thermal_config": {"line_upper_limit": 1.3}}) != key
+
+
+def test_result_cache(tmp_path):
+    cache = UpgradeResultCache(tmp_path / "cache")
+    job1 = tmp_path / "job1"
+    (job1 / "UpgradeCosts").mkdir(parents=True)
+    dump_data({"results": {"name": "job1", "total_cost_usd": 10.0, "comment": "job1"}}, job1 / "output.json")
+    dump_data([{"name": "job1", "type": "Line"}], job1 / "UpgradeCosts" / "equipment_upgrade_costs.json")
+    (job1 / "telemetry.json").write_text("{}")
+    assert cache.materialize("key1", tmp_path / "job2", "job2") is None
+    assert cache.store("key1", job1, "job1")
+    assert not cache.store("key1", job1, "job1")
+
+    job2 = tmp_path / "job2"
+    job2.mkdir()
+    assert cache.materialize("key1", job2, "job2")["job_name"] == "job1"
+    # Only the name fields are replaced.
+    assert load_data(job2 / "output.json")["results"] == {"name": "job2", "total_cost_usd": 10.0, "comment": "job1"}
+    assert load_data(job2 / "UpgradeCosts" / "equipment_upgrade_costs.json")[0]["name"] == "job2"
+    assert load_data(job2 / RESULT_CACHE_HIT_FILENAME)["source_job"] == "job1"
+    assert not (job2 / "telemetry.json").exists()
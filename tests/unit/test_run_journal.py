@@ -0,0 +1,97 @@
+import shutil
+
+from jade.utils.utils import dump_data, load_data
+
+from disco.extensions.upgrade_simulation.upgrades.run_journal import JOURNAL_FILENAME, RunJournal
+from disco.extensions.upgrade_simulation.upgrades.upgrade_session import UpgradeSession
+
+
+def test_run_journal(tmp_path):
+    journal_file = tmp_path / "journal.jsonl"
+    output_file = tmp_path / "output.json"
+    stats_file = tmp_path / "stats" / "feeder_stats.json"
+    stats_file.parent.mkdir()
+    session = UpgradeSession(journal_file=journal_file)
+    session.dump_data({"feeder_metadata": {"name": "f1"}, "stage_results": []}, stats_file, indent=2)
+    session.append_output(output_file, "violation_summary", {"stage": "initial"}, indent=2)
+    session.append_output(stats_file, "stage_results", {"stage": "initial"}, indent=2)
+    session.checkpoint()
+    crashed_journal_file = tmp_path / "crashed.jsonl"
+    shutil.copyfile(journal_file, crashed_journal_file)
+    session.append_output(output_file, "violation_summary", {"stage": "final"}, indent=2)
+    session.update_output(output_file, {"results": {"name": "job1"}}, indent=2)
+    assert not output_file.exists()
+
+    # A crashed job recovers the synced operations and skips a partially written one.
+    with open(crashed_journal_file, "a") as f_out:
+        f_out.write('{"document": "output.json", "op"')
+    documents = RunJournal.materialize(crashed_journal_file)
+    assert documents == {
+        "output.json": {"violation_summary": [{"stage": "initial"}]},
+        "stats/feeder_stats.json": {"feeder_metadata": {"name": "f1"}, "stage_results": [{"stage": "initial"}]},
+    }
+
+    session.write_outputs()
+    expected = {"violation_summary": [{"stage": "initial"}, {"stage": "final"}], "results": {"name": "job1"}}
+    assert load_data(output_file) == expected
+    assert RunJournal.materialize(journal_file, documents={"output.json"}) == {"output.json": expected}
+
+
+def test_read_job_output_summary(tmp_path):
+    from disco.cli.upgrade_cost_analysis import _read_job_output_summary
+
+    job_path = tmp_path / "job1"
+    session = UpgradeSession(journal_file=job_path / JOURNAL_FILENAME)
+    session.append_output(job_path / "feeder_stats.json", "stage_results", {"stage": "initial"}, indent=2)
+    session.append_output(job_path / "output.json", "violation_summary", {"stage": "initial"}, indent=2)
+    session.checkpoint()
+    # The job crashed before writing output.json.
+    assert _read_job_output_summary(job_path) == {"violation_summary": [{"stage": "initial"}]}
+
+    # A completed job is read from output.json.
+    dump_data({"results": {"name": "job1"}}, job_path / "output.json")
+    assert _read_job_output_summary(job_path) == {"results": {"name": "job1"}}
+
+
+def test_aggregate_partial_results(tmp_path):
+    from disco.cli.upgrade_cost_analysis import _aggregate_results, _write_job_return_code
+
+    jobs_output_dir = tmp_path / "output" / "job-outputs"
+    record = {
+        "scenario": "pf1",
+        "stage": "initial",
+        "upgrade_type": "thermal",
+        "simulation_time_s": 0.0,
+        "thermal_violations_present": True,
+        "voltage_violations_present": False,
+        "max_bus_voltage": 1.04,
+        "min_bus_voltage": 0.98,
+        "num_voltage_violation_buses": 0,
+        "num_overvoltage_violation_buses": 0,
+        "voltage_upper_limit": 1.05,
+        "num_undervoltage_violation_buses": 0,
+        "voltage_lower_limit": 0.95,
+        "max_line_loading": 1.6,
+        "max_transformer_loading": 0.9,
+        "num_line_violations": 1,
+        "line_upper_limit": 1.5,
+        "num_transformer_violations": 0,
+        "transformer_upper_limit": 1.5,
+    }
+    # job1 was killed after its first stage, job2 failed after its first stage, and job3 failed
+    # without results.
+    for name in ("job1", "job2", "job3"):
+        (jobs_output_dir / name).mkdir(parents=True)
+    session = UpgradeSession(journal_file=jobs_output_dir / "job1" / JOURNAL_FILENAME)
+    session.append_output(jobs_output_dir / "job1" / "output.json", "violation_summary", {"name": "job1", **record})
+    session.checkpoint()
+    dump_data({"violation_summary": [{"name": "job2", **record}]}, jobs_output_dir / "job2" / "output.json")
+    _write_job_return_code(jobs_output_dir, "job2", 1)
+    _write_job_return_code(jobs_output_dir, "job3", 1)
+
+    _aggregate_results(tmp_path / "output", tmp_path / "log.txt", ["job1", "job2", "job3"], "json")
+    summary = load_data(tmp_path / "output" / "upgrade_summary.json")
+    assert [x["name"] for x in summary["violation_summary"]] == ["job1", "job2"]
+    jobs = summary["outputs"]["jobs"]
+    assert [(x["return_code"], x["partial"]) for x in jobs] == [(None, True), (1, True)]
+    assert not (jobs_output_dir / "job2" / "return_code").exists()
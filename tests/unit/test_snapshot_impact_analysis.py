@@ -0,0 +1,127 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from disco.analysis.snapshot_impact_analysis import (
+    SnapshotImpactAnalysis,
+    _check_voltage_violations,
+    _compare_voltages,
+    _get_line_loading,
+    _get_transformer_loading,
+)
+from disco.exceptions import AnalysisRunException
+
+
+# These are the per-element implementations that were replaced by vectorized code.
+
+def _reference_loading(currents_df, normal_amps_df, ub1=1.0, ub2=1.5):
+    loadings = {}
+    count1 = 0
+    count2 = 0
+    for name in currents_df.Name.unique():
+        current_mag = []
+        for _, magnitude in currents_df.query(f"Name == '{name}'").iterrows():
+            current_mag.append(magnitude['Value'] / normal_amps_df.iloc[0][f"{name}__NormalAmps"])
+        loadings[name] = max(current_mag)
+        if max(current_mag) > ub1:
+            count1 += 1
+        if max(current_mag) > ub2:
+            count2 += 1
+    max_loading = max(list(loadings.values()))
+    return loadings, max_loading, max_loading > ub1, count1, max_loading > ub2, count2
+
+
+def _reference_voltage_violations(bus_voltages, ub1=1.05, lb1=0.95, ub2=1.05833, lb2=0.91667):
+    vmax = max(bus_voltages)
+    vmin = min(bus_voltages)
+    uv_count1 = len([v for v in bus_voltages if v < lb1])
+    ov_count1 = len([v for v in bus_voltages if v > ub1])
+    uv_count2 = len([v for v in bus_voltages if v < lb2])
+    ov_count2 = len([v for v in bus_voltages if v > ub2])
+    return vmin, vmax, vmin < lb1, vmax > ub1, uv_count1, ov_count1, vmin < lb2, vmax > ub2, uv_count2, ov_count2
+
+
+def _make_currents(names, rng):
+    rows = []
+    normal_amps = {}
+    for i, name in enumerate(names):
+        normal_amps[f"{name}__NormalAmps"] = 100.0 + 10 * i
+        for phase in "ABC"[:i % 3 + 1]:
+            rows.append({"Name": name, "PhaseTerminal": f"{name}__{phase}1", "Value": rng.uniform(0, 200)})
+    return pd.DataFrame(rows, columns=["Name", "PhaseTerminal", "Value"]), pd.DataFrame([normal_amps])
+
+
+def _assert_same(actual, expected):
+    assert len(actual) == len(expected)
+    for x, y in zip(actual, expected):
+        if isinstance(y, dict):
+            assert list(x) == list(y)
+            assert x == pytest.approx(y)
+        else:
+            assert type(x) == type(y)
+            assert x == pytest.approx(y)
+
+
+def test_line_loading():
+    rng = np.random.default_rng(3)
+    currents, normal_amps = _make_currents([f"Line.l{i}" for i in range(20)], rng)
+    _assert_same(_get_line_loading(currents, normal_amps, "d1"), _reference_loading(currents, normal_amps))
+    _assert_same(
+        _get_line_loading(currents, normal_amps, "d1", ub1=0.5, ub2=1.0),
+        _reference_loading(currents, normal_amps, ub1=0.5, ub2=1.0),
+    )
+    with pytest.raises(AnalysisRunException):
+        _get_line_loading(currents.iloc[:0], normal_amps, "d1")
+
+
+def test_transformer_loading():
+    rng = np.random.default_rng(4)
+    names = [f"Transformer.t{i}" for i in range(10)]
+    currents, normal_amps = _make_currents(names, rng)
+    info = pd.DataFrame({"Name": [x.replace("Transformer.", "") for x in names], "NumWindings": 2})
+    phase_conn = pd.DataFrame({"Transformer": names, "HighSideConnection": "wye", "NumPhases": 3})
+    _assert_same(
+        _get_transformer_loading(info, phase_conn, currents, normal_amps),
+        _reference_loading(currents, normal_amps),
+    )
+    with pytest.raises(AnalysisRunException):
+        _get_transformer_loading(info.iloc[1:], phase_conn, currents, normal_amps)
+
+
+def test_voltage_metrics():
+    rng = np.random.default_rng(5)
+    voltages = pd.Series(rng.uniform(0.9, 1.1, 200))
+    _assert_same(_check_voltage_violations(voltages), _reference_voltage_violations(voltages))
+    _assert_same(_check_voltage_violations(list(voltages)), _reference_voltage_violations(list(voltages)))
+
+    base = pd.Series(rng.uniform(0.95, 1.05, 200))
+    deviation, flag, count = _compare_voltages(base, voltages)
+    magnitude = abs(base - voltages)
+    assert count == len([x for x in magnitude if x > 0.03])
+    assert deviation == np.max(magnitude)
+    assert flag == (deviation > 0.03)
+
+
+class _Scenario:
+
+    def __init__(self, df):
+        self._df = df
+
+    def get_full_dataframe(self, class_name, property_name, **kwargs):
+        return self._df
+
+
+def test_normalize_dataframe_values():
+    columns = ["Line.l1__A1", "Line.l1__B1", "Line.l2__A1"]
+    values = [complex(3, 4), complex(-1, 1), complex(0, -2)]
+    scenario = _Scenario(pd.DataFrame([values], columns=columns))
+    df = SnapshotImpactAnalysis._normalize_dataframe_values(None, scenario, "Lines", "Currents", convert=True)
+    assert df["Name"].tolist() == ["Line.l1", "Line.l1", "Line.l2"]
+    assert df["PhaseTerminal"].tolist() == columns
+    expected = [math.sqrt(x.real**2 + x.imag**2) for x in values]
+    assert df["Value"].tolist() == pytest.approx(expected)
+
+    df = SnapshotImpactAnalysis._normalize_dataframe_values(None, scenario, "Lines", "Currents")
+    assert df["Value"].tolist() == values
@@ -0,0 +1,57 @@
+import pandas as pd
+from jade.utils.utils import dump_data
+
+from disco.pydss.snapshot_time_points import (
+    PYDSS_TIME_POINTS_FILENAME,
+    get_master_file,
+    get_time_point,
+    make_pydss_time_points_data,
+    read_deployment_pv_pmpp,
+    select_time_points,
+)
+
+
+def test_select_time_points():
+    index = pd.date_range("2021-01-01", periods=24, freq="1h")
+    load = pd.Series([10.0] * 24, index=index)
+    load.iloc[18] = 20.0
+    load.iloc[12] = 5.0
+    load.iloc[3] = 4.0
+    pv = pd.Series(0.0, index=index)
+    pv.iloc[10] = 13.0
+    pv.iloc[12] = 7.0
+
+    time_points = select_time_points(load, pv)
+    assert time_points["Max Load"] == index[18]
+    assert time_points["Min Load"] == index[3]
+    assert time_points["Min Daytime Load"] == index[12]
+    assert time_points["Max PV to Load Ratio"] == index[12]
+    assert time_points["Max PV minus Load"] == index[10]
+    assert get_time_point(time_points, "daytime_min_load") == index[12]
+
+    time_points = select_time_points(load)
+    assert "Max PV" not in time_points
+    assert get_time_point(time_points, "max_pv_load_ratio") == index[18]
+
+
+def test_read_deployment(tmp_path):
+    deployment = tmp_path / "PVDeployments" / "deployment.dss"
+    deployment.parent.mkdir()
+    deployment.write_text(
+        "Redirect ../OpenDSS/Master.dss\n\n"
+        "New PVSystem.pv1 bus1=b1.1 Pmpp=2.5 yearly=Shape1\n"
+        "New PVSystem.pv2 bus1=b2.1 pmpp=1.5 yearly=shape1\n"
+        "New PVSystem.pv3 bus1=b3.1 Pmpp=4\n"
+        "New Load.load1 bus1=b3.1 kW=4 yearly=shape1\n"
+    )
+    assert get_master_file(deployment) == (tmp_path / "OpenDSS" / "Master.dss").resolve()
+    assert read_deployment_pv_pmpp(deployment) == {"shape1": 4.0, "": 4.0}
+
+
+def test_pydss_time_points_data(tmp_path):
+    filename = tmp_path / PYDSS_TIME_POINTS_FILENAME
+    time_points = {"Max Load": "2021-01-01 18:00:00", "Max PV to Load Ratio": "2021-01-01 12:00:00"}
+    dump_data(make_pydss_time_points_data(time_points), filename, indent=2)
+    # This is how PyDSS reads the time point of a scenario in get_snapshot_timepoint.
+    timepoints = pd.read_json(filename)
+    assert pd.to_datetime(timepoints["Max PV to Load Ratio"].iloc[0]) == pd.Timestamp("2021-01-01 12:00:00")
@@ -0,0 +1,89 @@
+from jade.utils.timing_utils import Timer
+
+from disco.extensions.upgrade_simulation.upgrades.stage_budget import (
+    STAGE_STATUS_BUDGET_EXHAUSTED,
+    STAGE_STATUS_COMPLETED,
+    StageBudget,
+)
+from disco.utils.telemetry import DiscoTimerStatsCollector
+
+
+def _solve(collector, count):
+    for _ in range(count):
+        with Timer(collector, "circuit_solve_and_check"):
+            pass
+
+
+def test_stage_budget_solves():
+    collector = DiscoTimerStatsCollector()
+    # solves before the stage starts do not count
+    _solve(collector, 5)
+    budget = StageBudget.from_config("thermal", {"max_stage_solves": 3}, collector=collector)
+    _solve(collector, 2)
+    assert not budget.is_exhausted()
+    assert budget.status == STAGE_STATUS_COMPLETED
+    _solve(collector, 1)
+    assert budget.is_exhausted()
+    assert budget.status == STAGE_STATUS_BUDGET_EXHAUSTED
+    assert budget.exhausted_reason == "max_stage_solves=3"
+
+
+def test_stage_budget_time_and_memory():
+    collector = DiscoTimerStatsCollector()
+    assert not StageBudget("voltage", collector=collector).is_exhausted()
+    assert StageBudget("voltage", max_time_s=1e-9, collector=collector).is_exhausted()
+    budget = StageBudget("voltage", max_memory_mb=1e-3, collector=collector)
+    assert budget.is_exhausted()
+    assert budget.exhausted_reason == "max_memory_mb=0.001"
+
+
+def test_voltage_sweeps_stop_when_budget_exhausted(monkeypatch):
+    import pandas as pd
+    from disco.extensions.upgrade_simulation.upgrades import voltage_upgrade_functions
+
+    collector = DiscoTimerStatsCollector()
+    commands = []
+    severities = iter(range(100, 0, -1))
+
+    def solve(raise_exception=False, **kwargs):
+        _solve(collector, 1)
+        return True
+
+    monkeypatch.setattr(voltage_upgrade_functions, "circuit_solve_and_check", solve)
+    monkeypatch.setattr(voltage_upgrade_functions, "check_dss_run_command", commands.append)
+    monkeypatch.setattr(voltage_upgrade_functions, "get_bus_voltages", lambda **kwargs: (None, [], [], []))
+    monkeypatch.setattr(
+        voltage_upgrade_functions,
+        "compute_voltage_violation_severity",
+        lambda **kwargs: {"deciding_field": next(severities)},
+    )
+    voltage_config = {
+        "nominal_voltage": 120,
+        "capacitor_sweep_voltage_gap": 1,
+        "reg_v_delta": 0.5,
+        "reg_control_bands": [1, 2],
+    }
+
+    # The original setting and two sweep settings use the 3 solves of the budget.
+    budget = StageBudget("voltage", max_solves=3, collector=collector)
+    capacitors = pd.DataFrame({"capcontrol_name": ["cap1"]})
+    sweep = voltage_upgrade_functions.sweep_capacitor_settings(
+        voltage_config, capacitors, {"capON": 120, "capOFF": 121}, 1.05, 0.95, budget=budget
+    )
+    assert len(sweep) == 3
+    assert budget.is_exhausted()
+    assert sweep["cap_on_setting"].tolist() == ["original setting", 120, 119.5]
+    assert voltage_upgrade_functions.sweep_capacitor_settings(
+        voltage_config, capacitors, {"capON": 120, "capOFF": 121}, 1.05, 0.95
+    ).shape[0] == 13
+
+    budget = StageBudget("voltage", max_solves=2, collector=collector)
+    regcontrols = pd.DataFrame({"name": ["reg1"], "at_substation_xfmr_flag": [False]})
+    sweep = voltage_upgrade_functions.sweep_regcontrol_settings(
+        voltage_config, regcontrols, 1.05, 0.95, budget=budget
+    )
+    assert sweep["setting"].tolist() == ["original", "114.0_1"]
+    regcontrols_df, settings_commands = voltage_upgrade_functions.choose_best_regcontrol_sweep_setting(
+        sweep, regcontrols, "deciding_field"
+    )
+    assert settings_commands == ["Edit RegControl.reg1 vreg=114.0 band=1.0"]
@@ -0,0 +1,194 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from disco.extensions.upgrade_simulation.upgrades import automated_voltage_upgrades
+from disco.extensions.upgrade_simulation.upgrades.stage_checkpoints import (
+    VOLTAGE_STAGES,
+    StageCheckpoints,
+    compute_input_hash,
+)
+from disco.extensions.upgrade_simulation.upgrades.upgrade_session import UpgradeSession
+from disco.models.upgrade_cost_analysis_generic_input_model import (
+    ThermalUpgradeParamsModel,
+    VoltageUpgradeParamsModel,
+    get_default_thermal_upgrade_params,
+    get_default_voltage_upgrade_params,
+)
+
+MASTER_FILE = Path(__file__).parents[1] / "data" / "upgrade-models" / "123Bus" / "IEEE123Master.dss"
+
+
+def test_stage_checkpoints(tmp_path):
+    master_file = tmp_path / "Master.dss"
+    master_file.write_text("New Circuit.test\n")
+    params = {"thermal_config": {"line_upper_limit": 1.0}}
+    input_hash = compute_input_hash([master_file], params)
+    checkpoints = StageCheckpoints(tmp_path / "checkpoints", input_hash)
+    assert checkpoints.load_last(VOLTAGE_STAGES) == (None, None)
+
+    checkpoints.save("capacitors", {"dss_commands_list": ["Edit CapControl.c1 ONsetting=117.5"]})
+    checkpoints.save("regulator_sweep", {"dss_commands_list": []})
+    assert checkpoints.load("capacitors") == {"dss_commands_list": ["Edit CapControl.c1 ONsetting=117.5"]}
+    assert checkpoints.load_last(VOLTAGE_STAGES) == ("regulator_sweep", {"dss_commands_list": []})
+    assert not list(checkpoints.directory.glob("*.tmp"))
+
+    # Checkpoints of a job with different inputs are ignored.
+    master_file.write_text("New Circuit.test2\n")
+    changed = StageCheckpoints(checkpoints.directory, compute_input_hash([master_file], params))
+    assert changed.load("capacitors") is None
+    assert compute_input_hash([master_file], {"thermal_config": {"line_upper_limit": 1.1}}) != changed._input_hash
+
+    checkpoints.clear()
+    assert not checkpoints.directory.exists()
+
+
+def _run_voltage_stage(tmp_path, checkpoints):
+    params = get_default_voltage_upgrade_params()
+    params.update(initial_upper_limit=1.04, initial_lower_limit=0.96, final_upper_limit=1.04, final_lower_limit=0.96)
+    voltage_config = VoltageUpgradeParamsModel(**params).dict()
+    voltage_config["create_plots"] = False
+    params = get_default_thermal_upgrade_params()
+    params.update(voltage_upper_limit=1.04, voltage_lower_limit=0.96)
+    thermal_config = ThermalUpgradeParamsModel(**params).dict()
+    automated_voltage_upgrades.determine_voltage_upgrades(
+        job_name="job1",
+        master_path=str(MASTER_FILE),
+        enable_pydss_solve=False,
+        pydss_volt_var_model=None,
+        thermal_config=thermal_config,
+        voltage_config=voltage_config,
+        thermal_upgrades_dss_filepath=str(tmp_path / "thermal_upgrades.dss"),
+        voltage_upgrades_dss_filepath=str(tmp_path / "voltage_upgrades.dss"),
+        upgraded_master_dss_filepath=str(tmp_path / "upgraded_master.dss"),
+        output_json_voltage_upgrades_filepath=str(tmp_path / "voltage_upgrades.json"),
+        feeder_stats_json_file=str(tmp_path / "feeder_stats.json"),
+        voltage_upgrades_directory=str(tmp_path / "VoltageUpgrades"),
+        overall_output_summary_filepath=str(tmp_path / "output.json"),
+        dc_ac_ratio=None,
+        session=UpgradeSession(),
+        checkpoints=checkpoints,
+    )
+
+
+def test_resume_voltage_stages(tmp_path, monkeypatch):
+    (tmp_path / "thermal_upgrades.dss").write_text("")
+    checkpoints = StageCheckpoints(tmp_path / "checkpoints", "hash1")
+    calls = []
+
+    def new_regulators(fail):
+        def func(**kwargs):
+            calls.append("new_regulators")
+            if fail:
+                raise RuntimeError("the job was killed")
+            return {
+                "best_setting_so_far": kwargs["best_setting_so_far"],
+                "comparison_dict": kwargs["comparison_dict"],
+                "new_reg_upgrade_commands": ["Edit RegControl.creg3a band=3"],
+            }
+        return func
+
+    def substation_ltc(**kwargs):
+        calls.append("substation_ltc")
+        return {
+            "best_setting_so_far": kwargs["best_setting_so_far"],
+            "comparison_dict": kwargs["comparison_dict"],
+            "subltc_upgrade_commands": ["Edit RegControl.creg2a band=3"],
+        }
+
+    def regulator_sweep(**kwargs):
+        calls.append("regulator_sweep")
+        return None, ["Edit RegControl.creg1a band=3"]
+
+    monkeypatch.setattr(automated_voltage_upgrades, "determine_capacitor_upgrades",
+                        lambda *args, **kwargs: calls.append("capacitors") or [])
+    monkeypatch.setattr(automated_voltage_upgrades, "sweep_and_choose_regcontrol_setting", regulator_sweep)
+    monkeypatch.setattr(automated_voltage_upgrades, "determine_substation_ltc_upgrades", substation_ltc)
+    monkeypatch.setattr(automated_voltage_upgrades, "determine_new_regulator_upgrades", new_regulators(True))
+    with pytest.raises(RuntimeError):
+        _run_voltage_stage(tmp_path, checkpoints)
+    assert calls == ["capacitors", "regulator_sweep", "substation_ltc", "new_regulators"]
+    stage, state = checkpoints.load_last(VOLTAGE_STAGES)
+    assert stage == "substation_ltc"
+    expected_commands = ["Edit RegControl.creg1a band=3", "Edit RegControl.creg2a band=3"]
+    assert state["circuit_commands_list"][1:] == expected_commands
+
+    # The resumed job only runs the last sub-stage, on the circuit restored from the checkpoint.
+    calls.clear()
+    reloaded = []
+    reload_dss_circuit = automated_voltage_upgrades.reload_dss_circuit
+
+    def reload(dss_file_list, commands_list=None, **kwargs):
+        reloaded.append(commands_list)
+        return reload_dss_circuit(dss_file_list, commands_list=commands_list, **kwargs)
+
+    monkeypatch.setattr(automated_voltage_upgrades, "reload_dss_circuit", reload)
+    monkeypatch.setattr(automated_voltage_upgrades, "determine_new_regulator_upgrades", new_regulators(False))
+    _run_voltage_stage(tmp_path, checkpoints)
+    assert calls == ["new_regulators"]
+    assert reloaded[0] == state["circuit_commands_list"]
+    upgrades = [x for x in (tmp_path / "voltage_upgrades.dss").read_text().splitlines() if x.startswith("Edit")]
+    assert upgrades == expected_commands + ["Edit RegControl.creg3a band=3"]
+    assert checkpoints.load_last(VOLTAGE_STAGES)[0] == "new_regulators"
+
+
+def test_resume_thermal_stage(tmp_path, monkeypatch):
+    from disco.extensions.upgrade_simulation import upgrade_simulation as module
+
+    model = SimpleNamespace(name="job1", deployment=SimpleNamespace(deployment_file=str(MASTER_FILE)))
+    simulation = module.UpgradeSimulation(SimpleNamespace(name="job1", model=model), {}, output=tmp_path)
+    job_output = tmp_path / "job1"
+    job_output.mkdir()
+    thermal_json = job_output / "thermal_upgrades.json"
+    calls = []
+
+    def run_thermal_stage(session, *args, **kwargs):
+        calls.append("thermal")
+        Path(simulation.get_thermal_upgrades_dss_file()).write_text("Edit Line.l1 normamps=400")
+        session.dump_data({"line": [{"final_equipment_name": "l1"}]}, str(thermal_json))
+
+    def determine_voltage_upgrades(session, checkpoints, **kwargs):
+        calls.append("voltage")
+        resumed.append(checkpoints.load("capacitors") is not None)
+        assert Path(kwargs["thermal_upgrades_dss_filepath"]).read_text() == "Edit Line.l1 normamps=400"
+        assert session.load_data(str(thermal_json)) == {"line": [{"final_equipment_name": "l1"}]}
+        checkpoints.save("capacitors", {"dss_commands_list": []})
+
+    monkeypatch.setattr(simulation, "_run_thermal_stage", run_thermal_stage)
+    monkeypatch.setattr(module, "determine_voltage_upgrades", determine_voltage_upgrades)
+    monkeypatch.setattr(module, "compute_all_costs", lambda **kwargs: None)
+
+    def run(input_hash):
+        checkpoints = StageCheckpoints(job_output / "checkpoints", input_hash)
+        simulation._run_stages(UpgradeSession(), False, None, None, {}, {}, None, checkpoints=checkpoints)
+        # Simulate a crash: the in-memory outputs and the thermal upgrades file are lost.
+        Path(simulation.get_thermal_upgrades_dss_file()).unlink()
+
+    resumed = []
+    run("hash1")
+    run("hash1")
+    assert calls == ["thermal", "voltage", "voltage"]
+    assert resumed == [False, True]
+
+    # The thermal checkpoint is invalid when the inputs change. All checkpoints are cleared.
+    calls.clear()
+    run("hash2")
+    assert calls == ["thermal", "voltage"]
+    assert resumed == [False, True, False]
+
+
+def test_input_hash_includes_redirected_files(tmp_path):
+    from disco.extensions.upgrade_simulation.upgrade_simulation import UpgradeSimulation
+
+    master_file = tmp_path / "master.dss"
+    master_file.write_text("Redirect lines.dss\n")
+    lines_file = tmp_path / "lines.dss"
+    lines_file.write_text("New Line.l1 bus1=b1 bus2=b2\n")
+    model = SimpleNamespace(name="job1", deployment=SimpleNamespace(deployment_file=str(master_file)))
+    simulation = UpgradeSimulation(SimpleNamespace(name="job1", model=model), {}, output=tmp_path)
+    params = {"dc_ac_ratio": None}
+    input_hash = simulation._compute_input_hash(params, None)
+    assert simulation._compute_input_hash(params, None) == input_hash
+    lines_file.write_text("New Line.l1 bus1=b1 bus2=b3\n")
+    assert simulation._compute_input_hash(params, None) != input_hash
@@ -0,0 +1,80 @@
+import sqlite3
+
+import pandas as pd
+from click.testing import CliRunner
+
+from disco.cli.summarize_hosting_capacity import summarize_hosting_capacity
+
+
+METRIC_COLUMNS = "job_id TEXT, name TEXT, substation TEXT, feeder TEXT, placement TEXT, sample FLOAT, " \
+    "penetration_level FLOAT, scenario TEXT"
+
+
+def _make_database(filename):
+    conn = sqlite3.connect(filename)
+    conn.executescript(
+        f"""
+        CREATE TABLE task (id TEXT, name TEXT);
+        CREATE TABLE job (id TEXT, task_id TEXT, name TEXT);
+        CREATE TABLE metadata ({METRIC_COLUMNS}, load_capacity_kw FLOAT);
+        CREATE TABLE thermal_metrics ({METRIC_COLUMNS},
+            line_max_instantaneous_loading_pct FLOAT, line_max_moving_average_loading_pct FLOAT,
+            line_num_time_points_with_instantaneous_violations INT,
+            line_num_time_points_with_moving_average_violations INT,
+            transformer_max_instantaneous_loading_pct FLOAT, transformer_max_moving_average_loading_pct FLOAT,
+            transformer_num_time_points_with_instantaneous_violations INT,
+            transformer_num_time_points_with_moving_average_violations INT,
+            transformer_instantaneous_threshold FLOAT);
+        CREATE TABLE voltage_metrics ({METRIC_COLUMNS}, node_type TEXT, num_nodes_any_outside_ansi_b INT,
+            num_time_points_with_ansi_b_violations INT, min_voltage FLOAT, max_voltage FLOAT);
+        INSERT INTO task VALUES ('t1', 'Snapshot');
+        """
+    )
+    # f1 fails in the base case. Sample 1 of f0 fails at 15%.
+    jobs = [("f0", None, None, 100.0, 1.0)]
+    jobs += [("f0", 1, level, 100.0, 1.06 if level == 15 else 1.0) for level in (5, 10, 15)]
+    jobs += [("f0", 2, level, 100.0, 1.0) for level in (5, 10, 15)]
+    jobs += [("f1", None, None, 200.0, 1.0)]
+    for i, (feeder, sample, level, loading, max_voltage) in enumerate(jobs):
+        name = f"{feeder}__{sample}__{level}"
+        conn.execute("INSERT INTO job VALUES (?, 't1', ?)", (i, name))
+        for scenario in ("pf1", "control_mode"):
+            key = (i, name, "sub", feeder, "random", sample, level, scenario)
+            conn.execute("INSERT INTO metadata VALUES (?, ?, ?, ?, ?, ?, ?, ?, 100.0)", key)
+            conn.execute(
+                "INSERT INTO thermal_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 50, 0, 0, 50, 50, 0, 0, NULL)",
+                key + (loading,),
+            )
+            conn.execute("INSERT INTO voltage_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'primaries', 0, 0, 0.98, ?)",
+                         key + (max_voltage,))
+            # Only checked with --secondaries
+            conn.execute("INSERT INTO voltage_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'secondaries', 0, 0, 0.9, 1.0)",
+                         key)
+    conn.commit()
+    conn.close()
+
+
+def test_summarize_hosting_capacity(tmp_path):
+    database = tmp_path / "results.sqlite"
+    _make_database(database)
+    output = tmp_path / "hc_reports"
+    cmd = ["-d", str(database), "-s", "pf1", "-s", "control_mode", "-T", "Snapshot", "-o", str(output)]
+    result = CliRunner().invoke(summarize_hosting_capacity, cmd)
+    assert result.exit_code == 0, result.output
+
+    for scenario in ("pf1", "control_mode"):
+        path = output / scenario
+        assert pd.read_csv(path / "feeders_fail_base_case.csv")["feeder"].tolist() == ["f1"]
+        by_sample = pd.read_csv(path / "hc_by_sample.csv").dropna(subset=["sample"])
+        assert by_sample.set_index("sample")["max_passing_penetration_level"].to_dict() == {1: 10, 2: 15}
+        assert by_sample.set_index("sample")["max_hc_kw"].to_dict() == {1: 10, 2: 15}
+        summary = pd.read_csv(path / "hc_summary.csv")
+        assert summary["feeder"].tolist() == ["f0"]
+        assert summary.loc[0, "max_hc"] == 15
+        assert summary.loc[0, "min_hc"] == 0
+
+    # The secondary nodes are below min_voltage in every job.
+    cmd = ["-d", str(database), "-s", "pf1", "-T", "Snapshot", "-o", str(output), "--force", "--secondaries"]
+    result = CliRunner().invoke(summarize_hosting_capacity, cmd)
+    assert result.exit_code == 0, result.output
+    assert pd.read_csv(output / "feeders_fail_base_case.csv")["feeder"].tolist() == ["f0", "f1"]
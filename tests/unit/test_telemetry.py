@@ -0,0 +1,62 @@
+import subprocess
+import sys
+
+import pytest
+from jade.common import JOBS_OUTPUT_DIR
+from jade.utils.timing_utils import Timer
+from jade.utils.utils import dump_data, load_data
+
+from disco.utils.telemetry import (
+    TELEMETRY_FILENAME,
+    DiscoTimerStatsCollector,
+    JobTelemetry,
+    make_telemetry_tables,
+)
+
+
+def test_job_telemetry(tmp_path):
+    collector = DiscoTimerStatsCollector()
+    filename = tmp_path / "job1" / TELEMETRY_FILENAME
+    with pytest.raises(ValueError):
+        with JobTelemetry("job1", "upgrade", filename, collector):
+            for _ in range(3):
+                with Timer(collector, "circuit_solve_and_check"):
+                    pass
+            raise ValueError("job failed")
+
+    data = load_data(filename)
+    assert data["name"] == "job1"
+    assert data["failed"]
+    assert data["solve_count"] == 3
+    assert data["circuit_reload_count"] == 0
+    assert data["functions"]["circuit_solve_and_check"]["count"] == 3
+
+
+def test_make_telemetry_tables(tmp_path):
+    durations = [10.0, 11.0, 12.0, 13.0, 100.0]
+    for i, duration in enumerate(durations):
+        data = {
+            "name": f"job{i}",
+            "job_type": "upgrade",
+            "failed": False,
+            "start_time": 0.0,
+            "duration_s": duration,
+            "peak_rss_mb": 100.0,
+            "solve_count": 10,
+            "circuit_reload_count": 2,
+            "functions": {"reload_dss_circuit": {"count": 2, "total": 1.0, "max": 0.6, "min": 0.4, "avg": 0.5}},
+        }
+        job_path = tmp_path / JOBS_OUTPUT_DIR / f"job{i}"
+        job_path.mkdir(parents=True)
+        dump_data(data, job_path / TELEMETRY_FILENAME)
+
+    jobs, functions = make_telemetry_tables(tmp_path, [f"job{i}" for i in range(6)])
+    assert jobs.set_index("name").loc["job4", "outlier_metrics"] == "duration_s"
+    assert jobs["is_outlier"].sum() == 1
+    assert functions.to_dict(orient="records")[0]["count"] == 10
+    assert (tmp_path / "telemetry_jobs_table.csv").exists()
+
+
+def test_import_disco_does_not_import_pandas():
+    code = "import sys, disco; assert 'pandas' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
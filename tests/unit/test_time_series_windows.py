@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+
+from disco.pydss.time_series_windows import select_simulation_window
+
+
+def test_select_simulation_window():
+    index = pd.date_range("2021-01-01", periods=96 * 7, freq="15min")
+    hours = index.hour + index.minute / 60
+    load = pd.Series(0.5 + 0.4 * np.exp(-(((hours - 18) / 2) ** 2)), index=index)
+    pv = pd.Series(np.clip(np.sin((hours - 6) / 12 * np.pi), 0, None), index=index)
+
+    window = select_simulation_window(load, pv, margin_minutes=60)
+    assert window["start"] == "10:30:00"
+    assert window["end"] == "20:15:00"
+    assert 0 < window["excluded_pct"] < 100
+    assert window["excluded_max_load_pct_of_peak"] < 100
+
+    assert select_simulation_window(load, pv, margin_minutes=24 * 60) is None
@@ -0,0 +1,33 @@
+import pytest
+
+from disco.exceptions import OpenDssConvergenceError
+from disco.extensions.upgrade_simulation.upgrades import common_functions
+
+
+def test_solve_upgrade_commands_batch(monkeypatch):
+    commands = [
+        "New Linecode.lc1 nphases=3",
+        "Edit Line.line1 linecode=lc1",
+        "New Line.line2_upgrade bus1=b1 bus2=b2",
+        "Edit Line.line3 normamps=400",
+    ]
+    circuit = []
+    calcvoltagebases = []
+
+    def solve(**kwargs):
+        calcvoltagebases.append(kwargs["calcvoltagebases"])
+        return commands[2] not in circuit
+
+    monkeypatch.setattr(common_functions, "circuit_solve_and_check", solve)
+    monkeypatch.setattr(common_functions, "dss_run_command_list", circuit.extend)
+
+    common_functions.solve_upgrade_commands_batch(commands[:2])
+    assert calcvoltagebases == [False]
+
+    circuit.extend(commands)
+    with pytest.raises(OpenDssConvergenceError, match="line2_upgrade"):
+        common_functions.solve_upgrade_commands_batch(commands, restore_circuit=circuit.clear)
+    assert calcvoltagebases[1] is True
+
+    with pytest.raises(OpenDssConvergenceError, match="batch of 4"):
+        common_functions.solve_upgrade_commands_batch(commands)
@@ -0,0 +1,62 @@
+from pathlib import Path
+
+from jade.utils.utils import load_data
+
+from disco.extensions.upgrade_simulation.upgrades import upgrade_session
+from disco.extensions.upgrade_simulation.upgrades.upgrade_session import UpgradeSession
+
+
+def test_upgrade_session_outputs(tmp_path):
+    filename = tmp_path / "feeder_stats.json"
+    session = UpgradeSession()
+    assert not session.has_output(filename)
+    session.dump_data({"stage_results": []}, filename, indent=2)
+    assert session.has_output(filename)
+    assert not filename.exists()
+    session.load_data(filename)["stage_results"].append({"stage": "final"})
+    session.write_outputs()
+    assert load_data(filename) == {"stage_results": [{"stage": "final"}]}
+
+    session = UpgradeSession(in_memory=False)
+    session.dump_data({"a": 1}, filename)
+    assert load_data(filename) == {"a": 1}
+
+
+def test_upgrade_session_external_catalog():
+    catalog_file = Path("tests") / "data" / "uo_technical_catalog.json"
+    catalog, line_options, xfmr_options = UpgradeSession.load_external_catalog(catalog_file)
+    catalog2, line_options2, _ = UpgradeSession.load_external_catalog(catalog_file)
+    assert catalog2 is catalog
+    assert line_options2 is not line_options
+    assert line_options2.equals(line_options)
+    assert not xfmr_options.empty
+
+
+def test_upgrade_session_circuit_hand_over(monkeypatch):
+    master_file = str(Path(__file__).parents[1] / "data" / "upgrade-models" / "123Bus" / "IEEE123Master.dss")
+    compiled = []
+    reload_dss_circuit = upgrade_session.reload_dss_circuit
+
+    def record_compilation(dss_file_list, **kwargs):
+        compiled.append(dss_file_list)
+        return reload_dss_circuit(dss_file_list, **kwargs)
+
+    monkeypatch.setattr(upgrade_session, "reload_dss_circuit", record_compilation)
+    session = UpgradeSession()
+    params = {"enable_pydss_solve": False, "dc_ac_ratio": None}
+    session.load_circuit([master_file], **params)
+    session.hand_over_circuit([master_file], **params)
+    assert session.load_circuit([master_file], max_control_iterations=50, **params)["max_control_iterations"] == 50
+    assert len(compiled) == 1
+    # The circuit is only handed over once.
+    session.load_circuit([master_file], **params)
+    assert len(compiled) == 2
+
+    session.hand_over_circuit([master_file], **params)
+    session.load_circuit([master_file], enable_pydss_solve=False, dc_ac_ratio=1.2)
+    assert len(compiled) == 3
+
+    session = UpgradeSession(in_memory=False)
+    session.hand_over_circuit([master_file], **params)
+    session.load_circuit([master_file], **params)
+    assert len(compiled) == 4
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+from jade.utils.utils import dump_data
+
+from disco.extensions.upgrade_simulation.upgrade_configuration import (
+    make_warm_start_jobs,
+    order_warm_start_jobs,
+)
+from disco.extensions.upgrade_simulation.upgrades.warm_start import WarmStartSeed
+
+
+def _make_deployment(placement, sample, penetration_level):
+    return SimpleNamespace(
+        substation="sb1",
+        feeder="f1",
+        project_data={"placement": placement, "sample": sample, "penetration_level": penetration_level},
+    )
+
+
+def test_make_warm_start_jobs():
+    jobs = [
+        ("random__1__15", _make_deployment("random", 1, 15)),
+        ("random__1__5", _make_deployment("random", 1, 5)),
+        ("random__1__10", _make_deployment("random", 1, 10)),
+        ("random__2__10", _make_deployment("random", 2, 10)),
+        ("close__1__15", _make_deployment("close", 1, 15)),
+        ("base", SimpleNamespace(substation="sb1", feeder="f1", project_data={})),
+    ]
+    warm_start_jobs = make_warm_start_jobs(jobs)
+    assert warm_start_jobs == {"random__1__10": "random__1__5", "random__1__15": "random__1__10"}
+    names = [x[0] for x in jobs]
+    assert order_warm_start_jobs(names, warm_start_jobs) == [
+        "random__1__5", "random__1__10", "random__1__15", "random__2__10", "close__1__15", "base",
+    ]
+    # Seeds that are not selected are expected to have run already.
+    assert order_warm_start_jobs(["random__1__15"], warm_start_jobs) == ["random__1__15"]
+
+
+def test_warm_start_seed(tmp_path):
+    (tmp_path / "thermal_upgrades.dss").write_text(
+        "Edit Line.l1 normamps=400\n\nNew Line.l1_upgrade bus1=b1 bus2=b2\n\nCalcVoltageBases\n\nSolve"
+    )
+    (tmp_path / "voltage_upgrades.dss").write_text(
+        "//This file has all the voltage upgrades\n\n\nEdit CapControl.c1 ONsetting=119\n\n"
+        "Set MaxControlIter=50\n\nSolve"
+    )
+    dump_data({"line": [{"final_equipment_name": "l1"}], "transformer": []}, tmp_path / "thermal.json")
+    dump_data({"voltage": [{"name": "c1", "final_settings": {"ONsetting": 119}}]}, tmp_path / "voltage.json")
+    kwargs = {
+        "thermal_upgrades_dss_file": tmp_path / "thermal_upgrades.dss",
+        "voltage_upgrades_dss_file": tmp_path / "voltage_upgrades.dss",
+        "thermal_upgrades_json_file": tmp_path / "thermal.json",
+        "voltage_upgrades_json_file": tmp_path / "voltage.json",
+        "overall_output_summary_file": tmp_path / "output.json",
+    }
+    dump_data({"violation_summary": []}, tmp_path / "output.json")
+    assert WarmStartSeed.load("job1", **kwargs) is None
+
+    dump_data({"results": [], "violation_summary": []}, tmp_path / "output.json")
+    seed = WarmStartSeed.load("job1", **kwargs)
+    assert seed.thermal_commands == ["Edit Line.l1 normamps=400", "New Line.l1_upgrade bus1=b1 bus2=b2"]
+    assert seed.voltage_commands == ["Edit CapControl.c1 ONsetting=119"]
+    assert seed.get_thermal_upgrades("line") == [{"final_equipment_name": "l1", "inherited": True}]
+    assert seed.get_thermal_upgrades("transformer") == []
+
+
+def test_load_warm_start_seed(tmp_path):
+    from disco.extensions.upgrade_simulation.upgrade_simulation import UpgradeSimulation
+
+    simulation = UpgradeSimulation(SimpleNamespace(model=SimpleNamespace(name="job2")), {}, output=tmp_path)
+    assert simulation.load_warm_start_seed("job1") is None
+    assert not (tmp_path / "job1").exists()
+
+    seed_output = tmp_path / "job1"
+    (seed_output / "ThermalUpgrades").mkdir(parents=True)
+    (seed_output / "VoltageUpgrades").mkdir()
+    (seed_output / "thermal_upgrades.dss").write_text("Edit Line.l1 normamps=400")
+    (seed_output / "voltage_upgrades.dss").write_text("Edit CapControl.c1 ONsetting=119")
+    dump_data({"line": [], "transformer": []}, seed_output / "ThermalUpgrades" / "thermal_upgrades.json")
+    dump_data({"voltage": []}, seed_output / "VoltageUpgrades" / "voltage_upgrades.json")
+    dump_data({"results": []}, seed_output / "output.json")
+    seed = simulation.load_warm_start_seed("job1")
+    assert seed.thermal_commands == ["Edit Line.l1 normamps=400"]
+    assert seed.voltage_commands == ["Edit CapControl.c1 ONsetting=119"]